@@ -122,7 +122,7 @@ def run(input_file: KGTKFiles,
                                          very_verbose=very_verbose)
 
         # Process the input file, building IDs.
-        idb.process(kr, ew)
+        idb.process(kr, ew, error_file=error_file)
 
         # Clean up.
         ew.close()
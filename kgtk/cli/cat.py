@@ -28,6 +28,7 @@ def add_arguments_extended(parser: KGTKArgumentParser, parsed_shared_args: Names
     """
     from kgtk.io.kgtkreader import KgtkReader, KgtkReaderOptions
     from kgtk.io.kgtkwriter import KgtkWriter
+    from kgtk.utils.argparsehelpers import optional_bool
     from kgtk.value.kgtkvalueoptions import KgtkValueOptions
 
     _expert: bool = parsed_shared_args._expert
@@ -64,6 +65,11 @@ def add_arguments_extended(parser: KGTKArgumentParser, parsed_shared_args: Names
                               help=h("The list of new column names for selective renaming."),
                               type=str, nargs='+')
 
+    parser.add_argument(      "--fast-copy", dest="fast_copy", metavar="True|False",
+                              help="When True, copy the data lines of uncompressed KGTK input files whose columns match the " +
+                              "output columns without parsing, validating, or filtering them. (default=%(default)s).",
+                              type=optional_bool, nargs='?', const=True, default=False)
+
     KgtkReader.add_debug_arguments(parser, expert=_expert)
     KgtkReaderOptions.add_arguments(parser, mode_options=True, expert=_expert)
     KgtkValueOptions.add_arguments(parser, expert=_expert)
@@ -76,6 +82,8 @@ def run(input_files: KGTKFiles,
         old_column_names: typing.Optional[typing.List[str]],
         new_column_names: typing.Optional[typing.List[str]],
 
+        fast_copy: bool = False,
+
         errors_to_stdout: bool = False,
         errors_to_stderr: bool = True,
         show_options: bool = False,
@@ -118,6 +126,7 @@ def run(input_files: KGTKFiles,
             print("--old-columns %s" % " ".join(old_column_names), file=error_file, flush=True)
         if new_column_names is not None:
             print("--new-columns %s" % " ".join(new_column_names), file=error_file, flush=True)
+        print("--fast-copy=%s" % str(fast_copy), file=error_file, flush=True)
         reader_options.show(out=error_file)
         value_options.show(out=error_file)
         print("=======", file=error_file, flush=True)
@@ -142,6 +151,7 @@ def run(input_files: KGTKFiles,
                               output_column_names=output_column_names,
                               old_column_names=old_column_names,
                               new_column_names=new_column_names,
+                              fast_copy=fast_copy,
                               reader_options=reader_options,
                               value_options=value_options,
                               error_file=error_file,
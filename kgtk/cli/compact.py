@@ -31,6 +31,8 @@ def add_arguments_extended(parser: KGTKArgumentParser, parsed_shared_args: Names
     Args:
         parser (argparse.ArgumentParser)
     """
+    from pathlib import Path
+
     from kgtk.io.kgtkreader import KgtkReader, KgtkReaderOptions
     from kgtk.reshape.kgtkidbuilder import KgtkIdBuilder, KgtkIdBuilderOptions
     from kgtk.utils.argparsehelpers import optional_bool
@@ -72,6 +74,23 @@ def add_arguments_extended(parser: KGTKArgumentParser, parsed_shared_args: Names
                               help="Assume that the input file may contain lists (disable when certain it does not). (default=%(default)s).",
                               type=optional_bool, nargs='?', const=True, default=True)
 
+    parser.add_argument(      "--max-rows-in-memory", dest="max_rows_in_memory",
+                              help="When the input is not presorted, spill the input rows to temporary files, " +
+                              "hash-partitioned by key, once more than this many rows are held in memory. " +
+                              "(default=no limit).", type=int, default=None, metavar="N")
+
+    parser.add_argument(      "--spill-partitions", dest="spill_partitions",
+                              help=h("The number of hash partitions used when the input rows are spilled. (default=%(default)s)."),
+                              type=int, default=64, metavar="N")
+
+    parser.add_argument(      "--procs", dest="procs",
+                              help="The number of worker processes that compact spilled partitions. (default=%(default)s).",
+                              type=int, default=1, metavar="N")
+
+    parser.add_argument(      "--temp-directory", dest="temp_directory",
+                              help=h("The directory for the spilled partitions. (default=the system temporary directory)."),
+                              type=Path, default=None)
+
     parser.add_argument(      "--build-id", dest="build_id",
                               help="Build id values in an id column. (default=%(default)s).",
                               type=optional_bool, nargs='?', const=True, default=False, metavar="True|False")
@@ -89,6 +108,10 @@ def run(input_file: KGTKFiles,
         verify_sort: bool,
         lists_in_input: bool,
         build_id: bool,
+        max_rows_in_memory: typing.Optional[int] = None,
+        spill_partitions: int = 64,
+        procs: int = 1,
+        temp_directory: typing.Optional[str] = None,
 
         errors_to_stdout: bool = False,
         errors_to_stderr: bool = True,
@@ -130,6 +153,12 @@ def run(input_file: KGTKFiles,
         print("--verify-sort=%s" % str(verify_sort), file=error_file, flush=True)
         print("--lists-in-input=%s" % str(lists_in_input), file=error_file, flush=True)
         print("--build-id=%s" % str(build_id), file=error_file, flush=True)
+        if max_rows_in_memory is not None:
+            print("--max-rows-in-memory=%d" % max_rows_in_memory, file=error_file, flush=True)
+        print("--spill-partitions=%d" % spill_partitions, file=error_file, flush=True)
+        print("--procs=%d" % procs, file=error_file, flush=True)
+        if temp_directory is not None:
+            print("--temp-directory=%s" % str(temp_directory), file=error_file, flush=True)
         idbuilder_options.show(out=error_file)
         reader_options.show(out=error_file)
         value_options.show(out=error_file)
@@ -152,6 +181,10 @@ def run(input_file: KGTKFiles,
             output_file_path=output_kgtk_file,
             build_id=build_id,
             idbuilder_options=idbuilder_options,
+            max_rows_in_memory=max_rows_in_memory,
+            spill_partitions=spill_partitions,
+            procs=procs,
+            temp_directory=Path(temp_directory) if temp_directory is not None else None,
             reader_options=reader_options,
             value_options=value_options,
             error_file=error_file,
@@ -0,0 +1,315 @@
+"""
+Find the nearest neighbors of nodes in a KGTK embedding file.
+
+TODO: Need KgtkWriterOptions
+"""
+
+from argparse import Namespace, SUPPRESS
+import typing
+
+from kgtk.cli_argparse import KGTKArgumentParser, KGTKFiles
+
+def parser():
+    return {
+        'help': 'Find the nearest neighbors of nodes in an embedding file.',
+        'description': 'Build an exact or approximate (IVF/PQ) nearest-neighbor index over a KGTK embedding file, ' +
+        'such as the output of text-embedding or graph-embeddings, and write the top-k most similar nodes ' +
+        'for each query node as KGTK edges with scores.' +
+        '\n\nAdditional options are shown in expert help.\nkgtk --expert embedding-search --help'
+    }
+
+
+def add_arguments_extended(parser: KGTKArgumentParser, parsed_shared_args: Namespace):
+    """
+    Parse arguments
+    Args:
+        parser (argparse.ArgumentParser)
+    """
+    from kgtk.gt.embedding_search_utils import EMBEDDING_FORMAT_CHOICES, EMBEDDING_FORMAT_KGTK, \
+        INDEX_CHOICES, INDEX_EXACT, METRIC_CHOICES, METRIC_COSINE
+    from kgtk.io.kgtkreader import KgtkReader, KgtkReaderOptions
+    from kgtk.io.kgtkwriter import KgtkWriter
+    from kgtk.utils.argparsehelpers import optional_bool
+    from kgtk.value.kgtkvalueoptions import KgtkValueOptions
+
+    _expert: bool = parsed_shared_args._expert
+
+    # This helper function makes it easy to suppress options from
+    # The help message.  The options are still there, and initialize
+    # what they need to initialize.
+    def h(msg: str)->str:
+        if _expert:
+            return msg
+        else:
+            return SUPPRESS
+
+    parser.add_input_file(who="The KGTK embedding file.")
+    parser.add_input_file(who="A KGTK file with the query nodes (default: query every node in the embedding file).",
+                          dest="query_file",
+                          options=["--query-file"],
+                          metavar="QUERY_FILE",
+                          optional=True)
+    parser.add_output_file()
+
+    parser.add_argument(      "--output-format", dest="output_format", help="The file format (default=kgtk)", type=str,
+                              choices=KgtkWriter.OUTPUT_FORMAT_CHOICES)
+
+    parser.add_argument(      "--nodes", dest="query_nodes", nargs="+",
+                              help="The nodes to query (default: query every node in the embedding file).")
+
+    parser.add_argument(      "--query-column", dest="query_column_name",
+                              help="The query file column with the query nodes (default=node1 or id).")
+
+    parser.add_argument("-k", "--top-k", dest="top_k", type=int, default=10,
+                              help="The number of neighbors to find for each query node (default=%(default)s).")
+
+    parser.add_argument(      "--metric", dest="metric", choices=METRIC_CHOICES, default=METRIC_COSINE,
+                              help="The similarity metric. For l2, the score is the negated distance (default=%(default)s).")
+
+    parser.add_argument(      "--index", dest="index_type", choices=INDEX_CHOICES, default=INDEX_EXACT,
+                              help="The index type: exact blocked search or approximate IVF/PQ (default=%(default)s).")
+
+    parser.add_argument(      "--label", dest="label_value", default="similar_to",
+                              help="The label for the output edges (default=%(default)s).")
+
+    parser.add_argument(      "--include-self", dest="include_self", metavar="True|False",
+                              help="When True, a query node may be returned as its own neighbor (default=%(default)s).",
+                              type=optional_bool, nargs='?', const=True, default=False)
+
+    parser.add_argument(      "--embedding-format", dest="embedding_format", choices=EMBEDDING_FORMAT_CHOICES,
+                              default=EMBEDDING_FORMAT_KGTK,
+                              help=h("The embedding file format (default=%(default)s)."))
+
+    parser.add_argument(      "--node-column", dest="node_column_name",
+                              help=h("The embedding file column with the node ids (default=node1, id, or the first column)."))
+
+    parser.add_argument(      "--vector-column", dest="vector_column_name",
+                              help=h("The embedding file column with the vectors (default=node2 or the last column)."))
+
+    parser.add_argument(      "--embedding-label", dest="embedding_label",
+                              help=h("Only read embedding rows with this label, e.g. text_embedding (default: read all rows)."))
+
+    parser.add_argument(      "--vector-separator", dest="vector_separator", default=",",
+                              help=h("The separator between vector elements (default=%(default)s)."))
+
+    parser.add_argument(      "--batch-size", dest="batch_size", type=int, default=1024,
+                              help=h("The number of query nodes to search at once (default=%(default)s)."))
+
+    parser.add_argument(      "--block-size", dest="block_size", type=int, default=65536,
+                              help=h("The number of indexed vectors to score per matrix multiply (default=%(default)s)."))
+
+    parser.add_argument(      "--nlist", dest="nlist", type=int, default=None,
+                              help=h("IVF/PQ: the number of coarse cells (default=sqrt of the node count)."))
+
+    parser.add_argument(      "--nprobe", dest="nprobe", type=int, default=8,
+                              help=h("IVF/PQ: the number of cells to visit per query (default=%(default)s)."))
+
+    parser.add_argument(      "--subquantizers", dest="subquantizers", type=int, default=8,
+                              help=h("IVF/PQ: the number of product quantizer slices; must divide the dimension (default=%(default)s)."))
+
+    parser.add_argument(      "--nbits", dest="nbits", type=int, default=8,
+                              help=h("IVF/PQ: the bits per code, at most 8 (default=%(default)s)."))
+
+    parser.add_argument(      "--train-size", dest="train_size", type=int, default=100000,
+                              help=h("IVF/PQ: the number of vectors sampled for training (default=%(default)s)."))
+
+    parser.add_argument(      "--rerank", dest="rerank", metavar="True|False",
+                              help=h("IVF/PQ: rescore the best candidates exactly (default=%(default)s)."),
+                              type=optional_bool, nargs='?', const=True, default=True)
+
+    parser.add_argument(      "--save-index", dest="save_index_path", type=str, default=None,
+                              help=h("Save the index to this file for later runs. A saved index cannot be extended; " +
+                                     "rebuild it when the embeddings change (default=None)."))
+
+    parser.add_argument(      "--load-index", dest="load_index_path", type=str, default=None,
+                              help=h("Load a saved index instead of reading the embedding file (default=None)."))
+
+    KgtkReader.add_debug_arguments(parser, expert=_expert)
+    KgtkReaderOptions.add_arguments(parser, mode_options=False, expert=_expert)
+    KgtkValueOptions.add_arguments(parser, expert=_expert)
+
+def run(input_file: KGTKFiles,
+        query_file: KGTKFiles,
+        output_file: KGTKFiles,
+        output_format: typing.Optional[str] = None,
+
+        query_nodes: typing.Optional[typing.List[str]] = None,
+        query_column_name: typing.Optional[str] = None,
+        top_k: int = 10,
+        metric: str = "cosine",
+        index_type: str = "exact",
+        label_value: str = "similar_to",
+        include_self: bool = False,
+
+        embedding_format: str = "kgtk",
+        node_column_name: typing.Optional[str] = None,
+        vector_column_name: typing.Optional[str] = None,
+        embedding_label: typing.Optional[str] = None,
+        vector_separator: str = ",",
+        batch_size: int = 1024,
+        block_size: int = 65536,
+
+        nlist: typing.Optional[int] = None,
+        nprobe: int = 8,
+        subquantizers: int = 8,
+        nbits: int = 8,
+        train_size: int = 100000,
+        rerank: bool = True,
+
+        save_index_path: typing.Optional[str] = None,
+        load_index_path: typing.Optional[str] = None,
+
+        errors_to_stdout: bool = False,
+        errors_to_stderr: bool = True,
+        show_options: bool = False,
+        verbose: bool = False,
+        very_verbose: bool = False,
+
+        **kwargs # Whatever KgtkFileOptions and KgtkValueOptions want.
+)->int:
+    # import modules locally
+    from pathlib import Path
+    import sys
+
+    from kgtk.exceptions import KGTKException
+    from kgtk.gt.embedding_search_utils import EmbeddingSearch, ExactIndex, IVFPQIndex, INDEX_IVFPQ, \
+        load_embeddings, load_index, save_index
+    from kgtk.io.kgtkreader import KgtkReader, KgtkReaderOptions
+    from kgtk.value.kgtkvalueoptions import KgtkValueOptions
+
+    input_kgtk_file: Path = KGTKArgumentParser.get_input_file(input_file)
+    query_kgtk_file: typing.Optional[Path] = KGTKArgumentParser.get_optional_input_file(query_file, who="Query file")
+    output_kgtk_file: Path = KGTKArgumentParser.get_output_file(output_file)
+
+    # Select where to send error messages, defaulting to stderr.
+    error_file: typing.TextIO = sys.stdout if errors_to_stdout else sys.stderr
+
+    # Build the option structures.
+    reader_options: KgtkReaderOptions = KgtkReaderOptions.from_dict(kwargs)
+    value_options: KgtkValueOptions = KgtkValueOptions.from_dict(kwargs)
+
+    # Show the final option structures for debugging and documentation.
+    if show_options:
+        print("--input-file=%s" % str(input_kgtk_file), file=error_file)
+        if query_kgtk_file is not None:
+            print("--query-file=%s" % str(query_kgtk_file), file=error_file)
+        print("--output-file=%s" % str(output_kgtk_file), file=error_file)
+        if output_format is not None:
+            print("--output-format=%s" % output_format, file=error_file)
+        if query_nodes is not None:
+            print("--nodes %s" % " ".join(query_nodes), file=error_file)
+        if query_column_name is not None:
+            print("--query-column=%s" % query_column_name, file=error_file)
+        print("--top-k=%d" % top_k, file=error_file)
+        print("--metric=%s" % metric, file=error_file)
+        print("--index=%s" % index_type, file=error_file)
+        print("--label=%s" % label_value, file=error_file)
+        print("--include-self=%s" % str(include_self), file=error_file)
+        print("--embedding-format=%s" % embedding_format, file=error_file)
+        if node_column_name is not None:
+            print("--node-column=%s" % node_column_name, file=error_file)
+        if vector_column_name is not None:
+            print("--vector-column=%s" % vector_column_name, file=error_file)
+        if embedding_label is not None:
+            print("--embedding-label=%s" % embedding_label, file=error_file)
+        print("--vector-separator=%s" % repr(vector_separator), file=error_file)
+        print("--batch-size=%d" % batch_size, file=error_file)
+        print("--block-size=%d" % block_size, file=error_file)
+        if nlist is not None:
+            print("--nlist=%d" % nlist, file=error_file)
+        print("--nprobe=%d" % nprobe, file=error_file)
+        print("--subquantizers=%d" % subquantizers, file=error_file)
+        print("--nbits=%d" % nbits, file=error_file)
+        print("--train-size=%d" % train_size, file=error_file)
+        print("--rerank=%s" % str(rerank), file=error_file)
+        if save_index_path is not None:
+            print("--save-index=%s" % save_index_path, file=error_file)
+        if load_index_path is not None:
+            print("--load-index=%s" % load_index_path, file=error_file)
+        reader_options.show(out=error_file)
+        value_options.show(out=error_file)
+        print("=======", file=error_file, flush=True)
+
+    if top_k < 1:
+        raise KGTKException("--top-k must be at least 1.")
+
+    try:
+        node_ids: typing.List[str]
+        index: ExactIndex
+        if load_index_path is not None:
+            if verbose:
+                print("Loading the index from %s" % load_index_path, file=error_file, flush=True)
+            (node_ids, index) = load_index(Path(load_index_path), block_size=block_size)
+
+        else:
+            (node_ids, vectors) = load_embeddings(input_kgtk_file,
+                                                  embedding_format=embedding_format,
+                                                  node_column_name=node_column_name,
+                                                  vector_column_name=vector_column_name,
+                                                  embedding_label=embedding_label,
+                                                  vector_separator=vector_separator,
+                                                  reader_options=reader_options,
+                                                  value_options=value_options,
+                                                  error_file=error_file,
+                                                  verbose=verbose,
+                                                  very_verbose=very_verbose)
+            if index_type == INDEX_IVFPQ:
+                index = IVFPQIndex(vectors,
+                                   metric=metric,
+                                   nlist=nlist,
+                                   nprobe=nprobe,
+                                   subquantizers=subquantizers,
+                                   nbits=nbits,
+                                   train_size=train_size,
+                                   rerank=rerank,
+                                   block_size=block_size,
+                                   error_file=error_file,
+                                   verbose=verbose)
+            else:
+                index = ExactIndex(vectors, metric=metric, block_size=block_size)
+
+        if save_index_path is not None:
+            if verbose:
+                print("Saving the index to %s" % save_index_path, file=error_file, flush=True)
+            save_index(Path(save_index_path), node_ids, index)
+
+        query_node_ids: typing.Optional[typing.List[str]] = None
+        if query_nodes is not None and len(query_nodes) > 0:
+            query_node_ids = list(query_nodes)
+        if query_kgtk_file is not None:
+            if query_node_ids is None:
+                query_node_ids = [ ]
+            kr: KgtkReader = KgtkReader.open(query_kgtk_file,
+                                             who="query",
+                                             error_file=error_file,
+                                             options=reader_options,
+                                             value_options=value_options,
+                                             verbose=verbose,
+                                             very_verbose=very_verbose)
+            query_idx: int = kr.get_node1_column_index(query_column_name)
+            if query_idx < 0:
+                query_idx = kr.get_id_column_index(query_column_name)
+            if query_idx < 0:
+                raise KGTKException("No query column found in %s" % str(query_kgtk_file))
+            row: typing.List[str]
+            for row in kr:
+                query_node_ids.append(row[query_idx])
+            kr.close()
+
+        es: EmbeddingSearch = EmbeddingSearch(node_ids,
+                                              index,
+                                              k=top_k,
+                                              include_self=include_self,
+                                              batch_size=batch_size,
+                                              label_value=label_value,
+                                              error_file=error_file,
+                                              verbose=verbose,
+                                              very_verbose=very_verbose)
+        es.write(output_kgtk_file, query_node_ids=query_node_ids, output_format=output_format)
+
+        return 0
+
+    except SystemExit as e:
+        raise KGTKException("Exit requested")
+    except Exception as e:
+        raise KGTKException(str(e))
@@ -53,6 +53,11 @@ def add_arguments_extended(parser: KGTKArgumentParser, parsed_shared_args: Names
                           default_stdin=False)
     parser.add_output_file()
 
+    parser.add_argument(      "--procs", dest="procs", type=int, default=1,
+                              help="Build the entity JSON in this many worker processes. (default=%(default)s).")
+
+    parser.add_argument(      "--qnode-batch-size", dest="qnode_batch_size", type=int, default=1000,
+                              help=h("The number of qnodes sent to a worker process at a time. (default=%(default)s)."))
 
     KgtkReader.add_debug_arguments(parser, expert=_expert)
     # TODO: seperate reader_options for the label file.
@@ -64,6 +69,9 @@ def run(node_file: KGTKFiles,
         qualifier_file: KGTKFiles,
         output_file: KGTKFiles,
 
+        procs: int = 1,
+        qnode_batch_size: int = 1000,
+
         errors_to_stdout: bool = False,
         errors_to_stderr: bool = True,
         show_options: bool = False,
@@ -99,6 +107,8 @@ def run(node_file: KGTKFiles,
         print("--edge-file=%s" % str(edge_kgtk_file), file=error_file, flush=True)
         print("--qualifier-file=%s" % str(qualifier_kgtk_file), file=error_file, flush=True)
         print("--output-file=%s" % str(output_kgtk_file), file=error_file, flush=True)
+        print("--procs=%d" % procs, file=error_file, flush=True)
+        print("--qnode-batch-size=%d" % qnode_batch_size, file=error_file, flush=True)
 
         reader_options.show(out=error_file)
         value_options.show(out=error_file)
@@ -111,6 +121,9 @@ def run(node_file: KGTKFiles,
             qualifier_file_path=qualifier_kgtk_file,
             output_file_path=output_kgtk_file,
 
+            procs=procs,
+            qnode_batch_size=qnode_batch_size,
+
             reader_options=reader_options,
             value_options=value_options,
             error_file=error_file,
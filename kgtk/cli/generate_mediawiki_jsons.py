@@ -153,6 +153,33 @@ def add_arguments(parser):
         help="Whether the input file contains a rank column. Please refer to the `import_wikidata` command for the header information. Default to False, then all the ranks will be `normal`, therefore `NormalRank`.",
         dest="has_rank",
     )
+    parser.add_argument(
+        "--grouped-input",
+        action="store",
+        type=str2bool,
+        required = False,
+        default="no",
+        help="if set to yes, the input is grouped (sorted) by node1 and each entity's json is written as soon as its edges end, so that only one entity is kept in memory. Default to no",
+        dest="grouped_input",
+    )
+    parser.add_argument(
+        "--procs",
+        action="store",
+        type=int,
+        required = False,
+        default=1,
+        help="the number of worker processes that generate the entity jsons. Values greater than 1 imply --grouped-input yes. Default to 1",
+        dest="procs",
+    )
+    parser.add_argument(
+        "--group-batch-size",
+        action="store",
+        type=int,
+        required = False,
+        default=1000,
+        help="the number of entity groups sent to a worker process at a time. Default to 1000",
+        dest="group_batch_size",
+    )
 
 
 def run(
@@ -168,6 +195,9 @@ def run(
     warning: bool,
     input_file: str,
     has_rank:bool,
+    grouped_input: bool = False,
+    procs: int = 1,
+    group_batch_size: int = 1000,
 ):
     # import modules locally
     from kgtk.generator import JsonGenerator
@@ -206,46 +236,50 @@ def run(
             fp = sys.stdin
         # not line by line
 
-    if prop_declaration:
-        if input_file:
-            for line_num, edge in enumerate(fp):
-                generator.read_prop_declaration(line_num+1,edge)
-            fp.seek(0)
-            for line_num, edge in enumerate(fp):
-                generator.entry_point(line_num+1,edge)
+    def generation_lines():
+        """
+        Yield the (line number, edge) pairs for entry_point(), reading the
+        property declarations first when they are in the input file.
+        """
+        if prop_declaration:
+            if input_file:
+                for line_num, edge in enumerate(fp):
+                    generator.read_prop_declaration(line_num+1,edge)
+                fp.seek(0)
+                for line_num, edge in enumerate(fp):
+                    yield line_num+1, edge
+            else:
+                file_lines = 0
+                begining_edge = None
+                start_generation = False
+                for line_num, edge in enumerate(fp):
+                    if line_num == 0:
+                        begining_edge = edge
+                        yield line_num+1, edge
+                        file_lines += 1
+                    else:
+                        if start_generation:
+                            # start json generation because reached the starting position of the second `cat`
+                            line_number = line_num - file_lines
+                            yield line_number+1, edge # file generator
+                        else:
+                            if edge == begining_edge:
+                                start_generation = True
+                            else:
+                                file_lines += 1
+                                generator.read_prop_declaration(line_num+1,edge)
         else:
-            file_lines = 0
-            begining_edge = None
-            start_generation = False
             for line_num, edge in enumerate(fp):
-                if line_num == 0:
-                    begining_edge = edge
-                    generator.entry_point(line_num+1,edge)
-                    file_lines += 1
-                    # print("initial edge at line {}".format(line_num))
+                if edge.startswith("#") or len(edge.strip("\n")) == 0:
+                    continue
                 else:
-                    if start_generation:
-                        # start triple generation because reached the starting position of the second `cat`
-                        line_number = line_num - file_lines
-                        # print("creating jsons at line {} {} with total number of lines: {}".format(line_number+1, edge, file_lines))
-                        generator.entry_point(line_number+1,edge) # file generator
-                        # print("# {}".format(generator.read_num_of_lines))
-                    else:
-                        if edge == begining_edge:
-                            # print("set generation start at line {} {}".format(line_num, edge))
-                            start_generation = True
-                        else:
-                            file_lines += 1
-                            # print("creating property declarations at line {} {}".format(line_num, edge))
-                            generator.read_prop_declaration(line_num+1,edge)
-        generator.finalize()
+                    yield line_num+1, edge
+
+    if grouped_input or procs > 1:
+        generator.generate_grouped(generation_lines(), procs, group_batch_size)
     else:
-        for line_num, edge in enumerate(fp):
-            if edge.startswith("#") or len(edge.strip("\n")) == 0:
-                continue
-            else:
-                generator.entry_point(line_num+1,edge)
-    
+        for line_number, edge in generation_lines():
+            generator.entry_point(line_number, edge)
         generator.finalize()
     if input_file:
         fp.close()
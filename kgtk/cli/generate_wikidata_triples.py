@@ -161,6 +161,34 @@ def add_arguments(parser):
         help="set the path of the input kgtk file if not from standard input",
         dest="input_file",
     )
+    parser.add_argument(
+        "--serializer",
+        action="store",
+        type=str,
+        required = False,
+        default="etk",
+        choices=["etk", "fast"],
+        help="how to serialize the triples. 'etk' builds etk documents and serializes them with rdflib; 'fast' writes the same triples directly, one triple per line.",
+        dest="serializer",
+    )
+    parser.add_argument(
+        "--procs",
+        action="store",
+        type=int,
+        required = False,
+        default=1,
+        help="the number of worker processes. The input is split into shards at statement boundaries, the shards are converted in parallel, and the results are written in input order after a single prefix header.",
+        dest="procs",
+    )
+    parser.add_argument(
+        "--shard-size",
+        action="store",
+        type=int,
+        required = False,
+        default=100000,
+        help="the approximate number of input lines in each shard when --procs is greater than 1.",
+        dest="shard_size",
+    )
 
 
 def run(
@@ -177,15 +205,19 @@ def run(
     prop_declaration:bool,
     prefix_path:str,
     input_file: str,
+    serializer: str = "etk",
+    procs: int = 1,
+    shard_size: int = 100000,
 ):
     # import modules locally
     import gzip
     # from kgtk.triple_generator import TripleGenerator
-    from kgtk.generator import TripleGenerator
+    from kgtk.generator import TripleGenerator, FastTripleGenerator
     import sys
     from kgtk.exceptions import KGTKException
 
-    generator = TripleGenerator(
+    generator_class = FastTripleGenerator if serializer == "fast" else TripleGenerator
+    generator = generator_class(
         prop_file=prop_file,
         label_set=labels,
         alias_set=aliases,
@@ -212,52 +244,58 @@ def run(
     else:
         if input_file:
             try:
-                fp = open(prefix_path,"r")
+                fp = open(input_file,"r")
             except:
                 raise KGTKException("Fail to read from file {}. Exiting.".format(input_file))
         else:
             fp = sys.stdin
         # not line by line
     
-    if prop_declaration:
-        if input_file:
-            for line_num, edge in enumerate(fp):
-                generator.read_prop_declaration(line_num+1,edge)
-            fp.seek(0)
-            for line_num, edge in enumerate(fp):
-                generator.entry_point(line_num+1,edge)
+    def generation_lines():
+        """
+        Yield the (line number, edge) pairs for entry_point(), reading the
+        property declarations first when they are in the input file.
+        """
+        if prop_declaration:
+            if input_file:
+                for line_num, edge in enumerate(fp):
+                    generator.read_prop_declaration(line_num+1,edge)
+                fp.seek(0)
+                for line_num, edge in enumerate(fp):
+                    yield line_num+1, edge
+            else:
+                file_lines = 0
+                begining_edge = None
+                start_generation = False
+                for line_num, edge in enumerate(fp):
+                    if line_num == 0:
+                        begining_edge = edge
+                        yield line_num+1, edge
+                        file_lines += 1
+                    else:
+                        if start_generation:
+                            # start triple generation because reached the starting position of the second `cat`
+                            line_number = line_num - file_lines
+                            yield line_number+1, edge # file generator
+                        else:
+                            if edge == begining_edge:
+                                start_generation = True
+                            else:
+                                file_lines += 1
+                                generator.read_prop_declaration(line_num+1,edge)
         else:
-            file_lines = 0
-            begining_edge = None
-            start_generation = False
+            # not declaration
             for line_num, edge in enumerate(fp):
-                if line_num == 0:
-                    begining_edge = edge
-                    generator.entry_point(line_num+1,edge)
-                    file_lines += 1
+                if edge.startswith("#") or len(edge.strip("\n")) == 0:
+                    continue
                 else:
-                    if start_generation:
-                        # start triple generation because reached the starting position of the second `cat`
-                        line_number = line_num - file_lines
-                        # print("creating triples at line {} {} with total number of lines: {}".format(line_number+1, edge, file_lines))
-                        generator.entry_point(line_number+1,edge) # file generator
-                        # print("# {}".format(generator.read_num_of_lines))
-                    else:
-                        if edge == begining_edge:
-                            start_generation = True
-                        else:
-                            file_lines += 1
-                            # print("creating property declarations at line {} {}".format(line_num, edge))
-                            generator.read_prop_declaration(line_num+1,edge)
-                    
-        generator.finalize()
+                    yield line_num+1, edge
+
+    if procs > 1:
+        generator.generate_in_parallel(generation_lines(), procs, shard_size)
     else:
-        # not declaration
-        for line_num, edge in enumerate(fp):
-            if edge.startswith("#") or len(edge.strip("\n")) == 0:
-                continue
-            else:
-                generator.entry_point(line_num+1,edge)
-        generator.finalize()
+        for line_number, edge in generation_lines():
+            generator.entry_point(line_number, edge)
+    generator.finalize()
     if input_file:
         fp.close()
@@ -7,84 +7,16 @@ Generate graph embedding based on Pytorch BigGraph library
 
 from argparse import Namespace
 from kgtk.cli_argparse import KGTKArgumentParser
-from kgtk.io.kgtkreader import KgtkReader, KgtkReaderMode, KgtkReaderOptions
+from kgtk.io.kgtkreader import KgtkReaderMode, KgtkReaderOptions
 from kgtk.io.kgtkwriter import KgtkWriter
 from kgtk.utils.argparsehelpers import optional_bool
 from kgtk.value.kgtkvalueoptions import KgtkValueOptions
-import attr,sys,typing
-from kgtk.kgtkformat import KgtkFormat
 from pathlib import Path
-import sys
 
 import os
 os.environ['KMP_DUPLICATE_LIB_OK']='True' # remove the Issue: Initializing libiomp5.dylib, but found libiomp5.dylib already initialized.
 
 
-@attr.s(slots=True, frozen=False)
-class KgtkCreateTmpTsv(KgtkFormat):
-    input_file_path: Path = attr.ib(validator=attr.validators.instance_of(Path))
-    output_file_path: Path = attr.ib(validator=attr.validators.instance_of(Path))
-
-    reader_options: typing.Optional[KgtkReaderOptions]= attr.ib(default=None)
-    value_options: typing.Optional[KgtkValueOptions] = attr.ib(default=None)
-
-    error_file: typing.TextIO = attr.ib(default=sys.stderr)
-    verbose: bool = attr.ib(validator=attr.validators.instance_of(bool), default=False)
-    very_verbose: bool = attr.ib(validator=attr.validators.instance_of(bool), default=False)
-
-    def process(self):
-        # Open the input file.
-        if self.verbose:
-            print("Opening the input file: %s" % str(self.input_file_path), file=self.error_file, flush=True)
-
-        kr: KgtkReader =  KgtkReader.open(self.input_file_path,
-                                          error_file=self.error_file,
-                                          options=self.reader_options,
-                                          value_options = self.value_options,
-                                          verbose=self.verbose,
-                                          very_verbose=self.very_verbose,                          
-        )
-        
-        if self.verbose:
-            print("Opening the output file: %s" % str(self.output_file_path), file=self.error_file, flush=True)
-
-        # Open the output file.
-        kw: KgtkWriter = KgtkWriter.open(kr.column_names,
-                                         self.output_file_path,
-                                         mode=KgtkWriter.Mode[kr.mode.name],
-                                         require_all_columns=False,
-                                         prohibit_extra_columns=True,
-                                         fill_missing_columns=False,
-                                         gzip_in_parallel=False,
-                                         verbose=self.verbose,
-                                         very_verbose=self.very_verbose)
-        # here kw has one line already where PBG doesn't need it,
-
-        input_line_count: int = 0
-        if self.verbose:
-            print("Processing the input records.", file=self.error_file, flush=True)
-
-        # node1 relation node2
-        node1_index= kr.get_node1_column_index()
-        node2_index = kr.get_node2_column_index()
-        ##relation_index = kr.get_id_column_index('relation')#
-        relation_index = kr.get_label_column_index()
-      
-        row: typing.List[str]
-        # delete header
-        # kw.file_out.seek(0)         # set the cursor to the top of the file
-        # kw.file_out.truncate()      # truncate following part == delete first line
-        # print(kw.file_out.tell())
-
-        for row in kr:
-            input_line_count += 1
-            kw.write([row[node1_index],row[relation_index],row[node2_index]]) 
-           
-        if self.verbose:
-            print("Processed %d records." % (input_line_count), file=self.error_file, flush=True)
-    
-        kw.close()
-
 def get_config(**kwargs): 
     """
     configurations for graph embedding
@@ -103,7 +35,7 @@ def get_config(**kwargs):
         edge_paths = edge_paths,
         checkpoint_path = checkpoint_path,
         # Graph structure
-        entities= {"all": {"num_partitions": 1 }}  ,
+        entities= {"all": {"num_partitions": kwargs['num_partitions'] }}  ,
         relations=[  # relation template setting
         {
             "name": "all_edges",
@@ -196,6 +128,15 @@ def add_arguments(parser: KGTKArgumentParser):
     parser.add_argument(     '-w','--workers', dest='workers',
                              help="The number of worker processes for training. If not given, set to CPU count.",
                              type=int,default=None, metavar='')
+    parser.add_argument(     '-np','--num_partitions', dest='num_partitions',
+                             help="The number of partitions to split the entities into. Edges are stored in "+
+                             "num_partitions x num_partitions buckets, so that training only needs to hold two "+
+                             "partitions of the embeddings in memory at a time. [Default: 1]",
+                             type=int,default=1, metavar='')
+    parser.add_argument(     '-pw','--preprocess_workers', dest='preprocess_workers',
+                             help="The number of worker processes used to read the input file and "+
+                             "convert it to partitioned edge buckets. [Default: 1]",
+                             type=int,default=1, metavar='')
     parser.add_argument(     '-bs','--batch_size', dest='batch_size',
                              help="The number of edges per batch.[Default:1000]",
                              type=int,default=1000, metavar='')
@@ -338,7 +279,7 @@ def run(verbose: bool = False,
     import json,os,h5py,gzip,torch,shutil
     from torchbiggraph.config import parse_config
     # copy  missing file under kgtk/graph_embeddings
-    from kgtk.graph_embeddings.importers import TSVEdgelistReader,convert_input_data  
+    from kgtk.graph_embeddings.importers import convert_kgtk_input_data
     from torchbiggraph.train import train
     from torchbiggraph.util import SubprocessInitializer, setup_logging
     from kgtk.graph_embeddings.export_to_tsv import make_tsv
@@ -357,8 +298,6 @@ def run(verbose: bool = False,
 
         input_kgtk_file: Path = kwargs['input_file_path']
         tmp_folder = kwargs['temporary_directory']
-        tmp_tsv_path:Path = tmp_folder / f'tmp_{input_kgtk_file.name}'
-        # tmp_tsv_path:Path = input_kgtk_file.parent/f'tmp_{input_kgtk_file.name}'
 
         #  make sure the tmp folder exists, otherwise it will raise an exception
         if not os.path.exists(tmp_folder):
@@ -369,28 +308,10 @@ def run(verbose: bool = False,
             output_kgtk_file.unlink() 
         except: pass # didn't find, then let it go
 
-        # *********************************************
-        # 0. PREPARE PBG TSV FILE
-        # *********************************************
         reader_options: KgtkReaderOptions = KgtkReaderOptions.from_dict(kwargs)
         value_options: KgtkValueOptions = KgtkValueOptions.from_dict(kwargs)
         error_file: typing.TextIO = sys.stdout if kwargs.get("errors_to_stdout") else sys.stderr
-        kct: KgtkCopyTemplate = KgtkCreateTmpTsv(
-            input_file_path=input_kgtk_file,
-            output_file_path=tmp_tsv_path,
-            reader_options=reader_options,
-            value_options=value_options,
-            error_file=error_file,
-            verbose=verbose,
-            very_verbose=very_verbose,
-        )
-        # prepare the graph file
-        # create a tmp tsv file for PBG embedding
-        
-        logging.info('Generate the valid tsv format for embedding ...')
-        kct.process()
-        logging.info('Embedding file is ready...')
-        
+
         # *********************************************
         # 1. DEFINE CONFIG  
         # *********************************************
@@ -413,17 +334,24 @@ def run(verbose: bool = False,
         setup_logging()
         config = parse_config(processed_config)
         subprocess_init = SubprocessInitializer()
-        input_edge_paths = [tmp_tsv_path] 
+        input_edge_paths = [input_kgtk_file]
 
-        convert_input_data(
+        # Read the KGTK input file once, in parallel chunks, and write the
+        # partitioned edge buckets directly.
+        logging.info('Convert the input file to partitioned edge buckets ...')
+        convert_kgtk_input_data(
             config.entities,
             config.relations,
             config.entity_path,
             config.edge_paths,
             input_edge_paths,
-            TSVEdgelistReader(lhs_col=0, rel_col=1, rhs_col=2),
             dynamic_relations=config.dynamic_relations,
+            num_workers=kwargs['preprocess_workers'],
+            reader_options=reader_options,
+            value_options=value_options,
+            error_file=error_file,
         )
+        logging.info('Edge buckets are ready...')
 
         # ************************************************
         # 3. TRAIN THE EMBEDDINGS
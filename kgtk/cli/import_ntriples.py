@@ -101,6 +101,8 @@ def run(input_file: KGTKFiles,
 
         override_uuid: typing.Optional[str],
 
+        procs: int = 1,
+
         errors_to_stdout: bool = False,
         errors_to_stderr: bool = True,
         show_options: bool = False,
@@ -174,6 +176,8 @@ def run(input_file: KGTKFiles,
         print("--validate=%s" % str(validate), file=error_file, flush=True)
         
         print("--override-uuid=%s" % str(override_uuid), file=error_file, flush=True)
+
+        print("--procs=%d" % procs, file=error_file, flush=True)
         
         idbuilder_options.show(out=error_file)
         reader_options.show(out=error_file)
@@ -206,6 +210,7 @@ def run(input_file: KGTKFiles,
             escape_pipes=escape_pipes,
             validate=validate,
             override_uuid=override_uuid,
+            procs=procs,
             idbuilder_options=idbuilder_options,
             reader_options=reader_options,
             value_options=value_options,
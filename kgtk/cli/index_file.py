@@ -0,0 +1,114 @@
+"""Build the line-offset sidecar index for an uncompressed KGTK file.
+
+The index (stored next to the file, with the suffix .lidx) lets readers seek
+to sampled records, and split the file into row-aligned partitions for
+parallel processing.
+"""
+
+from argparse import Namespace
+import typing
+
+from kgtk.cli_argparse import KGTKArgumentParser, KGTKFiles
+
+def parser():
+    return {
+        'help': 'Build the line-offset index for a KGTK file.',
+        'description': 'Build the line-offset sidecar index for an uncompressed KGTK file. ' +
+        'The index records the byte offset of every nth data line and, for a file that is sorted ' +
+        'on a key column, the key boundaries.  It is used by --use-line-index and for reading ' +
+        'a file in row-aligned partitions.'
+    }
+
+
+def add_arguments_extended(parser: KGTKArgumentParser, parsed_shared_args: Namespace):
+    """
+    Parse arguments
+    Args:
+        parser (argparse.ArgumentParser)
+    """
+    from kgtk.io.kgtkreader import KgtkReader
+    from kgtk.utils.lineindex import LineIndex
+
+    _expert: bool = parsed_shared_args._expert
+
+    parser.add_input_file(positional=True)
+
+    parser.add_argument(      "--stride", dest="stride", type=int,
+                              help="Record the offset of every nth data line (default=%(default)s).",
+                              default=LineIndex.DEFAULT_STRIDE)
+
+    parser.add_argument(      "--key-column", dest="key_column",
+                              help="Record the key boundaries of a file that is sorted on this column, " +
+                              "so that partitions do not split a group of records with the same key (default=no key).")
+
+    parser.add_argument(      "--partitions", dest="partitions", type=int,
+                              help="Show the byte ranges of this number of partitions (default=do not show).")
+
+    KgtkReader.add_debug_arguments(parser, expert=_expert)
+
+def run(input_file: KGTKFiles,
+        stride: int = 1024,
+        key_column: typing.Optional[str] = None,
+        partitions: typing.Optional[int] = None,
+
+        errors_to_stdout: bool = False,
+        errors_to_stderr: bool = True,
+        show_options: bool = False,
+        verbose: bool = False,
+        very_verbose: bool = False,
+
+        **kwargs # Whatever KgtkReader.add_debug_arguments() wants.
+)->int:
+    # import modules locally
+    from pathlib import Path
+    import sys
+
+    from kgtk.exceptions import KGTKException
+    from kgtk.utils.filechunks import can_split
+    from kgtk.utils.lineindex import LineIndex
+
+    input_kgtk_file: Path = KGTKArgumentParser.get_input_file(input_file)
+
+    # Select where to send error messages, defaulting to stderr.
+    error_file: typing.TextIO = sys.stdout if errors_to_stdout else sys.stderr
+
+    # Show the final option structures for debugging and documentation.
+    if show_options:
+        print("--input-file=%s" % str(input_kgtk_file), file=error_file)
+        print("--stride=%d" % stride, file=error_file)
+        if key_column is not None:
+            print("--key-column=%s" % key_column, file=error_file)
+        if partitions is not None:
+            print("--partitions=%d" % partitions, file=error_file)
+        print("=======", file=error_file, flush=True)
+
+    if not can_split(input_kgtk_file):
+        raise KGTKException("%s cannot be indexed: it must be an uncompressed file." % str(input_kgtk_file))
+    if stride < 1:
+        raise KGTKException("--stride must be at least 1.")
+    if partitions is not None and partitions < 1:
+        raise KGTKException("--partitions must be at least 1.")
+
+    try:
+        index: LineIndex = LineIndex.build(input_kgtk_file, stride=stride, key_column=key_column)
+        index_path: Path = LineIndex.index_path(input_kgtk_file)
+        index.save(index_path)
+        if verbose:
+            print("Indexed %d data lines of %s in %s" % (index.line_count, str(input_kgtk_file), str(index_path)), file=error_file, flush=True)
+            if key_column is not None:
+                print("Recorded %d key boundaries" % len(index.key_lines), file=error_file, flush=True)
+
+        if partitions is not None:
+            partition: int
+            for partition in range(partitions):
+                start: int
+                end: int
+                (start, end) = index.partition(partition, partitions)
+                print("%d\t%d\t%d" % (partition, start, end), file=sys.stdout)
+
+        return 0
+
+    except SystemExit as e:
+        raise KGTKException("Exit requested")
+    except Exception as e:
+        raise KGTKException(str(e))
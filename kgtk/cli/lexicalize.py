@@ -15,6 +15,10 @@
 # the input file twice (once as --input-file and once as --entity-label-file, both
 # of which must be specified on the command line).
 #
+# With --grouped, the input file need only be grouped by node1 value;  the
+# sentences are written in input order.  --procs N builds the sentences in a
+# pool of N processes.
+#
 from argparse import Namespace, SUPPRESS
 import typing
 
@@ -79,6 +83,17 @@ def add_arguments_extended(parser: KGTKArgumentParser, parsed_shared_args: Names
                         help="When true, the input file is presorted on node1. (default=%(default)s).",
                         type=optional_bool, nargs='?', const=True, default=False)
 
+    parser.add_argument("--grouped", dest="grouped", metavar="True|False",
+                        help="When true, the input file is grouped on node1, but not necessarily sorted. " +
+                        "Sentences are written in input order without reading the whole input into memory. (default=%(default)s).",
+                        type=optional_bool, nargs='?', const=True, default=False)
+
+    parser.add_argument("--procs", dest="procs", type=int, default=1,
+                        help="The number of processes to use when producing sentences. (default=%(default)s).")
+
+    parser.add_argument("--node-batch-size", dest="node_batch_size", type=int, default=1000,
+                        help="The number of nodes to send to a process at a time when --procs is greater than 1. (default=%(default)s).")
+
     parser.add_argument("--add-entity-labels-from-input", dest="add_entity_labels_from_input", metavar="True|False",
                         help="When true, extract entity labels from the unsorted input file. (default=%(default)s).",
                         type=optional_bool, nargs='?', const=True, default=False)
@@ -101,6 +116,9 @@ def run(input_file: KGTKFiles,
         explain: bool,
         presorted: bool,
         add_entity_labels_from_input: bool,
+        grouped: bool = False,
+        procs: int = 1,
+        node_batch_size: int = 1000,
 
         errors_to_stdout: bool = False,
         errors_to_stderr: bool = True,
@@ -176,6 +194,9 @@ def run(input_file: KGTKFiles,
         print("--sentence-label=%s" % str(sentence_label), file=error_file, flush=True)
         print("--explain=%s" % str(explain), file=error_file, flush=True)
         print("--presorted=%s" % str(presorted), file=error_file, flush=True)
+        print("--grouped=%s" % str(grouped), file=error_file, flush=True)
+        print("--procs=%d" % procs, file=error_file, flush=True)
+        print("--node-batch-size=%d" % node_batch_size, file=error_file, flush=True)
 
         reader_options.show(out=error_file)
         value_options.show(out=error_file)
@@ -189,6 +210,8 @@ def run(input_file: KGTKFiles,
                                    property_values,
                                    sentence_label,
                                    explain=explain,
+                                   procs=procs,
+                                   node_batch_size=node_batch_size,
                                    error_file=error_file,
                                    verbose=verbose,
                                    very_verbose=very_verbose)
@@ -246,6 +269,8 @@ def run(input_file: KGTKFiles,
 
         if presorted:
             lexer.process_presorted_input(kr, kw)
+        elif grouped:
+            lexer.process_grouped_input(kr, kw)
         else:
             lexer.process_unsorted_input(kr, kw, add_entity_labels=add_entity_labels_from_input)
 
@@ -7,11 +7,15 @@ import os
 import os.path
 import tempfile
 import io
+import itertools
 import argparse
+from pathlib import Path
 
 from kgtk.exceptions import KGTKException
 
 from kgtk.cli_argparse import KGTKArgumentParser, KGTKFiles
+from kgtk.io.kgtkwriter import KgtkWriter
+from kgtk.utils.validationaction import ValidationAction
 
 DEFAULT_GRAPH_CACHE_FILE = os.path.join(
     tempfile.gettempdir(), 'kgtk-graph-cache-%s.sqlite3.db' % os.environ.get('USER', ''))
@@ -26,6 +30,7 @@ def parser():
 
 EXPLAIN_MODES = ('plan', 'full', 'expert')
 INDEX_MODES = ('auto', 'expert', 'quad', 'triple', 'node1+label', 'node1', 'label', 'node2', 'none')
+BATCH_MODES = ('auto', 'join', 'prepared')
 
 class InputOptionAction(argparse.Action):
     """Special-purpose argparse action that associates an input-specific option
@@ -78,12 +83,40 @@ def add_arguments_extended(parser: KGTKArgumentParser, parsed_shared_args):
                         help="zero or more named string parameters to be passed to the query")
     parser.add_argument('--lqpara', metavar='NAME=VAL', action='append', dest='lqstring_paras',
                         help="zero or more named LQ-string parameters to be passed to the query")
+    parser.add_argument('--para-file', metavar='FILE', default=None, action='store', dest='para_file',
+                        help="KGTK file with a header row of parameter names and one set of parameter values"
+                        + " per row, the query will be run for each row and each result row will be"
+                        + " prefixed with the index of its parameter row in a `para_row' column")
+    parser.add_argument('--para-file-mode', metavar='MODE', action='store', dest='para_file_mode',
+                        choices=BATCH_MODES, default=BATCH_MODES[0],
+                        help="run the query for the rows of --para-file as one join with a table of all rows"
+                        + " or by executing the same prepared statement for each row"
+                        + " (%(choices)s, default: %(default)s)")
     parser.add_argument('--no-header', action='store_true', dest='no_header',
                         help="do not generate a header row with column names")
     parser.add_argument('--index', metavar='MODE', nargs='?', action='store', dest='index',
                         choices=INDEX_MODES, const=INDEX_MODES[0], default=INDEX_MODES[0], 
                         help="control column index creation according to MODE"
                         + " (%(choices)s, default: %(const)s)")
+    parser.add_argument('--expression-index', metavar='FUNCTION(COLUMN)', action='append', dest='expression_indexes',
+                        help="zero or more indexes on a deterministic KGTK function applied to a column"
+                        + " such as `kgtk_date_year(node2)', to be created on all query graphs"
+                        + " in addition to the indexes selected by --index")
+    parser.add_argument('--cache-results', action='store_true', dest='cache_results',
+                        help="cache the query result in the graph cache and reuse it when the same query"
+                        + " is run again on unchanged graphs")
+    parser.add_argument('--result-cache-size', metavar='MB', type=int, default=None, action='store', dest='result_cache_size',
+                        help="size budget for all cached query results in megabytes,"
+                        + " least recently used results are evicted to stay within it (default: 1024)")
+    parser.add_argument('--literal-cache-size', metavar='N', type=int, default=None, action='store', dest='literal_cache_size',
+                        help="cache the parses of the N most recent distinct literals of each kind in the"
+                        + " literal accessor functions such as kgtk_date_year; this speeds up queries over"
+                        + " literals that repeat a lot, but slows down queries over mostly distinct literals"
+                        + " (default: 0)")
+    parser.add_argument('--procs', metavar='N', type=int, default=1, action='store', dest='procs',
+                        help="run the query in N processes, each on a range of rows of the graph of the first"
+                        + " match clause, and merge their results; queries that cannot be partitioned"
+                        + " and --para-file queries run in a single process (default: %(default)s)")
     parser.add_argument('--explain', metavar='MODE', nargs='?', action='store', dest='explain',
                         choices=EXPLAIN_MODES, const=EXPLAIN_MODES[0], 
                         help="explain the query execution and indexing plan according to MODE"
@@ -94,7 +127,21 @@ def add_arguments_extended(parser: KGTKArgumentParser, parsed_shared_args):
                         + " (defaults to per-user temporary file)")
     parser.add_argument('-o', '--out', default='-', action='store', dest='output',
                         help="output file to write to, if `-' (the default) output goes to stdout."
-                        + " Files with extensions .gz, .bz2 or .xz will be appropriately compressed.")
+                        + " Files with extensions .gz, .bz2 or .xz will be appropriately compressed,"
+                        + " extensions .md, .csv, .json or .jsonl select the corresponding output format.")
+    parser.add_argument('--output-format', metavar='FORMAT', default=None, action='store', dest='output_format',
+                        choices=KgtkWriter.OUTPUT_FORMAT_CHOICES,
+                        help="write the result with KgtkWriter in FORMAT (%(choices)s)")
+    parser.add_argument('--use-mgzip', action='store_true', dest='use_mgzip',
+                        help="write the result with KgtkWriter and compress .gz output with multiple threads")
+    parser.add_argument('--mgzip-threads', metavar='N', type=int, default=KgtkWriter.MGZIP_THREAD_COUNT_DEFAULT,
+                        action='store', dest='mgzip_threads',
+                        help="number of threads used by --use-mgzip (default: %(default)s)")
+    parser.add_argument('--gzip-in-parallel', action='store_true', dest='gzip_in_parallel',
+                        help="write the result with KgtkWriter and compress output in a separate process")
+    parser.add_argument('--output-graph', metavar='NAME', default=None, action='store', dest='output_graph',
+                        help="import the result into the graph cache as a graph named NAME instead of"
+                        + " writing it to the output, later queries can then use `-i NAME' as an input")
 
 def import_modules():
     """Import command-specific modules that are only needed when we actually run.
@@ -128,6 +175,89 @@ def parse_query_parameters(regular=[], string=[], lqstring=[]):
             parameters[name] = value
     return parameters
 
+def read_parameter_file(file):
+    """Read a KGTK 'file' of parameter values and return the list of parameter names
+    from its header and an iterator over its rows of parameter values.
+    """
+    inp = sqlstore.open_to_read(sys.stdin if file == '-' else file)
+    csvreader = csv.reader(inp, dialect=None, delimiter='\t', quoting=csv.QUOTE_NONE)
+    names = next(csvreader, None)
+    if names is None:
+        raise KGTKException('Missing header in parameter file: %s' % file)
+    def read_rows():
+        try:
+            for row in csvreader:
+                if len(row) != len(names):
+                    raise KGTKException('Parameter file row %d has %d instead of %d values'
+                                        % (csvreader.line_num - 1, len(row), len(names)))
+                yield row
+        finally:
+            if inp is not sys.stdin:
+                inp.close()
+    return names, read_rows()
+
+RESULT_BATCH_SIZE = 10000
+KGTK_WRITER_SUFFIXES = ('.md', '.csv', '.json', '.jsonl')
+
+def is_kgtk_writer_output(file):
+    """Return True if the extension of the output 'file' selects a KgtkWriter output format
+    other than plain KGTK, for example, `out.jsonl' or `out.md.gz'.
+    """
+    suffixes = Path(file).suffixes
+    if len(suffixes) > 0 and suffixes[-1] in ('.gz', '.bz2', '.xz', '.lz4'):
+        suffixes = suffixes[:-1]
+    return len(suffixes) > 0 and suffixes[-1] in KGTK_WRITER_SUFFIXES
+
+def iter_result_batches(result, size=RESULT_BATCH_SIZE):
+    """Return an iterator over lists of up to 'size' rows of the query 'result',
+    which can be a database cursor or any other iterator over result rows.
+    """
+    fetchmany = getattr(result, 'fetchmany', None)
+    if fetchmany is None:
+        rows = iter(result)
+        fetchmany = lambda size: list(itertools.islice(rows, size))
+    while True:
+        batch = fetchmany(size)
+        if len(batch) == 0:
+            break
+        yield batch
+
+def write_result_via_csv(header, result, output):
+    """Write 'header' (unless it is None) and the rows of 'result' as TSV to the open 'output'.
+    """
+    # we are forcing \n line endings here instead of \r\n, since those
+    # can be re/imported efficiently with the new SQLite import command;
+    # we also specify `escapechar' now so any unexpected column or line
+    # separators in fields will be quoted and visible:
+    csvwriter = csv.writer(output, dialect=None, delimiter='\t',
+                           quoting=csv.QUOTE_NONE, quotechar=None,
+                           lineterminator='\n', escapechar='\\')
+    if header is not None:
+        csvwriter.writerow(header)
+    for batch in iter_result_batches(result):
+        csvwriter.writerows(batch)
+    output.flush()
+
+def write_result_via_kgtk_writer(header, result, file, output_format=None, use_mgzip=False,
+                                 mgzip_threads=KgtkWriter.MGZIP_THREAD_COUNT_DEFAULT, gzip_in_parallel=False):
+    """Write 'header' and the rows of 'result' to 'file' via KgtkWriter, which selects the
+    output format from 'output_format' or the file extension and compresses accordingly.
+    """
+    kw = KgtkWriter.open(list(header), Path(file),
+                         mode=KgtkWriter.Mode.NONE,
+                         header_error_action=ValidationAction.PASS,
+                         output_format=output_format,
+                         use_mgzip=use_mgzip,
+                         mgzip_threads=mgzip_threads,
+                         gzip_in_parallel=gzip_in_parallel)
+    try:
+        for batch in iter_result_batches(result):
+            for row in batch:
+                kw.write(['' if value is None else str(value) for value in row])
+        kw.flush()
+    finally:
+        kw.close()
+
 def run(input_files: KGTKFiles,
         **options):
     """Run Kypher query according to the provided command-line arguments.
@@ -147,16 +277,29 @@ def run(input_files: KGTKFiles,
         if len(inputs) == 0:
             raise KGTKException('At least one input needs to be supplied')
 
-        output = options.get('output')
-        if output == '-':
-            output = sys.stdout
-        if isinstance(output, str):
-            output = sqlstore.open_to_write(output, mode='wt')
+        explain = options.get('explain')
+        output_file = options.get('output')
+        output_graph = options.get('output_graph')
+        use_kgtk_writer = (options.get('output_format') is not None or options.get('use_mgzip', False)
+                           or options.get('gzip_in_parallel', False) or is_kgtk_writer_output(output_file))
+        if use_kgtk_writer and options.get('no_header'):
+            raise KGTKException('--no-header cannot be used when writing the result with KgtkWriter')
+        output = None
+        if explain is not None or (output_graph is None and not use_kgtk_writer):
+            output = output_file == '-' and sys.stdout or sqlstore.open_to_write(output_file, mode='wt')
 
         parameters = parse_query_parameters(regular=options.get('regular_paras') or [],
                                             string=options.get('string_paras') or [],
                                             lqstring=options.get('lqstring_paras') or [])
 
+        result_cache_size = options.get('result_cache_size')
+        if result_cache_size is not None:
+            result_cache_size *= 2 ** 20
+
+        literal_cache_size = options.get('literal_cache_size')
+        if literal_cache_size is not None:
+            sqlstore.set_literal_parse_cache_size(literal_cache_size)
+
         try:
             graph_cache = options.get('graph_cache_file')
             store = sqlstore.SqliteStore(graph_cache, create=not os.path.exists(graph_cache), loglevel=loglevel)
@@ -171,26 +314,40 @@ def run(input_files: KGTKFiles,
                                       skip=options.get('skip'),
                                       limit=options.get('limit'),
                                       parameters=parameters,
-                                      index=options.get('index'))
+                                      index=options.get('index'),
+                                      expression_indexes=options.get('expression_indexes') or [],
+                                      cache_results=options.get('cache_results', False),
+                                      result_cache_size=result_cache_size)
             
-            explain = options.get('explain')
+            para_file = options.get('para_file')
             if explain is not None:
                 result = query.explain(explain)
                 output.write(result)
+                output.flush()
             else:
-                result = query.execute()
-                # we are forcing \n line endings here instead of \r\n, since those
-                # can be re/imported efficiently with the new SQLite import command;
-                # we also specify `escapechar' now so any unexpected column or line
-                # separators in fields will be quoted and visible:
-                csvwriter = csv.writer(output, dialect=None, delimiter='\t',
-                                       quoting=csv.QUOTE_NONE, quotechar=None,
-                                       lineterminator='\n', escapechar='\\')
-                if not options.get('no_header'):
-                    csvwriter.writerow(query.result_header)
-                csvwriter.writerows(result)
-                
-            output.flush()
+                if para_file is not None:
+                    names, rows = read_parameter_file(para_file)
+                    result = query.execute_batch(names, rows, mode=options.get('para_file_mode'))
+                    # the result header is known once the batch execution has started:
+                    first = next(result, None)
+                    result = itertools.chain(first is not None and [first] or [], result)
+                elif options.get('procs', 1) > 1:
+                    result = query.execute_parallel(options.get('procs'))
+                else:
+                    result = query.execute()
+                if output_graph is not None:
+                    if output_graph in query.files:
+                        raise KGTKException('Output graph %s cannot also be an input of the query' % output_graph)
+                    store.add_graph_rows(output_graph, query.result_header, result)
+                elif use_kgtk_writer:
+                    write_result_via_kgtk_writer(query.result_header, result, output_file,
+                                                 output_format=options.get('output_format'),
+                                                 use_mgzip=options.get('use_mgzip', False),
+                                                 mgzip_threads=options.get('mgzip_threads', KgtkWriter.MGZIP_THREAD_COUNT_DEFAULT),
+                                                 gzip_in_parallel=options.get('gzip_in_parallel', False))
+                else:
+                    header = not options.get('no_header') and query.result_header or None
+                    write_result_via_csv(header, result, output)
         finally:
             store.close()
             if output is not None and output is not sys.stdout:
@@ -0,0 +1,115 @@
+"""Build the columnar binary cache for a KGTK file.
+
+The cache (stored next to the file, with the suffix .kbin) holds the header
+and, for each column, a sorted dictionary of the column's values and an
+integer code per row.  KgtkReader reads the rows from the cache instead of
+the file when it is asked to, the cache is current, and no validation is
+requested.
+"""
+
+from argparse import Namespace
+import typing
+
+from kgtk.cli_argparse import KGTKArgumentParser, KGTKFiles
+
+def parser():
+    return {
+        'help': 'Build the binary cache for a KGTK file.',
+        'description': 'Build the columnar binary cache for a KGTK file, for faster repeated reads. ' +
+        'The cache is stored next to the file, with the suffix .kbin.  KGTK commands read the rows ' +
+        'from a current cache instead of the file when --use-binary-cache is given.' +
+        '\n\nAdditional options are shown in expert help.\nkgtk --expert to-binary --help'
+    }
+
+
+def add_arguments_extended(parser: KGTKArgumentParser, parsed_shared_args: Namespace):
+    """
+    Parse arguments
+    Args:
+        parser (argparse.ArgumentParser)
+    """
+    from kgtk.io.kgtkreader import KgtkReader, KgtkReaderOptions
+    from kgtk.value.kgtkvalueoptions import KgtkValueOptions
+
+    _expert: bool = parsed_shared_args._expert
+
+    parser.add_input_file(positional=True)
+
+    KgtkReader.add_debug_arguments(parser, expert=_expert)
+    KgtkReaderOptions.add_arguments(parser, mode_options=True, expert=_expert)
+    KgtkValueOptions.add_arguments(parser, expert=_expert)
+
+def run(input_file: KGTKFiles,
+
+        errors_to_stdout: bool = False,
+        errors_to_stderr: bool = True,
+        show_options: bool = False,
+        verbose: bool = False,
+        very_verbose: bool = False,
+
+        **kwargs # Whatever KgtkFileOptions and KgtkValueOptions want.
+)->int:
+    # import modules locally
+    import attr
+    from pathlib import Path
+    import sys
+
+    from kgtk.exceptions import KGTKException
+    from kgtk.io.kgtkbinary import KgtkBinaryFile
+    from kgtk.io.kgtkreader import KgtkReader, KgtkReaderOptions
+    from kgtk.value.kgtkvalueoptions import KgtkValueOptions
+
+    input_kgtk_file: Path = KGTKArgumentParser.get_input_file(input_file)
+
+    # Select where to send error messages, defaulting to stderr.
+    error_file: typing.TextIO = sys.stdout if errors_to_stdout else sys.stderr
+
+    # Build the option structures.
+    reader_options: KgtkReaderOptions = KgtkReaderOptions.from_dict(kwargs)
+    value_options: KgtkValueOptions = KgtkValueOptions.from_dict(kwargs)
+
+    # Show the final option structures for debugging and documentation.
+    if show_options:
+        print("--input-file=%s" % str(input_kgtk_file), file=error_file)
+        reader_options.show(out=error_file)
+        value_options.show(out=error_file)
+        print("=======", file=error_file, flush=True)
+
+    if str(input_kgtk_file) == "-" or str(input_kgtk_file).startswith("<") or not input_kgtk_file.is_file():
+        raise KGTKException("%s cannot be cached: it must be a file." % str(input_kgtk_file))
+
+    # The cache must hold every data line of the file, as it is in the file,
+    # since later readers sample, repair, and validate the rows themselves.
+    if not reader_options.passes_raw_lines():
+        raise KGTKException("The binary cache is built from all of the data lines of the file: " +
+                            "data sampling, line and value repair and validation, forced column names, " +
+                            "and non-KGTK input formats are not supported.")
+
+    try:
+        # Read the file itself, not an existing cache.
+        kr: KgtkReader = KgtkReader.open(input_kgtk_file,
+                                         error_file=error_file,
+                                         options=attr.evolve(reader_options, use_binary_cache=False, require_binary_cache=False),
+                                         value_options=value_options,
+                                         verbose=verbose,
+                                         very_verbose=very_verbose,
+        )
+
+        column_separator: str = reader_options.column_separator
+        binary_path: Path = KgtkBinaryFile.binary_path(input_kgtk_file)
+        row_count: int = KgtkBinaryFile.write(binary_path,
+                                              input_kgtk_file,
+                                              kr.header,
+                                              column_separator,
+                                              (line.rstrip("\r\n").split(column_separator) for line in kr.source))
+        kr.close()
+
+        if verbose:
+            print("Cached %d rows of %s in %s" % (row_count, str(input_kgtk_file), str(binary_path)), file=error_file, flush=True)
+
+        return 0
+
+    except SystemExit as e:
+        raise KGTKException("Exit requested")
+    except Exception as e:
+        raise KGTKException(str(e))
@@ -66,6 +66,26 @@ def add_arguments_extended(parser: KGTKArgumentParser, parsed_shared_args: Names
                               help="When True, the input file is presorted. (default=%(default)s).",
                               type=optional_bool, nargs='?', const=True, default=False)
 
+    parser.add_argument(      "--procs", dest="procs", type=int, default=1,
+                              help="Count the values in this many worker processes. (default=%(default)s).")
+
+    parser.add_argument(      "--approximate", dest="approximate", metavar="True|False",
+                              help="When True, write the top-k values by approximate count (Count-Min sketch) " +
+                              "and report the approximate number of distinct values (HyperLogLog). (default=%(default)s).",
+                              type=optional_bool, nargs='?', const=True, default=False)
+
+    parser.add_argument(      "--top-k", dest="top_k", type=int, default=1000,
+                              help="The number of values written in approximate mode. (default=%(default)s).")
+
+    parser.add_argument(      "--sketch-width", dest="sketch_width", type=int, default=1 << 20,
+                              help=h("The number of counters in each row of the Count-Min sketch. (default=%(default)s)."))
+
+    parser.add_argument(      "--sketch-depth", dest="sketch_depth", type=int, default=4,
+                              help=h("The number of rows in the Count-Min sketch. (default=%(default)s)."))
+
+    parser.add_argument(      "--distinct-precision", dest="distinct_precision", type=int, default=14,
+                              help=h("The HyperLogLog precision: 2**precision registers. (default=%(default)s)."))
+
     KgtkReader.add_debug_arguments(parser, expert=_expert)
     KgtkReaderOptions.add_arguments(parser, mode_options=True, expert=_expert)
     KgtkValueOptions.add_arguments(parser, expert=_expert)
@@ -85,6 +105,13 @@ def run(input_file: KGTKFiles,
 
         presorted: bool = False,
 
+        procs: int = 1,
+        approximate: bool = False,
+        top_k: int = 1000,
+        sketch_width: int = 1 << 20,
+        sketch_depth: int = 4,
+        distinct_precision: int = 14,
+
         errors_to_stdout: bool = False,
         errors_to_stderr: bool = True,
         show_options: bool = False,
@@ -128,6 +155,12 @@ def run(input_file: KGTKFiles,
         if where_values is not None and len(where_values) > 0:
             print("--in=%s" % " ".join(where_values), file=error_file)
         print("--prefix=%s" % repr(presorted), file=error_file)
+        print("--procs=%d" % procs, file=error_file)
+        print("--approximate=%s" % repr(approximate), file=error_file)
+        print("--top-k=%d" % top_k, file=error_file)
+        print("--sketch-width=%d" % sketch_width, file=error_file)
+        print("--sketch-depth=%d" % sketch_depth, file=error_file)
+        print("--distinct-precision=%d" % distinct_precision, file=error_file)
         reader_options.show(out=error_file)
         value_options.show(out=error_file)
         print("=======", file=error_file, flush=True)
@@ -144,6 +177,12 @@ def run(input_file: KGTKFiles,
             where_column_name=where_column_name,
             where_values=where_values,
             presorted=presorted,
+            procs=procs,
+            approximate=approximate,
+            top_k=top_k,
+            sketch_width=sketch_width,
+            sketch_depth=sketch_depth,
+            distinct_precision=distinct_precision,
             reader_options=reader_options,
             value_options=value_options,
             error_file=error_file,
@@ -31,6 +31,7 @@ def add_arguments_extended(parser: KGTKArgumentParser, parsed_shared_args: Names
         parser (argparse.ArgumentParser)
     """
     from kgtk.io.kgtkreader import KgtkReader, KgtkReaderOptions
+    from kgtk.unreify.kgtksortbuffer import KgtkSortBuffer
     from kgtk.unreify.kgtkunreifyvalues import KgtkUnreifyValues
     from kgtk.utils.argparsehelpers import optional_bool
     from kgtk.value.kgtkvalueoptions import KgtkValueOptions
@@ -72,6 +73,7 @@ def add_arguments_extended(parser: KGTKArgumentParser, parsed_shared_args: Names
                            optional=True)
     
     KgtkUnreifyValues.add_arguments(parser)
+    KgtkSortBuffer.add_arguments(parser)
     KgtkReader.add_debug_arguments(parser, expert=_expert)
     KgtkReaderOptions.add_arguments(parser, mode_options=True, expert=_expert)
     KgtkValueOptions.add_arguments(parser)
@@ -91,6 +93,9 @@ def run(input_file: KGTKFiles,
         allow_multiple_values: bool,
         allow_extra_columns: bool,
 
+        max_rows_in_memory: typing.Optional[int] = None,
+        temp_directory: typing.Optional[str] = None,
+
         errors_to_stdout: bool = False,
         errors_to_stderr: bool = True,
         show_options: bool = False,
@@ -141,6 +146,10 @@ def run(input_file: KGTKFiles,
 
         print("--allow-multiple-values=%s" % str(allow_multiple_values), file=error_file, flush=True)
         print("--allow-extra-columns=%s" % str(allow_extra_columns), file=error_file, flush=True)
+        if max_rows_in_memory is not None:
+            print("--max-rows-in-memory=%d" % max_rows_in_memory, file=error_file, flush=True)
+        if temp_directory is not None:
+            print("--temp-directory=%s" % str(temp_directory), file=error_file, flush=True)
 
         reader_options.show(out=error_file)
         value_options.show(out=error_file)
@@ -163,6 +172,9 @@ def run(input_file: KGTKFiles,
             allow_multiple_values=allow_multiple_values,
             allow_extra_columns=allow_extra_columns,
 
+            max_rows_in_memory=max_rows_in_memory,
+            temp_directory=Path(temp_directory) if temp_directory is not None else None,
+
             reader_options=reader_options,
             value_options=value_options,
             error_file=error_file,
@@ -2,6 +2,7 @@
 """
 from argparse import ArgumentParser, Namespace
 import attr
+import io
 import json
 from pathlib import Path
 import re
@@ -66,6 +67,12 @@ class ExportWikidata(KgtkFormat):
     verbose: bool = attr.ib(validator=attr.validators.instance_of(bool), default=False)
     very_verbose: bool = attr.ib(validator=attr.validators.instance_of(bool), default=False)
 
+    # Build the entity JSON in this many worker processes.  The parent reads
+    # the three inputs in aligned Qnode-range batches and writes the results
+    # in order.
+    procs: int = attr.ib(validator=attr.validators.instance_of(int), default=1)
+    qnode_batch_size: int = attr.ib(validator=attr.validators.instance_of(int), default=1000)
+
     node_alias_idx: int = attr.ib(default=-1)
     node_description_idx: int = attr.ib(default=-1)
     node_label_idx: int = attr.ib(default=-1)
@@ -180,9 +187,11 @@ class ExportWikidata(KgtkFormat):
         return result
 
     def build_qualifier_dict(self, qnode: str, qgr: GroupedReader)->typing.Mapping[str, typing.List[typing.List[str]]]:
+        return self.group_qualifiers(qgr.fetch(qnode))
+
+    def group_qualifiers(self, qualifiers: typing.List[typing.List[str]])->typing.Mapping[str, typing.List[typing.List[str]]]:
         result: typing.MutableMapping[str, typing.List[typing.List[str]]] = dict()
 
-        qualifiers: typing.List[typing.List[str]] = qgr.fetch(qnode)
         qualifier: typing.List[str]
         for qualifier in qualifiers:
             edge_id: str = qualifier[self.qual_node1_idx]
@@ -608,14 +617,71 @@ class ExportWikidata(KgtkFormat):
         if self.very_verbose:
             print("Processing qnode %s" % qnode)
 
+        return self.build_qnode(qnode_info, egr.fetch(qnode), qgr.fetch(qnode))
+
+    def build_qnode(self,
+                    qnode_info: typing.List[str],
+                    edges: typing.List[typing.List[str]],
+                    qualifiers: typing.List[typing.List[str]],
+    )->typing.Mapping[str, typing.Any]:
+        """
+        Build the entity JSON for a qnode from its node row and the edge and
+        qualifier rows already fetched for it.
+        """
+        qnode: str = qnode_info[self.node_qnode_idx]
         result: typing.MutableMapping[str, typing.Any] =  self.process_qnode_info(qnode, qnode_info)
 
-        edges: typing.List[typing.List[str]] = egr.fetch(qnode)
-        qualifier_dict: typing.Mapping[str, typing.List[typing.List[str]]] = self.build_qualifier_dict(qnode, qgr)
+        qualifier_dict: typing.Mapping[str, typing.List[typing.List[str]]] = self.group_qualifiers(qualifiers)
 
         self.process_qnode_edges(result, qnode, edges, qualifier_dict)
         
         return result
+
+    def qnode_batches(self,
+                      nr: KgtkReader,
+                      egr: GroupedReader,
+                      qgr: GroupedReader,
+    )->typing.Iterator[typing.List[typing.Tuple[typing.List[str], typing.List[typing.List[str]], typing.List[typing.List[str]]]]]:
+        """
+        Read the presorted node, edge, and qualifier files in step, yielding
+        batches of (node row, edge rows, qualifier rows) for consecutive qnodes.
+        """
+        batch: typing.List[typing.Tuple[typing.List[str], typing.List[typing.List[str]], typing.List[typing.List[str]]]] = [ ]
+        qnode_info: typing.List[str]
+        for qnode_info in nr:
+            qnode: str = qnode_info[self.node_qnode_idx]
+            batch.append((qnode_info, egr.fetch(qnode), qgr.fetch(qnode)))
+            if len(batch) >= self.qnode_batch_size:
+                yield batch
+                batch = [ ]
+        if len(batch) > 0:
+            yield batch
+
+    def process_in_parallel(self,
+                            nr: KgtkReader,
+                            egr: GroupedReader,
+                            qgr: GroupedReader,
+    )->typing.Iterator[str]:
+        """
+        Yield the serialized entity JSON for each qnode, in node file order,
+        building the entities in a process pool.
+        """
+        from multiprocessing import Pool
+        from kgtk.utils.orderedpool import ordered_imap
+
+        # The workers need the column indexes and options, but not the parent's error file.
+        worker_exporter: ExportWikidata = attr.evolve(self, error_file=None)
+        with Pool(self.procs, initializer=_init_export_worker, initargs=(worker_exporter,)) as pool:
+            results: typing.List[str]
+            messages: str
+            for results, messages in ordered_imap(pool,
+                                                  _export_qnode_batch,
+                                                  self.qnode_batches(nr, egr, qgr),
+                                                  backlog=2 * self.procs):
+                if len(messages) > 0:
+                    self.error_file.write(messages)
+                    self.error_file.flush()
+                yield from results
             
     def get_required_columns(self, nr: KgtkReader, er: KgtkReader, qr: KgtkReader):
         self.node_qnode_idx = nr.id_column_idx
@@ -728,6 +794,26 @@ class ExportWikidata(KgtkFormat):
         if self.qual_calendar_idx < 0:
             raise ValueError("The qual file does not have a calendar column.")
 
+    def entity_jsons(self,
+                     nr: KgtkReader,
+                     egr: GroupedReader,
+                     qgr: GroupedReader,
+    )->typing.Iterator[str]:
+        if self.procs > 1:
+            yield from self.process_in_parallel(nr, egr, qgr)
+            return
+
+        qnode_info: typing.List[str]
+        for qnode_info in nr:
+            result: typing.Mapping[str, typing.Any] = self.process_qnode(qnode_info,
+                                                                         egr=egr,
+                                                                         qgr=qgr)
+            yield self.dump_entity(result)
+
+    @staticmethod
+    def dump_entity(result: typing.Mapping[str, typing.Any])->str:
+        return json.dumps(result, indent=None, separators=(',', ':'), sort_keys=True)
+
     def process(self):
 
         if self.verbose:
@@ -771,21 +857,46 @@ class ExportWikidata(KgtkFormat):
 
         qnode_count: int = 0
         first: bool = True
-        qnode_info: typing.List[str]
-        for qnode_info in nr:
-            result: typing.Mapping[str, typing.Any] = self.process_qnode(qnode_info,
-                                                                         egr=egr,
-                                                                         qgr=qgr)
+        entity_json: str
+        for entity_json in self.entity_jsons(nr, egr, qgr):
             if first:
                 first = False
                 outfile.write("\n")
             else:
                 outfile.write(",\n")
-            outfile.write(json.dumps(result, indent=None, separators=(',', ':'), sort_keys=True))
+            outfile.write(entity_json)
 
         outfile.write("\n]\n")
         outfile.close()
 
+_export_worker: typing.Optional[ExportWikidata] = None
+
+def _init_export_worker(exporter: ExportWikidata):
+    global _export_worker
+    _export_worker = exporter
+
+def _export_qnode_batch(batch: typing.List[typing.Tuple[typing.List[str], typing.List[typing.List[str]], typing.List[typing.List[str]]]],
+)->typing.Tuple[typing.List[str], str]:
+    """
+    Build the entity JSON for a batch of qnodes in a worker process.  Return
+    the serialized entities and the messages that the parent should write to
+    its error file.
+    """
+    exporter: typing.Optional[ExportWikidata] = _export_worker
+    if exporter is None:
+        raise ValueError("The export worker has not been initialized.")
+    messages: io.StringIO = io.StringIO()
+    exporter.error_file = messages
+    results: typing.List[str] = [ ]
+    qnode_info: typing.List[str]
+    edges: typing.List[typing.List[str]]
+    qualifiers: typing.List[typing.List[str]]
+    for qnode_info, edges, qualifiers in batch:
+        if exporter.very_verbose:
+            print("Processing qnode %s" % qnode_info[exporter.node_qnode_idx], file=messages)
+        results.append(exporter.dump_entity(exporter.build_qnode(qnode_info, edges, qualifiers)))
+    return results, messages.getvalue()
+
 def main():
     """
     Test the Wikidata Exporter.
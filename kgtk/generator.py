@@ -1,6 +1,10 @@
+import io
+import os
 import re
+import sys
 import json
 import gzip
+import typing
 import rfc3986
 from etk.etk import ETK
 from etk.etk_module import ETKModule
@@ -21,12 +25,16 @@ from etk.wikidata.value import (
     ExternalIdentifier,
     URLValue
 )
-from etk.knowledge_graph.node import LiteralType
+from etk.knowledge_graph.node import Literal, LiteralType
+from uuid import uuid4
 import warnings
 
 BAD_CHARS = [":", "&", ",", " ",
              "(", ")", "\'", '\"', "/", "\\", "[", "]", ";", "|"]
 
+# Local names that can be written as prefixed names in Turtle without escaping.
+SAFE_LOCAL_NAME = re.compile(r"^[A-Za-z0-9_][A-Za-z0-9_\-]*$")
+
 
 class Generator:
     def __init__(self, **kwargs):
@@ -159,6 +167,8 @@ class Generator:
 
 class TripleGenerator(Generator):
     def __init__(self, **kwargs):
+        # Keep the settings so that generate_in_parallel() can build worker generators.
+        self.generator_kwargs = {k: v for k, v in kwargs.items() if k != "dest_fp"}
         super().__init__(**kwargs)
         prop_declaration = kwargs.pop("prop_declaration")
         dest_fp = kwargs.pop("dest_fp")
@@ -552,9 +562,431 @@ class TripleGenerator(Generator):
             return LiteralType.double
         return LiteralType.decimal
 
+    def shard_lines(self,
+                    lines: typing.Iterable[typing.Tuple[int, str]],
+                    shard_size: int,
+                    ) -> typing.Iterator[typing.Tuple[typing.Dict[str, str], typing.List[typing.Tuple[int, str]]]]:
+        """
+        Split the numbered data lines (after the header) into shards of about shard_size lines.
+        A shard only ends before a statement edge, so the qualifier edges that follow a
+        statement stay in its shard.  Each shard is returned with the in-file property
+        declarations in the shards before it, since entry_point() adds those to prop_types
+        as it goes.  The shard's own declarations are added when the worker processes them.
+        """
+        declarations: typing.Dict[str, str] = {}
+        shard_declarations: typing.Dict[str, str] = {}
+        shard: typing.List[typing.Tuple[int, str]] = []
+        statement_id: typing.Optional[str] = None
+        for line_number, edge in lines:
+            node1, node2, prop, e_id = self.parse_edges(edge)
+            if node1 != statement_id:
+                # A statement edge.
+                if len(shard) >= shard_size:
+                    yield shard_declarations, shard
+                    shard_declarations = dict(declarations)
+                    shard = []
+                statement_id = e_id
+            shard.append((line_number, edge))
+            if (prop == "data_type" or prop == "datatype") and node1 not in self.prop_types:
+                declarations.setdefault(node1, node2)
+        if len(shard) > 0:
+            yield shard_declarations, shard
+
+    def generate_in_parallel(self,
+                             lines: typing.Iterable[typing.Tuple[int, str]],
+                             procs: int,
+                             shard_size: int,
+                             ):
+        """
+        Generate triples for the numbered input lines in procs worker processes.  The first
+        line must be the header.  The shards are serialized by the workers and written to
+        this generator's output, in input order, after the prefix header written by __init__.
+        Property declarations read before the first data line are passed to the workers.
+        """
+        lines = iter(lines)
+        try:
+            line_number, header = next(lines)
+        except StopIteration:
+            return
+        self.entry_point(line_number, header)
+
+        try:
+            for ttl, warnings_text, error in self._generate_shards(lines, procs, shard_size, header):
+                if self.warning:
+                    self.warn_log.write(warnings_text)
+                if error is not None:
+                    raise KGTKException(error)
+                self.fp.write(ttl)
+                self.fp.flush()
+        finally:
+            self.reset()
+
+    def _generate_shards(self, lines, procs: int, shard_size: int, header: str):
+        from multiprocessing import Pool
+        from kgtk.utils.orderedpool import ordered_imap
+
+        shards = self.shard_lines(lines, shard_size)
+        try:
+            first_shard = next(shards)
+        except StopIteration:
+            return
+
+        def all_shards():
+            yield first_shard
+            yield from shards
+
+        # The pool is started after the first shard is read so that the workers
+        # see the property declarations read from the front of the input.
+        with Pool(procs,
+                  initializer=_init_triple_worker,
+                  initargs=(type(self), self.generator_kwargs, header, dict(self.prop_types))) as pool:
+            yield from ordered_imap(pool, _generate_triple_shard, all_shards(), backlog=2 * procs)
+
+
+_triple_worker: typing.Optional[TripleGenerator] = None
+
+
+def _init_triple_worker(generator_class: type, generator_kwargs: dict, header: str, prop_types: dict):
+    global _triple_worker
+    kwargs = dict(generator_kwargs)
+    # The parent writes the prefix header and the warnings; the property types
+    # have already been read by the parent.
+    kwargs.update(dest_fp=io.StringIO(), prop_file="NONE", log_path=os.devnull)
+    _triple_worker = generator_class(**kwargs)
+    _triple_worker.entry_point(1, header)
+    _triple_worker.base_prop_types = prop_types
+
+
+def _generate_triple_shard(shard) -> typing.Tuple[str, str, typing.Optional[str]]:
+    declarations, lines = shard
+    generator = _triple_worker
+    generator.reset()
+    generator.fp = io.StringIO()
+    generator.warn_log = io.StringIO()
+    generator.prop_types = dict(generator.base_prop_types)
+    generator.prop_types.update(declarations)
+    generator.corrupted_statement_id = None
+    try:
+        for line_number, edge in lines:
+            generator.entry_point(line_number, edge)
+        generator.serialize()
+    except KGTKException as e:
+        # KGTKException is a BaseException, which would kill the pool worker
+        # instead of being passed back, so pass back its message.
+        return "", generator.warn_log.getvalue(), e.message
+    return generator.fp.getvalue(), generator.warn_log.getvalue(), None
+
+
+class FastTripleGenerator(TripleGenerator):
+    """
+    Generate the same triples as TripleGenerator, but write them directly as
+    text, one triple per line, instead of building etk documents and
+    serializing them through rdflib.  The output is Turtle with prefixed
+    names, so it must be read with the prefix header.  It is not N-Triples,
+    but each triple is written on a single line.
+
+    Within each block of n lines, the descriptions of entities and value
+    nodes are written once, as rdflib would merge them.
+    """
+
+    TYPE_URI = "<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>"
+    CREATED_BY = "<http://www.isi.edu/etk/createdBy>"
+    CREATOR = "<http://www.isi.edu/datamart>"
+    WKT_LITERAL = "<http://www.opengis.net/ont/geosparql#wktLiteral>"
+    CALENDAR = "wd:Q1985727"
+    EARTH = "wd:Q2"
+
+    # The property description added by etk's WDProperty.
+    PROPERTY_TEMPLATE = [("wikibase:directClaim", "wdt"),
+                         ("wikibase:directClaimNormalized", "wdtn"),
+                         ("wikibase:claim", "p"),
+                         ("wikibase:statementProperty", "ps"),
+                         ("wikibase:statementValue", "psv"),
+                         ("wikibase:statementValueNormalized", "psn"),
+                         ("wikibase:qualifier", "pq"),
+                         ("wikibase:qualifierValue", "pqv"),
+                         ("wikibase:qualifierValueNormalized", "pqn"),
+                         ("wikibase:reference", "pr"),
+                         ("wikibase:referenceValue", "prv"),
+                         ("wikibase:referenceValueNormalized", "prn"),
+                         ("wikibase:novalue", "wdno")]
+
+    def set_prefix(self, prefix_path: str):
+        super().set_prefix(prefix_path)
+        self.namespaces = {
+            "rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+            "rdfs": "http://www.w3.org/2000/01/rdf-schema#",
+            "xsd": "http://www.w3.org/2001/XMLSchema#",
+        }
+        for k, v in wiki_namespaces.items():
+            self.namespaces[k] = self.prefix_dict.get(k, v)
+
+    def reset_etk_doc(self, doc_id: str = "http://isi.edu/default-ns/projects"):
+        self.lines = []
+        self.described = set()
+
+    def serialize(self):
+        self.fp.write("".join(self.lines))
+        self.fp.flush()
+        self.reset()
+
+    def serialize_prefix(self):
+        """
+        Unlike the etk path, also declare the rdf, rdfs, and xsd prefixes, which the triples use.
+        """
+        for k, v in self.namespaces.items():
+            self.fp.write("@prefix " + k + ": <" + v + "> .\n")
+        self.fp.write("\n")
+        self.fp.flush()
+        self.reset()
+
+    def uri(self, prefix: str, local: str) -> str:
+        if SAFE_LOCAL_NAME.match(local):
+            return prefix + ":" + local
+        return "<" + self.namespaces[prefix] + local + ">"
+
+    @staticmethod
+    def literal(value: str, lang: typing.Optional[str] = None, datatype: typing.Optional[str] = None) -> str:
+        text = '"' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n").replace("\r", "\\r") + '"'
+        if lang:
+            return text + "@" + lang
+        if datatype:
+            return text + "^^" + datatype
+        return text
+
+    def add_triple(self, s: str, p: str, o: str):
+        self.lines.append(s + " " + p + " " + o + " .\n")
+
+    def describe_item(self, node: str) -> str:
+        subject = self.uri("wd", node)
+        if subject not in self.described:
+            self.described.add(subject)
+            self.add_triple(subject, self.TYPE_URI, "wikibase:Item")
+        return subject
+
+    def describe_property(self, node: str, datatype) -> str:
+        subject = self.uri("wd", node)
+        if subject not in self.described:
+            self.described.add(subject)
+            if isinstance(datatype, str):
+                datatype = self.datatype_mapping[datatype]
+            self.add_triple(subject, self.TYPE_URI, "wikibase:Property")
+            self.add_triple(subject, "wikibase:propertyType", datatype.type.value)
+            for predicate, prefix in self.PROPERTY_TEMPLATE:
+                self.add_triple(subject, predicate, self.uri(prefix, node))
+        return subject
+
+    def _entity_id(self, node: str) -> str:
+        """
+        Return the node id used in the entity's URI and its statement ids.
+        """
+        if node in self.prop_types:
+            return node
+        return TripleGenerator.replace_illegal_string(node)
+
+    def _node_2_entity(self, node: str) -> str:
+        """
+        Describe the entity (once per block) and return its subject.
+        """
+        if node in self.prop_types:
+            return self.describe_property(node, self.prop_types[node])
+        return self.describe_item(TripleGenerator.replace_illegal_string(node))
+
+    def generate_label_triple(self, node1: str, node2: str) -> bool:
+        subject = self._node_2_entity(node1)
+        text_string, lang = TripleGenerator.process_text_string(node2)
+        label = self.literal(text_string, lang=lang)
+        self.add_triple(subject, "rdfs:label", label)
+        self.add_triple(subject, "schema:name", label)
+        self.add_triple(subject, "skos:prefLabel", label)
+        return True
+
+    def generate_description_triple(self, node1: str, node2: str) -> bool:
+        subject = self._node_2_entity(node1)
+        text_string, lang = TripleGenerator.process_text_string(node2)
+        self.add_triple(subject, "schema:description", self.literal(text_string, lang=lang))
+        return True
+
+    def generate_alias_triple(self, node1: str, node2: str) -> bool:
+        subject = self._node_2_entity(node1)
+        text_string, lang = TripleGenerator.process_text_string(node2)
+        self.add_triple(subject, "skos:altLabel", self.literal(text_string, lang=lang))
+        return True
+
+    def generate_prop_declaration_triple(self, node1: str, node2: str) -> bool:
+        # update the known prop_types
+        if node1 in self.prop_types:
+            if not self.prop_declaration:
+                raise KGTKException("Duplicated property definition of {} found!".format(node1))
+        else:
+            self.prop_types[node1] = node2
+
+        self.described.discard(self.uri("wd", node1))
+        self.describe_property(node1, self.datatype_mapping[node2])
+        return True
+
+    def time_value(self, value: str, precision: str):
+        """
+        Return the value, full value, and normalized value terms of a time, or None if etk would reject it.
+        """
+        if not Literal(value, type_=LiteralType.dateTime).is_valid():
+            return None
+        full_value = self.uri("wdv", "c".join(("Time", value.replace(":", "").replace(" ", "-"), "Q", precision, "0")))
+        literal = self.literal(value, datatype="xsd:dateTime")
+        if full_value not in self.described:
+            self.described.add(full_value)
+            self.add_triple(full_value, self.TYPE_URI, "wikibase:Time")
+            self.add_triple(full_value, "wikibase:timePrecision", self.literal(precision, datatype="xsd:integer"))
+            self.add_triple(full_value, "wikibase:timeTimezone", self.literal("0", datatype="xsd:integer"))
+            self.add_triple(full_value, "wikibase:timeCalendarModel", self.CALENDAR)
+            self.add_triple(full_value, "wikibase:timeValue", literal)
+        return literal, full_value, None
+
+    def quantity_value(self, amount: str, lower_bound, upper_bound, unit):
+        num_type = "xsd:decimal" if self.xsd_number_type(amount) == LiteralType.decimal else "xsd:double"
+        full_value = self.uri("wdv", "c".join(("Quantity",
+                                               amount.replace(".", "-"),
+                                               upper_bound if upper_bound is not None else "0",
+                                               lower_bound if lower_bound is not None else "0",
+                                               unit if unit is not None else "0")))
+        literal = self.literal(amount, datatype=num_type)
+        if full_value not in self.described:
+            self.described.add(full_value)
+            self.add_triple(full_value, self.TYPE_URI, "wikibase:QuantityValue")
+            self.add_triple(full_value, "wikibase:quantityAmount", literal)
+            if upper_bound is not None:
+                self.add_triple(full_value, "wikibase:quantityUpperBound", self.literal(upper_bound, datatype=num_type))
+            if lower_bound is not None:
+                self.add_triple(full_value, "wikibase:quantityLowerBound", self.literal(lower_bound, datatype=num_type))
+            if unit is not None:
+                self.add_triple(full_value, "wikibase:quantityUnit", self.uri("wd", unit))
+            self.add_triple(full_value, "wikibase:quantityNormalized", full_value)
+        return literal, full_value, full_value
+
+    def globe_coordinate_value(self, latitude: float, longitude: float):
+        precision = str(0.0001)
+        full_value = self.uri("wdv", "c".join(("GlobeCoordinate", "Q2", str(latitude), str(longitude), precision)))
+        literal = self.literal("<http://www.wikidata.org/entity/Q2> Point({} {})".format(latitude, longitude),
+                               datatype=self.WKT_LITERAL)
+        if full_value not in self.described:
+            self.described.add(full_value)
+            self.add_triple(full_value, self.TYPE_URI, "wikibase:GlobecoordinateValue")
+            self.add_triple(full_value, "wikibase:geoGlobe", self.EARTH)
+            self.add_triple(full_value, "wikibase:geoLatitude", self.literal(str(latitude), datatype="xsd:decimal"))
+            self.add_triple(full_value, "wikibase:geoLongitude", self.literal(str(longitude), datatype="xsd:decimal"))
+            self.add_triple(full_value, "wikibase:geoPrecision", self.literal(precision, datatype="xsd:decimal"))
+        return literal, full_value, None
+
+    def generate_normal_triple(
+            self, node1: str, property: str, node2: str, is_qualifier_edge: bool, e_id: str, line_number: int) -> bool:
+        if self.use_id:
+            e_id = TripleGenerator.replace_illegal_string(e_id)
+        node_id = self._entity_id(node1)
+        edge_type = self.prop_types[property]
+        full_value = None
+        normalized_value = None
+        if edge_type == Item:
+            value = self.describe_item(TripleGenerator.replace_illegal_string(node2))
+        elif edge_type == WDProperty:
+            value = self.describe_property(TripleGenerator.replace_illegal_string(node2), self.prop_types[node2])
+
+        elif edge_type == TimeValue:
+            if self.yyyy_mm_dd_pattern.match(node2):
+                result = self.time_value(node2, Precision.year.value.value)
+            elif self.yyyy_pattern.match(node2):
+                result = self.time_value(node2 + "-01-01", Precision.year.value.value)
+            else:
+                try:
+                    assert (node2[0] == "^")
+                    node2 = node2[1:]  # remove ^
+                    if node2.startswith("+"):
+                        node2 = node2[1:]
+                    dateTimeString, precision = node2.split("/")
+                    dateTimeString = dateTimeString[:-1]  # remove Z
+                    result = self.time_value(dateTimeString, str(precision))
+                except:
+                    return False
+            if result is None:
+                return False
+            value, full_value, normalized_value = result
+
+        elif edge_type == GlobeCoordinate:
+            latitude, longitude = node2[1:].split("/")
+            value, full_value, normalized_value = self.globe_coordinate_value(float(latitude), float(longitude))
+
+        elif edge_type == QuantityValue:
+            # +70[+60,+80]Q743895
+            try:
+                res = self.quantity_pattern.match(node2)
+                if self.warning and res == None:
+                    warnings.warn("Node2 [{}] at line [{}] is not a legal quantity. Skipping it.\n".format(
+                        node2, line_number))
+
+                    return False
+                res = res.groups()
+
+            except:
+                raise KGTKException(
+                    "Node2 [{}] at line [{}] is not a legal quantity.\n".format(
+                        node2, line_number)
+                )
+
+            amount, lower_bound, upper_bound, unit = res
+            amount = TripleGenerator.clean_number_string(amount)
+            lower_bound = TripleGenerator.clean_number_string(lower_bound)
+            upper_bound = TripleGenerator.clean_number_string(upper_bound)
+            if upper_bound is None or lower_bound is None:
+                upper_bound = lower_bound = None
+            value, full_value, normalized_value = self.quantity_value(amount, lower_bound, upper_bound, unit)
+
+        elif edge_type == MonolingualText:
+            text_string, lang = TripleGenerator.process_text_string(node2)
+            value = self.literal(text_string, lang=lang)
+        elif edge_type == ExternalIdentifier:
+            value = self.literal(node2, datatype="xsd:string")
+        elif edge_type == URLValue:
+            if TripleGenerator.is_valid_uri_with_scheme_and_host(node2):
+                value = "<" + node2 + ">"
+            else:
+                return False
+        else:
+            # treat everything else as stringValue
+            value = self.literal(node2, datatype="xsd:string")
+
+        if is_qualifier_edge:
+            # edge: e8 p9 ^2013-01-01T00:00:00Z/11
+            # add the qualifier to the previous STATEMENT
+            statement = self.to_append_statement
+            prefix = "pq"
+        else:
+            # edge: q1 p8 q2 e8
+            subject = self._node_2_entity(node1)
+            statement_id = e_id if self.use_id else str(uuid4())
+            statement = self.uri("wds", node_id + "-" + statement_id)
+            self.add_triple(statement, self.TYPE_URI, "wikibase:Statement")
+            self.add_triple(statement, "wikibase:rank",
+                            "wikibase:BestRank" if self.truthy else "wikibase:NormalRank")
+            self.add_triple(statement, self.CREATED_BY, self.CREATOR)
+            self.add_triple(subject, self.uri("p", property), statement)
+            if self.truthy:
+                self.add_triple(subject, self.uri("wdt", property), value)
+                if normalized_value is not None:
+                    self.add_triple(subject, self.uri("wdtn", property), normalized_value)
+            self.to_append_statement = statement
+            prefix = "ps"
+
+        self.add_triple(statement, self.uri(prefix, property), value)
+        if full_value is not None:
+            self.add_triple(statement, self.uri(prefix + "v", property), full_value)
+        if normalized_value is not None:
+            self.add_triple(statement, self.uri(prefix + "n", property), normalized_value)
+        return True
+
 
 class JsonGenerator(Generator):
     def __init__(self, **kwargs):
+        # Keep the settings so that generate_grouped() can build worker generators.
+        self.generator_kwargs = dict(kwargs)
         super().__init__(**kwargs)
         self.prop_declaration = kwargs.pop("prop_declaration")
         self.output_prefix = kwargs.pop("output_prefix")
@@ -1217,3 +1649,173 @@ class JsonGenerator(Generator):
         self.read_num_of_lines = 0
         self.to_append_statement_id = None
         self.to_append_statement = None
+
+    def group_lines(self,
+                    lines: typing.Iterable[typing.Tuple[int, str]],
+                    ) -> typing.Iterator[typing.Tuple[typing.Dict[str, str], typing.List[typing.Tuple[int, str]]]]:
+        """
+        Split the numbered data lines (after the header) into entity groups.  A group
+        holds the consecutive edges of one node1 together with the qualifier edges of
+        its statements, and ends at the first statement edge with a different node1.
+        Each group is returned with the in-file property declarations read so far.
+        """
+        label_props = self.label_set | self.description_set | self.alias_set
+        declarations: typing.Dict[str, str] = {}
+        group: typing.List[typing.Tuple[int, str]] = []
+        group_node: typing.Optional[str] = None
+        statement_id: typing.Optional[str] = None
+        for line_number, edge in lines:
+            node1, node2, prop, e_id = self.parse_edges(edge)
+            if prop == "data_type" and self.prop_declaration:
+                # entry_point() records the declaration and skips the edge.
+                declarations = dict(declarations)
+                declarations[node1] = self.datatype_mapping[node2.strip()]
+                group.append((line_number, edge))
+                continue
+            if node1 != statement_id:
+                # A statement (or label, alias or description) edge.
+                if group_node is not None and node1 != group_node:
+                    yield declarations, group
+                    group = []
+                group_node = node1
+                if prop not in label_props:
+                    statement_id = e_id
+            group.append((line_number, edge))
+        if len(group) > 0:
+            yield declarations, group
+
+    def generate_grouped(self,
+                         lines: typing.Iterable[typing.Tuple[int, str]],
+                         procs: int = 1,
+                         group_batch_size: int = 1000,
+                         ):
+        """
+        Generate the jsons of node1-grouped input one entity group at a time, so that
+        only one entity is held in memory per process.  The first line must be the
+        header.  With procs > 1 batches of about group_batch_size groups are
+        processed in worker processes.  The records are written in input order to
+        {output_prefix}{file_num}.jsonl files of about n records each.  An entity
+        record is written for every group; a node that is only referenced (a property
+        or a wikibase-item value) gets a stub record the first time it is seen, unless
+        its own record has already been written.  Closes the warning log, like finalize().
+        """
+        lines = iter(lines)
+        try:
+            line_number, header = next(lines)
+        except StopIteration:
+            self.finalize()
+            return
+        self.entry_point(line_number, header)
+
+        written: typing.Set[str] = set()
+        fp: typing.Optional[typing.TextIO] = None
+        records_in_file: int = 0
+        try:
+            for results, warnings_text, error in self._generate_group_batches(lines, procs, group_batch_size, header):
+                if self.warning:
+                    self.warn_log.write(warnings_text)
+                if error is not None:
+                    raise KGTKException(error)
+                for records in results:
+                    if fp is None or records_in_file >= self.n:
+                        if fp is not None:
+                            fp.close()
+                        fp = open("{}{}.jsonl".format(self.output_prefix, self.file_num), "w")
+                        self.file_num += 1
+                        records_in_file = 0
+                    for node, record, is_entity in records:
+                        if is_entity or node not in written:
+                            fp.write(record)
+                            fp.write("\n")
+                            written.add(node)
+                            records_in_file += 1
+            if fp is None:
+                # Match serialize(), which always writes a file.
+                fp = open("{}{}.jsonl".format(self.output_prefix, self.file_num), "w")
+                self.file_num += 1
+        finally:
+            if fp is not None:
+                fp.close()
+            if self.warning:
+                self.warn_log.close()
+            self.reset()
+
+    def _generate_group_batches(self, lines, procs: int, group_batch_size: int, header: str):
+        def batches():
+            batch = []
+            declarations = {}
+            for declarations, group in self.group_lines(lines):
+                batch.append(group)
+                if len(batch) >= group_batch_size:
+                    yield declarations, batch
+                    batch = []
+            if len(batch) > 0:
+                yield declarations, batch
+
+        worker_args = (type(self), self.generator_kwargs, header)
+        if procs <= 1:
+            _init_json_worker(*worker_args, dict(self.prop_types))
+            for batch in batches():
+                yield _generate_json_groups(batch)
+            return
+
+        from multiprocessing import Pool
+        from kgtk.utils.orderedpool import ordered_imap
+
+        all_batches = batches()
+        try:
+            first_batch = next(all_batches)
+        except StopIteration:
+            return
+
+        def started_batches():
+            yield first_batch
+            yield from all_batches
+
+        # The pool is started after the first batch is read so that the workers
+        # see the property declarations read from the front of the input.
+        with Pool(procs,
+                  initializer=_init_json_worker,
+                  initargs=(*worker_args, dict(self.prop_types))) as pool:
+            yield from ordered_imap(pool, _generate_json_groups, started_batches(), backlog=2 * procs)
+
+
+_json_worker: typing.Optional[JsonGenerator] = None
+
+
+def _init_json_worker(generator_class: type, generator_kwargs: dict, header: str, prop_types: dict):
+    global _json_worker
+    kwargs = dict(generator_kwargs)
+    # The parent writes the output files and the warnings; the property types
+    # have already been read by the parent.  A large n keeps entry_point()
+    # from serializing in the middle of a group.
+    kwargs.update(prop_file="NONE", log_path=os.devnull, n=sys.maxsize)
+    _json_worker = generator_class(**kwargs)
+    _json_worker.entry_point(1, header)
+    _json_worker.base_prop_types = prop_types
+
+
+def _generate_json_groups(batch) -> typing.Tuple[typing.List[typing.List[typing.Tuple[str, str, bool]]],
+                                                 str,
+                                                 typing.Optional[str]]:
+    declarations, groups = batch
+    generator = _json_worker
+    generator.warn_log = io.StringIO()
+    generator.prop_types = dict(generator.base_prop_types)
+    generator.prop_types.update(declarations)
+    results = []
+    try:
+        for group in groups:
+            generator.reset()
+            generator.corrupted_statement_id = None
+            generator.previous_qnode = None
+            for line_number, edge in group:
+                generator.entry_point(line_number, edge)
+            group_node = generator.previous_qnode
+            results.append([(node, json.dumps({node: value}), node == group_node)
+                            for node, value in generator.misc_json_dict.items()])
+    except KGTKException as e:
+        # KGTKException is a BaseException, which would kill the pool worker
+        # instead of being passed back, so pass back its message.
+        return [], generator.warn_log.getvalue(), e.message
+    return results, generator.warn_log.getvalue(), None
@@ -10,10 +10,13 @@ import random
 import logging
 from abc import ABC, abstractmethod
 from contextlib import ExitStack
+from multiprocessing import Pool
 from pathlib import Path
 import gzip
-from typing import Any, Counter, Dict, Iterable, List, Optional, Tuple
+import sys
+from typing import Any, Counter, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
 
+import numpy as np
 import torch
 from torchbiggraph.config import EntitySchema, RelationSchema
 from torchbiggraph.converters.dictionary import Dictionary
@@ -30,6 +33,9 @@ from torchbiggraph.graph_storages import (
 )
 # from torchbiggraph.types import UNPARTITIONED
 
+from kgtk.io.kgtkreader import KgtkReaderOptions
+from kgtk.value.kgtkvalueoptions import KgtkValueOptions
+
 
 class EdgelistReader(ABC):
     @abstractmethod
@@ -400,6 +406,367 @@ def convert_input_data(
         )
 
 
+# The single-pass KGTK importer.
+#
+# The functions above read the edge list three times (relation types,
+# entities, edges) and append the edges one at a time.  The functions below
+# read the KGTK edge file once.  The file is split into line-aligned chunks
+# that are parsed in worker processes; each worker interns its entity and
+# relation names into chunk-local integer ids.  The parent merges the
+# chunk dictionaries, remaps the chunk arrays to global ids with numpy, and
+# writes each partitioned HDF5 edge bucket with a single save_edges() call.
+
+
+class InternedChunk:
+    """The entity and relation names seen in a chunk, and its edges as local ids."""
+    def __init__(self,
+                 entity_names: List[str],
+                 relation_names: List[str],
+                 lhs: np.ndarray,
+                 rel: np.ndarray,
+                 rhs: np.ndarray,
+                 ):
+        self.entity_names = entity_names
+        self.relation_names = relation_names
+        self.lhs = lhs
+        self.rel = rel
+        self.rhs = rhs
+
+
+def intern_rows(rows: Iterable[Sequence[str]],
+                lhs_col: int,
+                rel_col: int,
+                rhs_col: int,
+                ) -> InternedChunk:
+    entity_ids: Dict[str, int] = {}
+    relation_ids: Dict[str, int] = {}
+    lhs: List[int] = []
+    rel: List[int] = []
+    rhs: List[int] = []
+    needed: int = max(lhs_col, rel_col, rhs_col) + 1
+
+    for words in rows:
+        if len(words) < needed:
+            raise RuntimeError(f"Row has only {len(words)} columns: {words!r}")
+        lhs.append(entity_ids.setdefault(words[lhs_col], len(entity_ids)))
+        rel.append(relation_ids.setdefault(words[rel_col], len(relation_ids)))
+        rhs.append(entity_ids.setdefault(words[rhs_col], len(entity_ids)))
+
+    return InternedChunk(list(entity_ids.keys()),
+                         list(relation_ids.keys()),
+                         np.array(lhs, dtype=np.int32),
+                         np.array(rel, dtype=np.int32),
+                         np.array(rhs, dtype=np.int32))
+
+
+def intern_lines(lines: Iterable[str],
+                 lhs_col: int,
+                 rel_col: int,
+                 rhs_col: int,
+                 column_separator: str = "\t",
+                 ) -> InternedChunk:
+    needed: int = max(lhs_col, rel_col, rhs_col) + 1
+
+    def split_lines() -> Iterator[List[str]]:
+        for line in lines:
+            line = line.rstrip("\r\n")
+            if len(line) == 0 or line[0] == "#":
+                continue
+            yield line.split(column_separator, needed)
+
+    return intern_rows(split_lines(), lhs_col, rel_col, rhs_col)
+
+
+def _intern_range(args: Tuple[Path, int, int, int, int, int, str]) -> InternedChunk:
+    from kgtk.utils.filechunks import iter_range_lines
+    path, start, end, lhs_col, rel_col, rhs_col, column_separator = args
+    return intern_lines(iter_range_lines(path, start, end), lhs_col, rel_col, rhs_col, column_separator)
+
+
+def _intern_batch(args: Tuple[List[str], int, int, int, str]) -> InternedChunk:
+    lines, lhs_col, rel_col, rhs_col, column_separator = args
+    return intern_lines(lines, lhs_col, rel_col, rhs_col, column_separator)
+
+
+def _intern_row_batch(args: Tuple[List[List[str]], int, int, int]) -> InternedChunk:
+    rows, lhs_col, rel_col, rhs_col = args
+    return intern_rows(rows, lhs_col, rel_col, rhs_col)
+
+
+def _batch_lines(lines: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+    batch: List[Any] = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if len(batch) > 0:
+        yield batch
+
+
+def read_kgtk_edges(
+    edge_path_in: Path,
+    lhs_column: Optional[str] = None,
+    rel_column: Optional[str] = None,
+    rhs_column: Optional[str] = None,
+    num_workers: int = 1,
+    batch_size: int = 100000,
+    reader_options: Optional[KgtkReaderOptions] = None,
+    value_options: Optional[KgtkValueOptions] = None,
+    error_file: TextIO = sys.stderr,
+) -> Tuple[List[str], List[str], np.ndarray, np.ndarray, np.ndarray]:
+    """Read a KGTK edge file once and intern it into global integer ids.
+
+    Returns (entity names, relation names, lhs, rel, rhs), where the three
+    arrays hold one global id per edge.  The columns default to the node1,
+    label, and node2 columns (or their aliases).  Uncompressed files are split into
+    byte ranges that the workers read directly; other inputs are read by
+    the parent and shipped to the workers in batches of lines.  When the
+    reader options sample, repair, or validate the input, the parent reads
+    the rows with the KGTK reader and ships them to the workers instead.
+    """
+    from kgtk.io.kgtkreader import KgtkReader
+    from kgtk.utils.filechunks import can_split, chunk_ranges, header_length
+
+    # Read the header and find the columns.  The reader is also used as the
+    # line source when the file cannot be split.
+    kr: KgtkReader = KgtkReader.open(edge_path_in,
+                                     error_file=error_file,
+                                     options=reader_options,
+                                     value_options=value_options)
+    column_separator: str = kr.options.column_separator
+    lhs_col = kr.get_node1_column_index(lhs_column)
+    rel_col = kr.get_label_column_index(rel_column)
+    rhs_col = kr.get_node2_column_index(rhs_column)
+    if lhs_col < 0 or rel_col < 0 or rhs_col < 0:
+        raise ValueError(f"Could not find the node1, label, and node2 columns in {edge_path_in}")
+
+    chunks: Iterable[InternedChunk]
+    pool: Optional[Any] = None
+    if not kr.passes_raw_lines():
+        # Let the reader sample, repair, and validate the rows.
+        row_batches = ((batch, lhs_col, rel_col, rhs_col) for batch in _batch_lines(kr, batch_size))
+        logging.info(f"- Reading the rows of {edge_path_in} serially with {num_workers} workers")
+        if num_workers > 1:
+            pool = Pool(num_workers)
+            chunks = pool.imap(_intern_row_batch, row_batches)
+        else:
+            chunks = map(_intern_row_batch, row_batches)
+    elif can_split(edge_path_in):
+        kr.close()
+        ranges = chunk_ranges(edge_path_in, num_workers * 4, start_offset=header_length(edge_path_in))
+        tasks = [(edge_path_in, start, end, lhs_col, rel_col, rhs_col, column_separator) for start, end in ranges]
+        logging.info(f"- Reading {edge_path_in} in {len(tasks)} chunks with {num_workers} workers")
+        if num_workers > 1:
+            pool = Pool(num_workers)
+            chunks = pool.imap(_intern_range, tasks)
+        else:
+            chunks = map(_intern_range, tasks)
+    else:
+        # Pass the raw lines through; the columns are split by the workers.
+        batches = ((batch, lhs_col, rel_col, rhs_col, column_separator)
+                   for batch in _batch_lines(kr.source, batch_size))
+        logging.info(f"- Reading {edge_path_in} serially with {num_workers} workers")
+        if num_workers > 1:
+            pool = Pool(num_workers)
+            chunks = pool.imap(_intern_batch, batches)
+        else:
+            chunks = map(_intern_batch, batches)
+
+    entity_ids: Dict[str, int] = {}
+    relation_ids: Dict[str, int] = {}
+    lhs_parts: List[np.ndarray] = []
+    rel_parts: List[np.ndarray] = []
+    rhs_parts: List[np.ndarray] = []
+    processed = 0
+    try:
+        for chunk in chunks:
+            entity_map = np.array([entity_ids.setdefault(name, len(entity_ids)) for name in chunk.entity_names],
+                                  dtype=np.int64)
+            relation_map = np.array([relation_ids.setdefault(name, len(relation_ids)) for name in chunk.relation_names],
+                                    dtype=np.int64)
+            if len(chunk.lhs) > 0:
+                lhs_parts.append(entity_map[chunk.lhs])
+                rel_parts.append(relation_map[chunk.rel])
+                rhs_parts.append(entity_map[chunk.rhs])
+            processed += len(chunk.lhs)
+            logging.info(f"- Read {processed} edges so far...")
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        kr.close()
+
+    def concat(parts: List[np.ndarray]) -> np.ndarray:
+        return np.concatenate(parts) if len(parts) > 0 else np.empty(0, dtype=np.int64)
+
+    return (list(entity_ids.keys()), list(relation_ids.keys()),
+            concat(lhs_parts), concat(rel_parts), concat(rhs_parts))
+
+
+def convert_kgtk_input_data(
+    entity_configs: Dict[str, EntitySchema],
+    relation_configs: List[RelationSchema],
+    entity_path: str,
+    edge_paths_out: List[str],
+    edge_paths_in: List[Path],
+    lhs_column: Optional[str] = None,
+    rel_column: Optional[str] = None,
+    rhs_column: Optional[str] = None,
+    entity_min_count: int = 1,
+    relation_type_min_count: int = 1,
+    dynamic_relations: bool = False,
+    num_workers: int = 1,
+    reader_options: Optional[KgtkReaderOptions] = None,
+    value_options: Optional[KgtkValueOptions] = None,
+    error_file: TextIO = sys.stderr,
+) -> None:
+    """A single-pass replacement for convert_input_data() that reads KGTK edge files.
+
+    All the input files are read (and interned) before any output is
+    written, since the entity dictionaries must be complete before the
+    entities can be assigned to partitions.
+    """
+    if len(edge_paths_in) != len(edge_paths_out):
+        raise ValueError(
+            f"The edge paths passed as inputs ({edge_paths_in}) don't match "
+            f"the ones specified as outputs ({edge_paths_out})"
+        )
+
+    entity_storage = ENTITY_STORAGES.make_instance(entity_path)
+    relation_type_storage = RELATION_TYPE_STORAGES.make_instance(entity_path)
+    edge_storages = [EDGE_STORAGES.make_instance(ep) for ep in edge_paths_out]
+
+    # Intern every input file against one set of global dictionaries.
+    entity_names: List[str] = []
+    relation_names: List[str] = []
+    entity_ids: Dict[str, int] = {}
+    relation_ids: Dict[str, int] = {}
+    edges: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+    for edge_path_in in edge_paths_in:
+        names, rels, lhs, rel, rhs = read_kgtk_edges(edge_path_in, lhs_column, rel_column, rhs_column,
+                                                     num_workers=num_workers,
+                                                     reader_options=reader_options,
+                                                     value_options=value_options,
+                                                     error_file=error_file)
+        entity_map = np.array([entity_ids.setdefault(name, len(entity_ids)) for name in names], dtype=np.int64)
+        relation_map = np.array([relation_ids.setdefault(name, len(relation_ids)) for name in rels], dtype=np.int64)
+        edges.append((entity_map[lhs] if len(lhs) > 0 else lhs,
+                      relation_map[rel] if len(rel) > 0 else rel,
+                      entity_map[rhs] if len(rhs) > 0 else rhs))
+    entity_names = list(entity_ids.keys())
+    relation_names = list(relation_ids.keys())
+
+    # Relation types: global relation id -> output relation id (-1 to skip).
+    relation_counts = np.zeros(len(relation_names), dtype=np.int64)
+    for _lhs, rel, _rhs in edges:
+        relation_counts += np.bincount(rel, minlength=len(relation_names))
+    relation_out = np.full(len(relation_names), -1, dtype=np.int64)
+    if dynamic_relations:
+        logging.info(f"- Found {len(relation_names)} relation types")
+        kept = [i for i in range(len(relation_names)) if relation_counts[i] >= relation_type_min_count]
+        logging.info(f"- Left with {len(kept)} relation types")
+        random.shuffle(kept)
+        relation_out[kept] = np.arange(len(kept))
+        relation_types = Dictionary([relation_names[i] for i in kept])
+    else:
+        names = [rconfig.name for rconfig in relation_configs]
+        logging.info(f"Using the {len(names)} relation types given in the config")
+        for rel_id, name in enumerate(names):
+            if name in relation_ids:
+                relation_out[relation_ids[name]] = rel_id
+        relation_types = Dictionary(names)
+
+    # Entities, by entity type.  The lhs and rhs entity type of each edge
+    # depends on its relation type.
+    def edge_types(rel_out: np.ndarray, side: str) -> np.ndarray:
+        type_names = list(entity_configs.keys())
+        if dynamic_relations:
+            return np.full(len(rel_out), type_names.index(getattr(relation_configs[0], side)), dtype=np.int64)
+        per_relation = np.array([type_names.index(getattr(rconfig, side)) for rconfig in relation_configs],
+                                dtype=np.int64)
+        return per_relation[np.maximum(rel_out, 0)]
+
+    type_names = list(entity_configs.keys())
+    counts = np.zeros((len(type_names), len(entity_names)), dtype=np.int64)
+    for lhs, rel, rhs in edges:
+        rel_out = relation_out[rel]
+        valid = rel_out >= 0
+        np.add.at(counts, (edge_types(rel_out, "lhs")[valid], lhs[valid]), 1)
+        np.add.at(counts, (edge_types(rel_out, "rhs")[valid], rhs[valid]), 1)
+
+    entities_by_type: Dict[str, Dictionary] = {}
+    # For each type: global entity id -> (partition, offset), -1 if filtered out.
+    partitions = np.full((len(type_names), len(entity_names)), -1, dtype=np.int64)
+    offsets = np.full((len(type_names), len(entity_names)), -1, dtype=np.int64)
+    for type_idx, entity_name in enumerate(type_names):
+        found = np.flatnonzero(counts[type_idx] > 0)
+        kept = found[counts[type_idx][found] >= entity_min_count].tolist()
+        logging.info(f"Entity type {entity_name}: found {len(found)} entities, kept {len(kept)}")
+        random.shuffle(kept)
+        dictionary = Dictionary([entity_names[i] for i in kept],
+                                num_parts=entity_configs[entity_name].num_partitions)
+        entities_by_type[entity_name] = dictionary
+        kept_array = np.array(kept, dtype=np.int64)
+        for part in range(dictionary.num_parts):
+            start, end = dictionary.part_start(part), dictionary.part_end(part)
+            partitions[type_idx, kept_array[start:end]] = part
+            offsets[type_idx, kept_array[start:end]] = np.arange(end - start)
+
+    generate_entity_path_files(
+        entity_storage,
+        entities_by_type,
+        relation_type_storage,
+        relation_types,
+        dynamic_relations,
+    )
+
+    num_lhs_parts = max(entities_by_type[rconfig.lhs].num_parts for rconfig in relation_configs)
+    num_rhs_parts = max(entities_by_type[rconfig.rhs].num_parts for rconfig in relation_configs)
+    logging.info(f"- Edges will be partitioned in {num_lhs_parts} x {num_rhs_parts} buckets.")
+
+    for (lhs, rel, rhs), edge_path_out, edge_storage in zip(edges, edge_paths_out, edge_storages):
+        edge_storage.prepare()
+        rel_out = relation_out[rel]
+        lhs_types = edge_types(rel_out, "lhs")
+        rhs_types = edge_types(rel_out, "rhs")
+        lhs_part = partitions[lhs_types, lhs]
+        rhs_part = partitions[rhs_types, rhs]
+        valid = (rel_out >= 0) & (lhs_part >= 0) & (rhs_part >= 0)
+        skipped = int(len(valid) - valid.sum())
+
+        bucket = lhs_part * num_rhs_parts + rhs_part
+        bucket[~valid] = -1
+        order = np.argsort(bucket, kind="stable")
+        order = order[bucket[order] >= 0]
+        bucket_counts = np.bincount(bucket[order], minlength=num_lhs_parts * num_rhs_parts)
+        bucket_starts = np.concatenate([[0], np.cumsum(bucket_counts)])
+        lhs_offset = offsets[lhs_types, lhs]
+        rhs_offset = offsets[rhs_types, rhs]
+
+        for lhs_p in range(num_lhs_parts):
+            for rhs_p in range(num_rhs_parts):
+                b = lhs_p * num_rhs_parts + rhs_p
+                selected = order[bucket_starts[b]:bucket_starts[b + 1]]
+                edge_storage.save_edges(
+                    lhs_p,
+                    rhs_p,
+                    EdgeList(
+                        EntityList.from_tensor(torch.from_numpy(lhs_offset[selected])),
+                        EntityList.from_tensor(torch.from_numpy(rhs_offset[selected])),
+                        torch.from_numpy(rel_out[selected]),
+                    ),
+                )
+
+        logging.info(f"- Wrote {len(order)} edges to {edge_path_out}")
+        if skipped > 0:
+            logging.info(
+                f"- Skipped {skipped} edges because their relation type or "
+                f"entities were unknown (either not given in the config or "
+                f"filtered out as too rare)."
+            )
+
+
 def parse_config_partial(
     config_dict: Any,
 ) -> Tuple[Dict[str, EntitySchema], List[RelationSchema], str, List[str], bool]:
@@ -0,0 +1,612 @@
+"""Nearest-neighbor search over KGTK embedding files.
+
+Two index types are provided:
+
+ * ExactIndex:  brute-force top-k, computed as a blocked matrix multiply.
+ * IVFPQIndex:  an approximate inverted-file index with product-quantized
+                residuals (IVF/PQ), optionally reranked with exact scores.
+
+Both indexes work on a float32 matrix of embedding vectors and a parallel
+list of node ids, and both return (node index, score) arrays for a batch of
+query vectors.  Larger scores are better: for the l2 metric, the score is
+the negated Euclidean distance.
+
+A saved index is a snapshot of one embedding file: vectors cannot be added
+to it, so rebuild it when the embeddings change.
+"""
+
+import math
+from pathlib import Path
+import sys
+import typing
+
+import numpy as np
+
+from kgtk.exceptions import KGTKException
+from kgtk.io.kgtkreader import KgtkReader, KgtkReaderMode, KgtkReaderOptions
+from kgtk.io.kgtkwriter import KgtkWriter
+from kgtk.value.kgtkvalueoptions import KgtkValueOptions
+
+METRIC_COSINE: str = "cosine"
+METRIC_DOT: str = "dot"
+METRIC_L2: str = "l2"
+METRIC_CHOICES: typing.List[str] = [METRIC_COSINE, METRIC_DOT, METRIC_L2]
+
+EMBEDDING_FORMAT_KGTK: str = "kgtk"
+EMBEDDING_FORMAT_W2V: str = "w2v"
+EMBEDDING_FORMAT_GLOVE: str = "glove"
+EMBEDDING_FORMAT_CHOICES: typing.List[str] = [EMBEDDING_FORMAT_KGTK, EMBEDDING_FORMAT_W2V, EMBEDDING_FORMAT_GLOVE]
+
+INDEX_EXACT: str = "exact"
+INDEX_IVFPQ: str = "ivfpq"
+INDEX_CHOICES: typing.List[str] = [INDEX_EXACT, INDEX_IVFPQ]
+
+
+def load_embeddings(input_file_path: Path,
+                    embedding_format: str = EMBEDDING_FORMAT_KGTK,
+                    node_column_name: typing.Optional[str] = None,
+                    vector_column_name: typing.Optional[str] = None,
+                    label_column_name: typing.Optional[str] = None,
+                    embedding_label: typing.Optional[str] = None,
+                    vector_separator: str = ",",
+                    reader_options: typing.Optional[KgtkReaderOptions] = None,
+                    value_options: typing.Optional[KgtkValueOptions] = None,
+                    error_file: typing.TextIO = sys.stderr,
+                    verbose: bool = False,
+                    very_verbose: bool = False,
+)->typing.Tuple[typing.List[str], np.ndarray]:
+    """Read an embedding file and return the node ids and a float32 matrix.
+
+    The KGTK format is the one written by `text-embedding` and by
+    `graph-embeddings --output_format kgtk`: one row per node, with the
+    vector in a single column as a list of numbers.  The w2v and glove
+    formats are the other `graph-embeddings` output formats.
+    """
+    node_ids: typing.List[str] = [ ]
+    vectors: typing.List[typing.List[float]] = [ ]
+
+    if embedding_format == EMBEDDING_FORMAT_KGTK:
+        kr: KgtkReader = KgtkReader.open(input_file_path,
+                                         mode=KgtkReaderMode.NONE,
+                                         error_file=error_file,
+                                         options=reader_options,
+                                         value_options=value_options,
+                                         verbose=verbose,
+                                         very_verbose=very_verbose,
+        )
+
+        # The text-embedding output uses "node property value" as its header,
+        # so we fall back to column positions when the aliases are missing.
+        node_idx: int = kr.get_node1_column_index(node_column_name)
+        if node_idx < 0:
+            node_idx = kr.get_id_column_index(node_column_name)
+        if node_idx < 0:
+            if node_column_name is not None:
+                raise KGTKException("Node column '%s' not found in %s" % (node_column_name, str(input_file_path)))
+            node_idx = 0
+
+        vector_idx: int = kr.get_node2_column_index(vector_column_name)
+        if vector_idx < 0:
+            if vector_column_name is not None:
+                raise KGTKException("Vector column '%s' not found in %s" % (vector_column_name, str(input_file_path)))
+            vector_idx = kr.column_count - 1
+
+        label_idx: int = -1
+        if embedding_label is not None:
+            label_idx = kr.get_label_column_index(label_column_name)
+            if label_idx < 0:
+                if label_column_name is not None or kr.column_count < 3:
+                    raise KGTKException("Label column not found in %s" % str(input_file_path))
+                label_idx = 1
+
+        row: typing.List[str]
+        for row in kr:
+            if label_idx >= 0 and row[label_idx] != embedding_label:
+                continue
+            node_ids.append(row[node_idx])
+            vectors.append([float(x) for x in row[vector_idx].split(vector_separator)])
+        kr.close()
+
+    elif embedding_format in (EMBEDDING_FORMAT_W2V, EMBEDDING_FORMAT_GLOVE):
+        with open(input_file_path, "r") as f:
+            line: str
+            for line in f:
+                fields: typing.List[str] = line.rstrip("\r\n").split("\t" if embedding_format == EMBEDDING_FORMAT_GLOVE else " ")
+                if embedding_format == EMBEDDING_FORMAT_W2V and len(node_ids) == 0 and len(vectors) == 0 and len(fields) == 2:
+                    continue # The w2v header line: entity count and dimension.
+                if len(fields) < 2:
+                    continue
+                node_ids.append(fields[0])
+                vectors.append([float(x) for x in fields[1:]])
+
+    else:
+        raise KGTKException("Unknown embedding format '%s'" % embedding_format)
+
+    if len(vectors) == 0:
+        raise KGTKException("No embeddings found in %s" % str(input_file_path))
+
+    dimension: int = len(vectors[0])
+    idx: int
+    for idx, vector in enumerate(vectors):
+        if len(vector) != dimension:
+            raise KGTKException("Embedding for '%s' has %d dimensions, expected %d" % (node_ids[idx], len(vector), dimension))
+
+    if verbose:
+        print("Loaded %d embeddings with %d dimensions from %s" % (len(node_ids), dimension, str(input_file_path)),
+              file=error_file, flush=True)
+    return node_ids, np.array(vectors, dtype=np.float32)
+
+
+def normalize_rows(vectors: np.ndarray)->np.ndarray:
+    norms: np.ndarray = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def merge_top_k(best_scores: np.ndarray,
+                best_ids: np.ndarray,
+                scores: np.ndarray,
+                ids: np.ndarray,
+                k: int)->typing.Tuple[np.ndarray, np.ndarray]:
+    """Merge a new block of candidate scores into the running top-k (unsorted)."""
+    all_scores: np.ndarray = np.concatenate([best_scores, scores], axis=1)
+    all_ids: np.ndarray = np.concatenate([best_ids, ids], axis=1)
+    if all_scores.shape[1] <= k:
+        return all_scores, all_ids
+    top: np.ndarray = np.argpartition(-all_scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(all_scores, top, axis=1), np.take_along_axis(all_ids, top, axis=1)
+
+
+def sort_top_k(best_scores: np.ndarray, best_ids: np.ndarray)->typing.Tuple[np.ndarray, np.ndarray]:
+    order: np.ndarray = np.argsort(-best_scores, axis=1, kind="stable")
+    return np.take_along_axis(best_scores, order, axis=1), np.take_along_axis(best_ids, order, axis=1)
+
+
+def kmeans(data: np.ndarray,
+           k: int,
+           iterations: int = 20,
+           rng: typing.Optional[np.random.Generator] = None,
+           block_size: int = 65536)->typing.Tuple[np.ndarray, np.ndarray]:
+    """A plain Lloyd's k-means with L2 distance.  Returns (centroids, assignments)."""
+    if rng is None:
+        rng = np.random.default_rng(0)
+    n: int = data.shape[0]
+    k = min(k, n)
+    centroids: np.ndarray = data[rng.choice(n, size=k, replace=False)].copy()
+    assignments: np.ndarray = np.zeros(n, dtype=np.int64)
+
+    iteration: int
+    for iteration in range(iterations):
+        assignments = assign_nearest(data, centroids, block_size=block_size)
+        counts: np.ndarray = np.bincount(assignments, minlength=k)
+        sums: np.ndarray = np.zeros_like(centroids, dtype=np.float64)
+        np.add.at(sums, assignments, data)
+        nonempty: np.ndarray = counts > 0
+        centroids[nonempty] = (sums[nonempty] / counts[nonempty, None]).astype(np.float32)
+
+        # Reseed empty clusters from random data points.
+        empty: np.ndarray = np.flatnonzero(~nonempty)
+        if len(empty) > 0:
+            centroids[empty] = data[rng.choice(n, size=len(empty), replace=False)]
+
+    return centroids, assign_nearest(data, centroids, block_size=block_size)
+
+
+def assign_nearest(data: np.ndarray, centroids: np.ndarray, block_size: int = 65536)->np.ndarray:
+    """Return the index of the nearest (L2) centroid for each data row."""
+    centroid_norms: np.ndarray = (centroids * centroids).sum(axis=1)
+    result: np.ndarray = np.empty(data.shape[0], dtype=np.int64)
+    start: int
+    for start in range(0, data.shape[0], block_size):
+        block: np.ndarray = data[start:start + block_size]
+        # ||x||^2 is constant per row, so it does not change the argmin.
+        distances: np.ndarray = centroid_norms[None, :] - 2.0 * (block @ centroids.T)
+        result[start:start + block_size] = np.argmin(distances, axis=1)
+    return result
+
+
+class ExactIndex:
+    """Exact top-k search by blocked matrix multiply."""
+    KIND: str = INDEX_EXACT
+
+    def __init__(self,
+                 vectors: np.ndarray,
+                 metric: str = METRIC_COSINE,
+                 block_size: int = 65536,
+                 ):
+        if metric not in METRIC_CHOICES:
+            raise KGTKException("Unknown metric '%s'" % metric)
+        self.metric: str = metric
+        self.block_size: int = block_size
+        self.vectors: np.ndarray = normalize_rows(vectors) if metric == METRIC_COSINE else vectors
+        self.norms: np.ndarray = (self.vectors * self.vectors).sum(axis=1)
+
+    def __len__(self)->int:
+        return self.vectors.shape[0]
+
+    def prepare_queries(self, queries: np.ndarray)->np.ndarray:
+        return normalize_rows(queries) if self.metric == METRIC_COSINE else queries
+
+    def score_block(self, queries: np.ndarray, start: int, end: int)->np.ndarray:
+        scores: np.ndarray = queries @ self.vectors[start:end].T
+        if self.metric == METRIC_L2:
+            # -||q - x||^2, without the per-query ||q||^2 term, which does not change the ranking.
+            scores = 2.0 * scores - self.norms[None, start:end]
+        return scores
+
+    def finish_scores(self, queries: np.ndarray, scores: np.ndarray)->np.ndarray:
+        if self.metric == METRIC_L2:
+            query_norms: np.ndarray = (queries * queries).sum(axis=1, keepdims=True)
+            return -np.sqrt(np.maximum(query_norms - scores, 0.0))
+        return scores
+
+    def search(self,
+               queries: np.ndarray,
+               k: int,
+               exclude: typing.Optional[np.ndarray] = None,
+               )->typing.Tuple[np.ndarray, np.ndarray]:
+        """Return (ids, scores), each of shape (len(queries), k), best first.
+
+        `exclude` optionally gives, for each query, a row index to leave
+        out of its results (-1 for none), which is used to skip self matches.
+        Missing results (k > len(self)) have id -1.
+        """
+        queries = self.prepare_queries(queries.astype(np.float32, copy=False))
+        nq: int = queries.shape[0]
+        best_scores: np.ndarray = np.full((nq, 0), -np.inf, dtype=np.float32)
+        best_ids: np.ndarray = np.full((nq, 0), -1, dtype=np.int64)
+
+        start: int
+        for start in range(0, len(self), self.block_size):
+            end: int = min(start + self.block_size, len(self))
+            scores: np.ndarray = self.score_block(queries, start, end)
+            if exclude is not None:
+                rows: np.ndarray = np.flatnonzero((exclude >= start) & (exclude < end))
+                scores[rows, exclude[rows] - start] = -np.inf
+            ids: np.ndarray = np.broadcast_to(np.arange(start, end, dtype=np.int64), scores.shape)
+            best_scores, best_ids = merge_top_k(best_scores, best_ids, scores, ids, k)
+
+        best_scores, best_ids = sort_top_k(best_scores, best_ids)
+        best_ids = np.where(np.isneginf(best_scores), -1, best_ids)
+        return best_ids, self.finish_scores(queries, best_scores)
+
+    def save(self, path: Path):
+        np.savez(path, kind=self.KIND, metric=self.metric, vectors=self.vectors)
+
+    @classmethod
+    def from_saved(cls, saved: typing.Mapping[str, np.ndarray], block_size: int = 65536)->"ExactIndex":
+        index: ExactIndex = cls.__new__(cls)
+        index.metric = str(saved["metric"])
+        index.block_size = block_size
+        index.vectors = saved["vectors"]
+        index.norms = (index.vectors * index.vectors).sum(axis=1)
+        return index
+
+
+class IVFPQIndex(ExactIndex):
+    """Approximate search with an inverted file and product-quantized residuals.
+
+    The vectors are clustered into `nlist` coarse cells.  Each vector's
+    residual from its cell centroid is split into `subquantizers` equal
+    slices, and each slice is replaced by the id of its nearest codebook
+    entry (2**nbits entries per slice).  A query visits the `nprobe` best
+    cells and scores their members with per-query lookup tables.  When
+    `rerank` is set, the best `rerank_factor * k` candidates are rescored
+    exactly against the original vectors, which are then kept in memory.
+    """
+    KIND: str = INDEX_IVFPQ
+
+    def __init__(self,
+                 vectors: np.ndarray,
+                 metric: str = METRIC_COSINE,
+                 nlist: typing.Optional[int] = None,
+                 nprobe: int = 8,
+                 subquantizers: int = 8,
+                 nbits: int = 8,
+                 train_size: int = 100000,
+                 iterations: int = 20,
+                 rerank: bool = True,
+                 rerank_factor: int = 4,
+                 block_size: int = 65536,
+                 seed: int = 0,
+                 error_file: typing.TextIO = sys.stderr,
+                 verbose: bool = False,
+                 ):
+        super().__init__(vectors, metric=metric, block_size=block_size)
+        n: int
+        dimension: int
+        (n, dimension) = self.vectors.shape
+        if dimension % subquantizers != 0:
+            raise KGTKException("The embedding dimension %d is not divisible by %d subquantizers" % (dimension, subquantizers))
+        if nbits < 1 or nbits > 8:
+            raise KGTKException("nbits must be between 1 and 8")
+
+        self.nprobe: int = nprobe
+        self.rerank: bool = rerank
+        self.rerank_factor: int = rerank_factor
+        self.subquantizers: int = subquantizers
+        self.subdimension: int = dimension // subquantizers
+        if nlist is None:
+            nlist = max(1, int(math.sqrt(n)))
+
+        rng: np.random.Generator = np.random.default_rng(seed)
+        training: np.ndarray = self.vectors
+        if n > train_size:
+            training = self.vectors[rng.choice(n, size=train_size, replace=False)]
+
+        if verbose:
+            print("Training %d coarse cells on %d vectors" % (nlist, training.shape[0]), file=error_file, flush=True)
+        self.centroids: np.ndarray
+        (self.centroids, _) = kmeans(training, nlist, iterations=iterations, rng=rng, block_size=block_size)
+
+        # Train the product quantizer on the training residuals.
+        training_residuals: np.ndarray = training - self.centroids[assign_nearest(training, self.centroids, block_size)]
+        ksub: int = min(2 ** nbits, training.shape[0])
+        if verbose:
+            print("Training %d codebooks of %d entries" % (subquantizers, ksub), file=error_file, flush=True)
+        self.codebooks: np.ndarray = np.stack([kmeans(self.subvectors(training_residuals, m), ksub,
+                                                      iterations=iterations, rng=rng, block_size=block_size)[0]
+                                               for m in range(subquantizers)])
+
+        # Encode the whole database.
+        assignments: np.ndarray = assign_nearest(self.vectors, self.centroids, block_size)
+        residuals: np.ndarray = self.vectors - self.centroids[assignments]
+        self.codes: np.ndarray = np.stack([assign_nearest(self.subvectors(residuals, m), self.codebooks[m], block_size)
+                                           for m in range(subquantizers)], axis=1).astype(np.uint8)
+        self.build_lists(assignments)
+        if not rerank:
+            self.vectors = np.empty((0, dimension), dtype=np.float32)
+            self.norms = np.empty(0, dtype=np.float32)
+
+        if verbose:
+            print("Encoded %d vectors into %d lists" % (n, len(self.list_offsets) - 1), file=error_file, flush=True)
+
+    def __len__(self)->int:
+        return self.codes.shape[0]
+
+    def subvectors(self, data: np.ndarray, m: int)->np.ndarray:
+        return data[:, m * self.subdimension:(m + 1) * self.subdimension]
+
+    def build_lists(self, assignments: np.ndarray):
+        # The inverted lists are stored as one array of row ids, ordered by
+        # cell, plus the offset of each cell in that array.
+        self.assignments: np.ndarray = assignments.astype(np.int32)
+        self.list_ids: np.ndarray = np.argsort(assignments, kind="stable").astype(np.int64)
+        self.list_offsets: np.ndarray = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=len(self.centroids)))])
+
+    def search(self,
+               queries: np.ndarray,
+               k: int,
+               exclude: typing.Optional[np.ndarray] = None,
+               )->typing.Tuple[np.ndarray, np.ndarray]:
+        queries = self.prepare_queries(queries.astype(np.float32, copy=False))
+        nq: int = queries.shape[0]
+        nprobe: int = min(self.nprobe, len(self.centroids))
+        candidates: int = k * self.rerank_factor if self.rerank else k
+        result_ids: np.ndarray = np.full((nq, k), -1, dtype=np.int64)
+        result_scores: np.ndarray = np.full((nq, k), -np.inf, dtype=np.float32)
+
+        # Coarse scores for all queries at once.
+        coarse: np.ndarray = queries @ self.centroids.T
+        if self.metric == METRIC_L2:
+            coarse = 2.0 * coarse - (self.centroids * self.centroids).sum(axis=1)[None, :]
+        probes: np.ndarray = np.argpartition(-coarse, nprobe - 1, axis=1)[:, :nprobe]
+
+        qi: int
+        for qi in range(nq):
+            query: np.ndarray = queries[qi]
+            ids_parts: typing.List[np.ndarray] = [ ]
+            score_parts: typing.List[np.ndarray] = [ ]
+
+            # Inner-product lookup tables do not depend on the cell.
+            ip_table: typing.Optional[np.ndarray] = None
+            if self.metric != METRIC_L2:
+                ip_table = np.stack([self.codebooks[m] @ query[m * self.subdimension:(m + 1) * self.subdimension]
+                                     for m in range(self.subquantizers)])
+
+            cell: int
+            for cell in probes[qi]:
+                start: int = self.list_offsets[cell]
+                end: int = self.list_offsets[cell + 1]
+                if start == end:
+                    continue
+                members: np.ndarray = self.list_ids[start:end]
+                codes: np.ndarray = self.codes[members]
+                table: np.ndarray
+                base: float
+                if ip_table is not None:
+                    table = ip_table
+                    base = float(query @ self.centroids[cell])
+                else:
+                    residual: np.ndarray = query - self.centroids[cell]
+                    table = -np.stack([((self.codebooks[m] - residual[m * self.subdimension:(m + 1) * self.subdimension]) ** 2).sum(axis=1)
+                                       for m in range(self.subquantizers)])
+                    base = 0.0
+                scores: np.ndarray = base + table[np.arange(self.subquantizers)[None, :], codes].sum(axis=1)
+                ids_parts.append(members)
+                score_parts.append(scores.astype(np.float32))
+
+            if len(ids_parts) == 0:
+                continue
+            ids: np.ndarray = np.concatenate(ids_parts)
+            all_scores: np.ndarray = np.concatenate(score_parts)
+            if exclude is not None and exclude[qi] >= 0:
+                all_scores[ids == exclude[qi]] = -np.inf
+            if len(ids) > candidates:
+                top: np.ndarray = np.argpartition(-all_scores, candidates - 1)[:candidates]
+                ids = ids[top]
+                all_scores = all_scores[top]
+
+            if self.rerank:
+                valid: np.ndarray = ~np.isneginf(all_scores)
+                ids = ids[valid]
+                all_scores = self.vectors[ids] @ query
+                if self.metric == METRIC_L2:
+                    all_scores = 2.0 * all_scores - self.norms[ids]
+
+            order: np.ndarray = np.argsort(-all_scores, kind="stable")[:k]
+            result_ids[qi, :len(order)] = ids[order]
+            result_scores[qi, :len(order)] = all_scores[order]
+
+        result_ids = np.where(np.isneginf(result_scores), -1, result_ids)
+        if self.metric == METRIC_L2:
+            if self.rerank:
+                return result_ids, self.finish_scores(queries, result_scores)
+            return result_ids, -np.sqrt(np.maximum(-result_scores, 0.0))
+        return result_ids, result_scores
+
+    def save(self, path: Path):
+        np.savez(path, kind=self.KIND, metric=self.metric, vectors=self.vectors,
+                 centroids=self.centroids, codebooks=self.codebooks, codes=self.codes,
+                 assignments=self.assignments, list_ids=self.list_ids, list_offsets=self.list_offsets,
+                 nprobe=self.nprobe, rerank=self.rerank, rerank_factor=self.rerank_factor)
+
+    @classmethod
+    def from_saved(cls, saved: typing.Mapping[str, np.ndarray], block_size: int = 65536)->"IVFPQIndex":
+        index: IVFPQIndex = cls.__new__(cls)
+        index.metric = str(saved["metric"])
+        index.block_size = block_size
+        index.vectors = saved["vectors"]
+        index.norms = (index.vectors * index.vectors).sum(axis=1)
+        index.centroids = saved["centroids"]
+        index.codebooks = saved["codebooks"]
+        index.codes = saved["codes"]
+        index.assignments = saved["assignments"]
+        index.list_ids = saved["list_ids"]
+        index.list_offsets = saved["list_offsets"]
+        index.nprobe = int(saved["nprobe"])
+        index.rerank = bool(saved["rerank"])
+        index.rerank_factor = int(saved["rerank_factor"])
+        index.subquantizers = index.codebooks.shape[0]
+        index.subdimension = index.codebooks.shape[2]
+        return index
+
+
+def save_index(path: Path, node_ids: typing.List[str], index: ExactIndex):
+    with open(path, "wb") as f:
+        index.save(f) # type: ignore
+    with open(str(path) + ".ids", "w") as f:
+        node_id: str
+        for node_id in node_ids:
+            f.write(node_id + "\n")
+
+
+def load_index(path: Path, block_size: int = 65536)->typing.Tuple[typing.List[str], ExactIndex]:
+    saved = np.load(path, allow_pickle=False)
+    kind: str = str(saved["kind"])
+    index: ExactIndex
+    if kind == INDEX_EXACT:
+        index = ExactIndex.from_saved(saved, block_size=block_size)
+    elif kind == INDEX_IVFPQ:
+        index = IVFPQIndex.from_saved(saved, block_size=block_size)
+    else:
+        raise KGTKException("Unknown index kind '%s' in %s" % (kind, str(path)))
+    with open(str(path) + ".ids", "r") as f:
+        node_ids: typing.List[str] = [line.rstrip("\n") for line in f]
+    if len(node_ids) != len(index):
+        raise KGTKException("Index %s has %d vectors but %d node ids" % (str(path), len(index), len(node_ids)))
+    return node_ids, index
+
+
+class EmbeddingSearch:
+    def __init__(self,
+                 node_ids: typing.List[str],
+                 index: ExactIndex,
+                 k: int = 10,
+                 include_self: bool = False,
+                 batch_size: int = 1024,
+                 label_value: str = "similar_to",
+                 error_file: typing.TextIO = sys.stderr,
+                 verbose: bool = False,
+                 very_verbose: bool = False,
+                 ):
+        self.node_ids: typing.List[str] = node_ids
+        self.index: ExactIndex = index
+        self.k: int = k
+        self.include_self: bool = include_self
+        self.batch_size: int = batch_size
+        self.label_value: str = label_value
+        self.error_file: typing.TextIO = error_file
+        self.verbose: bool = verbose
+        self.very_verbose: bool = very_verbose
+
+        self.node_index: typing.Mapping[str, int] = {node_id: idx for idx, node_id in enumerate(node_ids)}
+
+    OUTPUT_COLUMNS: typing.List[str] = ["node1", "label", "node2", "score"]
+
+    def query_vectors(self, rows: np.ndarray)->np.ndarray:
+        if isinstance(self.index, IVFPQIndex) and not self.index.rerank:
+            # The original vectors were dropped; reconstruct from the codes.
+            centroids: np.ndarray = self.index.centroids[self.index.assignments[rows]]
+            residuals: np.ndarray = np.concatenate([self.index.codebooks[m][self.index.codes[rows, m]]
+                                                    for m in range(self.index.subquantizers)], axis=1)
+            return centroids + residuals
+        return self.index.vectors[rows]
+
+    def search(self, query_node_ids: typing.Optional[typing.List[str]] = None
+               )->typing.Iterator[typing.Tuple[str, str, float]]:
+        """Yield (query node, neighbor node, score) for each query, best first.
+
+        When query_node_ids is None, every node in the index is a query.
+        Queries that are not in the index are skipped.
+        """
+        if query_node_ids is None:
+            query_node_ids = self.node_ids
+        rows: typing.List[int] = [ ]
+        missing_count: int = 0
+        node_id: str
+        for node_id in query_node_ids:
+            if node_id in self.node_index:
+                rows.append(self.node_index[node_id])
+            else:
+                missing_count += 1
+                if self.very_verbose:
+                    print("Query node '%s' has no embedding" % node_id, file=self.error_file, flush=True)
+        if self.verbose and missing_count > 0:
+            print("%d query nodes have no embedding" % missing_count, file=self.error_file, flush=True)
+
+        k: int = min(self.k, len(self.index) - (0 if self.include_self else 1))
+        if k <= 0:
+            return
+
+        start: int
+        for start in range(0, len(rows), self.batch_size):
+            batch: np.ndarray = np.array(rows[start:start + self.batch_size], dtype=np.int64)
+            exclude: typing.Optional[np.ndarray] = None if self.include_self else batch
+            ids: np.ndarray
+            scores: np.ndarray
+            (ids, scores) = self.index.search(self.query_vectors(batch), k, exclude=exclude)
+            i: int
+            for i in range(len(batch)):
+                j: int
+                for j in range(k):
+                    if ids[i, j] < 0:
+                        break
+                    yield self.node_ids[batch[i]], self.node_ids[ids[i, j]], float(scores[i, j])
+
+    def write(self,
+              output_file_path: Path,
+              query_node_ids: typing.Optional[typing.List[str]] = None,
+              output_format: typing.Optional[str] = None,
+              ):
+        kw: KgtkWriter = KgtkWriter.open(self.OUTPUT_COLUMNS,
+                                         output_file_path,
+                                         mode=KgtkWriter.Mode.EDGE,
+                                         require_all_columns=True,
+                                         prohibit_extra_columns=True,
+                                         fill_missing_columns=False,
+                                         output_format=output_format,
+                                         error_file=self.error_file,
+                                         verbose=self.verbose,
+                                         very_verbose=self.very_verbose)
+        output_count: int = 0
+        node1: str
+        node2: str
+        score: float
+        for node1, node2, score in self.search(query_node_ids):
+            kw.write([node1, self.label_value, node2, "%.6g" % score])
+            output_count += 1
+        kw.close()
+
+        if self.verbose:
+            print("Wrote %d similarity edges." % output_count, file=self.error_file, flush=True)
@@ -1,4 +1,6 @@
 from collections import defaultdict
+import copy
+import io
 import logging
 from pathlib import Path
 import sys
@@ -19,6 +21,8 @@ class Lexicalize:
                  property_values: typing.List[str],
                  sentence_label: str,
                  explain: bool = False,
+                 procs: int = 1,
+                 node_batch_size: int = 1000,
                  error_file: typing.TextIO = sys.stderr,
                  verbose: bool = False,
                  very_verbose: bool = False,
@@ -32,6 +36,11 @@ class Lexicalize:
 
         self.explain: bool = explain
 
+        # When procs > 1, sentences are built in a process pool, a batch of
+        # node_batch_size nodes at a time.
+        self.procs: int = procs
+        self.node_batch_size: int = node_batch_size
+
         self.error_file: typing.TextIO = error_file
         self.verbose: bool = verbose
         self.very_verbose: bool = very_verbose
@@ -293,51 +302,134 @@ class Lexicalize:
 
         return
 
-    def process_presorted_input(self, kr: KgtkReader, kw: KgtkWriter):
-        """The input file must be sorted by node1."""
-
-        if self.verbose:
-            print("Processing presorted input.", file=self.error_file, flush=True)
-
+    NODE_GROUP_TYPE = typing.Tuple[str, typing.List[typing.Tuple[str, str]]]
+
+    def node_groups(self,
+                    kr: KgtkReader,
+                    require_sorted: bool,
+    )->typing.Iterator[NODE_GROUP_TYPE]:
+        """
+        Yield (node_id, [(property, value), ...]) for each run of rows with
+        the same node1 value.  The input must be grouped by node1;  when
+        require_sorted is True, it must also be sorted by node1.
+        """
         input_rows: int = 0
-
-        each_node_attributes: Lexicalize.EACH_NODE_ATTRIBUTES = self.new_each_node_attributes()
-
-        previous_node_id: typing.Optional[str] = None
-        current_process_node_id: typing.Optional[str] = None
         node_id: typing.Optional[str] = None
+        properties: typing.List[typing.Tuple[str, str]] = [ ]
 
         rownum: int
         row: typing.List[str]
         for rownum, row in enumerate(kr):
             input_rows += 1
-            node_id = row[kr.node1_column_idx]
-            node_property: str = row[kr.label_column_idx]
-            node_value: str = row[kr.node2_column_idx]
-
-            # Ensure that the input file is sorted (node1 lowest to highest):
-            if previous_node_id is None:
-                previous_node_id = node_id
-            elif previous_node_id > node_id:
-                raise KGTKException("Row %d is out of order: %s > %s" % (rownum + 1, previous_node_id, node_id))
-            elif previous_node_id < node_id:
-                self.process_qnode(kw, previous_node_id, each_node_attributes)
-                each_node_attributes = self.new_each_node_attributes()
-                previous_node_id = node_id
+            row_node_id: str = row[kr.node1_column_idx]
+            if node_id is None:
+                node_id = row_node_id
+            elif row_node_id != node_id:
+                # Ensure that the input file is sorted (node1 lowest to highest):
+                if require_sorted and node_id > row_node_id:
+                    raise KGTKException("Row %d is out of order: %s > %s" % (rownum + 1, node_id, row_node_id))
+                yield node_id, properties
+                node_id = row_node_id
+                properties = [ ]
+            properties.append((row[kr.label_column_idx], row[kr.node2_column_idx]))
+
+        if node_id is not None:
+            # The final qnode in the input file.
+            yield node_id, properties
 
+        if self.verbose:
+            print("Processed %d input rows." % (input_rows), file=self.error_file, flush=True)
+
+    def node_sentence_row(self,
+                          node_id: str,
+                          properties: typing.List[typing.Tuple[str, str]],
+    )->typing.Optional[typing.List[str]]:
+        """
+        Build the output row for one node, or return None if the node has no
+        interesting attributes.
+        """
+        each_node_attributes: Lexicalize.EACH_NODE_ATTRIBUTES = self.new_each_node_attributes()
+        node_property: str
+        node_value: str
+        for node_property, node_value in properties:
             self.process_row(node_id,
                              node_property,
                              node_value,
                              each_node_attributes)
+        return self.qnode_row(node_id, each_node_attributes)
+
+    def write_node_sentences(self,
+                             kw: KgtkWriter,
+                             node_groups: typing.Iterator[NODE_GROUP_TYPE]):
+        """
+        Write the sentences for the node groups in order, building them in a
+        process pool when procs > 1.
+        """
+        output_row: typing.Optional[typing.List[str]]
+        if self.procs <= 1:
+            node_id: str
+            properties: typing.List[typing.Tuple[str, str]]
+            for node_id, properties in node_groups:
+                output_row = self.node_sentence_row(node_id, properties)
+                if output_row is not None:
+                    kw.write(output_row)
+            return
 
+        from multiprocessing import Pool
+        from kgtk.utils.orderedpool import ordered_imap
 
-        if node_id is not None:
-            # Processing the final qnode in the input file
-            self.process_qnode(kw, node_id, each_node_attributes)
+        if self.verbose:
+            print("Producing sentences with %d processes." % self.procs, file=self.error_file, flush=True)
+
+        # The workers need the properties and the entity labels, but not the
+        # parent's error file.
+        worker_lexer: Lexicalize = copy.copy(self)
+        worker_lexer.error_file = None # type: ignore
+        with Pool(self.procs, initializer=_init_lexicalize_worker, initargs=(worker_lexer,)) as pool:
+            output_rows: typing.List[typing.List[str]]
+            messages: str
+            for output_rows, messages in ordered_imap(pool,
+                                                      _lexicalize_node_batch,
+                                                      self.node_batches(node_groups),
+                                                      backlog=2 * self.procs):
+                if len(messages) > 0:
+                    self.error_file.write(messages)
+                    self.error_file.flush()
+                for output_row in output_rows:
+                    kw.write(output_row)
+
+    def node_batches(self,
+                     node_groups: typing.Iterator[NODE_GROUP_TYPE],
+    )->typing.Iterator[typing.List[NODE_GROUP_TYPE]]:
+        batch: typing.List[Lexicalize.NODE_GROUP_TYPE] = [ ]
+        node_group: Lexicalize.NODE_GROUP_TYPE
+        for node_group in node_groups:
+            batch.append(node_group)
+            if len(batch) >= self.node_batch_size:
+                yield batch
+                batch = [ ]
+        if len(batch) > 0:
+            yield batch
+
+    def process_presorted_input(self, kr: KgtkReader, kw: KgtkWriter):
+        """The input file must be sorted by node1."""
 
         if self.verbose:
-            print("Processed %d input rows." % (input_rows), file=self.error_file, flush=True)
+            print("Processing presorted input.", file=self.error_file, flush=True)
+
+        self.write_node_sentences(kw, self.node_groups(kr, require_sorted=True))
 
+    def process_grouped_input(self, kr: KgtkReader, kw: KgtkWriter):
+        """
+        The input file must be grouped by node1, but need not be sorted.  The
+        sentences are written in input order.  A node1 value that appears in
+        more than one group will produce more than one sentence.
+        """
+
+        if self.verbose:
+            print("Processing grouped input.", file=self.error_file, flush=True)
+
+        self.write_node_sentences(kw, self.node_groups(kr, require_sorted=False))
 
     def process_unsorted_input(self, kr: KgtkReader, kw: KgtkWriter, add_entity_labels: bool = False):
         """The input file is sorted in memory by node1."""
@@ -384,16 +476,8 @@ class Lexicalize:
                       file=self.error_file, flush=True)
             print("Producing sentences.", file=self.error_file, flush=True)
 
-        for node_id in sorted(rows_by_node_id.keys()):
-            node_id_rows = rows_by_node_id[node_id]
-            each_node_attributes: Lexicalize.EACH_NODE_ATTRIBUTES = self.new_each_node_attributes()
-            for row in node_id_rows:
-                self.process_row(node_id,
-                                 row[kr.label_column_idx],
-                                 row[kr.node2_column_idx],
-                                 each_node_attributes)
-                
-            self.process_qnode(kw, node_id, each_node_attributes)
+        self.write_node_sentences(kw, ((node_id, [ (row[kr.label_column_idx], row[kr.node2_column_idx]) for row in rows_by_node_id[node_id] ])
+                                       for node_id in sorted(rows_by_node_id.keys())))
         
         if self.verbose:
             print("Done producing sentences.", file=self.error_file, flush=True)
@@ -402,6 +486,15 @@ class Lexicalize:
                       kw: KgtkWriter,
                       current_process_node_id: str,
                       each_node_attributes: EACH_NODE_ATTRIBUTES)->bool:
+        output_row: typing.Optional[typing.List[str]] = self.qnode_row(current_process_node_id, each_node_attributes)
+        if output_row is None:
+            return False
+        kw.write(output_row)
+        return True
+
+    def qnode_row(self,
+                  current_process_node_id: str,
+                  each_node_attributes: EACH_NODE_ATTRIBUTES)->typing.Optional[typing.List[str]]:
         interesting_qnode: bool = False
         if each_node_attributes:
             for k in each_node_attributes:
@@ -409,16 +502,15 @@ class Lexicalize:
                     interesting_qnode = True
                     break
         if not interesting_qnode:
-            return False
+            return None
 
         concat_sentence: str
         explanation: str
         concat_sentence, explanation = self.attribute_to_sentence(each_node_attributes, current_process_node_id)
         if self.explain:
-            kw.write([ current_process_node_id, self.sentence_label, KgtkFormat.stringify(concat_sentence), KgtkFormat.stringify(explanation)])
+            return [ current_process_node_id, self.sentence_label, KgtkFormat.stringify(concat_sentence), KgtkFormat.stringify(explanation)]
         else:
-            kw.write([ current_process_node_id, self.sentence_label, KgtkFormat.stringify(concat_sentence)])
-        return True
+            return [ current_process_node_id, self.sentence_label, KgtkFormat.stringify(concat_sentence)]
 
     def get_real_label_name(self, node: str)->str:
         if node in self.node_labels:
@@ -670,3 +762,28 @@ class Lexicalize:
             print("node_id %s explanation: %s" % (node_id, repr(explanation)), file=self.error_file, flush=True)
         return concated_sentence, explanation
 
+_lexicalize_worker: typing.Optional[Lexicalize] = None
+
+def _init_lexicalize_worker(lexer: Lexicalize):
+    global _lexicalize_worker
+    _lexicalize_worker = lexer
+
+def _lexicalize_node_batch(batch: typing.List[Lexicalize.NODE_GROUP_TYPE],
+)->typing.Tuple[typing.List[typing.List[str]], str]:
+    """
+    Build the sentence rows for a batch of nodes in a worker process.  Return
+    the rows and the messages that the parent should write to its error file.
+    """
+    lexer: typing.Optional[Lexicalize] = _lexicalize_worker
+    if lexer is None:
+        raise ValueError("The lexicalize worker has not been initialized.")
+    messages: io.StringIO = io.StringIO()
+    lexer.error_file = messages
+    output_rows: typing.List[typing.List[str]] = [ ]
+    node_id: str
+    properties: typing.List[typing.Tuple[str, str]]
+    for node_id, properties in batch:
+        output_row: typing.Optional[typing.List[str]] = lexer.node_sentence_row(node_id, properties)
+        if output_row is not None:
+            output_rows.append(output_row)
+    return output_rows, messages.getvalue()
@@ -894,6 +894,10 @@ class KgtkIfExists(KgtkFormat):
                                  very_verbose=self.very_verbose)
             if right_column_names is not None:
                 join_shuffle_list = jw.build_shuffle_list(right_column_names)
+
+        if not (self.presorted or self.cache_input) and mfew is None and ufew is None and jw is None and not self.join_output:
+            # Only the filter keys are read from the filter file.
+            filter_kr.project(filter_key_columns)
             
         if self.presorted:
             self.process_presorted_files(input_kr=input_kr,
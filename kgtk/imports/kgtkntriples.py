@@ -3,6 +3,7 @@
 from argparse import ArgumentParser, Namespace
 import attr
 import csv
+import io
 from pathlib import Path
 import re
 import shortuuid # type: ignore
@@ -14,6 +15,7 @@ from kgtk.io.kgtkreader import KgtkReader, KgtkReaderMode, KgtkReaderOptions
 from kgtk.io.kgtkwriter import KgtkWriter
 from kgtk.reshape.kgtkidbuilder import KgtkIdBuilder, KgtkIdBuilderOptions
 from kgtk.utils.argparsehelpers import optional_bool
+from kgtk.utils.filechunks import can_split, chunk_ranges, iter_range_lines
 from kgtk.value.kgtkvalue import KgtkValue, KgtkValueFields
 from kgtk.value.kgtkvalueoptions import KgtkValueOptions, DEFAULT_KGTK_VALUE_OPTIONS
 
@@ -38,6 +40,11 @@ class KgtkNtriples(KgtkFormat):
     DEFAULT_BUILD_ID: bool = False
     DEFAULT_ESCAPE_PIPES: bool = True
     DEFAULT_VALIDATE: bool = False
+    DEFAULT_PROCS: int = 1
+
+    # The target and minimum sizes of the chunks converted by each worker process.
+    PARALLEL_CHUNK_SIZE: int = 1 << 26
+    PARALLEL_MIN_CHUNK_SIZE: int = 1 << 20
 
     COLUMN_NAMES: typing.List[str] = [KgtkFormat.NODE1, KgtkFormat.LABEL, KgtkFormat.NODE2]
     
@@ -181,6 +188,9 @@ class KgtkNtriples(KgtkFormat):
 
     output_line_count: int = attr.ib(default=0)
 
+    # Convert uncompressed input files in this many worker processes.
+    procs: int = attr.ib(validator=attr.validators.instance_of(int), default=DEFAULT_PROCS)
+
     def write_row(self, ew: KgtkWriter, node1: str, label: str, node2: str):
         output_row: typing.List[str] = [ node1, label, node2]
         if self.idbuilder is None:
@@ -519,6 +529,117 @@ class KgtkNtriples(KgtkFormat):
         return [m.group("node1"), m.group("label"), m.group("node2")], True
 
 
+    def convert_line(self, line: str, line_number: int, ew: KgtkWriter)->bool:
+        """
+        Parse and convert an input line, writing the output row.  Return False
+        if the line should be rejected.
+        """
+        row: typing.List[str]
+        valid: bool
+        row, valid = self.parse(line, line_number)
+        if not valid:
+            return False
+
+        node1: str
+        ok_1: bool
+        node1, ok_1 = self.convert_and_validate(row[0], line_number, ew)
+
+        label: str
+        ok_2: bool
+        label, ok_2 = self.convert_and_validate(row[1], line_number, ew)
+
+        node2: str
+        ok_3: bool
+        node2, ok_3 = self.convert_and_validate(row[2], line_number, ew)
+
+        if ok_1 and ok_2 and ok_3:
+            self.write_row(ew, node1, label, node2)
+            return True
+        else:
+            return False
+
+    def worker_copy(self)->"KgtkNtriples":
+        """
+        Return a copy that can be sent to a worker process.  The workers do not
+        build IDs or write files, and they send their messages to the parent.
+        """
+        return attr.evolve(self, error_file=None, idbuilder=None, idbuilder_options=None)
+
+    def process_file_in_parallel(self,
+                                 input_file_path: Path,
+                                 ew: KgtkWriter,
+                                 rw: typing.Optional[typing.TextIO],
+    )->typing.Tuple[int, int]:
+        """
+        Convert an uncompressed input file in line-aligned chunks in worker
+        processes.  Return the number of input lines and rejected lines.
+
+        The first pass finds the namespaces that each chunk would create and
+        the number of new nodes it would generate.  Replaying the namespaces in
+        chunk order gives the same namespace table as a serial import, so the
+        second pass can convert the chunks in parallel against a frozen table,
+        with each chunk starting at its own new node counter.  The output is
+        written in chunk order, so it matches a serial import.
+        """
+        from multiprocessing import Pool
+        from kgtk.utils.orderedpool import ordered_imap
+
+        file_size: int = input_file_path.stat().st_size
+        ranges: typing.List[typing.Tuple[int, int]] = chunk_ranges(input_file_path,
+                                                                   max(4 * self.procs, file_size // self.PARALLEL_CHUNK_SIZE),
+                                                                   min_chunk_size=self.PARALLEL_MIN_CHUNK_SIZE)
+        if self.verbose:
+            print("Converting %s in %d chunks with %d processes." % (str(input_file_path), len(ranges), self.procs),
+                  file=self.error_file, flush=True)
+
+        # Pass 1: discover the namespaces and count the lines and new nodes.
+        scans: typing.List[typing.Tuple[int, int, typing.List[str]]]
+        with Pool(self.procs, initializer=_init_ntriples_worker, initargs=(self.worker_copy(),)) as pool:
+            scans = pool.map(_scan_ntriples_chunk, [(input_file_path, start, end) for start, end in ranges])
+
+        tasks: typing.List[typing.Tuple[Path, int, int, int, int]] = [ ]
+        line_count: int = 0
+        newnode_counter: int = self.newnode_counter
+        chunk_idx: int
+        for chunk_idx, (chunk_line_count, chunk_newnode_count, namespace_prefixes) in enumerate(scans):
+            namespace_prefix: str
+            for namespace_prefix in namespace_prefixes:
+                # This creates the namespace only if a serial import would
+                # have created it at this point.
+                self.convert_uri("<" + namespace_prefix + ">", line_count)
+            start, end = ranges[chunk_idx]
+            tasks.append((input_file_path, start, end, line_count, newnode_counter))
+            line_count += chunk_line_count
+            newnode_counter += chunk_newnode_count
+
+        # Pass 2: convert the chunks against the frozen namespace table.
+        reject_line_count: int = 0
+        with Pool(self.procs, initializer=_init_ntriples_worker, initargs=(self.worker_copy(),)) as pool:
+            rows: typing.List[typing.List[str]]
+            reject_lines: typing.List[str]
+            chunk_reject_count: int
+            used_namespaces: typing.Set[str]
+            messages: str
+            for rows, reject_lines, chunk_reject_count, used_namespaces, messages in ordered_imap(pool,
+                                                                                                 _convert_ntriples_chunk,
+                                                                                                 tasks,
+                                                                                                 backlog=2 * self.procs):
+                if len(messages) > 0:
+                    self.error_file.write(messages)
+                    self.error_file.flush()
+                row: typing.List[str]
+                for row in rows:
+                    self.write_row(ew, row[0], row[1], row[2])
+                if rw is not None:
+                    line: str
+                    for line in reject_lines:
+                        rw.write(line)
+                reject_line_count += chunk_reject_count
+                self.used_namespaces.update(used_namespaces)
+
+        self.newnode_counter = newnode_counter
+        return line_count, reject_line_count
+
     def process(self):
         output_column_names: typing.List[str]
         if self.build_id and self.idbuilder_options is not None:
@@ -568,6 +689,15 @@ class KgtkNtriples(KgtkFormat):
                     # Generate a new local namespace UUID.
                     self.local_namespace_uuid = shortuuid.uuid()
 
+            if self.procs > 1 and can_split(Path(input_file_path)):
+                chunk_line_count: int
+                chunk_reject_count: int
+                chunk_line_count, chunk_reject_count = self.process_file_in_parallel(Path(input_file_path), ew, rw)
+                total_input_line_count += chunk_line_count
+                reject_line_count += chunk_reject_count
+                self.save_namespaces(ew)
+                continue
+
             # Open the input file.
             if self.verbose:
                 print("Opening the input file: %s" % input_file_path, file=self.error_file, flush=True)
@@ -582,30 +712,7 @@ class KgtkNtriples(KgtkFormat):
                 input_line_count += 1
                 total_input_line_count += 1
 
-                row: typing.List[str]
-                valid: bool
-                row, valid = self.parse(line, input_line_count)
-                if not valid:
-                    if rw is not None:
-                        rw.write(line)
-                    reject_line_count += 1
-                    continue
-
-                node1: str
-                ok_1: bool
-                node1, ok_1 = self.convert_and_validate(row[0], input_line_count, ew)
-
-                label: str
-                ok_2: bool
-                label, ok_2 = self.convert_and_validate(row[1], input_line_count, ew)
-
-                node2: str
-                ok_3: bool
-                node2, ok_3 = self.convert_and_validate(row[2], input_line_count, ew)
-
-                if ok_1 and ok_2 and ok_3:
-                    self.write_row(ew, node1, label, node2)
-                else:
+                if not self.convert_line(line, input_line_count, ew):
                     if rw is not None:
                         rw.write(line)
                     reject_line_count += 1
@@ -616,6 +723,10 @@ class KgtkNtriples(KgtkFormat):
 
                 self.save_namespaces(ew)
 
+        if self.idbuilder is not None:
+            # Report deferred ID uniqueness violations, if any.
+            self.idbuilder.finish(self.error_file)
+
         if self.verbose:
             print("Processed %d known namespaces." % (namespace_line_count), file=self.error_file, flush=True)
             print("Processed %d records." % (total_input_line_count), file=self.error_file, flush=True)
@@ -710,6 +821,99 @@ class KgtkNtriples(KgtkFormat):
                                   help="When specified, override UUID generation for debugging. (default=%(default)s).",
                                   default=None)
 
+        parser.add_argument(      "--procs", dest="procs",
+                                  help="Convert uncompressed input files in this many worker processes. (default=%(default)s).",
+                                  type=int, default=cls.DEFAULT_PROCS)
+
+class _RowCollector:
+    """
+    Collect the rows that a worker process would write.
+    """
+    def __init__(self):
+        self.rows: typing.List[typing.List[str]] = [ ]
+
+    def write(self, row: typing.List[str]):
+        self.rows.append(row)
+
+_ntriples_worker: typing.Optional[KgtkNtriples] = None
+
+def _init_ntriples_worker(kn: KgtkNtriples):
+    global _ntriples_worker
+    _ntriples_worker = kn
+
+def _chunk_lines(input_file_path: Path, start: int, end: int)->typing.Iterator[str]:
+    line: str
+    for line in iter_range_lines(input_file_path, start, end):
+        # Text mode reads in the serial import translate the ends of lines.
+        if line.endswith("\r\n"):
+            line = line[:-2] + "\n"
+        yield line
+
+def _scan_ntriples_chunk(task: typing.Tuple[Path, int, int])->typing.Tuple[int, int, typing.List[str]]:
+    """
+    Convert a chunk against the starting namespace table, discarding the output.
+    Return the number of lines, the number of new nodes generated, and the
+    namespace prefixes created, in order.
+    """
+    input_file_path, start, end = task
+    if _ntriples_worker is None:
+        raise ValueError("The ntriples worker has not been initialized.")
+    kn: KgtkNtriples = attr.evolve(_ntriples_worker,
+                                   namespace_prefixes=dict(_ntriples_worker.namespace_prefixes),
+                                   namespace_ids=dict(_ntriples_worker.namespace_ids),
+                                   used_namespaces=set(),
+                                   error_file=io.StringIO(),
+                                   verbose=False)
+    initial_namespace_count: int = len(kn.namespace_prefixes)
+    initial_newnode_counter: int = kn.newnode_counter
+    collector: _RowCollector = _RowCollector()
+    line_count: int = 0
+    line: str
+    for line in _chunk_lines(input_file_path, start, end):
+        line_count += 1
+        row: typing.List[str]
+        valid: bool
+        row, valid = kn.parse(line, line_count)
+        if valid:
+            item: str
+            for item in row:
+                kn.convert(item, line_count, collector) # type: ignore
+        collector.rows.clear()
+    return line_count, kn.newnode_counter - initial_newnode_counter, list(kn.namespace_prefixes.keys())[initial_namespace_count:]
+
+def _convert_ntriples_chunk(task: typing.Tuple[Path, int, int, int, int],
+)->typing.Tuple[typing.List[typing.List[str]], typing.List[str], int, typing.Set[str], str]:
+    """
+    Convert a chunk against the complete namespace table.  Return the output
+    rows, the rejected lines, the number of rejected lines, the namespaces
+    used, and the messages that the parent should write to its error file.
+    """
+    input_file_path, start, end, line_offset, newnode_counter = task
+    if _ntriples_worker is None:
+        raise ValueError("The ntriples worker has not been initialized.")
+    kn: KgtkNtriples = _ntriples_worker
+    kn.newnode_counter = newnode_counter
+    kn.used_namespaces = set()
+    messages: io.StringIO = io.StringIO()
+    kn.error_file = messages
+    namespace_id_counter: int = kn.namespace_id_counter
+
+    collector: _RowCollector = _RowCollector()
+    reject_lines: typing.List[str] = [ ]
+    reject_count: int = 0
+    line_number: int = line_offset
+    line: str
+    for line in _chunk_lines(input_file_path, start, end):
+        line_number += 1
+        if not kn.convert_line(line, line_number, collector): # type: ignore
+            reject_count += 1
+            if kn.reject_file_path is not None:
+                reject_lines.append(line)
+
+    if kn.namespace_id_counter != namespace_id_counter:
+        raise ValueError("A new namespace was created after the namespace table was frozen.")
+    return collector.rows, reject_lines, reject_count, kn.used_namespaces, messages.getvalue()
+
 def main():
     """
     Test the KGTK ntriples importer.
@@ -776,6 +980,7 @@ def main():
         print("--build-id=%s" % str(args.build_id), file=error_file, flush=True)
         print("--escape-pipes=%s" % str(args.escape_pipes), file=error_file, flush=True)
         print("--validate=%s" % str(args.validate), file=error_file, flush=True)
+        print("--procs=%d" % args.procs, file=error_file, flush=True)
         if args.override_uuid is not None:
             print("--override_uuid=%s" % str(args.override_uuid), file=error_file, flush=True)            
 
@@ -809,6 +1014,7 @@ def main():
         idbuilder_options=idbuilder_options,
         validate=args.validate,
         override_uuid=args.override_uuid,
+        procs=args.procs,
         reader_options=reader_options,
         value_options=value_options,
         error_file=error_file,
@@ -0,0 +1,259 @@
+"""
+A columnar binary cache for a KGTK file, for repeated reads.
+
+The cache is stored next to the KGTK file it caches, with the suffix ".kbin".
+It preserves the header line, and stores each column as a dictionary of the
+distinct values in the column plus an array of integer codes, one per data
+row.  The dictionary is sorted, so comparing the codes of two values in the
+same column gives the same result as comparing the values.  The cache is
+memory-mapped when it is loaded, and the values of a column are only decoded
+when the column is first used, so readers that only need some of the columns
+do not pay for the others.
+
+The cache records the size and modification time of the KGTK file when the
+cache was built.  A cache that does not match the file is stale, and will
+not be used.
+
+Layout (all integers are little-endian, and all sections are padded to a
+multiple of 8 bytes):
+
+  * a fixed-size header: magic, version, column count, row count, and the
+    size and modification time of the KGTK file;
+  * the header line and the column separator (each as a length and utf-8 bytes);
+  * a table with, for each column, the number of distinct values and the
+    position and size of the values and the position of the codes;
+  * for each column, the sorted values (utf-8, separated by newlines, which
+    cannot appear in KGTK values) and the codes (uint32, one per row).
+"""
+
+from array import array
+import attr
+import mmap
+import os
+from pathlib import Path
+import struct
+import sys
+import typing
+
+@attr.s(slots=True, frozen=True)
+class KgtkBinaryColumn():
+    # The sorted, distinct values of the column, and the code of each row.
+    value_count: int = attr.ib(validator=attr.validators.instance_of(int))
+    value_bytes: typing.Union[bytes, memoryview] = attr.ib()
+    codes: typing.Sequence[int] = attr.ib()
+
+    # The decoded values, filled in when they are first used.
+    decoded: typing.List[typing.List[str]] = attr.ib(factory=list)
+
+    @property
+    def values(self)->typing.List[str]:
+        if len(self.decoded) == 0:
+            self.decoded.append(bytes(self.value_bytes).decode("utf-8").split("\n") if self.value_count > 0 else [ ])
+        return self.decoded[0]
+
+
+@attr.s(slots=True, frozen=True)
+class KgtkBinaryFile():
+    SUFFIX: str = ".kbin"
+    MAGIC: bytes = b"KGTKBIN\0"
+    VERSION: int = 1
+
+    # magic, version, column count, row count, file size, file mtime (ns)
+    HEADER: struct.Struct = struct.Struct("<8sIIQQq")
+    COLUMN: struct.Struct = struct.Struct("<QQQQ")
+    VALUE_SEPARATOR: str = "\n"
+
+    header: str = attr.ib(validator=attr.validators.instance_of(str))
+    column_separator: str = attr.ib(validator=attr.validators.instance_of(str))
+    row_count: int = attr.ib(validator=attr.validators.instance_of(int))
+
+    # The size and modification time of the KGTK file when it was cached.
+    file_size: int = attr.ib(validator=attr.validators.instance_of(int))
+    file_mtime_ns: int = attr.ib(validator=attr.validators.instance_of(int))
+
+    columns: typing.List[KgtkBinaryColumn] = attr.ib()
+
+    @classmethod
+    def binary_path(cls, file_path: Path)->Path:
+        return Path(str(file_path) + cls.SUFFIX)
+
+    @property
+    def column_names(self)->typing.List[str]:
+        return self.header.split(self.column_separator)
+
+    def is_current(self, file_path: Path)->bool:
+        """
+        Return True if the KGTK file has not changed since it was cached.
+        """
+        st: os.stat_result = os.stat(file_path)
+        return st.st_size == self.file_size and st.st_mtime_ns == self.file_mtime_ns
+
+    @classmethod
+    def write(cls,
+              binary_path: Path,
+              file_path: Path,
+              header: str,
+              column_separator: str,
+              rows: typing.Iterable[typing.Sequence[str]],
+    )->int:
+        """
+        Write the cache for the KGTK file at file_path from its header and data
+        rows, which must have one value per column.  Returns the row count.
+
+        Take the file's size and modification time before reading the rows, so
+        that a file that changes while it is being read leaves a stale cache.
+        """
+        st: os.stat_result = os.stat(file_path)
+        column_count: int = len(header.split(column_separator))
+        value_codes: typing.List[typing.Dict[str, int]] = [dict() for idx in range(column_count)]
+        codes: typing.List[array] = [array("I") for idx in range(column_count)]
+
+        row_count: int = 0
+        row: typing.Sequence[str]
+        for row in rows:
+            if len(row) != column_count:
+                raise ValueError("Data row %d has %d values, expected %d." % (row_count + 1, len(row), column_count))
+            idx: int
+            value: str
+            for idx, value in enumerate(row):
+                if cls.VALUE_SEPARATOR in value:
+                    raise ValueError("Data row %d has a newline in column %d." % (row_count + 1, idx + 1))
+                column_values: typing.Dict[str, int] = value_codes[idx]
+                code: typing.Optional[int] = column_values.get(value)
+                if code is None:
+                    code = len(column_values)
+                    column_values[value] = code
+                codes[idx].append(code)
+            row_count += 1
+
+        def padded(data: bytes)->bytes:
+            return data + bytes(-len(data) % 8)
+
+        def text(value: str)->bytes:
+            data: bytes = value.encode("utf-8")
+            return padded(struct.pack("<Q", len(data)) + data)
+
+        def little_endian(a: array)->bytes:
+            if sys.byteorder != "little":
+                a = array(a.typecode, a)
+                a.byteswap()
+            return padded(a.tobytes())
+
+        # Sort each dictionary so that codes compare like values, and
+        # renumber the codes to match.
+        sections: typing.List[typing.Tuple[int, bytes, bytes]] = [ ]
+        idx = 0
+        for idx in range(column_count):
+            values: typing.List[str] = sorted(value_codes[idx])
+            renumber: array = array("I", bytes(4 * len(values)))
+            new_code: int
+            for new_code, value in enumerate(values):
+                renumber[value_codes[idx][value]] = new_code
+            value_codes[idx] = dict() # Free the memory.
+            column_codes: array = array("I", map(renumber.__getitem__, codes[idx]))
+            codes[idx] = array("I") # Free the memory.
+            sections.append((len(values), cls.VALUE_SEPARATOR.join(values).encode("utf-8"), little_endian(column_codes)))
+
+        prefix: bytes = cls.HEADER.pack(cls.MAGIC, cls.VERSION, column_count, row_count, st.st_size, st.st_mtime_ns) + \
+            text(header) + text(column_separator)
+        position: int = len(prefix) + cls.COLUMN.size * column_count
+        table: bytearray = bytearray()
+        value_count: int
+        values_data: bytes
+        codes_data: bytes
+        for value_count, values_data, codes_data in sections:
+            table += cls.COLUMN.pack(value_count, position, len(values_data), position + len(padded(values_data)))
+            position += len(padded(values_data)) + len(codes_data)
+
+        with open(binary_path, "wb") as f:
+            f.write(prefix)
+            f.write(table)
+            for value_count, values_data, codes_data in sections:
+                f.write(padded(values_data))
+                f.write(codes_data)
+
+        return row_count
+
+    @classmethod
+    def load(cls, binary_path: Path)->typing.Optional["KgtkBinaryFile"]:
+        """
+        Memory-map a cache file.  Returns None if the cache file is missing or
+        is not a cache that we understand.
+        """
+        if not binary_path.is_file() or os.path.getsize(binary_path) < cls.HEADER.size:
+            return None
+        with open(binary_path, "rb") as f:
+            # The memory map stays open as long as the columns are in use.
+            mm: mmap.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data: memoryview = memoryview(mm)
+
+        magic: bytes
+        version: int
+        column_count: int
+        row_count: int
+        file_size: int
+        file_mtime_ns: int
+        (magic, version, column_count, row_count, file_size, file_mtime_ns) = cls.HEADER.unpack_from(data, 0)
+        if magic != cls.MAGIC or version != cls.VERSION:
+            return None
+        position: int = cls.HEADER.size
+
+        def text()->str:
+            nonlocal position
+            length: int = struct.unpack_from("<Q", data, position)[0]
+            value: str = bytes(data[position + 8:position + 8 + length]).decode("utf-8")
+            position += 8 + length + (-length % 8)
+            return value
+
+        def numbers(typecode: str, start: int, count: int)->typing.Sequence[int]:
+            size: int = array(typecode).itemsize
+            if sys.byteorder == "little":
+                return data[start:start + size * count].cast(typecode)
+            a: array = array(typecode, bytes(data[start:start + size * count]))
+            a.byteswap()
+            return a
+
+        header: str = text()
+        column_separator: str = text()
+        columns: typing.List[KgtkBinaryColumn] = [ ]
+        idx: int
+        for idx in range(column_count):
+            value_count: int
+            values_pos: int
+            values_size: int
+            codes_pos: int
+            (value_count, values_pos, values_size, codes_pos) = cls.COLUMN.unpack_from(data, position + idx * cls.COLUMN.size)
+            columns.append(KgtkBinaryColumn(value_count=value_count,
+                                            value_bytes=data[values_pos:values_pos + values_size],
+                                            codes=numbers("I", codes_pos, row_count)))
+
+        return cls(header=header,
+                   column_separator=column_separator,
+                   row_count=row_count,
+                   file_size=file_size,
+                   file_mtime_ns=file_mtime_ns,
+                   columns=columns)
+
+    def iter_rows(self,
+                  start: int = 0,
+                  stop: typing.Optional[int] = None,
+                  step: int = 1,
+                  column_indexes: typing.Optional[typing.List[int]] = None,
+    )->typing.Iterator[typing.List[str]]:
+        """
+        Yield the rows start, start + step, ... up to (but not including) stop,
+        as lists of the values in all columns, or only in the selected columns.
+        Rows are numbered from 0.
+        """
+        if stop is None or stop > self.row_count:
+            stop = self.row_count
+        if start >= stop:
+            return
+        columns: typing.List[KgtkBinaryColumn]
+        if column_indexes is None:
+            columns = self.columns
+        else:
+            columns = [self.columns[idx] for idx in column_indexes]
+
+        # Look up the values of each column, and zip them into rows.
+        yield from map(list, zip(*[map(column.values.__getitem__, column.codes[start:stop:step]) for column in columns]))
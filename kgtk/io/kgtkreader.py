@@ -20,17 +20,22 @@ from argparse import ArgumentParser, _ArgumentGroup, Namespace, SUPPRESS
 import attr
 from enum import Enum
 import io
+import itertools
 from multiprocessing import Process, Queue
+import os
 from pathlib import Path
 import sys
 import typing
 
 from kgtk.kgtkformat import KgtkFormat
 from kgtk.io.kgtkbase import KgtkBase
+from kgtk.io.kgtkbinary import KgtkBinaryFile
 from kgtk.utils.argparsehelpers import optional_bool
-from kgtk.utils.closableiter import ClosableIter, ClosableIterTextIOWrapper
+from kgtk.utils.closableiter import ClosableIter, ClosableIterGenerator, ClosableIterTextIOWrapper
 from kgtk.utils.enumnameaction import EnumNameAction
+from kgtk.utils.filechunks import can_split, header_length, iter_range_lines, iter_sample_lines, tail_offset
 from kgtk.utils.gzipprocess import GunzipProcess
+from kgtk.utils.lineindex import LineIndex
 from kgtk.utils.validationaction import ValidationAction
 from kgtk.value.kgtkvalue import KgtkValue
 from kgtk.value.kgtkvalueoptions import KgtkValueOptions, DEFAULT_KGTK_VALUE_OPTIONS
@@ -82,6 +87,22 @@ class KgtkReaderOptions():
     record_limit: typing.Optional[int] = attr.ib(validator=attr.validators.optional(attr.validators.instance_of(int)), default=None)
     tail_count: typing.Optional[int] = attr.ib(validator=attr.validators.optional(attr.validators.instance_of(int)), default=None)
 
+    # Sample an uncompressed file by seeking instead of reading every record:
+    #
+    # 1) With a line-offset sidecar index (built on first use), the sampling
+    #    above is exact, and a tail count without a record limit passes the
+    #    last records of the file.
+    # 2) Without an index, a tail count without a record limit seeks to the
+    #    end of the file, and every nth record sampling reads records at
+    #    random offsets (an approximate sample).
+    use_line_index: bool = attr.ib(validator=attr.validators.instance_of(bool), default=False)
+    seek_sampling: bool = attr.ib(validator=attr.validators.instance_of(bool), default=False)
+
+    # Read the rows from the binary cache of the file (see "kgtk to-binary")
+    # when it has a current one and no validation is requested, or require it.
+    use_binary_cache: bool = attr.ib(validator=attr.validators.instance_of(bool), default=False)
+    require_binary_cache: bool = attr.ib(validator=attr.validators.instance_of(bool), default=False)
+
     # How do we handle errors?
     error_limit: int = attr.ib(validator=attr.validators.instance_of(int), default=ERROR_LIMIT_DEFAULT) # >0 ==> limit error reports
 
@@ -237,6 +258,19 @@ class KgtkReaderOptions():
                             help=h(prefix3 + "The action to take when a column name is unsafe (default=%(default)s)."),
                             type=ValidationAction, action=EnumNameAction, **d(default=ValidationAction.REPORT))
 
+        fgroup.add_argument(prefix1 + "use-binary-cache",
+                            dest=prefix2 + "use_binary_cache",
+                            metavar="optional True|False",
+                            help=h(prefix3 + "Read the rows from the binary cache of the file when it has a current one " +
+                                   "and no validation is requested (default=%(default)s)."),
+                            type=optional_bool, nargs='?', const=True, **d(default=False))
+
+        fgroup.add_argument(prefix1 + "require-binary-cache",
+                            dest=prefix2 + "require_binary_cache",
+                            metavar="optional True|False",
+                            help=h(prefix3 + "Fail if the rows cannot be read from the binary cache of the file (default=%(default)s)."),
+                            type=optional_bool, nargs='?', const=True, **d(default=False))
+
         fgroup.add_argument(prefix1 + "prohibit-whitespace-in-column-names",
                             dest=prefix2 + "prohibit_whitespace_in_column_names",
                             metavar="optional True|False",
@@ -266,6 +300,21 @@ class KgtkReaderOptions():
                             help=h(prefix3 + "Pass this number of records (default=no tail processing)."),
                             type=int, **d(default=None))
 
+        sgroup.add_argument(prefix1 + "use-line-index",
+                            dest=prefix2 + "use_line_index",
+                            metavar="optional True|False",
+                            help=h(prefix3 + "Seek to the sampled records of an uncompressed file using a line-offset " +
+                                   "sidecar index, building the index if needed (default=%(default)s)."),
+                            type=optional_bool, nargs='?', const=True, **d(default=False))
+
+        sgroup.add_argument(prefix1 + "seek-sampling",
+                            dest=prefix2 + "seek_sampling",
+                            metavar="optional True|False",
+                            help=h(prefix3 + "Sample an uncompressed file by seeking: a tail count without a record limit " +
+                                   "reads the end of the file, and every nth record sampling reads records at " +
+                                   "random offsets (default=%(default)s)."),
+                            type=optional_bool, nargs='?', const=True, **d(default=False))
+
         lgroup: _ArgumentGroup = parser.add_argument_group(h(prefix3 + "Line parsing"),
                                                            h("Options affecting " + prefix4 + "data line parsing."))
 
@@ -387,6 +436,10 @@ class KgtkReaderOptions():
             short_line_action=lookup("short_line_action", ValidationAction.EXCLUDE),
             skip_header_record=lookup("skip_header_recordb", False),
             tail_count=lookup("tail_count", None),
+            use_line_index=lookup("use_line_index", False),
+            seek_sampling=lookup("seek_sampling", False),
+            use_binary_cache=lookup("use_binary_cache", False),
+            require_binary_cache=lookup("require_binary_cache", False),
             truncate_long_lines=lookup("truncate_long_lines", False),
             unsafe_column_name_action=lookup("unsafe_column_name_action", ValidationAction.REPORT),
             whitespace_line_action=lookup("whitespace_line_action", ValidationAction.EXCLUDE),
@@ -428,6 +481,8 @@ class KgtkReaderOptions():
             print("%srecord-limit=%s" % (prefix, str(self.record_limit)), file=out)
         if self.tail_count is not None:
             print("%stail-count=%s" % (prefix, str(self.tail_count)), file=out)
+        print("%suse-line-index=%s" % (prefix, str(self.use_line_index)), file=out)
+        print("%sseek-sampling=%s" % (prefix, str(self.seek_sampling)), file=out)
         print("%sinitial-skip-count=%s" % (prefix, str(self.initial_skip_count)), file=out)
         print("%sprohibited-list-action=%s" % (prefix, self.prohibited_list_action.name), file=out)
         print("%sfill-short-lines=%s" % (prefix, str(self.fill_short_lines)), file=out)
@@ -440,7 +495,24 @@ class KgtkReaderOptions():
         print("%smgzip-threads=%s" % (prefix, str(self.mgzip_threads)), file=out)
         print("%sgzip-in-parallel=%s" % (prefix, str(self.gzip_in_parallel)), file=out)
         print("%sgzip-queue-size=%s" % (prefix, str(self.gzip_queue_size)), file=out)
+        print("%suse-binary-cache=%s" % (prefix, str(self.use_binary_cache)), file=out)
+        print("%srequire-binary-cache=%s" % (prefix, str(self.require_binary_cache)), file=out)
         print("%sprohibit-whitespace-in-column-names=%s" % (prefix, str(self.prohibit_whitespace_in_column_names)), file=out)
+
+    def passes_raw_lines(self)->bool:
+        """
+        Return True if a reader with these options passes every data line of a
+        KGTK file through, split on the column separator and otherwise
+        unchanged: there is no data sampling, line or value repair and
+        validation, or forced header, and the input format is KGTK.
+        """
+        return self.input_format in (None, self.INPUT_FORMAT_KGTK) and \
+            self.force_column_names is None and \
+            not (self.repair_and_validate_lines or self.repair_and_validate_values) and \
+            self.initial_skip_count == 0 and \
+            self.every_nth_record <= 1 and \
+            self.record_limit is None and \
+            self.tail_count is None
               
 
 DEFAULT_KGTK_READER_OPTIONS: KgtkReaderOptions = KgtkReaderOptions()
@@ -486,6 +558,18 @@ class KgtkReader(KgtkBase, ClosableIter[typing.List[str]]):
     data_lines_ignored: int = attr.ib(validator=attr.validators.instance_of(int), default=0)
     data_errors_reported: int = attr.ib(validator=attr.validators.instance_of(int), default=0)
 
+    # Has the source already applied the pre-validation sampling?
+    presampled: bool = attr.ib(validator=attr.validators.instance_of(bool), default=False)
+
+    # The binary cache and its sampled rows, used instead of the source.
+    binary: typing.Optional[KgtkBinaryFile] = attr.ib(default=None)
+    binary_rows: typing.Optional[ClosableIter[typing.List[str]]] = attr.ib(default=None)
+
+    # The columns that the caller needs (see project()), and the width of the
+    # rows that are returned.  None means all columns.
+    projection: typing.Optional[typing.List[int]] = attr.ib(default=None)
+    projection_width: int = attr.ib(validator=attr.validators.instance_of(int), default=-1)
+
     # Is this an edge file or a node file?
     is_edge_file: bool = attr.ib(validator=attr.validators.instance_of(bool), default=False)
     is_node_file: bool = attr.ib(validator=attr.validators.instance_of(bool), default=False)
@@ -531,13 +615,35 @@ class KgtkReader(KgtkBase, ClosableIter[typing.List[str]]):
         # Supply the default reader and value options:
         (options, value_options) = cls._default_options(options, value_options)
 
-        source: ClosableIter[str] = cls._openfile(file_path, options=options, error_file=error_file, verbose=verbose)
-
-        # Read the kgtk file header and split it into column names.  We get the
-        # header back, too, for use in debugging and error messages.
+        source: ClosableIter[str]
         header: str
         column_names: typing.List[str]
-        (header, column_names) = cls._build_column_names(source, options, error_file=error_file, verbose=verbose)
+        sampled_source: typing.Optional[ClosableIter[str]] = None
+        binary_rows: typing.Optional[ClosableIter[typing.List[str]]] = None
+
+        # Use the binary cache of the file, if there is a current one.
+        binary: typing.Optional[KgtkBinaryFile] = cls._open_binary_cache(file_path, options, error_file=error_file, verbose=verbose)
+        if binary is not None:
+            header = binary.header
+            column_names = binary.column_names
+            binary_rows = ClosableIterGenerator(cls._generate_binary_rows(binary, options))
+            source = ClosableIterGenerator(line for line in ())
+
+        else:
+            source = cls._openfile(file_path, options=options, error_file=error_file, verbose=verbose)
+
+            # Read the kgtk file header and split it into column names.  We get the
+            # header back, too, for use in debugging and error messages.
+            (header, column_names) = cls._build_column_names(source, options, error_file=error_file, verbose=verbose)
+
+            # Optionally replace the source with one that seeks to the sampled data lines.
+            sampled_source = cls._open_sampled_source(file_path,
+                                                      options,
+                                                      error_file=error_file,
+                                                      verbose=verbose)
+            if sampled_source is not None:
+                source.close()
+                source = sampled_source
         # Check for unsafe column names.
         cls.check_column_names(column_names,
                                header_line=header,
@@ -637,6 +743,9 @@ class KgtkReader(KgtkBase, ClosableIter[typing.List[str]]):
                    label_column_idx=label_column_idx,
                    node2_column_idx=node2_column_idx,
                    id_column_idx=id_column_idx,
+                   presampled=sampled_source is not None,
+                   binary=binary,
+                   binary_rows=binary_rows,
                    error_file=error_file,
                    reject_file=reject_file,
                    options=options,
@@ -647,6 +756,68 @@ class KgtkReader(KgtkBase, ClosableIter[typing.List[str]]):
                    very_verbose=very_verbose,
         )
 
+    @classmethod
+    def open_partition(cls,
+                       file_path: Path,
+                       partition: int,
+                       partition_count: int,
+                       key_column: typing.Optional[str] = None,
+                       who: str = "input",
+                       error_file: typing.TextIO = sys.stderr,
+                       reject_file: typing.Optional[typing.TextIO] = None,
+                       mode: typing.Optional[KgtkReaderMode] = None,
+                       options: typing.Optional[KgtkReaderOptions] = None,
+                       value_options: typing.Optional[KgtkValueOptions] = None,
+                       verbose: bool = False,
+                       very_verbose: bool = False)->"KgtkReader":
+        """
+        Opens one of partition_count row-aligned partitions of an uncompressed
+        KGTK file.  The reader has the file's header, and returns only the data
+        lines of the partition.  Partitions are numbered from 0.
+
+        The partitions are computed from the file's line index, which is built
+        (and saved) if necessary.  If key_column is given, the file must be sorted
+        on that column, and the lines with the same key will be in the same
+        partition.  The sampling options apply within the partition.
+        """
+        if not can_split(file_path):
+            raise ValueError("%s: %s cannot be partitioned: it must be an uncompressed file." % (cls.__name__, str(file_path)))
+
+        # Supply the default reader and value options:
+        (options, value_options) = cls._default_options(options, value_options)
+        if options.compression_type is not None and len(options.compression_type) > 0:
+            raise ValueError("%s: %s cannot be partitioned: it must be an uncompressed file." % (cls.__name__, str(file_path)))
+
+        # Seek-based sampling and the binary cache do not apply to partitions.
+        kr: KgtkReader = cls.open(file_path,
+                                  who=who,
+                                  error_file=error_file,
+                                  reject_file=reject_file,
+                                  mode=mode,
+                                  options=attr.evolve(options,
+                                                      use_line_index=False,
+                                                      seek_sampling=False,
+                                                      use_binary_cache=False,
+                                                      require_binary_cache=False),
+                                  value_options=value_options,
+                                  verbose=verbose,
+                                  very_verbose=very_verbose)
+
+        has_header: bool = options.force_column_names is None or options.skip_header_record
+        index: LineIndex = LineIndex.get(file_path, has_header=has_header, key_column=key_column, error_file=error_file, verbose=verbose)
+        start: int
+        end: int
+        (start, end) = index.partition(partition, partition_count)
+        if verbose:
+            print("%s: reading partition %d of %d: bytes %d to %d" % (cls.__name__, partition, partition_count, start, end),
+                  file=error_file, flush=True)
+
+        def generate_lines()->typing.Generator[str, None, None]:
+            yield from iter_range_lines(file_path, start, end)
+        kr.source.close()
+        kr.source = ClosableIterGenerator(generate_lines())
+        return kr
+
     @classmethod
     def _open_compressed_file(cls,
                               compression_type: str,
@@ -760,6 +931,142 @@ class KgtkReader(KgtkBase, ClosableIter[typing.List[str]]):
             return ClosableIterTextIOWrapper(input_file)
             
 
+    @classmethod
+    def _sampled_range(cls,
+                       options: KgtkReaderOptions,
+                       line_count: int,
+    )->typing.Tuple[int, int, int]:
+        """
+        Return the range (start, stop, step) of the data lines, numbered from 0,
+        that nextrow() would pass from a file with line_count data lines.  A tail
+        count without a record limit passes the last lines of the file.
+        """
+        every_nth_record: int = max(options.every_nth_record, 1)
+        limit: int = line_count if options.record_limit is None else options.record_limit
+        skip_count: int = options.initial_skip_count
+        if options.tail_count is not None:
+            skip_count = max(skip_count, limit - options.tail_count)
+
+        # nextrow() passes the data lines (numbered from 1) after the skipped
+        # ones whose numbers are multiples of every_nth_record.
+        start: int = (skip_count // every_nth_record + 1) * every_nth_record - 1
+        return (start, min(limit, line_count), every_nth_record)
+
+    @classmethod
+    def _open_binary_cache(cls,
+                           file_path: typing.Optional[Path],
+                           options: KgtkReaderOptions,
+                           error_file: typing.TextIO,
+                           verbose: bool = False,
+    )->typing.Optional[KgtkBinaryFile]:
+        """
+        Load the binary cache of a KGTK file, if it has a current one and the
+        cached rows can be used in place of the file's data lines.  The cached
+        rows have not been repaired or validated, so the cache is not used
+        when line or value validation is requested.
+        """
+        if not (options.use_binary_cache or options.require_binary_cache):
+            return None
+
+        reason: typing.Optional[str] = None
+        binary: typing.Optional[KgtkBinaryFile] = None
+        if file_path is None or str(file_path) == "-" or str(file_path).startswith("<") or not file_path.is_file():
+            reason = "the input is not a file"
+        elif options.force_column_names is not None or options.input_format not in (None, KgtkReaderOptions.INPUT_FORMAT_KGTK):
+            reason = "the input is not read as a KGTK file with a header"
+        elif options.repair_and_validate_lines or options.repair_and_validate_values:
+            reason = "validation was requested"
+        else:
+            binary = KgtkBinaryFile.load(KgtkBinaryFile.binary_path(file_path))
+            if binary is None:
+                reason = "there is no binary cache"
+            elif not binary.is_current(file_path):
+                reason = "the binary cache is stale"
+            elif binary.column_separator != options.column_separator:
+                reason = "the binary cache has a different column separator"
+
+        if reason is not None:
+            if options.require_binary_cache:
+                raise ValueError("%s: cannot use the binary cache for %s: %s." % (cls.__name__, str(file_path), reason))
+            return None
+
+        if verbose:
+            print("%s: reading the binary cache for %s" % (cls.__name__, str(file_path)), file=error_file, flush=True)
+        return binary
+
+    @classmethod
+    def _generate_binary_rows(cls,
+                              binary: KgtkBinaryFile,
+                              options: KgtkReaderOptions,
+                              column_indexes: typing.Optional[typing.List[int]] = None,
+    )->typing.Generator[typing.List[str], None, None]:
+        # A tail count without a record limit is ignored, as when reading the file,
+        # unless seeking was requested.
+        if options.tail_count is not None and options.record_limit is None and \
+           not (options.use_line_index or options.seek_sampling):
+            options = attr.evolve(options, tail_count=None)
+        start: int
+        stop: int
+        step: int
+        (start, stop, step) = cls._sampled_range(options, binary.row_count)
+        yield from binary.iter_rows(start, stop, step, column_indexes=column_indexes)
+
+    @classmethod
+    def _open_sampled_source(cls,
+                             file_path: typing.Optional[Path],
+                             options: KgtkReaderOptions,
+                             error_file: typing.TextIO,
+                             verbose: bool = False,
+    )->typing.Optional[ClosableIter[str]]:
+        """
+        Open a source that seeks to the sampled data lines of an uncompressed
+        file, rather than reading and discarding the lines that are not
+        sampled.  Returns None when nextrow() should do the sampling.
+        """
+        if not (options.use_line_index or options.seek_sampling):
+            return None
+        if options.compression_type is not None and len(options.compression_type) > 0:
+            return None
+        if file_path is None or not can_split(file_path):
+            return None
+
+        has_header: bool = options.force_column_names is None or options.skip_header_record
+        skip_count: int = options.initial_skip_count
+        every_nth_record: int = max(options.every_nth_record, 1)
+
+        start: int
+        stop: int
+        step: int
+        lines: typing.Iterator[str]
+        if options.use_line_index:
+            index: LineIndex = LineIndex.get(file_path, has_header=has_header, error_file=error_file, verbose=verbose)
+            (start, stop, step) = cls._sampled_range(options, index.line_count)
+            lines = index.iter_lines(file_path, start, stop, step)
+            if verbose:
+                print("%s: seeking to data line %d using the line index" % (cls.__name__, start + 1), file=error_file, flush=True)
+
+        elif options.tail_count is not None and options.record_limit is None:
+            data_start: int = header_length(file_path) if has_header else 0
+            tail_start: int = tail_offset(file_path, options.tail_count, data_start)
+            if verbose:
+                print("%s: seeking to offset %d for the last %d data lines" % (cls.__name__, tail_start, options.tail_count),
+                      file=error_file, flush=True)
+            (start, stop, step) = cls._sampled_range(attr.evolve(options, tail_count=None), options.tail_count)
+            lines = itertools.islice(iter_range_lines(file_path, tail_start, os.path.getsize(file_path)), start, None, step)
+
+        elif every_nth_record > 1 and skip_count == 0 and options.record_limit is None and options.tail_count is None:
+            if verbose:
+                print("%s: sampling about one data line in %d at random offsets" % (cls.__name__, every_nth_record),
+                      file=error_file, flush=True)
+            lines = iter_sample_lines(file_path, every_nth_record, header_length(file_path) if has_header else 0)
+
+        else:
+            return None
+
+        def generate_lines()->typing.Generator[str, None, None]:
+            yield from lines
+        return ClosableIterGenerator(generate_lines())
+
     @classmethod
     def _build_column_names(cls,
                             source: ClosableIter[str],
@@ -800,6 +1107,49 @@ class KgtkReader(KgtkBase, ClosableIter[typing.List[str]]):
 
     def close(self):
         self.source.close()
+        if self.binary_rows is not None:
+            self.binary_rows.close()
+
+    def passes_raw_lines(self)->bool:
+        """
+        Return True if a caller may read the data lines from self.source and
+        split them itself, instead of reading the rows, without losing any of
+        the reader's processing.  This is not the case when the options sample,
+        repair, or validate the data lines, or when the rows come from the
+        binary cache (which leaves no lines in the source).
+        """
+        return self.binary is None and self.options.passes_raw_lines()
+
+    def project(self, column_idxs: typing.List[int]):
+        """
+        Tell the reader which columns the caller needs, before reading the first
+        row.  The data lines are then split only as far as the last of these
+        columns, and the rows that are returned end there.  Column indexes are
+        not changed, so a row still has the values of the other columns before
+        the last needed one, and row[idx] works as before for each needed column.
+
+        Line validation, when requested, still checks the whole line; value
+        validation checks only the needed columns.  The caller must not write
+        projected rows to an output file with all of the input columns.
+        """
+        if self.data_lines_read > 0:
+            raise ValueError("%s: cannot project the columns after reading data lines." % self.__class__.__name__)
+        if len(column_idxs) == 0:
+            raise ValueError("%s: at least one column is needed." % self.__class__.__name__)
+        idx: int
+        for idx in column_idxs:
+            if idx < 0 or idx >= self.column_count:
+                raise ValueError("%s: column index %d is out of range." % (self.__class__.__name__, idx))
+
+        self.projection = sorted(set(column_idxs))
+        self.projection_width = self.projection[-1] + 1
+
+        if self.binary is not None and self.binary_rows is not None:
+            # Decode only the columns up to the last needed one.
+            self.binary_rows.close()
+            self.binary_rows = ClosableIterGenerator(self._generate_binary_rows(self.binary,
+                                                                                self.options,
+                                                                                list(range(self.projection_width))))
 
     def exclude_line(self, action: ValidationAction, msg: str, line: str)->bool:
         """
@@ -888,12 +1238,30 @@ class KgtkReader(KgtkBase, ClosableIter[typing.List[str]]):
     def nextrow(self)-> typing.List[str]:
         row: typing.List[str]
 
+        if self.binary_rows is not None:
+            # The rows from the binary cache have already been sampled.
+            try:
+                row = next(self.binary_rows)
+            except StopIteration as e:
+                self.binary_rows.close()
+                raise e
+            self.data_lines_read += 1
+            self.data_lines_passed += 1
+            return row
+
         repair_and_validate_lines: bool = self.options.repair_and_validate_lines
         repair_and_validate_values: bool = self.options.repair_and_validate_values
 
         # Compute the initial skip count
         skip_count: int = self.options.initial_skip_count
-        if self.options.record_limit is not None and self.options.tail_count is not None:
+        every_nth_record: int = self.options.every_nth_record
+        record_limit: typing.Optional[int] = self.options.record_limit
+        if self.presampled:
+            # The source has already skipped, sampled, and limited the data lines.
+            skip_count = 0
+            every_nth_record = 1
+            record_limit = None
+        elif self.options.record_limit is not None and self.options.tail_count is not None:
             # Compute the tail count.
             tail_skip_count: int = self.options.record_limit - self.options.tail_count
             if tail_skip_count > skip_count:
@@ -908,8 +1276,8 @@ class KgtkReader(KgtkBase, ClosableIter[typing.List[str]]):
         # This loop accomodates lines that are ignored.
         while (True):
             # Has a record limit been specified and have we reached it?
-            if self.options.record_limit is not None:
-                if self.data_lines_read >= self.options.record_limit:
+            if record_limit is not None:
+                if self.data_lines_read >= record_limit:
                     # Close the source and stop the iteration.
                     self.source.close() # Do we need to guard against repeating this call?
                     raise StopIteration
@@ -933,8 +1301,8 @@ class KgtkReader(KgtkBase, ClosableIter[typing.List[str]]):
             if self.data_lines_read <= skip_count:
                 self.data_lines_skipped += 1
                 continue
-            if self.options.every_nth_record > 1:
-                if self.data_lines_read % self.options.every_nth_record != 0:
+            if every_nth_record > 1:
+                if self.data_lines_read % every_nth_record != 0:
                     self.data_lines_skipped += 1
                     continue
 
@@ -966,6 +1334,9 @@ class KgtkReader(KgtkBase, ClosableIter[typing.List[str]]):
 
             if input_format == KgtkReaderOptions.INPUT_FORMAT_CSV:
                 row = self.csvsplit(line)
+            elif self.projection is not None and not repair_and_validate_lines:
+                # Split only as far as the last needed column.
+                row = line.split(self.options.column_separator, self.projection_width)
             else:
                 row = line.split(self.options.column_separator)
 
@@ -1005,6 +1376,9 @@ class KgtkReader(KgtkBase, ClosableIter[typing.List[str]]):
                     self.reject(line)
                     continue
 
+            if self.projection is not None and len(row) > self.projection_width:
+                del row[self.projection_width:]
+
             if repair_and_validate_values:
                 if self.options.invalid_value_action != ValidationAction.PASS:
                     # TODO: find a way to optionally cache the KgtkValue objects
@@ -1230,6 +1604,8 @@ class KgtkReader(KgtkBase, ClosableIter[typing.List[str]]):
         idx: int
         item: str
         for idx, item in enumerate(row):
+            if self.projection is not None and idx not in self.projection:
+                continue # Validate only the needed columns.
             if len(item) > 0: # Optimize the common case of empty columns.
                 if self.verbose:
                     error_file = io.StringIO()
@@ -1261,6 +1637,8 @@ class KgtkReader(KgtkBase, ClosableIter[typing.List[str]]):
     ):
         if idx < 0:
             return
+        if self.projection is not None and idx not in self.projection:
+            return
         item: str = row[idx]
         if KgtkFormat.LIST_SEPARATOR not in item:
             return
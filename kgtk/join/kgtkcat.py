@@ -14,7 +14,10 @@ import typing
 
 from kgtk.io.kgtkreader import KgtkReader, KgtkReaderOptions
 from kgtk.io.kgtkwriter import KgtkWriter
+from kgtk.utils.argparsehelpers import optional_bool
 from kgtk.join.kgtkmergecolumns import KgtkMergeColumns
+from kgtk.utils.cats import append_file_data
+from kgtk.utils.filechunks import can_split, count_lines, header_length
 from kgtk.value.kgtkvalueoptions import KgtkValueOptions
 
 @attr.s(slots=True, frozen=True)
@@ -47,10 +50,77 @@ class KgtkCat():
 
     output_format: typing.Optional[str] = attr.ib(validator=attr.validators.optional(attr.validators.instance_of(str)), default=None) # TODO: use an enum
 
+    # When True, copy the data lines of uncompressed input files whose columns
+    # match the output columns without parsing them.
+    fast_copy: bool = attr.ib(validator=attr.validators.instance_of(bool), default=False)
+
     error_file: typing.TextIO = attr.ib(default=sys.stderr)
     verbose: bool = attr.ib(validator=attr.validators.instance_of(bool), default=False)
     very_verbose: bool = attr.ib(validator=attr.validators.instance_of(bool), default=False)
 
+    def can_fast_copy_output(self, ew: KgtkWriter)->bool:
+        """
+        Can data bytes be appended directly to the output file?
+        """
+        if not self.fast_copy or ew.output_format != KgtkWriter.OUTPUT_FORMAT_KGTK or ew.gzip_thread is not None:
+            return False
+        if self.output_path is not None and self.output_path.suffix in [".gz", ".bz2", ".xz", ".lz4"]:
+            return False
+        try:
+            ew.file_out.fileno()
+        except (AttributeError, OSError, ValueError):
+            return False
+        return True
+
+    def can_fast_copy_input(self, kr: KgtkReader, column_names: typing.List[str])->bool:
+        """
+        Can the data lines of this input file be copied to the output file
+        without parsing them?  The file must be an uncompressed KGTK file with
+        exactly the output columns, and no options that select or edit the
+        input data lines may be in effect.
+        """
+        if kr.file_path is None or not can_split(kr.file_path):
+            return False
+        if kr.column_names != column_names:
+            return False
+        options: typing.Optional[KgtkReaderOptions] = self.reader_options
+        if options is not None:
+            if options.input_format not in (None, KgtkReaderOptions.INPUT_FORMAT_KGTK):
+                return False
+            if options.force_column_names is not None or options.skip_header_record:
+                return False
+            if options.initial_skip_count != 0 or options.every_nth_record != 1 or \
+               options.record_limit is not None or options.tail_count is not None:
+                return False
+            if options.repair_and_validate_lines or options.repair_and_validate_values or \
+               options.fill_short_lines or options.truncate_long_lines:
+                return False
+        return True
+
+    def fast_copy_input(self, kr: KgtkReader, ew: KgtkWriter)->int:
+        """
+        Append the data lines of the input file to the output file.  Return
+        the number of bytes copied.
+        """
+        if kr.file_path is None:
+            raise ValueError("Missing file path.")
+        # Write anything the KgtkWriter has buffered before appending to the file.
+        ew.flush()
+        ofd: int = ew.file_out.fileno()
+        copied: int = 0
+        try:
+            copied = append_file_data(str(kr.file_path), ofd, header_length(kr.file_path))
+            if copied > 0:
+                # Make sure that the last line ends before the next file starts.
+                file_size: int = kr.file_path.stat().st_size
+                with open(kr.file_path, "rb") as f:
+                    f.seek(file_size - 1)
+                    if f.read(1) != b"\n":
+                        os.write(ofd, b"\n")
+        except BrokenPipeError:
+            pass # Ignore, as KgtkWriter.flush() does.
+        return copied
+
     def process(self):
         kmc: KgtkMergeColumns = KgtkMergeColumns()
 
@@ -172,6 +242,8 @@ class KgtkCat():
                                          verbose=self.verbose,
                                          very_verbose=self.very_verbose)
 
+        fast_copy_output: bool = self.can_fast_copy_output(ew)
+
         output_data_lines: int = 0
         for idx, kr in enumerate(krs):
             if kr.file_path is None:
@@ -191,6 +263,17 @@ class KgtkCat():
             if self.verbose:
                 print("Copying data from file %d: %s" % (idx + 1, input_file_path), file=self.error_file, flush=True)
 
+            if fast_copy_output and self.can_fast_copy_input(kr, kmc.column_names):
+                copied: int = self.fast_copy_input(kr, ew)
+                if self.verbose:
+                    # The data was copied without reading it, so count its lines
+                    # only when we report them.
+                    copied_lines: int = count_lines(input_file_path, header_length(input_file_path))
+                    output_data_lines += copied_lines
+                    print("Copied %d data lines (%d bytes) from file %d: %s" % (copied_lines, copied, idx + 1, input_file_path),
+                          file=self.error_file, flush=True)
+                continue
+
             shuffle_list: typing.List[int] = ew.build_shuffle_list(kmc.new_column_name_lists[idx])
 
             input_data_lines: int = 0
@@ -229,6 +312,11 @@ def main():
     parser.add_argument(      "--old-columns", dest="old_column_names", help="Rename seleted output columns: old names. (default=%(default)s)", type=str, nargs='+')
     parser.add_argument(      "--new-columns", dest="new_column_names", help="Rename seleted output columns: new names. (default=%(default)s)", type=str, nargs='+')
 
+    parser.add_argument(      "--fast-copy", dest="fast_copy", metavar="True|False",
+                              help="When True, copy the data lines of uncompressed input files whose columns match the output columns " +
+                              "without parsing them. (default=%(default)s)",
+                              type=optional_bool, nargs='?', const=True, default=False)
+
     KgtkReader.add_debug_arguments(parser, expert=True)
     KgtkReaderOptions.add_arguments(parser, mode_options=True, expert=True)
     KgtkValueOptions.add_arguments(parser, expert=True)
@@ -257,6 +345,7 @@ def main():
             print("--old-columns=%s" %" ".join(args.old_column_names), file=error_file, flush=True)
         if args.new_column_names is not None:
             print("--new-columns=%s" %" ".join(args.new_column_names), file=error_file, flush=True)
+        print("--fast-copy=%s" % str(args.fast_copy), file=error_file, flush=True)
         reader_options.show(out=error_file)
         value_options.show(out=error_file)
 
@@ -266,6 +355,7 @@ def main():
                           output_column_names=args.output_column_names,
                           old_column_names=args.old_column_names,
                           new_column_names=args.new_column_names,
+                          fast_copy=args.fast_copy,
                           reader_options=reader_options,
                           value_options=value_options,
                           error_file=error_file,
@@ -40,6 +40,17 @@ class Unique(KgtkFormat):
 
     presorted: bool = attr.ib(validator=attr.validators.instance_of(bool), default=False)
 
+    # Count in this many worker processes.
+    procs: int = attr.ib(validator=attr.validators.instance_of(int), default=1)
+
+    # Approximate counting: the top_k values by (estimated) count and an
+    # estimate of the number of distinct values.
+    approximate: bool = attr.ib(validator=attr.validators.instance_of(bool), default=False)
+    top_k: int = attr.ib(validator=attr.validators.instance_of(int), default=1000)
+    sketch_width: int = attr.ib(validator=attr.validators.instance_of(int), default=1 << 20)
+    sketch_depth: int = attr.ib(validator=attr.validators.instance_of(int), default=4)
+    distinct_precision: int = attr.ib(validator=attr.validators.instance_of(int), default=14)
+
     # TODO: find working validators
     # value_options: typing.Optional[KgtkValueOptions] = attr.ib(attr.validators.optional(attr.validators.instance_of(KgtkValueOptions)), default=None)
     reader_options: typing.Optional[KgtkReaderOptions]= attr.ib(default=None)
@@ -56,6 +67,9 @@ class Unique(KgtkFormat):
     OUTPUT_FORMATS: typing.List[str] = [EDGE_FORMAT, NODE_FORMAT, NODE_COUNTS_FORMAT, NODE_ONLY_FORMAT]
     DEFAULT_FORMAT: str = EDGE_FORMAT
 
+    # The number of lines per task when the parent process reads the input for the workers.
+    PARALLEL_BATCH_SIZE: int = 100000
+
     def process_presorted(self,
                           output_columns: typing.List[str],
                           kr: KgtkReader,
@@ -175,23 +189,38 @@ class Unique(KgtkFormat):
 
         value_counts: typing.MutableMapping[str, int] = { }
         
-        row: typing.List[str]
-        for row in kr:
-            input_line_count += 1
-            if where_column_idx >= 0:
-                if row[where_column_idx] not in where_value_set:
-                    skip_line_count += 1
-                    continue
-            if len(row) <= column_idx:
-                raise ValueError("Line %d: Short row (len(row)=%d, column_idx=%d): %s" % (input_line_count, len(row), column_idx, repr(row)))
-            value: str = row[column_idx]
-            if len(value) == 0:
-                value = self.empty_value
-            if len(value) > 0:
-                value = self.prefix + value
-                value_counts[value] = value_counts.get(value, 0) + 1
-            else:
-                empty_value_count += 1
+        if self.procs > 1 and kr.passes_raw_lines():
+            partial_counts: typing.MutableMapping[str, int]
+            partial_line_count: int
+            partial_skip_count: int
+            partial_empty_count: int
+            for partial_counts, partial_line_count, partial_skip_count, partial_empty_count in self.count_in_parallel(kr, column_idx, where_column_idx, where_value_set):
+                if len(value_counts) == 0:
+                    value_counts = partial_counts
+                else:
+                    for value, count in partial_counts.items():
+                        value_counts[value] = value_counts.get(value, 0) + count
+                input_line_count += partial_line_count
+                skip_line_count += partial_skip_count
+                empty_value_count += partial_empty_count
+        else:
+            row: typing.List[str]
+            for row in kr:
+                input_line_count += 1
+                if where_column_idx >= 0:
+                    if row[where_column_idx] not in where_value_set:
+                        skip_line_count += 1
+                        continue
+                if len(row) <= column_idx:
+                    raise ValueError("Line %d: Short row (len(row)=%d, column_idx=%d): %s" % (input_line_count, len(row), column_idx, repr(row)))
+                value: str = row[column_idx]
+                if len(value) == 0:
+                    value = self.empty_value
+                if len(value) > 0:
+                    value = self.prefix + value
+                    value_counts[value] = value_counts.get(value, 0) + 1
+                else:
+                    empty_value_count += 1
                 
         if self.verbose:
             print("Read %d records, skipped %d, found %d unique non-empty values, %d empty values." % (input_line_count,
@@ -250,6 +279,167 @@ class Unique(KgtkFormat):
 
         ew.close()
        
+    def count_in_parallel(self,
+                          kr: KgtkReader,
+                          column_idx: int,
+                          where_column_idx: int,
+                          where_value_set: typing.Set[str],
+    )->typing.Iterator[typing.Tuple[typing.Any, int, int, int]]:
+        """
+        Count the values in self.procs worker processes, yielding the partial
+        results (counts, input lines, skipped lines, empty values) for each
+        chunk of the input.  An uncompressed input file is split into byte
+        ranges that the workers read directly; other inputs are read by this
+        process and sent to the workers in batches of lines.  The workers split
+        the raw lines on the column separator, as the reader does when it
+        passes the raw lines through (see KgtkReader.passes_raw_lines()): blank
+        and comment lines are counted as rows, and short rows are rejected.
+        Callers count the rows in this process instead when the reader does not
+        pass the raw lines through.
+        """
+        from multiprocessing import Pool
+        from kgtk.utils.filechunks import can_split, chunk_ranges, header_length
+
+        counting: typing.Tuple[typing.Any, ...] = (kr.options.column_separator, column_idx, where_column_idx, where_value_set,
+                                                   self.empty_value, self.prefix, self.approximate_settings())
+
+        with Pool(self.procs) as pool:
+            if self.input_file_path is not None and can_split(self.input_file_path):
+                if self.verbose:
+                    print("Counting byte ranges of %s in %d processes" % (self.input_file_path, self.procs), file=self.error_file, flush=True)
+                # Each approximate result carries a whole sketch, so use fewer, larger chunks.
+                ranges: typing.List[typing.Tuple[int, int]] = chunk_ranges(self.input_file_path,
+                                                                           self.procs if self.approximate else self.procs * 4,
+                                                                           start_offset=header_length(self.input_file_path))
+                kr.close()
+                yield from pool.imap_unordered(_count_range, [ (self.input_file_path, start, end) + counting for start, end in ranges ])
+            else:
+                from kgtk.utils.orderedpool import ordered_imap
+
+                batch_size: int = self.PARALLEL_BATCH_SIZE * (10 if self.approximate else 1)
+
+                def batches()->typing.Iterator[typing.Tuple[typing.Any, ...]]:
+                    batch: typing.List[str] = [ ]
+                    line: str
+                    for line in kr.source:
+                        batch.append(line)
+                        if len(batch) >= batch_size:
+                            yield (batch, ) + counting
+                            batch = [ ]
+                    if len(batch) > 0:
+                        yield (batch, ) + counting
+
+                yield from ordered_imap(pool, _count_batch, batches(), backlog=2 * self.procs)
+
+    def approximate_settings(self)->typing.Optional[typing.Tuple[int, int, int, int]]:
+        if not self.approximate:
+            return None
+        return (self.top_k, self.sketch_width, self.sketch_depth, self.distinct_precision)
+
+    def process_approximate(self,
+                            output_columns: typing.List[str],
+                            kr: KgtkReader,
+                            column_idx: int,
+                            where_column_idx: int,
+                            where_value_set: typing.Set[str]):
+        from kgtk.utils.sketches import ApproximateCounts
+
+        if self.verbose:
+            print("Approximately counting values from the %s column in %s" % (kr.column_names[column_idx], self.input_file_path), file=self.error_file, flush=True)
+        input_line_count: int = 0
+        skip_line_count: int = 0
+        empty_value_count: int = 0
+
+        counts: ApproximateCounts = ApproximateCounts(top_k=self.top_k,
+                                                      width=self.sketch_width,
+                                                      depth=self.sketch_depth,
+                                                      precision=self.distinct_precision)
+        if self.procs > 1 and kr.passes_raw_lines():
+            partial_counts: ApproximateCounts
+            partial_line_count: int
+            partial_skip_count: int
+            partial_empty_count: int
+            for partial_counts, partial_line_count, partial_skip_count, partial_empty_count in self.count_in_parallel(kr, column_idx, where_column_idx, where_value_set):
+                counts.merge(partial_counts)
+                input_line_count += partial_line_count
+                skip_line_count += partial_skip_count
+                empty_value_count += partial_empty_count
+        else:
+            batch: typing.List[str] = [ ]
+            row: typing.List[str]
+            for row in kr:
+                input_line_count += 1
+                if where_column_idx >= 0:
+                    if row[where_column_idx] not in where_value_set:
+                        skip_line_count += 1
+                        continue
+                if len(row) <= column_idx:
+                    raise ValueError("Line %d: Short row (len(row)=%d, column_idx=%d): %s" % (input_line_count, len(row), column_idx, repr(row)))
+                value: str = row[column_idx]
+                if len(value) == 0:
+                    value = self.empty_value
+                if len(value) > 0:
+                    batch.append(self.prefix + value)
+                    if len(batch) >= self.PARALLEL_BATCH_SIZE:
+                        counts.add_batch(batch)
+                        batch = [ ]
+                else:
+                    empty_value_count += 1
+            counts.add_batch(batch)
+
+        top_values: typing.List[typing.Tuple[str, int]] = counts.top()
+        distinct_count: int = counts.distinct_count()
+        if self.verbose:
+            print("Read %d records, skipped %d, %d empty values." % (input_line_count, skip_line_count, empty_value_count),
+                  file=self.error_file, flush=True)
+        # The distinct count is a result of the approximate mode, so always report it.
+        print("Approximately %d distinct non-empty values in the %s column." % (distinct_count, kr.column_names[column_idx]),
+              file=self.error_file, flush=True)
+
+        if self.output_format == self.NODE_FORMAT:
+            for value, _ in top_values:
+                # TODO: provide a way to override this check.
+                if value in KgtkFormat.NODE1_COLUMN_NAMES:
+                    raise ValueError("Cannot write a KGTK node file with a column named '%s'." % value)
+                output_columns.append(value)
+
+        ew: KgtkWriter = KgtkWriter.open(output_columns,
+                                         self.output_file_path,
+                                         require_all_columns=False,
+                                         prohibit_extra_columns=True,
+                                         fill_missing_columns=True,
+                                         use_mgzip=self.reader_options.use_mgzip if self.reader_options is not None else False, # Hack!
+                                         mgzip_threads=self.reader_options.mgzip_threads if self.reader_options is not None else 3, # Hack!
+                                         gzip_in_parallel=False,
+                                         verbose=self.verbose,
+                                         very_verbose=self.very_verbose)
+
+        # The values are written by descending estimated count.
+        value: str
+        count: int
+        if self.output_format == self.EDGE_FORMAT:
+            for value, count in top_values:
+                ew.write([value, self.label_value, str(count)])
+
+        elif self.output_format == self.NODE_ONLY_FORMAT:
+            for value, _ in top_values:
+                ew.write([value])
+
+        elif self.output_format == self.NODE_COUNTS_FORMAT:
+            for value, count in top_values:
+                ew.write([value, str(count)])
+
+        elif self.output_format == self.NODE_FORMAT:
+            output_row: typing.List[str] = [ kr.column_names[column_idx] ]
+            for _, count in top_values:
+                output_row.append(str(count))
+            ew.write(output_row)
+
+        else:
+            raise ValueError("Unknown output format %s" % str(self.output_format))
+
+        ew.close()
+
     def process(self):
         # Open the input file.
         if self.verbose:
@@ -303,11 +493,83 @@ class Unique(KgtkFormat):
             else:
                 where_value_set = set(self.where_values)
 
-        if self.presorted and self.output_format != self.NODE_FORMAT:
+        # Split the input lines only as far as the columns that we use.
+        kr.project([column_idx] if where_column_idx < 0 else [column_idx, where_column_idx])
+
+        if self.approximate:
+            self.process_approximate(output_columns, kr, column_idx, where_column_idx, where_value_set)
+        elif self.presorted and self.output_format != self.NODE_FORMAT:
             self.process_presorted(output_columns, kr, column_idx, where_column_idx, where_value_set)
         else:
             self.process_unsorted(output_columns, kr, column_idx, where_column_idx, where_value_set)
        
+def _count_lines(lines: typing.Iterable[str],
+                 column_separator: str,
+                 column_idx: int,
+                 where_column_idx: int,
+                 where_value_set: typing.Set[str],
+                 empty_value: str,
+                 prefix: str,
+                 approximate: typing.Optional[typing.Tuple[int, int, int, int]],
+)->typing.Tuple[typing.Any, int, int, int]:
+    """
+    Count the values in raw KGTK data lines, exactly or approximately.  Like
+    KgtkReader without line validation, this splits every line, including
+    blank and comment lines, and rejects the short rows.
+    """
+    input_line_count: int = 0
+    skip_line_count: int = 0
+    empty_value_count: int = 0
+    value_counts: typing.MutableMapping[str, int] = { }
+    values: typing.List[str] = [ ]
+
+    counts: typing.Any = None
+    if approximate is not None:
+        from kgtk.utils.sketches import ApproximateCounts
+        top_k, width, depth, precision = approximate
+        counts = ApproximateCounts(top_k=top_k, width=width, depth=depth, precision=precision)
+
+    line: str
+    for line in lines:
+        line = line.rstrip("\r\n")
+        input_line_count += 1
+        row: typing.List[str] = line.split(column_separator)
+        if where_column_idx >= 0:
+            if where_column_idx >= len(row):
+                raise ValueError("Short row (len(row)=%d, where_column_idx=%d): %s" % (len(row), where_column_idx, repr(row)))
+            if row[where_column_idx] not in where_value_set:
+                skip_line_count += 1
+                continue
+        if len(row) <= column_idx:
+            raise ValueError("Short row (len(row)=%d, column_idx=%d): %s" % (len(row), column_idx, repr(row)))
+        value: str = row[column_idx]
+        if len(value) == 0:
+            value = empty_value
+        if len(value) > 0:
+            value = prefix + value
+            if approximate is None:
+                value_counts[value] = value_counts.get(value, 0) + 1
+            else:
+                values.append(value)
+                if len(values) >= Unique.PARALLEL_BATCH_SIZE:
+                    counts.add_batch(values)
+                    values = [ ]
+        else:
+            empty_value_count += 1
+
+    if counts is None:
+        return value_counts, input_line_count, skip_line_count, empty_value_count
+    counts.add_batch(values)
+    return counts, input_line_count, skip_line_count, empty_value_count
+
+def _count_range(task: typing.Tuple[typing.Any, ...])->typing.Tuple[typing.Any, int, int, int]:
+    from kgtk.utils.filechunks import iter_range_lines
+    path, start, end = task[:3]
+    return _count_lines(iter_range_lines(path, start, end), *task[3:])
+
+def _count_batch(task: typing.Tuple[typing.Any, ...])->typing.Tuple[typing.Any, int, int, int]:
+    return _count_lines(task[0], *task[1:])
+
 def main():
     """
     Test the KGTK unique processor.
@@ -340,6 +602,26 @@ def main():
                               help="When True, the input file is presorted. (default=%(default)s).",
                               type=optional_bool, nargs='?', const=True, default=False)
 
+    parser.add_argument(      "--procs", dest="procs", type=int, default=1,
+                              help="Count the values in this many worker processes. (default=%(default)s).")
+
+    parser.add_argument(      "--approximate", dest="approximate", metavar="True|False",
+                              help="When True, write the top-k values by approximate count (Count-Min sketch) " +
+                              "and report the approximate number of distinct values (HyperLogLog). (default=%(default)s).",
+                              type=optional_bool, nargs='?', const=True, default=False)
+
+    parser.add_argument(      "--top-k", dest="top_k", type=int, default=1000,
+                              help="The number of values written in approximate mode. (default=%(default)s).")
+
+    parser.add_argument(      "--sketch-width", dest="sketch_width", type=int, default=1 << 20,
+                              help="The number of counters in each row of the Count-Min sketch. (default=%(default)s).")
+
+    parser.add_argument(      "--sketch-depth", dest="sketch_depth", type=int, default=4,
+                              help="The number of rows in the Count-Min sketch. (default=%(default)s).")
+
+    parser.add_argument(      "--distinct-precision", dest="distinct_precision", type=int, default=14,
+                              help="The HyperLogLog precision: 2**precision registers. (default=%(default)s).")
+
     KgtkReader.add_debug_arguments(parser)
     KgtkReaderOptions.add_arguments(parser, mode_options=True)
     KgtkValueOptions.add_arguments(parser)
@@ -366,6 +648,12 @@ def main():
         if args.where_values is not None and len(args.where_values) > 0:
             print("--in=%s" % " ".join(args.where_values), file=error_file)
         print("--prefix=%s" % repr(args.presorted), file=error_file)
+        print("--procs=%d" % args.procs, file=error_file)
+        print("--approximate=%s" % repr(args.approximate), file=error_file)
+        print("--top-k=%d" % args.top_k, file=error_file)
+        print("--sketch-width=%d" % args.sketch_width, file=error_file)
+        print("--sketch-depth=%d" % args.sketch_depth, file=error_file)
+        print("--distinct-precision=%d" % args.distinct_precision, file=error_file)
 
         reader_options.show(out=error_file)
         value_options.show(out=error_file)
@@ -381,6 +669,12 @@ def main():
         where_column_name=args.where_column_name,
         where_values=args.where_values,
         presorted=args.presorted,
+        procs=args.procs,
+        approximate=args.approximate,
+        top_k=args.top_k,
+        sketch_width=args.sketch_width,
+        sketch_depth=args.sketch_depth,
+        distinct_precision=args.distinct_precision,
         reader_options=reader_options,
         value_options=value_options,
         error_file=error_file,
@@ -6,12 +6,15 @@ import sys
 import os.path
 import io
 import re
+import heapq
+import itertools
 import time
 import pprint
 
 import sh
 
 import kgtk.kypher.parser as parser
+import kgtk.kypher.sqlstore as sqlstore
 from   kgtk.kypher.sqlstore import sql_quote_ident
 from   kgtk.value.kgtkvalue import KgtkValue
 
@@ -50,6 +53,31 @@ pp = pprint.PrettyPrinter(indent=4)
 def listify(x):
     return (hasattr(x, '__iter__') and not isinstance(x, str) and list(x)) or (x and [x]) or []
 
+def parse_expression_index(spec):
+    """Parse an expression index 'spec' such as 'kgtk_date_year(node2)'
+    into a (function, column) pair.
+    """
+    m = re.match(r'^\s*(?P<function>[A-Za-z_][A-Za-z0-9_]*)\s*\(\s*(?P<column>[^\s()]+)\s*\)\s*$', spec)
+    if m is None:
+        raise Exception("Illegal expression index, expected FUNCTION(COLUMN): '%s'" % spec)
+    return m['function'], m['column']
+
+class QueryParameter(object):
+    """Placeholder for the value of the query parameter 'name' in a translated SQL
+    query, so the same translation can be executed with different parameter values.
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def __eq__(self, other):
+        return isinstance(other, QueryParameter) and self.name == other.name
+
+    def __hash__(self):
+        return hash((QueryParameter, self.name))
+
+    def __repr__(self):
+        return '$' + self.name
+
 def dwim_to_string_para(x):
     """Try to coerce 'x' to a KGTK string value that can be passed as a query parameter.
     """
@@ -157,7 +185,8 @@ class KgtkQuery(object):
     def __init__(self, files, store, options=None,
                  query=None, match='()', where=None, ret='*',
                  order=None, skip=None, limit=None,
-                 parameters={}, index='auto', loglevel=0):
+                 parameters={}, index='auto', expression_indexes=[],
+                 cache_results=False, result_cache_size=None, loglevel=0):
         # normalize to strings in case we get path objects:
         self.files = [str(f) for f in listify(files)]
         self.options = options or {}
@@ -165,6 +194,12 @@ class KgtkQuery(object):
         self.loglevel = loglevel
         self.parameters = parameters
         self.index_mode = index.lower()
+        # (function, column) pairs to index on all query graphs:
+        self.expression_indexes = [parse_expression_index(x) if isinstance(x, str) else tuple(x)
+                                   for x in expression_indexes]
+        # cache results in the store, so repeated queries over unchanged graphs are only computed once:
+        self.cache_results = cache_results
+        self.result_cache_size = store.RESULT_CACHE_SIZE if result_cache_size is None else result_cache_size
         if query is None:
             # supplying a query through individual clause arguments might be a bit easier,
             # since they can be in any order, can have defaults, are easier to shell-quote, etc.:
@@ -230,12 +265,20 @@ class KgtkQuery(object):
                     return file
         raise Exception("failed to uniquely map handle '%s' onto one of %s" % (handle, files))
 
-    def get_parameter_value(self, name):
-        value = self.parameters.get(name)
+    def get_parameter_value(self, name, parameters=None):
+        parameters = self.parameters if parameters is None else parameters
+        value = parameters.get(name)
         if value is None:
             raise Exception("undefined query parameter: '%s'" % name)
         return value
 
+    def bind_parameters(self, sql_parameters, parameters=None):
+        """Return a copy of the translated 'sql_parameters' with each query parameter
+        placeholder replaced by its value in 'parameters' (defaults to our own).
+        """
+        return [self.get_parameter_value(para.name, parameters) if isinstance(para, QueryParameter) else para
+                for para in sql_parameters]
+
     def get_pattern_clause_graph(self, clause):
         node1 = clause[0]
         graph = node1.graph
@@ -266,9 +309,11 @@ class KgtkQuery(object):
             litmap[literal] = placeholder
             return placeholder
 
-    def replace_literal_parameters(self, raw_query, litmap):
+    def replace_literal_parameters(self, raw_query, litmap, batch_parameters={}):
         """Replace the named literal placeholders in 'raw_query' with positional
         parameters and build a list of actual parameters to substitute for them.
+        Query parameters named in 'batch_parameters' are replaced with the SQL
+        column expression they map to instead.
         """
         query = io.StringIO()
         parameters = []
@@ -276,8 +321,12 @@ class KgtkQuery(object):
         litmap = {p: l for l, p in litmap.items()}
         for token in re.split(r'\?\?', raw_query):
             if token.startswith('?'):
-                parameters.append(litmap['??' + token + '??'])
-                token = '?'
+                literal = litmap['??' + token + '??']
+                if isinstance(literal, QueryParameter) and literal.name in batch_parameters:
+                    token = batch_parameters[literal.name]
+                else:
+                    parameters.append(literal)
+                    token = '?'
             query.write(token)
         return query.getvalue(), parameters
                  
@@ -338,13 +387,97 @@ class KgtkQuery(object):
             
         labelcol = self.get_label_column(graph)
         idcol = self.get_id_column(graph)
-        if rel.labels is not None:
+        # the label of a variable-length relationship is restricted inside its path table:
+        if rel.labels is not None and not self.is_path_clause(clause):
             para = self.get_literal_parameter(rel.labels[0], litmap)
             restrictions.add(((graph, labelcol), para))
         # but an anonymous relation variable cannot connect to anything else:
         if rel.variable is not None and not isinstance(rel.variable, parser.AnonymousVariable):
             self.register_clause_variable(rel.variable.name, (graph, idcol), varmap, joins)
 
+    def is_path_clause(self, clause):
+        """Return True if the relationship of 'clause' is a variable-length pattern such as '-[:P279*]->'.
+        """
+        return getattr(clause[1], 'range_', None) is not None
+
+    def get_path_length_range(self, rel):
+        """Return the (min, max) number of edges matched by the variable-length relationship 'rel',
+        where 'max' is None if unbounded.  Following Cypher, '*' means one or more, '*n' exactly
+        'n', and '*n..m' and '*..m' are inclusive bounds.
+        """
+        range_ = rel.range_
+        if range_.start is not None and range_.stop is None:
+            minlen = maxlen = range_.start
+        else:
+            minlen = range_.start if range_.start is not None else 1
+            maxlen = range_.stop
+        if minlen < 1:
+            raise Exception('Zero-length relationship patterns are not supported')
+        if maxlen is not None and maxlen < minlen:
+            raise Exception('Illegal relationship length range: *%d..%d' % (minlen, maxlen))
+        return minlen, maxlen
+
+    def path_clause_to_sql(self, clause, graph, graph_alias, litmap, indexes):
+        """Translate the variable-length relationship of 'clause' on 'graph' into a recursive
+        common table expression.  Return a (cte_definition, table_expression) pair, where the
+        table expression provides the 'node1' and 'node2' columns of all pairs of nodes connected
+        by a path of matching edges of the requested length under 'graph_alias'.  Each pair of
+        nodes is returned at most once.  Add (graph, column) pairs to 'indexes' which will allow
+        SQLite to evaluate the recursion via index lookups.
+        """
+        node1, rel, node2 = clause
+        if rel.variable is not None and not isinstance(rel.variable, parser.AnonymousVariable):
+            raise Exception('Variables are not supported on variable-length relationships: %s' % rel.variable.name)
+        if rel.properties or node1.properties or node2.properties:
+            raise Exception('Properties are not supported on variable-length relationship patterns')
+        minlen, maxlen = self.get_path_length_range(rel)
+        node1col = sql_quote_ident(self.get_node1_column(graph))
+        node2col = sql_quote_ident(self.get_node2_column(graph))
+        labelcol = sql_quote_ident(self.get_label_column(graph))
+        path = sql_quote_ident(graph_alias + '_path')
+
+        # SQLite does not push restrictions into a recursive CTE, so we start the recursion from
+        # a fixed end node if there is one, and otherwise compute the closure over all edges:
+        seed = []
+        step = []
+        if rel.labels is not None:
+            seed.append('%s=%s' % (labelcol, self.get_literal_parameter(rel.labels[0], litmap)))
+            step.append('e.%s=%s' % (labelcol, self.get_literal_parameter(rel.labels[0], litmap)))
+        if node1.labels is None and node2.labels is not None:
+            # extend paths backwards from their end nodes:
+            seed.append('%s=%s' % (node2col, self.get_literal_parameter(node2.labels[0], litmap)))
+            select = 'e.%s, p.%s' % (node1col, node2col)
+            step.insert(0, 'e.%s=p.%s' % (node2col, node1col))
+            indexes.add((graph, self.get_node2_column(graph)))
+        else:
+            # extend paths forwards from their start nodes:
+            if node1.labels is not None:
+                seed.append('%s=%s' % (node1col, self.get_literal_parameter(node1.labels[0], litmap)))
+            select = 'p.%s, e.%s' % (node1col, node2col)
+            step.insert(0, 'e.%s=p.%s' % (node1col, node2col))
+            indexes.add((graph, self.get_node1_column(graph)))
+        if node1.labels is None and node2.labels is None and rel.labels is not None:
+            indexes.add((graph, self.get_label_column(graph)))
+
+        # UNION discards rows that were already generated which guarantees termination on cyclic graphs;
+        # if the path length is bounded, we keep track of it and stop extending paths at the bound:
+        columns = [node1col, node2col]
+        seed_select = '%s, %s' % (node1col, node2col)
+        if maxlen is not None:
+            columns.append('depth')
+            seed_select += ', 1'
+            select += ', p.depth+1'
+            step.append('p.depth<%d' % maxlen)
+        seed_where = len(seed) > 0 and (' WHERE ' + ' AND '.join(seed)) or ''
+        cte = ('%s(%s) AS (\n    SELECT %s FROM %s%s\n    UNION\n    SELECT %s FROM %s AS p, %s AS e WHERE %s)'
+               % (path, ', '.join(columns), seed_select, graph, seed_where,
+                  select, path, graph, ' AND '.join(step)))
+        if maxlen is None:
+            table = path
+        else:
+            table = '(SELECT DISTINCT %s, %s FROM %s WHERE depth>=%d)' % (node1col, node2col, path, minlen)
+        return cte, table
+
     def pattern_props_to_sql(self, pattern, graph, column, litmap, varmap, restrictions, joins):
         # 'pattern' is a node or relationship pattern for 'graph.column'.  'column' should be 'node1', 'node2' or 'id'.
         props = getattr(pattern, 'properties', None)
@@ -394,8 +527,8 @@ class KgtkQuery(object):
         if expr_type == parser.Literal:
             return self.get_literal_parameter(expr.value, litmap)
         elif expr_type == parser.Parameter:
-            value = self.get_parameter_value(expr.name)
-            return self.get_literal_parameter(value, litmap)
+            # values are bound at execution time, so one translation can serve many parameter sets:
+            return self.get_literal_parameter(QueryParameter(expr.name), litmap)
         
         elif expr_type == parser.Variable:
             query_var = expr.name
@@ -530,20 +663,35 @@ class KgtkQuery(object):
         """
         return column.startswith(self.ALIAS_COLUMN_PREFIX) and column[len(self.ALIAS_COLUMN_PREFIX):] or column
 
-    def return_clause_to_sql_selection(self, clause, litmap, varmap):
+    def is_aggregate_expression(self, expr):
+        """Return True if 'expr' calls an aggregation function.
+        """
+        return parser.has_element(
+            expr, lambda x: isinstance(x, parser.Call) and self.store.is_aggregate_function(x.function))
+
+    def return_clause_to_sql_selection(self, clause, litmap, varmap, prefix=None, star='*', columns=None):
+        """Translate the return 'clause' into a selection and optional GROUP BY clause.
+        If 'prefix' is not None, it will be selected as the first column.  A '*' item
+        will be translated as 'star'.  If 'columns' is a list, the SQL expression and
+        SQL alias (or None) of each item get appended to it.
+        """
         select = clause.distinct and 'DISTINCT ' or ''
         first = True
+        if prefix is not None:
+            select += prefix
+            first = False
         # Cypher does not have a 'GROUP BY' clause but instead uses non-aggregate return columns
         # that precede an aggregate function as grouping keys, so we have to keep track of those:
         agg_info = []
         for item in clause.items:
             expr = self.expression_to_sql(item.expression, litmap, varmap)
+            if expr == '*':
+                expr = star
             select += first and expr or (', ' + expr)
             first = False
             # check if this item calls an aggregation function or not: if it does then preceding columns
             # that aren't aggregates are used for grouping, if it doesn't this column might be used for grouping:
-            is_agg = parser.has_element(
-                item.expression, lambda x: isinstance(x, parser.Call) and self.store.is_aggregate_function(x.function))
+            is_agg = self.is_aggregate_expression(item.expression)
             if item.name is not None:
                 # we create an alias variable object here, so we can evaluate it for proper renaming:
                 alias_var = parser.Variable(item._query, item.name)
@@ -554,7 +702,10 @@ class KgtkQuery(object):
                 select += ' ' + sql_alias
                 agg_info.append(not is_agg and sql_alias or None)
             else:
+                sql_alias = None
                 agg_info.append(not is_agg and expr or None)
+            if columns is not None:
+                columns.append((expr, sql_alias))
                 
         # we only need to group if there is at least one aggregate column and
         # at least one regular column before one of the aggregate columns:
@@ -572,10 +723,10 @@ class KgtkQuery(object):
             group_by = None
         return select, group_by
 
-    def order_clause_to_sql(self, order_clause, litmap, varmap):
+    def order_clause_to_sql(self, order_clause, litmap, varmap, prefix=None):
+        items = prefix is not None and [prefix] or []
         if order_clause is None:
-            return None
-        items = []
+            return len(items) > 0 and 'ORDER BY ' + ', '.join(items) or None
         for sort_item in order_clause.items:
             expr = self.expression_to_sql(sort_item.expression, litmap, varmap)
             direction = sort_item.direction.upper()
@@ -610,12 +761,87 @@ class KgtkQuery(object):
                 indexes.add((alias_to_graph[g], c))
         return indexes
 
-    def ensure_relevant_indexes(self, sql, graphs=[], auto_indexes=[], explain=False):
+    def compute_parameter_indexes(self, graphs, varmap):
+        """Compute column indexes for variables that are compared for equality with a query
+        parameter in a top-level conjunct of the WHERE clause, for example, 'x = $node'.  Such
+        queries are generally lookups that get executed repeatedly with different parameters.
+        """
+        alias_to_graph = {alias: graph for graph, alias in graphs}
+        indexes = set()
+        conjuncts = self.where_clause and [self.where_clause.expression] or []
+        while len(conjuncts) > 0:
+            expr = conjuncts.pop()
+            if isinstance(expr, parser.And):
+                conjuncts.append(expr.arg1)
+                conjuncts.append(expr.arg2)
+            elif type(expr) == parser.Eq:
+                for arg, other in ((expr.arg1, expr.arg2), (expr.arg2, expr.arg1)):
+                    if type(arg) == parser.Variable and isinstance(other, parser.Parameter):
+                        for graph, col in varmap.get(arg.name, ()):
+                            if graph in alias_to_graph:
+                                indexes.add((alias_to_graph[graph], col))
+        return indexes
+
+    COMPARISON_OPERATORS = (parser.Eq, parser.Lt, parser.Gt, parser.Lte, parser.Gte)
+
+    def get_indexable_expression(self, expr, varmap):
+        """If 'expr' applies an indexable KGTK user function to a variable that is bound
+        to a graph column, either as 'x.kgtk_date_year' or 'kgtk_date_year(x)', return
+        the corresponding (graph_alias, column, function) triple, otherwise None.
+        """
+        var = function = None
+        if isinstance(expr, parser.Expression2):
+            if isinstance(expr.arg1, parser.Variable) and len(expr.arg2) == 1 \
+               and isinstance(expr.arg2[0], parser.PropertyLookup):
+                var = expr.arg1
+                function = expr.arg2[0].property
+        elif isinstance(expr, parser.Call):
+            if len(expr.args) == 1 and isinstance(expr.args[0], parser.Variable) and not expr.distinct:
+                var = expr.args[0]
+                function = expr.function
+        if var is None or not self.is_kgtk_operator(function) or not self.store.is_indexable_user_function(function):
+            return None
+        sql_vars = varmap.get(var.name)
+        if not sql_vars:
+            return None
+        # use the same representative column as 'expression_to_sql', which SQLite has to match:
+        graph, col = list(sql_vars)[0]
+        if graph == self.ALIAS_GRAPH:
+            return None
+        return graph, col, function
+
+    def compute_auto_expression_indexes(self, graphs, varmap):
+        """Compute expression indexes that are likely needed to run this query efficiently.
+        These are indexable KGTK functions applied to graph columns which are compared
+        to a literal or parameter in a top-level conjunct of the WHERE clause, for example,
+        'kgtk_date_year(x.node2) > 1900'.  Each element is a (graph, column, function) triple.
+        """
+        alias_to_graph = {alias: graph for graph, alias in graphs}
+        indexes = set()
+        conjuncts = self.where_clause and [self.where_clause.expression] or []
+        while len(conjuncts) > 0:
+            expr = conjuncts.pop()
+            if isinstance(expr, parser.And):
+                conjuncts.append(expr.arg1)
+                conjuncts.append(expr.arg2)
+            elif type(expr) in self.COMPARISON_OPERATORS:
+                for arg, other in ((expr.arg1, expr.arg2), (expr.arg2, expr.arg1)):
+                    if isinstance(other, (parser.Literal, parser.Parameter)):
+                        index = self.get_indexable_expression(arg, varmap)
+                        # path tables are computed on the fly and cannot use expression indexes:
+                        if index is not None and index[0] in alias_to_graph:
+                            graph, col, function = index
+                            indexes.add((alias_to_graph[graph], col, function))
+        return indexes
+
+    def ensure_relevant_indexes(self, sql, graphs=[], auto_indexes=[], auto_expression_indexes=[], explain=False):
         """Ensure that relevant indexes for this 'sql' query are available on the database.
         Based on the specified index_mode strategy, either use 'auto_indexes', the DB's
         'expert' mode, or some fixed variant such as 'quad' 'triple', 'node1+label', etc.
         which will be applied to all 'graphs'.  Each element in 'auto_indexes' is assumed
-        to be an unaliased (graph, column) pair.
+        to be an unaliased (graph, column) pair.  Explicitly requested expression indexes
+        are applied to all 'graphs', and in 'auto' mode, 'auto_expression_indexes' which are
+        unaliased (graph, column, function) triples will be created as well.
         """
         # NOTES
         # - what we want is the minimal number of indexes that allow this query to run efficiently,
@@ -630,8 +856,16 @@ class KgtkQuery(object):
         #   the indexes it suggests, since that often wants multi-column indexes which are expensive
         # - we also need some manual control as well to force certain indexing patterns
         # - we only index core columns for now, but we might have use cases where that is too restrictive
+        # - expression indexes on KGTK literal accessors let SQLite turn range restrictions such as
+        #   'kgtk_date_year(x) > 1900' into index lookups instead of full scans with a UDF call per row
+
+        for graph in graphs:
+            for function, column in self.expression_indexes:
+                self.store.ensure_graph_expression_index(graph, function, column, explain=explain)
         
         if self.index_mode == 'auto':
+            for graph, column, function in sorted(auto_expression_indexes):
+                self.store.ensure_graph_expression_index(graph, function, column, explain=explain)
             # build indexes as suggested by joins and restrictions:
             for graph, column in auto_indexes:
                 # for now unconditionally restrict to core columns:
@@ -672,12 +906,113 @@ class KgtkQuery(object):
                 # the ID check needs to be generalized:
                 self.store.ensure_graph_index(graph, column, unique=column=='id', explain=explain)
 
-    def translate_to_sql(self):
+    PARTITION_START = '_partition_start'
+    PARTITION_END = '_partition_end'
+    PARTITION_AGGREGATES = ('COUNT', 'SUM', 'TOTAL', 'MIN', 'MAX')
+
+    def partition_clauses_to_sql(self, select, columns, litmap, varmap, partition):
+        """Translate the ORDER BY, SKIP and LIMIT clauses of a partitioned query, and adjust
+        'select' whose result 'columns' were recorded by 'return_clause_to_sql_selection'.
+        Return the new selection, ORDER BY and LIMIT clauses.  Record how to merge partition
+        results in 'partition': the aggregate function (or None) of each result column, the
+        (column index, descending) pairs of the sort order or None if the order cannot be
+        computed from partition results, the number of hidden sort columns appended to the
+        selection, and a query to compute the overall LIMIT and SKIP values.
+        """
+        items = self.return_clause.items
+        aggregates = [self.is_aggregate_expression(item.expression) and item.expression.function.upper() or None
+                      for item in items]
+        is_aggregate = any(aggregates)
+        partition['aggregates'] = is_aggregate and aggregates or None
+        partition['distinct'] = self.return_clause.distinct
+        partition['hidden'] = 0
+        # columns following a '*' item don't have a known index in the result:
+        stars = [i for i, (expr, alias) in enumerate(columns) if expr == '*']
+        columns = len(stars) > 0 and columns[0:stars[0]] or columns
+        sort = []
+        if self.order_clause is not None:
+            for sort_item in self.order_clause.items:
+                expr = self.expression_to_sql(sort_item.expression, litmap, varmap)
+                descending = not sort_item.direction.upper().startswith('ASC')
+                index = [i for i, column in enumerate(columns) if expr in column]
+                if len(index) > 0:
+                    sort.append((index[0], descending))
+                elif not is_aggregate:
+                    # sort partition results by hidden trailing columns, so we can merge them:
+                    select += ', ' + expr
+                    sort.append((-1, descending))
+                    partition['hidden'] += 1
+                else:
+                    sort = None
+                    break
+        if sort is not None:
+            # hidden column indexes are counted from the end of a result row:
+            hidden = partition['hidden']
+            for i, (index, descending) in enumerate(sort):
+                if index < 0:
+                    hidden -= 1
+                    sort[i] = (-1 - hidden, descending)
+        partition['sort'] = sort
+
+        limit = skip = None
+        if self.limit_clause is not None:
+            limit = self.expression_to_sql(self.limit_clause.expression, litmap, None)
+        if self.skip_clause is not None:
+            skip = self.expression_to_sql(self.skip_clause.expression, litmap, None)
+        partition['limits'] = 'SELECT %s, %s' % (limit or '-1', skip or '0')
+        if is_aggregate:
+            # aggregated results can only be sorted and limited once they have been combined:
+            return select, None, None
+        order = self.order_clause_to_sql(self.order_clause, litmap, varmap)
+        # each partition might contribute all of the first SKIP+LIMIT results:
+        limit = limit is not None and 'LIMIT (%s) + (%s)' % (limit, skip or '0') or None
+        return select, order, limit
+
+    def can_partition(self):
+        """Return True if this query can be executed on partitions of the graph table
+        of its first match clause whose results can then be merged (see 'execute_parallel').
+        Variable-length path clauses, and aggregates other than COUNT, SUM, TOTAL, MIN and
+        MAX of a return item, or non-aggregate return items following all aggregates which
+        are not used for grouping, are not supported.
+        """
+        if any(self.is_path_clause(clause) for clause in self.match_clauses):
+            return False
+        items = self.return_clause.items
+        aggregates = [self.is_aggregate_expression(item.expression) for item in items]
+        if not any(aggregates):
+            return True
+        if self.return_clause.distinct or aggregates[-1] is False:
+            return False
+        for item, is_agg in zip(items, aggregates):
+            if not is_agg:
+                if isinstance(item.expression, parser.Variable) and item.expression.name == '*':
+                    return False
+                continue
+            expr = item.expression
+            if (not isinstance(expr, parser.Call) or expr.distinct
+                or expr.function.upper() not in self.PARTITION_AGGREGATES
+                or self.is_aggregate_expression(expr.args)):
+                return False
+        return True
+
+    BATCH_TABLE_ALIAS = '_paras'
+    PARAMETER_ROW_COLUMN = 'para_row'
+
+    def translate_to_sql(self, batch_table=None, batch_parameters=(), partition=None):
+        """Translate this query into SQL.  If 'batch_table' is not None, join the query with
+        that table which has a row for each set of values of the query parameters named in
+        'batch_parameters' (see 'execute_batch').  If 'partition' is a dict, translate the
+        query so it only computes the results for a rowid range of the graph table of the
+        first match clause, and record how to merge partition results in 'partition'
+        (see 'execute_parallel').
+        """
         graphs = set()        # the set of graph table names with aliases referenced by this query
         litmap = {}           # maps Kypher literals onto parameter placeholders
         varmap = {}           # maps Kypher variables onto representative (graph, col) SQL columns
         restrictions = set()  # maps (graph, col) SQL columns onto literal restrictions
         joins = set()         # maps equivalent SQL column pairs (avoiding dupes and redundant flips)
+        paths = {}            # maps graph aliases of variable-length clauses onto (CTE, table) pairs
+        path_indexes = set()  # (graph, col) SQL columns used to compute variable-length paths
         parameters = None     # maps ? parameters in sequence onto actual query parameters
         
         # translate clause top-level info:
@@ -685,6 +1020,8 @@ class KgtkQuery(object):
             graph = self.get_pattern_clause_graph(clause)
             graph_alias = '%s_c%d' % (graph, i+1) # per-clause graph table alias for self-joins
             graphs.add((graph, graph_alias))
+            if self.is_path_clause(clause):
+                paths[graph_alias] = self.path_clause_to_sql(clause, graph, graph_alias, litmap, path_indexes)
             self.pattern_clause_to_sql(clause, graph_alias, litmap, varmap, restrictions, joins)
             
         # translate properties:
@@ -694,13 +1031,35 @@ class KgtkQuery(object):
             self.pattern_clause_props_to_sql(clause, graph_alias, litmap, varmap, restrictions, joins)
 
         # assemble SQL query:
-        select, group_by = self.return_clause_to_sql_selection(self.return_clause, litmap, varmap)
-        graph_tables = ', '.join([g + ' AS ' + a for g, a in sorted(list(graphs))])
+        batch_row = batch_star = None
+        if batch_table is not None:
+            batch_row = '%s.%s' % (self.BATCH_TABLE_ALIAS, sql_quote_ident(self.PARAMETER_ROW_COLUMN))
+            # '*' would include the parameter columns:
+            batch_star = ', '.join([a + '.*' for g, a in sorted(list(graphs))])
+        columns = []
+        select, group_by = self.return_clause_to_sql_selection(
+            self.return_clause, litmap, varmap, prefix=batch_row, star=batch_star or '*', columns=columns)
+        order = self.order_clause_to_sql(self.order_clause, litmap, varmap, prefix=batch_row)
+        limit = self.limit_clauses_to_sql(self.skip_clause, self.limit_clause, litmap, varmap)
+        partition_alias = None
+        if partition is not None:
+            partition_alias = '%s_c1' % self.get_pattern_clause_graph(self.match_clauses[0])
+            select, order, limit = self.partition_clauses_to_sql(select, columns, litmap, varmap, partition)
+            partition['table'] = self.get_pattern_clause_graph(self.match_clauses[0])
+        graph_tables = ', '.join([(a in paths and paths[a][1] or g) + ' AS ' + a for g, a in sorted(list(graphs))])
+        if batch_table is not None:
+            graph_tables = '%s AS %s, %s' % (batch_table, self.BATCH_TABLE_ALIAS, graph_tables)
         query = io.StringIO()
+        if len(paths) > 0:
+            query.write('WITH RECURSIVE %s\n' % ',\n'.join([paths[a][0] for a in sorted(paths)]))
         query.write('SELECT %s\nFROM %s' % (select, graph_tables))
         
-        if len(restrictions) > 0 or len(joins) > 0 or self.where_clause is not None:
+        if len(restrictions) > 0 or len(joins) > 0 or self.where_clause is not None or partition_alias is not None:
             query.write('\nWHERE TRUE')
+        if partition_alias is not None:
+            query.write('\nAND %s.rowid>=%s AND %s.rowid<%s'
+                        % (partition_alias, self.get_literal_parameter(QueryParameter(self.PARTITION_START), litmap),
+                           partition_alias, self.get_literal_parameter(QueryParameter(self.PARTITION_END), litmap)))
         for (g, c), val in sorted(list(restrictions)):
             query.write('\nAND %s.%s=%s' % (g, sql_quote_ident(c), val))
         for (g1, c1), (g2, c2) in sorted(list(joins)):
@@ -709,35 +1068,323 @@ class KgtkQuery(object):
         where = self.where_clause_to_sql(self.where_clause, litmap, varmap)
         where and query.write('\nAND ' + where)
         group_by and query.write('\n' + group_by)
-        order = self.order_clause_to_sql(self.order_clause, litmap, varmap)
         order and query.write('\n' + order)
-        limit = self.limit_clauses_to_sql(self.skip_clause, self.limit_clause, litmap, varmap)
         limit and query.write('\n' + limit)
         query = query.getvalue().replace(' TRUE\nAND', '')
-        query, parameters = self.replace_literal_parameters(query, litmap)
-        auto_indexes = self.compute_auto_indexes(graphs, restrictions, joins)
+        batch_columns = {name: '%s.%s' % (self.BATCH_TABLE_ALIAS, sql_quote_ident(name)) for name in batch_parameters}
+        query, parameters = self.replace_literal_parameters(query, litmap, batch_columns)
+        if partition is not None:
+            partition['limits'] = self.replace_literal_parameters(partition['limits'], litmap)
+        auto_indexes = self.compute_auto_indexes(graphs, restrictions, joins) | path_indexes
+        auto_indexes |= self.compute_parameter_indexes(graphs, varmap)
+        auto_expression_indexes = self.compute_auto_expression_indexes(
+            [(g, a) for g, a in graphs if a not in paths], varmap)
 
         # logging:
         rule = '-' * 45
         self.log(1, 'SQL Translation:\n%s\n  %s\n  PARAS: %s\n%s'
                  % (rule, query.replace('\n', '\n     '), parameters, rule))
 
-        return query, parameters, sorted(list(zip(*graphs))[0]), auto_indexes
+        return query, parameters, sorted(list(zip(*graphs))[0]), auto_indexes, auto_expression_indexes
 
     def execute(self):
-        query, params, graphs, indexes = self.translate_to_sql()
-        self.ensure_relevant_indexes(query, graphs=graphs, auto_indexes=indexes)
+        query, params, graphs, indexes, expression_indexes = self.translate_to_sql()
+        params = self.bind_parameters(params)
+        if self.cache_results:
+            cache_key = self.store.get_query_result_key(query, params, graphs)
+            cached = self.store.get_cached_query_result(cache_key)
+            if cached is not None:
+                self.result_header, rows = cached
+                return iter(rows)
+        self.ensure_relevant_indexes(query, graphs=graphs, auto_indexes=indexes,
+                                     auto_expression_indexes=expression_indexes)
         result = self.store.execute(query, params)
         self.result_header = [self.unalias_column_name(c[0]) for c in result.description]
+        if self.cache_results:
+            return self.cache_result(cache_key, graphs, result)
         return result
 
+    def cache_result(self, cache_key, graphs, result):
+        """Pass through the rows of 'result' and cache them under 'cache_key' once all of them
+        have been consumed, unless they exceed the size budget of the result cache.
+        """
+        rows = []
+        size = 0
+        for row in result:
+            if rows is not None:
+                # estimate the uncompressed size and stop buffering as soon as it is over the budget,
+                # so we never hold more than the budget in memory for results we can't cache:
+                size += sum(len(str(value)) for value in row)
+                if size > self.result_cache_size:
+                    rows = None
+                else:
+                    rows.append(row)
+            yield row
+        if rows is not None:
+            self.store.set_cached_query_result(cache_key, graphs, self.result_header, rows,
+                                               budget=self.result_cache_size)
+
+    PARTITIONS_PER_PROCESS = 4
+
+    def execute_parallel(self, procs, partitions=None):
+        """Execute this query in a pool of 'procs' processes, each of which runs it on a
+        range of rowids of the graph table of the first match clause via its own read-only
+        database connection, and return an iterator over the merged partition results.  The graph
+        table is split into 'partitions' ranges (defaults to a few per process).  Results
+        get merged in the order specified by ORDER BY, and the results of COUNT, SUM, TOTAL,
+        MIN and MAX are combined across partitions.  Queries that cannot be partitioned
+        according to 'can_partition' are executed sequentially instead.
+        """
+        if procs <= 1 or not self.can_partition():
+            self.log(1, 'Query cannot be partitioned, executing it sequentially')
+            return self.execute()
+        plan = {}
+        query, params, graphs, indexes, expression_indexes = self.translate_to_sql(partition=plan)
+        if plan['sort'] is None:
+            self.log(1, 'Query results cannot be sorted after partitioning, executing it sequentially')
+            return self.execute()
+        if self.cache_results:
+            # the merged result covers all partitions, so their ranges get a placeholder in the key:
+            paras = dict(self.parameters)
+            paras[self.PARTITION_START] = paras[self.PARTITION_END] = ''
+            cache_key = self.store.get_query_result_key(query, self.bind_parameters(params, paras), graphs)
+            cached = self.store.get_cached_query_result(cache_key)
+            if cached is not None:
+                self.result_header, rows = cached
+                return iter(rows)
+        self.ensure_relevant_indexes(query, graphs=graphs, auto_indexes=indexes,
+                                     auto_expression_indexes=expression_indexes)
+        self.store.commit()
+
+        start, end = self.store.execute('SELECT min(rowid), max(rowid) FROM %s' % plan['table']).fetchone()
+        start = start or 0
+        end = (end or 0) + 1
+        partitions = max(1, partitions or procs * self.PARTITIONS_PER_PROCESS)
+        step = max(1, -(-(end - start) // partitions))
+        parameters = []
+        for pstart in range(start, end, step):
+            paras = dict(self.parameters)
+            paras[self.PARTITION_START] = pstart
+            paras[self.PARTITION_END] = min(pstart + step, end)
+            parameters.append(self.bind_parameters(params, paras))
+        limits_query, limits_params = plan['limits']
+        limit, skip = self.store.execute(limits_query, self.bind_parameters(limits_params)).fetchone()
+
+        from multiprocessing import Pool
+        procs = min(procs, len(parameters))
+        self.log(1, 'Executing query on %d partitions with %d processes' % (len(parameters), procs))
+        initargs = (self.store.dbfile, sqlstore.LITERAL_PARSE_CACHE_SIZE)
+        with Pool(procs, initializer=_init_partition_worker, initargs=initargs) as pool:
+            results = pool.starmap(_execute_partition, [(query, paras) for paras in parameters])
+        columns = results[0][0]
+        self.result_header = [self.unalias_column_name(c) for c in columns[0:len(columns) - plan['hidden']]]
+        rows = merge_partition_results([rows for header, rows in results], plan, limit, skip)
+        if self.cache_results:
+            return self.cache_result(cache_key, graphs, rows)
+        return rows
+
+    BATCH_MODES = ('auto', 'join', 'prepared')
+    BATCH_TABLE = 'temp.kgtk_query_parameters'
+
+    def can_join_parameters(self):
+        """Return True if this query can be executed for many parameter sets as a single
+        join with a table of those parameter sets.  Aggregation and SKIP/LIMIT apply to the
+        results of each parameter set, so those queries are executed once per parameter set.
+        """
+        if self.skip_clause is not None or self.limit_clause is not None:
+            return False
+        items = self.return_clause.items
+        for item in items:
+            if self.is_aggregate_expression(item.expression):
+                return False
+            if isinstance(item.expression, parser.Variable) and item.expression.name == '*' and len(items) > 1:
+                return False
+        return True
+
+    def execute_batch(self, names, rows, mode='auto'):
+        """Execute this query for each of the parameter value tuples in 'rows' which bind the
+        query parameters in 'names', all other parameters are bound to our own parameters.
+        Return an iterator over all results where each result row is prefixed with the 1-based
+        index of the tuple that produced it.  The query is only translated once.  In 'prepared'
+        mode, the same prepared SQL statement is executed for each tuple, in 'join' mode, the
+        tuples are imported into a temporary table and the query is executed as a single join
+        with that table.  'auto' uses a join whenever 'can_join_parameters'.
+        """
+        mode = mode.lower()
+        if mode not in self.BATCH_MODES:
+            raise Exception('Unsupported batch mode: %s' % mode)
+        if mode == 'join' and not self.can_join_parameters():
+            raise Exception('Aggregation and SKIP/LIMIT queries cannot be joined with parameter sets')
+        if mode == 'auto':
+            mode = self.can_join_parameters() and 'join' or 'prepared'
+        if mode == 'join':
+            return self.execute_batch_via_join(names, rows)
+        else:
+            return self.execute_batch_via_prepared(names, rows)
+
+    def execute_batch_via_prepared(self, names, rows):
+        query, params, graphs, indexes, expression_indexes = self.translate_to_sql()
+        self.ensure_relevant_indexes(query, graphs=graphs, auto_indexes=indexes,
+                                     auto_expression_indexes=expression_indexes)
+        rows = iter(rows)
+        first_row = next(rows, None)
+        parameters = dict(self.parameters)
+        # if we have no parameter sets, we still want the result header:
+        parameters.update(zip(names, first_row or [''] * len(names)))
+        result = self.store.execute(query, self.bind_parameters(params, parameters))
+        self.result_header = [self.PARAMETER_ROW_COLUMN] + [self.unalias_column_name(c[0]) for c in result.description]
+        if first_row is None:
+            return
+        for row in result:
+            yield (1,) + row
+        # the sqlite3 module caches the prepared statement for 'query' and reuses it:
+        for index, values in enumerate(rows, 2):
+            parameters.update(zip(names, values))
+            for row in self.store.execute(query, self.bind_parameters(params, parameters)):
+                yield (index,) + row
+
+    def execute_batch_via_join(self, names, rows):
+        store = self.store
+        columns = [sql_quote_ident(self.PARAMETER_ROW_COLUMN)] + [sql_quote_ident(name) for name in names]
+        store.execute('DROP TABLE IF EXISTS %s' % self.BATCH_TABLE)
+        store.execute('CREATE TABLE %s (%s INTEGER PRIMARY KEY, %s)' % (self.BATCH_TABLE, columns[0], ', '.join(columns[1:])))
+        try:
+            insert = 'INSERT INTO %s VALUES (%s)' % (self.BATCH_TABLE, ', '.join(['?'] * len(columns)))
+            store.executemany(insert, ((index,) + tuple(values) for index, values in enumerate(rows, 1)))
+            # the table statistics make SQLite loop over the parameter sets and look up the graph data:
+            store.execute('ANALYZE %s' % self.BATCH_TABLE)
+            store.commit()
+            query, params, graphs, indexes, expression_indexes = self.translate_to_sql(
+                batch_table=self.BATCH_TABLE, batch_parameters=names)
+            self.ensure_relevant_indexes(query, graphs=graphs, auto_indexes=indexes,
+                                         auto_expression_indexes=expression_indexes)
+            result = store.execute(query, self.bind_parameters(params))
+            self.result_header = [self.unalias_column_name(c[0]) for c in result.description]
+            yield from result
+        finally:
+            store.execute('DROP TABLE IF EXISTS %s' % self.BATCH_TABLE)
+
     def explain(self, mode='plan'):
-        query, params, graphs, indexes = self.translate_to_sql()
-        self.ensure_relevant_indexes(query, graphs=graphs, auto_indexes=indexes, explain=True)
+        query, params, graphs, indexes, expression_indexes = self.translate_to_sql()
+        self.ensure_relevant_indexes(query, graphs=graphs, auto_indexes=indexes,
+                                     auto_expression_indexes=expression_indexes, explain=True)
         result = self.store.explain(query, mode=mode)
         return result
 
 
+
+### Parallel partitioned execution:
+
+# Each worker process runs partition queries via its own read-only store:
+_partition_store = None
+
+def _init_partition_worker(dbfile, literal_parse_cache_size):
+    global _partition_store
+    from kgtk.kypher.sqlstore import SqliteStore, set_literal_parse_cache_size
+    set_literal_parse_cache_size(literal_parse_cache_size)
+    _partition_store = SqliteStore(dbfile, readonly=True)
+    for name in SqliteStore.USER_FUNCTIONS:
+        _partition_store.load_user_function(name)
+
+def _execute_partition(query, parameters):
+    result = _partition_store.execute(query, parameters)
+    return [c[0] for c in result.description], result.fetchall()
+
+def sqlite_sort_key(value):
+    """Return a key that sorts 'value' like SQLite does: NULL before numbers before text before blobs.
+    """
+    if value is None:
+        return (0, 0)
+    elif isinstance(value, (int, float)):
+        return (1, value)
+    elif isinstance(value, str):
+        return (2, value)
+    else:
+        return (3, value)
+
+class DescendingKey(object):
+    """Wrapper that inverts the order of a sort 'key'.
+    """
+    def __init__(self, key):
+        self.key = key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+def get_row_sort_key(sort):
+    """Return a function that computes the key of a result row for the (column index,
+    descending) pairs of a 'sort' order.
+    """
+    def row_key(row):
+        return tuple(descending and DescendingKey(sqlite_sort_key(row[index])) or sqlite_sort_key(row[index])
+                     for index, descending in sort)
+    return row_key
+
+def combine_aggregate(function, value1, value2):
+    """Combine the values of the aggregate 'function' computed for two partitions.
+    """
+    if value1 is None:
+        return value2
+    elif value2 is None:
+        return value1
+    elif function == 'MIN':
+        return min(value1, value2, key=sqlite_sort_key)
+    elif function == 'MAX':
+        return max(value1, value2, key=sqlite_sort_key)
+    else:
+        # COUNT, SUM and TOTAL:
+        return value1 + value2
+
+def merge_partition_results(results, plan, limit=-1, skip=0):
+    """Merge the lists of partition 'results' according to the partition 'plan' computed
+    by 'KgtkQuery.translate_to_sql' and return an iterator over the merged result rows.
+    Apply the overall 'limit' (negative for none) and 'skip' to the merged results.
+    """
+    hidden = plan['hidden']
+    sort = plan['sort']
+    aggregates = plan['aggregates']
+    if aggregates is not None:
+        keys = [i for i, function in enumerate(aggregates) if function is None]
+        groups = {}
+        for rows in results:
+            for row in rows:
+                key = tuple(row[i] for i in keys)
+                group = groups.get(key)
+                if group is None:
+                    groups[key] = list(row)
+                else:
+                    for i, function in enumerate(aggregates):
+                        if function is not None:
+                            group[i] = combine_aggregate(function, group[i], row[i])
+        rows = [tuple(group) for group in groups.values()]
+        # SQLite returns groups in the order of their keys:
+        rows.sort(key=get_row_sort_key([(i, False) for i in keys]))
+        if len(sort) > 0:
+            rows.sort(key=get_row_sort_key(sort))
+    elif len(sort) > 0:
+        # each partition is already sorted, so a k-way merge suffices:
+        rows = heapq.merge(*results, key=get_row_sort_key(sort))
+    else:
+        rows = itertools.chain(*results)
+    if hidden > 0:
+        rows = (row[0:len(row) - hidden] for row in rows)
+    if plan['distinct']:
+        rows = unique_rows(rows)
+    skip = max(0, int(skip or 0))
+    limit = -1 if limit is None else int(limit)
+    return itertools.islice(rows, skip, None if limit < 0 else skip + limit)
+
+def unique_rows(rows):
+    seen = set()
+    for row in rows:
+        if row not in seen:
+            seen.add(row)
+            yield row
+
+
 """
 >>> store = cq.SqliteStore('/tmp/graphstore.sqlite3.db', create=True)
 >>> graph = '/home/hans/Documents/kgtk/code/kgtk/kgtk/kypher/.work/data/graph.tsv'
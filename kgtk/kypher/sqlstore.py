@@ -8,8 +8,13 @@ import sqlite3
 from   odictliteral import odict
 import time
 import csv
+import hashlib
+import io
+import pickle
+import zlib
 import re
 from   functools import lru_cache
+from   pathlib import Path
 import pprint
 
 import sh
@@ -79,6 +84,27 @@ def open_to_read(file, mode='rt'):
     else:
         return open(file, mode)
 
+class DigestingReader(io.RawIOBase):
+    """Raw binary reader that feeds all the bytes it reads from the binary
+    'file' into the hash object 'digest'.  Wrap it with 'io.BufferedReader'.
+    """
+    def __init__(self, file, digest):
+        self.file = file
+        self.digest = digest
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = self.file.readinto(buffer)
+        if n:
+            self.digest.update(memoryview(buffer)[:n])
+        return n
+
+    def close(self):
+        self.file.close()
+        super().close()
+
 def open_to_write(file, mode='wt'):
     """Version of 'open' that is smart about different types of compressed files
     and file-like objects that are already open to write.  'mode' has to be a
@@ -179,17 +205,33 @@ class SqliteStore(SqlStore):
             'header':  sdict['_name_': 'header',  'type': 'TEXT'],
             'size':    sdict['_name_': 'size',    'type': 'INTEGER', 'doc': 'total size in bytes used by this graph including indexes'],
             'acctime': sdict['_name_': 'acctime', 'type': 'FLOAT', 'doc': 'last time this graph was accessed'],
+            'version': sdict['_name_': 'version', 'type': 'INTEGER', 'doc': 'store-wide counter value of the last import into this graph'],
         ]
     ]
 
-    def __init__(self, dbfile, create=False, loglevel=0):
+    QUERY_CACHE_TABLE = sdict[
+        '_name_': 'querycache',
+        'columns': sdict[
+            'key':     sdict['_name_': 'key',     'type': 'TEXT', 'key': True, 'doc': 'hash of the SQL query, its parameters and graph versions'],
+            'graphs':  sdict['_name_': 'graphs',  'type': 'TEXT', 'doc': 'space-separated names of the graph tables used by the query'],
+            'header':  sdict['_name_': 'header',  'type': 'TEXT'],
+            'result':  sdict['_name_': 'result',  'type': 'BLOB', 'doc': 'compressed pickle of the result rows'],
+            'size':    sdict['_name_': 'size',    'type': 'INTEGER', 'doc': 'size of the result in bytes'],
+            'acctime': sdict['_name_': 'acctime', 'type': 'FLOAT', 'doc': 'last time this result was accessed'],
+        ]
+    ]
+
+    def __init__(self, dbfile, create=False, readonly=False, loglevel=0):
         self.loglevel = loglevel
-        if not os.path.exists(dbfile) and not create:
+        if not os.path.exists(dbfile) and (not create or readonly):
             raise KGTKException('sqlite DB file does not exist: %s' % dbfile)
         self.dbfile = dbfile
+        # read-only stores can be used concurrently by multiple processes to run queries:
+        self.readonly = readonly
         self.conn = None
         self.user_functions = set()
-        self.init_meta_tables()
+        if not readonly:
+            self.init_meta_tables()
         self.configure()
 
     def log(self, level, message):
@@ -203,8 +245,16 @@ class SqliteStore(SqlStore):
             self.execute(self.get_table_definition(self.FILE_TABLE))
         if not self.has_table(self.GRAPH_TABLE._name_):
             self.execute(self.get_table_definition(self.GRAPH_TABLE))
+        elif self.GRAPH_TABLE.columns.version._name_ not in self.get_table_header(self.GRAPH_TABLE._name_):
+            # upgrade graph tables of stores created before graphs had versions:
+            self.execute('ALTER TABLE %s ADD COLUMN %s INTEGER'
+                         % (self.GRAPH_TABLE._name_, self.GRAPH_TABLE.columns.version._name_))
+        if not self.has_table(self.QUERY_CACHE_TABLE._name_):
+            self.execute(self.get_table_definition(self.QUERY_CACHE_TABLE))
 
     CACHE_SIZE = 2 ** 32 # 4GB
+    RESULT_CACHE_SIZE = 2 ** 30 # 1GB, default budget for cached query results
+    FILE_BLOCK_SIZE = 2 ** 20 # 1MB, used when reading files to import or checksum them
 
     def configure(self):
         """Configure various settings of the store.
@@ -216,7 +266,10 @@ class SqliteStore(SqlStore):
 
     def get_conn(self):
         if self.conn is None:
-            self.conn = sqlite3.connect(self.dbfile)
+            if self.readonly:
+                self.conn = sqlite3.connect(Path(self.dbfile).resolve().as_uri() + '?mode=ro', uri=True)
+            else:
+                self.conn = sqlite3.connect(self.dbfile)
         return self.conn
 
     def get_sqlite_cmd(self):
@@ -257,6 +310,10 @@ class SqliteStore(SqlStore):
     USER_FUNCTIONS = {}
     AGGREGATE_FUNCTIONS = ('AVG', 'COUNT', 'GROUP_CONCAT', 'MAX', 'MIN', 'SUM', 'TOTAL')
 
+    # only Python 3.8+ with SQLite 3.8.3+ can declare user functions deterministic, otherwise
+    # they are registered as non-deterministic and cannot be used in index expressions:
+    DETERMINISTIC_FUNCTIONS = sys.version_info >= (3, 8) and sqlite3.sqlite_version_info >= (3, 8, 3)
+
     @staticmethod
     def register_user_function(name, num_params, func, deterministic=False):
         name = name.upper()
@@ -273,9 +330,11 @@ class SqliteStore(SqlStore):
             return
         elif self.is_user_function(name):
             info = self.USER_FUNCTIONS.get(name)
-            # Py 3.8 or later:
-            #self.get_conn().create_function(info['name'], info['num_params'], info['func'], deterministic=info['deterministic'])
-            self.get_conn().create_function(info['name'], info['num_params'], info['func'])
+            if info['deterministic'] and self.DETERMINISTIC_FUNCTIONS:
+                # deterministic functions can be factored out of repeated calls by SQLite:
+                self.get_conn().create_function(info['name'], info['num_params'], info['func'], deterministic=True)
+            else:
+                self.get_conn().create_function(info['name'], info['num_params'], info['func'])
             self.user_functions.add(name)
         elif error:
             raise KGTKException('No user-function has been registered for: ' + str(name))
@@ -371,6 +430,31 @@ class SqliteStore(SqlStore):
         # we just key in on the name, not the table type, given how the names are constructed:
         return self.has_table(index_name)
 
+    def get_expression_index_name(self, table_schema, function, column):
+        """Return a global name for the index on 'function(column)' on 'table_schema'.
+        """
+        table_name = table_schema._name_
+        column_name = table_schema.columns[column]._name_
+        index_name = '%s_%s_%s_idx' % (table_name, function.lower(), column_name)
+        return index_name
+
+    def get_expression_index_definition(self, table_schema, function, column):
+        """Return a definition statement to create an index on the value of the user
+        function 'function' applied to 'column' of 'table_schema'.  SQLite will use
+        this index for queries that restrict the same expression, for example,
+        'kgtk_date_year(node2) > 1900'.  'function' must be a deterministic user function.
+        """
+        table_name = table_schema._name_
+        column_name = table_schema.columns[column]._name_
+        index_name = self.get_expression_index_name(table_schema, function, column)
+        return 'CREATE INDEX %s on %s (%s(%s))' % (
+            sql_quote_ident(index_name), table_name, function.upper(), sql_quote_ident(column_name))
+
+    def has_expression_index(self, table_schema, function, column):
+        """Return True if table 'table_schema' has an index defined for 'function(column)'.
+        """
+        return self.has_table(self.get_expression_index_name(table_schema, function, column))
+
     def get_column_list(self, *columns):
         return ', '.join([sql_quote_ident(col._name_) for col in columns])
 
@@ -455,11 +539,12 @@ class SqliteStore(SqlStore):
             info = self.get_record_info(self.FILE_TABLE, file)
         return info
 
-    def set_file_info(self, file, size=None, modtime=None, graph=None):
+    def set_file_info(self, file, size=None, modtime=None, md5sum=None, graph=None):
         info = sdict()
         info.file = file
         info.size = size
         info.modtime = modtime
+        info.md5sum = md5sum
         info.graph = graph
         self.set_record_info(self.FILE_TABLE, info)
 
@@ -484,7 +569,45 @@ class SqliteStore(SqlStore):
             raise KGTKException('alias %s is already in use for different file' % alias)
         # we don't have an update yet, instead we delete first and then create the new record:
         self.drop_file_info(finfo.file)
-        self.set_file_info(alias, size=finfo.size, modtime=finfo.modtime, graph=finfo.graph)
+        self.set_file_info(alias, size=finfo.size, modtime=finfo.modtime, md5sum=finfo.md5sum, graph=finfo.graph)
+
+    def is_plain_file(self, file):
+        """Return True if 'file' is an existing, uncompressed regular file whose data
+        can be read at byte offsets.
+        """
+        return (isinstance(file, str) and not self.is_standard_input(file) and os.path.isfile(file)
+                and not file.endswith(('.gz', '.bz2', '.xz')))
+
+    def get_appended_file_md5sum(self, file, file_info):
+        """Return the MD5 hex digest of all of 'file' if its first 'file_info.size' bytes
+        are unchanged from when 'file_info' was recorded and end in a complete line,
+        that is, if 'file' has only had data appended to it since then.  Otherwise,
+        return None.  The whole file is read in a single pass.
+        """
+        if file_info.md5sum is None or not self.is_plain_file(file):
+            return None
+        prefix_size = file_info.size
+        if prefix_size is None or prefix_size <= 0 or os.path.getsize(file) < prefix_size:
+            return None
+        md5 = hashlib.md5()
+        with open(file, 'rb') as inp:
+            size = prefix_size
+            block = b''
+            while size > 0:
+                block = inp.read(min(size, self.FILE_BLOCK_SIZE))
+                if len(block) == 0:
+                    return None
+                md5.update(block)
+                size -= len(block)
+            # if the last imported line was incomplete, appending might have changed it:
+            if not block.endswith((b'\n', b'\r')) or md5.hexdigest() != file_info.md5sum:
+                return None
+            while True:
+                block = inp.read(self.FILE_BLOCK_SIZE)
+                if len(block) == 0:
+                    break
+                md5.update(block)
+        return md5.hexdigest()
 
     def get_file_graph(self, file):
         """Return the graph table name created from the data of 'file'.
@@ -523,7 +646,17 @@ class SqliteStore(SqlStore):
         info.header = header
         info.size = size
         info.acctime = acctime
+        info.version = self.new_graph_version()
         self.set_record_info(self.GRAPH_TABLE, info)
+
+    def new_graph_version(self):
+        """Return a new graph version number which is larger than those of all graphs in the store.
+        Each import of data into a graph gives it a new version, which identifies its cached query results.
+        """
+        schema = self.GRAPH_TABLE
+        query = 'SELECT max(%s) FROM %s' % (schema.columns.version._name_, schema._name_)
+        (version,) = self.execute(query).fetchone()
+        return (version or 0) + 1
     
     def drop_graph_info(self, table_name):
         """Delete the graph info record for 'table_name'.
@@ -544,21 +677,50 @@ class SqliteStore(SqlStore):
         schema = self.get_graph_table_schema(table_name)
         if not self.has_index(schema, column):
             index_stmt = self.get_index_definition(schema, column, unique=unique)
-            loglevel = explain and 0 or 1
-            self.log(loglevel, 'CREATE INDEX on table %s column %s ...' % (table_name, column))
-            # we also measure the increase in allocated disk space here:
-            oldsize = self.get_db_size()
-            if not explain:
-                self.execute(index_stmt)
-            # do this unconditionally for now, given that it only takes about 10% of creation time:
-            self.log(loglevel, 'ANALYZE INDEX on table %s column %s ...' % (table_name, column))
-            if not explain:
-                self.execute('ANALYZE %s' % sql_quote_ident(self.get_index_name(schema, column)))
-            idxsize = self.get_db_size() - oldsize
-            ginfo = self.get_graph_info(table_name)
-            ginfo.size += idxsize
-            if not explain:
-                self.set_record_info(self.GRAPH_TABLE, ginfo)
+            self.create_graph_index(table_name, self.get_index_name(schema, column), index_stmt,
+                                    'column %s' % column, explain=explain)
+
+    def is_indexable_user_function(self, name):
+        """Return True if 'name' is a deterministic single-argument user function
+        whose values can be indexed, which requires that it gets registered as deterministic.
+        """
+        info = self.USER_FUNCTIONS.get(name.upper())
+        return info is not None and info['deterministic'] and info['num_params'] == 1 and self.DETERMINISTIC_FUNCTIONS
+
+    def ensure_graph_expression_index(self, table_name, function, column, explain=False):
+        """Ensure an index for 'table_name' on 'function(column)' already exists or gets created.
+        """
+        if not self.is_indexable_user_function(function):
+            raise KGTKException('Cannot index non-deterministic or unknown user function: %s' % function)
+        schema = self.get_graph_table_schema(table_name)
+        if column not in schema.columns:
+            raise KGTKException('Cannot index %s on unknown column %s of table %s' % (function, column, table_name))
+        if not self.has_expression_index(schema, function, column):
+            # the function needs to be defined on the connection to compute the index:
+            self.load_user_function(function)
+            index_stmt = self.get_expression_index_definition(schema, function, column)
+            self.create_graph_index(table_name, self.get_expression_index_name(schema, function, column), index_stmt,
+                                    'expression %s(%s)' % (function, column), explain=explain)
+
+    def create_graph_index(self, table_name, index_name, index_stmt, what, explain=False):
+        """Create and analyze the index 'index_name' for 'table_name' via 'index_stmt'
+        and add its size to the graph info.  'what' describes the index for logging.
+        """
+        loglevel = explain and 0 or 1
+        self.log(loglevel, 'CREATE INDEX on table %s %s ...' % (table_name, what))
+        # we also measure the increase in allocated disk space here:
+        oldsize = self.get_db_size()
+        if not explain:
+            self.execute(index_stmt)
+        # do this unconditionally for now, given that it only takes about 10% of creation time:
+        self.log(loglevel, 'ANALYZE INDEX on table %s %s ...' % (table_name, what))
+        if not explain:
+            self.execute('ANALYZE %s' % sql_quote_ident(index_name))
+        idxsize = self.get_db_size() - oldsize
+        ginfo = self.get_graph_info(table_name)
+        ginfo.size += idxsize
+        if not explain:
+            self.set_record_info(self.GRAPH_TABLE, ginfo)
 
     def number_of_graphs(self):
         """Return the number of graphs currently stored in 'self'.
@@ -596,13 +758,15 @@ class SqliteStore(SqlStore):
                     return False
                 if info.modtime != os.path.getmtime(file):
                     return False
-            # don't check md5sum for now:
+            # the md5sum is only checked by 'add_graph' to detect appended data:
             return True
         return False
 
     def add_graph(self, file, alias=None):
         """Import a graph from 'file' (and optionally named by 'alias') unless a matching
         graph has already been imported earlier according to 'has_graph' (which see).
+        If 'file' is a plain file that has only grown since it was imported, only the
+        appended rows get imported into the existing graph table (see 'append_graph').
         """
         if self.has_graph(file, alias=alias):
             if alias is not None:
@@ -611,6 +775,10 @@ class SqliteStore(SqlStore):
             return
         file_info = self.get_file_info(file, alias=alias)
         if file_info is not None:
+            if self.append_graph(file, file_info):
+                if alias is not None:
+                    self.set_file_alias(file, alias)
+                return
             # we already have an earlier version of the file in store, delete its graph data:
             self.drop_graph(file_info.graph)
         file = self.normalize_file_path(file)
@@ -618,21 +786,70 @@ class SqliteStore(SqlStore):
         oldsize = self.get_db_size()
         try:
             # try fast shell-based import first, but if that is not applicable...
-            self.import_graph_data_via_import(table, file)
+            md5sum = self.import_graph_data_via_import(table, file)
         except (KGTKException, sh.CommandNotFound):
             # ...fall back on CSV-based import which is more flexible but about 2x slower:
-            self.import_graph_data_via_csv(table, file)
+            md5sum = self.import_graph_data_via_csv(table, file)
         graphsize = self.get_db_size() - oldsize
         # this isn't really needed, but we store it for now - maybe use JSON-encoding instead:
         header = str(self.get_table_header(table))
         if self.is_standard_input(file):
             self.set_file_info(file, size=0, modtime=time.time(), graph=table)
         else:
-            self.set_file_info(file, size=os.path.getsize(file), modtime=os.path.getmtime(file), graph=table)
+            # record the checksum of plain files so we can detect later if data was only appended:
+            self.set_file_info(file, size=os.path.getsize(file), modtime=os.path.getmtime(file), md5sum=md5sum, graph=table)
         self.set_graph_info(table, header=header, size=graphsize, acctime=time.time())
         if alias is not None:
             self.set_file_alias(file, alias)
 
+    def add_graph_rows(self, name, header, rows):
+        """Import 'rows' of values for the columns in 'header' as a new graph named by 'name',
+        replacing any graph previously stored under that name.  Since 'name' does not need to
+        be an existing file, the graph can then be queried by using 'name' as an input file,
+        which allows query results to be chained without writing and reimporting a file.
+        """
+        file_info = self.get_file_info(name, exact=True)
+        if file_info is not None:
+            self.drop_graph(file_info.graph)
+        table = self.new_graph_table()
+        oldsize = self.get_db_size()
+        self.import_graph_data_via_rows(table, header, rows)
+        graphsize = self.get_db_size() - oldsize
+        self.set_file_info(name, size=0, modtime=time.time(), graph=table)
+        self.set_graph_info(table, header=str(list(header)), size=graphsize, acctime=time.time())
+
+    def append_graph(self, file, file_info):
+        """If 'file' has only had data appended to it since it was imported according
+        to 'file_info', import just the appended rows into the existing graph table and
+        return True.  SQLite keeps all existing indexes on the table up-to-date as rows
+        are inserted.  Return False if the graph needs to be imported from scratch.
+        """
+        md5sum = self.get_appended_file_md5sum(file, file_info)
+        if md5sum is None:
+            return False
+        table = file_info.graph
+        ginfo = self.get_graph_info(table)
+        if ginfo is None or not self.has_table(table):
+            return False
+        oldsize = self.get_db_size()
+        try:
+            self.import_graph_tail_via_csv(table, file, file_info.size)
+        except sqlite3.Error as e:
+            # for example, rows with the wrong number of columns; import everything from scratch instead:
+            self.get_conn().rollback()
+            self.log(1, 'APPEND to table %s failed, reimporting: %s' % (table, e))
+            return False
+        ginfo.size += self.get_db_size() - oldsize
+        ginfo.acctime = time.time()
+        ginfo.version = self.new_graph_version()
+        self.set_record_info(self.GRAPH_TABLE, ginfo)
+        self.drop_cached_query_results(table)
+        file_info.size = os.path.getsize(file)
+        file_info.modtime = os.path.getmtime(file)
+        file_info.md5sum = md5sum
+        self.set_record_info(self.FILE_TABLE, file_info)
+        return True
+
     def drop_graph(self, table_name):
         """Delete the graph 'table_name' and all its associated info records.
         """
@@ -640,23 +857,107 @@ class SqliteStore(SqlStore):
         for file in self.get_graph_files(table_name):
             self.log(1, 'DROP graph data table %s from %s' % (table_name, file))
             self.drop_file_info(file)
-        # delete the graph info:
+        # delete the graph info and any query results computed from the graph:
         self.drop_graph_info(table_name)
+        self.drop_cached_query_results(table_name)
         # now delete the graph table and all associated indexes:
         if self.has_table(table_name):
             self.execute('DROP TABLE %s' % table_name)
 
 
+    ### Query result cache:
+
+    # Results of queries over graphs that rarely change can be cached in the store.  A cached result
+    # is identified by a hash of the translated SQL query, its parameters and the header and import
+    # version of each graph it uses.  Results are dropped whenever one of their graphs gets replaced,
+    # appended to or deleted, and least recently used results get evicted to stay within a size budget.
+
+    def get_query_result_key(self, sql_query, parameters, graphs):
+        """Return the query cache key for running 'sql_query' with 'parameters' on 'graphs'.
+        """
+        versions = []
+        for graph in sorted(graphs):
+            ginfo = self.get_graph_info(graph)
+            versions.append((graph, ginfo and ginfo.header, ginfo and ginfo.version))
+        return hashlib.sha256(repr((sql_query, list(parameters), versions)).encode('utf8')).hexdigest()
+
+    def get_cached_query_result(self, key):
+        """Return the cached (header, rows) query result for 'key' or None if there is none.
+        """
+        schema = self.QUERY_CACHE_TABLE
+        info = self.get_record_info(schema, key)
+        if info is None:
+            return None
+        self.log(1, 'USING cached query result %s' % key)
+        # only update the access time, so we don't rewrite the result:
+        self.execute('UPDATE %s SET %s=? WHERE %s=?' % (schema._name_, schema.columns.acctime._name_, schema.columns.key._name_),
+                     (time.time(), key))
+        self.commit()
+        return eval(info.header), pickle.loads(zlib.decompress(info.result))
+
+    def set_cached_query_result(self, key, graphs, header, rows, budget=RESULT_CACHE_SIZE):
+        """Cache the query result 'header' and 'rows' for 'key' computed from 'graphs', and evict
+        least recently used results to keep the total size of all cached results within 'budget'.
+        Results that are larger than 'budget' by themselves do not get cached.
+        """
+        result = zlib.compress(pickle.dumps(list(rows), protocol=pickle.HIGHEST_PROTOCOL))
+        if len(result) > budget:
+            return
+        schema = self.QUERY_CACHE_TABLE
+        table = schema._name_
+        cols = schema.columns
+        self.log(1, 'CACHE query result %s of %d bytes' % (key, len(result)))
+        self.drop_record_info(schema, key)
+        info = sdict()
+        info.key = key
+        info.graphs = ' %s ' % ' '.join(graphs)
+        info.header = str(list(header))
+        info.result = result
+        info.size = len(result)
+        info.acctime = time.time()
+        self.set_record_info(schema, info)
+        query = 'SELECT %s, %s FROM %s ORDER BY %s DESC' % (cols.key._name_, cols.size._name_, table, cols.acctime._name_)
+        total = 0
+        evicted = []
+        for rkey, size in self.execute(query).fetchall():
+            total += size
+            if total > budget:
+                evicted.append((rkey,))
+        if len(evicted) > 0:
+            self.log(1, 'EVICT %d cached query results' % len(evicted))
+            self.executemany('DELETE FROM %s WHERE %s=?' % (table, cols.key._name_), evicted)
+        self.commit()
+
+    def drop_cached_query_results(self, table_name=None):
+        """Delete all cached query results that used graph 'table_name', or all results if it is None.
+        """
+        schema = self.QUERY_CACHE_TABLE
+        if table_name is None:
+            self.execute('DELETE FROM %s' % schema._name_)
+        else:
+            self.execute('DELETE FROM %s WHERE instr(%s, ?) > 0' % (schema._name_, schema.columns.graphs._name_),
+                         (' %s ' % table_name,))
+        self.commit()
+
+
     ### Data import:
     
     def import_graph_data_via_csv(self, table, file):
         """Import 'file' into 'table' using Python's csv.reader.  This is safe and properly
         handles conversion of different kinds of line endings, but 2x slower than direct import.
+        Return the MD5 hex digest of 'file' computed while reading it if it is a plain file,
+        otherwise None.
         """
         self.log(1, 'IMPORT graph via csv.reader into table %s from %s ...' % (table, file))
+        md5 = None
         if self.is_standard_input(file):
-            file = sys.stdin
-        with open_to_read(file) as inp:
+            inp = open_to_read(sys.stdin)
+        elif self.is_plain_file(file):
+            md5 = hashlib.md5()
+            inp = io.TextIOWrapper(io.BufferedReader(DigestingReader(open(file, 'rb'), md5)), encoding='utf8')
+        else:
+            inp = open_to_read(file)
+        with inp:
             csvreader = csv.reader(inp, dialect=None, delimiter='\t', quoting=csv.QUOTE_NONE)
             header = next(csvreader)
             schema = self.kgtk_header_to_graph_table_schema(table, header)
@@ -664,11 +965,41 @@ class SqliteStore(SqlStore):
             insert = 'INSERT INTO %s VALUES (%s)' % (table, ','.join(['?'] * len(header)))
             self.executemany(insert, csvreader)
             self.commit()
+        return md5 and md5.hexdigest()
+
+    def import_graph_data_via_rows(self, table, header, rows):
+        """Import 'rows' of values for the columns in 'header' into the new 'table'.
+        """
+        self.log(1, 'IMPORT graph rows into table %s ...' % table)
+        schema = self.kgtk_header_to_graph_table_schema(table, header)
+        self.execute(self.get_table_definition(schema))
+        insert = 'INSERT INTO %s VALUES (%s)' % (table, ','.join(['?'] * len(header)))
+        self.executemany(insert, rows)
+        self.commit()
+
+    def import_graph_tail_via_csv(self, table, file, offset):
+        """Import the rows of the plain 'file' starting at byte 'offset' into the existing
+        graph 'table'.  The data starting at 'offset' has no header row.
+        """
+        self.log(1, 'APPEND graph via csv.reader to table %s from %s at offset %d ...' % (table, file, offset))
+        # user functions used by expression indexes need to be defined to update those indexes:
+        for name in self.USER_FUNCTIONS:
+            if self.is_indexable_user_function(name):
+                self.load_user_function(name)
+        ncolumns = len(self.get_table_header(table))
+        with open(file, 'rb') as binp:
+            binp.seek(offset)
+            with io.TextIOWrapper(binp, encoding='utf8') as inp:
+                csvreader = csv.reader(inp, dialect=None, delimiter='\t', quoting=csv.QUOTE_NONE)
+                insert = 'INSERT INTO %s VALUES (%s)' % (table, ','.join(['?'] * ncolumns))
+                self.executemany(insert, csvreader)
+        self.commit()
 
     def import_graph_data_via_import(self, table, file):
         """Use the sqlite shell and its import command to import 'file' into 'table'.
         This will be about 2+ times faster and can exploit parallelism for decompression.
-        This is only supported for Un*x for now and requires a named 'file'.
+        This is only supported for Un*x for now and requires a named 'file'.  Return the MD5
+        hex digest of 'file' computed while importing it if it is a plain file, otherwise None.
         """
         if os.name != 'posix':
             raise KGTKException("not yet implemented for this OS: '%s'" % os.name)
@@ -708,13 +1039,18 @@ class SqliteStore(SqlStore):
                 self.dbfile, '.import /dev/stdin %s' % table]
 
         self.log(1, 'IMPORT graph directly into table %s from %s ...' % (table, file))
+        md5 = None
+        sqlproc = None
         try:
-            if isplain:
-                tailproc = tail('-n', '+2', file, _piped=True)
-            else:
-                tailproc = tail(catcmd(), '-n', '+2', _piped=True)
             # we run this asynchronously, so we can kill it in the cleanup clause:
-            sqlproc = sqlite3(tailproc, *args, _bg=True)
+            if self.is_plain_file(file):
+                # feed the data from here, so the file gets checksummed in the same pass:
+                md5 = hashlib.md5()
+                sqlproc = sqlite3(*args, _in=self.read_data_blocks(file, eol, md5), _bg=True)
+            elif isplain:
+                sqlproc = sqlite3(tail('-n', '+2', file, _piped=True), *args, _bg=True)
+            else:
+                sqlproc = sqlite3(tail(catcmd(), '-n', '+2', _piped=True), *args, _bg=True)
             sqlproc.wait()
         finally:
             # make sure we kill this process in case we had a user interrupt, however,
@@ -723,6 +1059,28 @@ class SqliteStore(SqlStore):
             # waiting (we can't call is_alive or access sqlproc.exit_code):
             if sqlproc is not None and sqlproc.process.exit_code is None:
                 sqlproc.terminate()
+        return md5 and md5.hexdigest()
+
+    def read_data_blocks(self, file, eol, digest):
+        """Generate the data of the plain 'file' following its header line, which ends
+        in 'eol', in blocks.  All bytes of 'file' are fed into the hash object 'digest'.
+        """
+        eol = eol.encode('utf8')
+        in_header = True
+        with open(file, 'rb') as inp:
+            while True:
+                block = inp.read(self.FILE_BLOCK_SIZE)
+                if len(block) == 0:
+                    break
+                digest.update(block)
+                if in_header:
+                    end = block.find(eol)
+                    if end < 0:
+                        continue
+                    block = block[end + 1:]
+                    in_header = False
+                if len(block) > 0:
+                    yield block
 
                 
     def shell(self, *commands):
@@ -910,6 +1268,81 @@ def kgtk_regex(x, regex):
 SqliteStore.register_user_function('kgtk_regex', 2, kgtk_regex, deterministic=True)
 
 
+# Literal parsing:
+
+# A query often calls several accessors on the same literal (e.g., year and
+# month of a date), and SQLite calls them for every row.  Each kind of literal
+# therefore has a parser that remembers the match of the last literal it parsed.
+# The parsers are shared by all connections; the match objects give access to
+# all fields of a literal.
+#
+# A parser can also keep the matches of a bounded number of recent literals in
+# an LRU cache.  That pays off when values such as dates and units repeat a lot,
+# but a single accessor over values that rarely repeat gets about 25% slower
+# from the cache misses, so the cache is off unless it is given a size with
+# 'set_literal_parse_cache_size' (kgtk query --literal-cache-size).
+
+LITERAL_PARSE_CACHE_SIZE = 0
+
+class LiteralParser(object):
+    """Parse KGTK literals of one kind with a lax KgtkValue regex.
+    """
+    def __init__(self, regex, cache_size=LITERAL_PARSE_CACHE_SIZE):
+        self.regex = regex
+        self.set_cache_size(cache_size)
+        # The last literal and its match are kept as one tuple which is read and
+        # assigned atomically, since the parsers are shared across threads:
+        self.last_parse = (None, None)
+
+    def set_cache_size(self, cache_size):
+        """Keep the matches of up to 'cache_size' recently parsed literals in an LRU cache,
+        or of none if 'cache_size' is 0.
+        """
+        if cache_size < 0:
+            raise KGTKException('illegal literal parse cache size: %d' % cache_size)
+        self.cache_size = cache_size
+        self.cached_match = cache_size > 0 and lru_cache(maxsize=cache_size)(self.regex.match) or self.regex.match
+
+    def parse(self, x):
+        """Return the match object for the literal string 'x', or None if it does not parse.
+        """
+        last_literal, last_match = self.last_parse
+        if x != last_literal:
+            last_match = self.cached_match(x)
+            self.last_parse = (x, last_match)
+        return last_match
+
+    def clear(self):
+        if self.cache_size > 0:
+            self.cached_match.cache_clear()
+        self.last_parse = (None, None)
+
+LQSTRING_PARSER = LiteralParser(KgtkValue.lax_language_qualified_string_re)
+DATE_PARSER = LiteralParser(KgtkValue.lax_date_and_times_re)
+QUANTITY_PARSER = LiteralParser(KgtkValue.lax_number_or_quantity_re)
+GEO_COORDS_PARSER = LiteralParser(KgtkValue.lax_location_coordinates_re)
+LITERAL_PARSERS = (LQSTRING_PARSER, DATE_PARSER, QUANTITY_PARSER, GEO_COORDS_PARSER)
+
+parse_lqstring = LQSTRING_PARSER.parse
+parse_date = DATE_PARSER.parse
+parse_quantity = QUANTITY_PARSER.parse
+parse_geo_coords = GEO_COORDS_PARSER.parse
+
+def clear_literal_parse_caches():
+    """Clear the literal parse caches, e.g., to measure uncached performance.
+    """
+    for parser in LITERAL_PARSERS:
+        parser.clear()
+
+def set_literal_parse_cache_size(cache_size):
+    """Set the size of the LRU cache of each shared literal parser, 0 turns the caches off.
+    """
+    global LITERAL_PARSE_CACHE_SIZE
+    for parser in LITERAL_PARSERS:
+        parser.set_cache_size(cache_size)
+    LITERAL_PARSE_CACHE_SIZE = cache_size
+
+
 # Language-qualified strings:
 
 def kgtk_lqstring(x):
@@ -922,7 +1355,7 @@ def kgtk_lqstring_text(x):
     """Return the text component of a KGTK language-qualified string literal.
     """
     if isinstance(x, str):
-        m = KgtkValue.lax_language_qualified_string_re.match(x)
+        m = parse_lqstring(x)
         if m:
             return m.group('text')
         
@@ -938,7 +1371,7 @@ def kgtk_lqstring_lang(x):
     This is the first part not including suffixes such as 'en' in 'en-us'.
     """
     if isinstance(x, str):
-        m = KgtkValue.lax_language_qualified_string_re.match(x)
+        m = parse_lqstring(x)
         if m:
             # not a string for easier manipulation - assumes valid lang syntax:
             return m.group('lang')
@@ -947,7 +1380,7 @@ def kgtk_lqstring_lang_suffix(x):
     """Return the language+suffix components of a KGTK language-qualified string literal.
     """
     if isinstance(x, str):
-        m = KgtkValue.lax_language_qualified_string_re.match(x)
+        m = parse_lqstring(x)
         if m:
             # not a string for easier manipulation - assumes valid lang syntax:
             return m.group('lang_suffix')
@@ -957,7 +1390,7 @@ def kgtk_lqstring_suffix(x):
     This is the second part if it exists such as 'us' in 'en-us', empty otherwise.
     """
     if isinstance(x, str):
-        m = KgtkValue.lax_language_qualified_string_re.match(x)
+        m = parse_lqstring(x)
         if m:
             # not a string for easier manipulation - assumes valid lang syntax:
             return m.group('suffix')
@@ -982,7 +1415,7 @@ def kgtk_date_date(x):
     """Return the date component of a KGTK date literal as a KGTK date.
     """
     if isinstance(x, str):
-        m = KgtkValue.lax_date_and_times_re.match(x)
+        m = parse_date(x)
         if m:
             return '^' + m.group('date')
         
@@ -990,7 +1423,7 @@ def kgtk_date_time(x):
     """Return the time component of a KGTK date literal as a KGTK date.
     """
     if isinstance(x, str):
-        m = KgtkValue.lax_date_and_times_re.match(x)
+        m = parse_date(x)
         if m:
             return '^' + m.group('time')
         
@@ -998,7 +1431,7 @@ def kgtk_date_and_time(x):
     """Return the date+time components of a KGTK date literal as a KGTK date.
     """
     if isinstance(x, str):
-        m = KgtkValue.lax_date_and_times_re.match(x)
+        m = parse_date(x)
         if m:
             return '^' + m.group('date_and_time')
         
@@ -1006,7 +1439,7 @@ def kgtk_date_year(x):
     """Return the year component of a KGTK date literal as an int.
     """
     if isinstance(x, str):
-        m = KgtkValue.lax_date_and_times_re.match(x)
+        m = parse_date(x)
         if m:
             return int(m.group('year'))
         
@@ -1014,7 +1447,7 @@ def kgtk_date_month(x):
     """Return the month component of a KGTK date literal as an int.
     """
     if isinstance(x, str):
-        m = KgtkValue.lax_date_and_times_re.match(x)
+        m = parse_date(x)
         if m:
             return int(m.group('month'))
         
@@ -1022,7 +1455,7 @@ def kgtk_date_day(x):
     """Return the day component of a KGTK date literal as an int.
     """
     if isinstance(x, str):
-        m = KgtkValue.lax_date_and_times_re.match(x)
+        m = parse_date(x)
         if m:
             return int(m.group('day'))
         
@@ -1030,7 +1463,7 @@ def kgtk_date_hour(x):
     """Return the hour component of a KGTK date literal as an int.
     """
     if isinstance(x, str):
-        m = KgtkValue.lax_date_and_times_re.match(x)
+        m = parse_date(x)
         if m:
             return int(m.group('hour'))
         
@@ -1038,7 +1471,7 @@ def kgtk_date_minutes(x):
     """Return the minutes component of a KGTK date literal as an int.
     """
     if isinstance(x, str):
-        m = KgtkValue.lax_date_and_times_re.match(x)
+        m = parse_date(x)
         if m:
             return int(m.group('minutes'))
         
@@ -1046,7 +1479,7 @@ def kgtk_date_seconds(x):
     """Return the seconds component of a KGTK date literal as an int.
     """
     if isinstance(x, str):
-        m = KgtkValue.lax_date_and_times_re.match(x)
+        m = parse_date(x)
         if m:
             return int(m.group('seconds'))
         
@@ -1054,7 +1487,7 @@ def kgtk_date_zone(x):
     """Return the timezone component of a KGTK date literal.
     """
     if isinstance(x, str):
-        m = KgtkValue.lax_date_and_times_re.match(x)
+        m = parse_date(x)
         if m:
             return m.group('zone')
         
@@ -1069,7 +1502,7 @@ def kgtk_date_precision(x):
     """Return the precision component of a KGTK date literal as an int.
     """
     if isinstance(x, str):
-        m = KgtkValue.lax_date_and_times_re.match(x)
+        m = parse_date(x)
         if m:
             return int(m.group('precision'))
 
@@ -1094,7 +1527,7 @@ def kgtk_number(x):
     """Return True if 'x' is a dimensionless KGTK number literal.
     """
     if isinstance(x, str):
-        m = KgtkValue.lax_number_or_quantity_re.match(x)
+        m = parse_quantity(x)
         if m:
             return x == m.group('number')
     return False
@@ -1103,7 +1536,7 @@ def kgtk_quantity(x):
     """Return True if 'x' is a dimensioned KGTK quantity literal.
     """
     if isinstance(x, str):
-        m = KgtkValue.lax_number_or_quantity_re.match(x)
+        m = parse_quantity(x)
         if m:
             return x != m.group('number')
     return False
@@ -1113,7 +1546,7 @@ def kgtk_quantity_numeral(x):
     """Return the numeral component of a KGTK quantity literal.
     """
     if isinstance(x, str):
-        m = KgtkValue.lax_number_or_quantity_re.match(x)
+        m = parse_quantity(x)
         if m:
             return m.group('number')
         
@@ -1129,7 +1562,7 @@ def kgtk_quantity_number(x):
     """Return the number value of a KGTK quantity literal as an int or float.
     """
     if isinstance(x, str):
-        m = KgtkValue.lax_number_or_quantity_re.match(x)
+        m = parse_quantity(x)
         if m:
             numeral = m.group('number')
             if float_numeral_regex.match(numeral):
@@ -1141,7 +1574,7 @@ def kgtk_quantity_number_int(x):
     """Return the number value of a KGTK quantity literal as an int.
     """
     if isinstance(x, str):
-        m = KgtkValue.lax_number_or_quantity_re.match(x)
+        m = parse_quantity(x)
         if m:
             numeral = m.group('number')
             if float_numeral_regex.match(numeral):
@@ -1153,7 +1586,7 @@ def kgtk_quantity_number_float(x):
     """Return the number value component of a KGTK quantity literal as a float.
     """
     if isinstance(x, str):
-        m = KgtkValue.lax_number_or_quantity_re.match(x)
+        m = parse_quantity(x)
         if m:
             numeral = m.group('number')
             if float_numeral_regex.match(numeral):
@@ -1166,7 +1599,7 @@ def kgtk_quantity_si_units(x):
     """Return the SI-units component of a KGTK quantity literal.
     """
     if isinstance(x, str):
-        m = KgtkValue.lax_number_or_quantity_re.match(x)
+        m = parse_quantity(x)
         if m:
             return m.group('si_units')
         
@@ -1174,7 +1607,7 @@ def kgtk_quantity_wd_units(x):
     """Return the Wikidata unit node component of a KGTK quantity literal.
     """
     if isinstance(x, str):
-        m = KgtkValue.lax_number_or_quantity_re.match(x)
+        m = parse_quantity(x)
         if m:
             return m.group('units_node')
 
@@ -1182,7 +1615,7 @@ def kgtk_quantity_tolerance(x):
     """Return the full tolerance component of a KGTK quantity literal.
     """
     if isinstance(x, str):
-        m = KgtkValue.lax_number_or_quantity_re.match(x)
+        m = parse_quantity(x)
         if m:
             lowtol = m.group('low_tolerance')
             hightol = m.group('high_tolerance')
@@ -1199,7 +1632,7 @@ def kgtk_quantity_low_tolerance(x):
     """Return the low tolerance component of a KGTK quantity literal as a float.
     """
     if isinstance(x, str):
-        m = KgtkValue.lax_number_or_quantity_re.match(x)
+        m = parse_quantity(x)
         if m:
             lowtol = m.group('low_tolerance')
             if lowtol:
@@ -1209,7 +1642,7 @@ def kgtk_quantity_high_tolerance(x):
     """Return the high tolerance component of a KGTK quantity literal as a float.
     """
     if isinstance(x, str):
-        m = KgtkValue.lax_number_or_quantity_re.match(x)
+        m = parse_quantity(x)
         if m:
             hightol = m.group('high_tolerance')
             if hightol:
@@ -1246,7 +1679,7 @@ def kgtk_geo_coords_lat(x):
     """Return the latitude component of a KGTK geo coordinates literal as a float.
     """
     if isinstance(x, str):
-        m = KgtkValue.lax_location_coordinates_re.match(x)
+        m = parse_geo_coords(x)
         if m:
             return float(m.group('lat'))
         
@@ -1254,7 +1687,7 @@ def kgtk_geo_coords_long(x):
     """Return the longitude component of a KGTK geo coordinates literal as a float.
     """
     if isinstance(x, str):
-        m = KgtkValue.lax_location_coordinates_re.match(x)
+        m = parse_geo_coords(x)
         if m:
             return float(m.group('lon'))
 
@@ -0,0 +1,85 @@
+"""
+Benchmark the Kypher literal accessor user functions.
+
+Each accessor is timed alone in a SQLite query over a table of synthetic
+literals, and then all accessors of one kind of literal are timed together in
+one query.  The literal parse caches are cleared before each query.  Use
+--cache-size to compare runs with and without the LRU caches of the parsers.
+
+Usage:  python -m kgtk.kypher.udfbenchmark [--rows N] [--distinct N] [--repeat N] [--cache-size N]
+"""
+
+from argparse import ArgumentParser
+import random
+import sqlite3
+import sys
+import time
+
+from kgtk.kypher import sqlstore
+from kgtk.kypher.sqlstore import SqliteStore
+
+
+# The accessors to benchmark, by literal kind:
+ACCESSORS = {
+    'lqstring': ['kgtk_lqstring_text', 'kgtk_lqstring_lang', 'kgtk_lqstring_suffix'],
+    'date': ['kgtk_date_year', 'kgtk_date_month', 'kgtk_date_day', 'kgtk_date_precision'],
+    'quantity': ['kgtk_quantity_number', 'kgtk_quantity_si_units', 'kgtk_quantity_low_tolerance'],
+    'geo_coords': ['kgtk_geo_coords_lat', 'kgtk_geo_coords_long'],
+}
+
+def make_literal(kind, rng):
+    if kind == 'lqstring':
+        return "'word %d'@%s" % (rng.randint(0, 1000000), rng.choice(['en', 'de', 'en-us', 'fr']))
+    elif kind == 'date':
+        return '^%04d-%02d-%02dT00:00:00Z/11' % (rng.randint(1000, 2020), rng.randint(1, 12), rng.randint(1, 28))
+    elif kind == 'quantity':
+        return '%d.%d[-0.1,+0.1]%s' % (rng.randint(0, 100000), rng.randint(0, 9), rng.choice(['m', 'kg', 'Q11573']))
+    else:
+        return '@%.4f/%.4f' % (rng.uniform(-90, 90), rng.uniform(-180, 180))
+
+def make_table(conn, kind, rows, distinct, seed=0):
+    rng = random.Random(seed)
+    literals = [make_literal(kind, rng) for i in range(distinct)]
+    conn.execute('DROP TABLE IF EXISTS literals')
+    conn.execute('CREATE TABLE literals (value TEXT)')
+    conn.executemany('INSERT INTO literals VALUES (?)', ((literals[i % distinct],) for i in range(rows)))
+    conn.commit()
+
+def time_query(conn, query, repeat):
+    best = None
+    for i in range(repeat):
+        sqlstore.clear_literal_parse_caches()
+        start = time.perf_counter()
+        conn.execute(query).fetchall()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = ArgumentParser(description='Benchmark the Kypher literal accessor user functions.')
+    parser.add_argument('--rows', type=int, default=200000, help='The number of table rows. (default=%(default)s)')
+    parser.add_argument('--distinct', type=int, default=20000, help='The number of distinct literals. (default=%(default)s)')
+    parser.add_argument('--repeat', type=int, default=3, help='Report the best of this many runs. (default=%(default)s)')
+    parser.add_argument('--cache-size', type=int, default=0, help='The size of the literal parse LRU caches. (default=%(default)s)')
+    args = parser.parse_args()
+    sqlstore.set_literal_parse_cache_size(args.cache_size)
+
+    conn = sqlite3.connect(':memory:')
+    for name, info in SqliteStore.USER_FUNCTIONS.items():
+        if info['deterministic'] and SqliteStore.DETERMINISTIC_FUNCTIONS:
+            conn.create_function(name, info['num_params'], info['func'], deterministic=True)
+        else:
+            conn.create_function(name, info['num_params'], info['func'])
+
+    print('%-30s %10s %12s' % ('accessor', 'seconds', 'rows/second'), file=sys.stdout)
+    for kind, accessors in ACCESSORS.items():
+        make_table(conn, kind, args.rows, args.distinct)
+        for accessor in accessors:
+            elapsed = time_query(conn, 'SELECT %s(value) FROM literals' % accessor, args.repeat)
+            print('%-30s %10.3f %12.0f' % (accessor, elapsed, args.rows / elapsed), file=sys.stdout)
+        combined = ', '.join('%s(value)' % accessor for accessor in accessors)
+        elapsed = time_query(conn, 'SELECT %s FROM literals' % combined, args.repeat)
+        print('%-30s %10.3f %12.0f' % ('all %s accessors' % kind, elapsed, args.rows / elapsed), file=sys.stdout)
+
+if __name__ == '__main__':
+    main()
@@ -227,6 +227,10 @@ class KgtkLift(KgtkFormat):
             print("label_value_column_idx=%d (%s)." % (label_value_column_idx, kr.column_names[label_value_column_idx]), file=self.error_file, flush=True)
             print("label_select_column_value='%s'." % self.label_select_column_value, file=self.error_file, flush=True)
 
+        if not save_input:
+            # Only the label table columns are needed.
+            kr.project([idx for idx in (label_match_column_idx, label_select_column_idx, label_value_column_idx) if idx >= 0])
+
         key: str
         row: typing.List[str]
         for row in kr:
@@ -614,6 +618,9 @@ class KgtkLift(KgtkFormat):
         label_value_column_idx: int
         label_match_column_idx, label_select_column_idx, label_value_column_idx = self.lookup_label_table_idxs(lkr)
 
+        # Only the label table columns are read from the label file.
+        lkr.project([idx for idx in (label_match_column_idx, label_select_column_idx, label_value_column_idx) if idx >= 0])
+
         input_select_column_idx: int = -1
         if self.input_select_column_value is not None or self.output_select_column_value is not None:
             input_select_column_idx = self.lookup_input_select_column_idx(ikr)
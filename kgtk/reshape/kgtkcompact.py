@@ -6,19 +6,31 @@ be grouped (not necessarily sorted).  kgtkcompact will sort its input
 in-memory by default, but that can be disabled for large input files using an
 external presorter.
 
+When the number of input rows held in memory exceeds max_rows_in_memory,
+kgtkcompact spills the rows to temporary files, hash-partitioned by key.
+Each partition is then sorted and compacted on its own (optionally in
+parallel worker processes), and the compacted partitions are merged by key,
+producing the same output as the in-memory sort.  Partitions that would hold
+more than max_rows_in_memory rows across the worker processes are split
+again first.
+
 """
 
 from argparse import ArgumentParser, Namespace
 import attr
+import heapq
 from pathlib import Path
 import sys
+import tempfile
 import typing
+import zlib
 
 from kgtk.kgtkformat import KgtkFormat
 from kgtk.io.kgtkreader import KgtkReader, KgtkReaderOptions
 from kgtk.io.kgtkwriter import KgtkWriter
 from kgtk.reshape.kgtkidbuilder import KgtkIdBuilder, KgtkIdBuilderOptions
 from kgtk.utils.argparsehelpers import optional_bool
+from kgtk.utils.runmerge import reduce_runs
 from kgtk.value.kgtkvalue import KgtkValue
 from kgtk.value.kgtkvalueoptions import KgtkValueOptions
 
@@ -47,6 +59,13 @@ class KgtkCompact(KgtkFormat):
     reader_options: typing.Optional[KgtkReaderOptions]= attr.ib(default=None)
     value_options: typing.Optional[KgtkValueOptions] = attr.ib(default=None)
 
+    # Spill to hash partitions on disk when more than this many input rows
+    # would be held in memory.  None means never spill.
+    max_rows_in_memory: typing.Optional[int] = attr.ib(validator=attr.validators.optional(attr.validators.instance_of(int)), default=None)
+    spill_partitions: int = attr.ib(validator=attr.validators.instance_of(int), default=64)
+    procs: int = attr.ib(validator=attr.validators.instance_of(int), default=1)
+    temp_directory: typing.Optional[Path] = attr.ib(validator=attr.validators.optional(attr.validators.instance_of(Path)), default=None)
+
     error_file: typing.TextIO = attr.ib(default=sys.stderr)
     verbose: bool = attr.ib(validator=attr.validators.instance_of(bool), default=False)
     very_verbose: bool = attr.ib(validator=attr.validators.instance_of(bool), default=False)
@@ -341,10 +360,18 @@ class KgtkCompact(KgtkFormat):
                 print("Sorting the input data from %s" % self.input_file_path, file=self.error_file, flush=True)
             # Map key values to lists of input and output data.
             input_map: typing.MutableMapping[str, typing.List[typing.List[str]]] = { }
+            # The input line numbers of the rows in input_map, kept only when they might be spilled.
+            input_line_numbers: typing.MutableMapping[str, typing.List[int]] = { }
+            rows_in_memory: int = 0
+            spill: typing.Optional[KgtkCompactSpill] = None
 
             for row in kr:
                 input_line_count += 1
                 input_key = self.build_key(row, key_idx_list)
+                if spill is not None:
+                    spill.add(input_key, input_line_count, row)
+                    continue
+
                 if input_key in input_map:
                     # Append the row to an existing list for that key.
                     input_map[input_key].append(row)
@@ -352,22 +379,272 @@ class KgtkCompact(KgtkFormat):
                     # Create a new list of rows for this key.
                     input_map[input_key] = [ row ]
 
-            if self.verbose:
-                print("Processing the sorted input data", file=self.error_file, flush=True)
-            
-            for input_key in sorted(input_map.keys()):
-                for row in input_map[input_key]:
-                    self.process_row(input_key, row, input_line_count, idb, ew)
+                if self.max_rows_in_memory is not None:
+                    if input_key in input_line_numbers:
+                        input_line_numbers[input_key].append(input_line_count)
+                    else:
+                        input_line_numbers[input_key] = [ input_line_count ]
+
+                rows_in_memory += 1
+                if self.max_rows_in_memory is not None and rows_in_memory > self.max_rows_in_memory:
+                    if self.verbose:
+                        print("Spilling the input data to %d partitions after %d rows" % (self.spill_partitions, rows_in_memory),
+                              file=self.error_file, flush=True)
+                    # Each worker process compacts a partition at a time, so
+                    # together they hold at most max_rows_in_memory rows.
+                    spill = KgtkCompactSpill(partition_count=self.spill_partitions,
+                                             max_rows_per_partition=max(1, self.max_rows_in_memory // max(1, self.procs)),
+                                             temp_directory=self.temp_directory)
+                    for input_key, rows in input_map.items():
+                        line_number: int
+                        for line_number, row in zip(input_line_numbers[input_key], rows):
+                            spill.add(input_key, line_number, row)
+                    input_map.clear()
+                    input_line_numbers.clear()
+
+            if spill is None:
+                if self.verbose:
+                    print("Processing the sorted input data", file=self.error_file, flush=True)
+
+                for input_key in sorted(input_map.keys()):
+                    for row in input_map[input_key]:
+                        self.process_row(input_key, row, input_line_count, idb, ew)
+            else:
+                if self.verbose:
+                    print("Processing the partitioned input data", file=self.error_file, flush=True)
+                try:
+                    compacted_line_number: int
+                    compacted_row: typing.List[str]
+                    for compacted_line_number, compacted_row in spill.compacted_rows(key_idx_list, self.field_separator,
+                                                                                     self.lists_in_input, self.procs):
+                        if idb is None:
+                            ew.write(compacted_row)
+                        else:
+                            ew.write(idb.build(compacted_row, compacted_line_number))
+                        self.output_line_count += 1
+                finally:
+                    spill.cleanup()
 
         # Flush the final row, if any.  We pass the last row read for
         # feedback, such as an ID uniqueness violation.
         self.process_row("", row, input_line_count, idb, ew, flush=True)
+
+        if idb is not None:
+            # Report deferred ID uniqueness violations, if any.
+            idb.finish(self.error_file)
         
         if self.verbose:
             print("Read %d records, wrote %d records." % (input_line_count, self.output_line_count), file=self.error_file, flush=True)
         
         ew.close()
 
+class _SpillPartitions:
+    """
+    A set of temporary files that rows are hash-partitioned into by key.
+    Partition idx gets the keys whose hash h has (h // divisor) % count == idx,
+    so that the rows of a partition can be split again with a larger divisor.
+    Each row is written after its input line number.
+    """
+    def __init__(self, directory: Path, name: str, partition_count: int, divisor: int = 1):
+        self.divisor: int = divisor
+        self.paths: typing.List[Path] = [ directory / ("%s_%d.tsv" % (name, idx)) for idx in range(partition_count) ]
+        self.files: typing.List[typing.TextIO] = [ open(path, "w", encoding="utf-8", newline="\n") for path in self.paths ]
+        self.row_counts: typing.List[int] = [ 0 ] * partition_count
+        self.first_keys: typing.List[typing.Optional[str]] = [ None ] * partition_count
+        self.single_key: typing.List[bool] = [ True ] * partition_count
+
+    def add(self, key: str, line_number: int, row: typing.List[str]):
+        idx: int = (zlib.crc32(key.encode("utf-8")) // self.divisor) % len(self.files)
+        self.files[idx].write(str(line_number) + "\t" + "\t".join(row) + "\n")
+        self.row_counts[idx] += 1
+        if self.first_keys[idx] is None:
+            self.first_keys[idx] = key
+        elif self.single_key[idx] and self.first_keys[idx] != key:
+            self.single_key[idx] = False
+
+    def can_split(self)->bool:
+        # Beyond 32 bits, the rows of a partition all have the same hash value.
+        return self.divisor * len(self.paths) < 2 ** 32
+
+    def close(self):
+        f: typing.TextIO
+        for f in self.files:
+            f.close()
+
+class KgtkCompactSpill:
+    """
+    Hash-partition input rows by key into temporary files, then compact each
+    partition on its own and merge the compacted partitions in key order.
+    Rows with the same key always land in the same partition, in input order.
+
+    A partition with more than max_rows_per_partition rows is split again
+    until its parts fit, so compacting a partition holds at most that many
+    rows in memory.  A partition whose rows all have the same key is compacted
+    as it is read, without holding its rows.
+    """
+    def __init__(self,
+                 partition_count: int,
+                 max_rows_per_partition: typing.Optional[int] = None,
+                 temp_directory: typing.Optional[Path] = None):
+        if partition_count < 1:
+            raise ValueError("The number of spill partitions must be at least 1.")
+        if max_rows_per_partition is not None and max_rows_per_partition < 1:
+            raise ValueError("The number of rows per spill partition must be at least 1.")
+        self.max_rows_per_partition: typing.Optional[int] = max_rows_per_partition
+        self.tempdir = tempfile.TemporaryDirectory(prefix="kgtk-compact-",
+                                                   dir=str(temp_directory) if temp_directory is not None else None)
+        self.partitions: _SpillPartitions = _SpillPartitions(Path(self.tempdir.name), "part", partition_count)
+        self.open_partitions: typing.List[_SpillPartitions] = [ self.partitions ]
+
+    def add(self, key: str, line_number: int, row: typing.List[str]):
+        self.partitions.add(key, line_number, row)
+
+    def build_tasks(self,
+                    partitions: _SpillPartitions,
+                    key_idx_list: typing.List[int],
+                    field_separator: str,
+                    lists_in_input: bool,
+                    tasks: typing.List[typing.Tuple[Path, Path, typing.List[int], str, bool, bool]]):
+        """
+        Add a compaction task for each partition that fits in memory (or has a
+        single key), splitting the other partitions again.
+        """
+        partitions.close()
+        idx: int
+        path: Path
+        for idx, path in enumerate(partitions.paths):
+            row_count: int = partitions.row_counts[idx]
+            if row_count == 0:
+                continue
+            single_key: bool = partitions.single_key[idx]
+            if self.max_rows_per_partition is None or row_count <= self.max_rows_per_partition or \
+               single_key or not partitions.can_split():
+                tasks.append((path, path.with_suffix(".compacted"), key_idx_list, field_separator, lists_in_input, single_key))
+                continue
+
+            subpartitions: _SpillPartitions = _SpillPartitions(path.parent, path.stem,
+                                                               row_count // self.max_rows_per_partition + 1,
+                                                               divisor=partitions.divisor * len(partitions.paths))
+            self.open_partitions.append(subpartitions)
+            with open(path, "r", encoding="utf-8", newline="\n") as f:
+                line: str
+                for line in f:
+                    values: typing.List[str] = line[:-1].split("\t")
+                    subpartitions.add(field_separator.join([ values[1 + key_idx] for key_idx in key_idx_list ]),
+                                      int(values[0]), values[1:])
+            path.unlink()
+            self.build_tasks(subpartitions, key_idx_list, field_separator, lists_in_input, tasks)
+
+    def compacted_rows(self,
+                       key_idx_list: typing.List[int],
+                       field_separator: str,
+                       lists_in_input: bool,
+                       procs: int = 1,
+    )->typing.Iterator[typing.Tuple[int, typing.List[str]]]:
+        """
+        Compact the partitions (in procs worker processes when procs > 1) and
+        yield the compacted rows in key order, each with the input line number
+        of the last row compacted into it.
+        """
+        tasks: typing.List[typing.Tuple[Path, Path, typing.List[int], str, bool, bool]] = [ ]
+        self.build_tasks(self.partitions, key_idx_list, field_separator, lists_in_input, tasks)
+
+        if procs > 1 and len(tasks) > 1:
+            from multiprocessing import Pool
+            with Pool(min(procs, len(tasks))) as pool:
+                pool.map(_compact_partition, tasks)
+        else:
+            for task in tasks:
+                _compact_partition(task)
+
+        run_paths: typing.List[Path] = reduce_runs([ task[1] for task in tasks ],
+                                                   _read_compacted_partition,
+                                                   _write_compacted_partition,
+                                                   key=lambda compacted: compacted[0])
+        key: str
+        line_number: int
+        row: typing.List[str]
+        for key, line_number, row in heapq.merge(*[ _read_compacted_partition(path) for path in run_paths ],
+                                                 key=lambda compacted: compacted[0]):
+            yield line_number, row
+
+    def cleanup(self):
+        partitions: _SpillPartitions
+        for partitions in self.open_partitions:
+            partitions.close()
+        self.tempdir.cleanup()
+
+class _CompactedPartitionWriter:
+    """
+    Stands in for the KgtkWriter in KgtkCompact.process_row(...), writing each
+    compacted row after the key that it was compacted under and the input line
+    number of the last row compacted into it.
+    """
+    def __init__(self, kc: KgtkCompact, f: typing.TextIO):
+        self.kc = kc
+        self.f = f
+        self.line_number: int = 0
+
+    def write(self, row: typing.List[str]):
+        self.f.write(typing.cast(str, self.kc.current_key) + "\n" + str(self.line_number) + "\t" + "\t".join(row) + "\n")
+
+def _compact_partition(task: typing.Tuple[Path, Path, typing.List[int], str, bool, bool]):
+    input_path, output_path, key_idx_list, field_separator, lists_in_input, single_key = task
+
+    kc: KgtkCompact = KgtkCompact(input_file_path=None,
+                                  output_file_path=None,
+                                  key_column_names=[ ],
+                                  field_separator=field_separator,
+                                  lists_in_input=lists_in_input)
+    with open(output_path, "w", encoding="utf-8", newline="\n") as of:
+        writer: _CompactedPartitionWriter = _CompactedPartitionWriter(kc, of)
+        def compact(input_key: str, line_number: int, row: typing.List[str]):
+            # A row is written when the next key starts, so the line number
+            # is set after processing the row.
+            kc.process_row(input_key, row, line_number, None, writer) # type: ignore
+            writer.line_number = line_number
+
+        line: str
+        values: typing.List[str]
+        input_key: str
+        with open(input_path, "r", encoding="utf-8", newline="\n") as f:
+            if single_key:
+                # All rows have the same key, so they are already grouped.
+                for line in f:
+                    values = line[:-1].split("\t")
+                    compact(kc.build_key(values[1:], key_idx_list), int(values[0]), values[1:])
+            else:
+                input_map: typing.MutableMapping[str, typing.List[typing.Tuple[int, typing.List[str]]]] = { }
+                for line in f:
+                    values = line[:-1].split("\t")
+                    row: typing.List[str] = values[1:]
+                    input_key = kc.build_key(row, key_idx_list)
+                    if input_key in input_map:
+                        input_map[input_key].append((int(values[0]), row))
+                    else:
+                        input_map[input_key] = [ (int(values[0]), row) ]
+
+                line_number: int
+                for input_key in sorted(input_map.keys()):
+                    for line_number, row in input_map[input_key]:
+                        compact(input_key, line_number, row)
+        kc.process_row("", [ ], 0, None, writer, flush=True) # type: ignore
+
+def _write_compacted_partition(path: Path, compacted_rows: typing.Iterable[typing.Tuple[str, int, typing.List[str]]]):
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        key: str
+        line_number: int
+        row: typing.List[str]
+        for key, line_number, row in compacted_rows:
+            f.write(key + "\n" + str(line_number) + "\t" + "\t".join(row) + "\n")
+
+def _read_compacted_partition(path: Path)->typing.Iterator[typing.Tuple[str, int, typing.List[str]]]:
+    with open(path, "r", encoding="utf-8", newline="\n") as f:
+        key: str
+        for key in f:
+            values: typing.List[str] = f.readline()[:-1].split("\t")
+            yield key[:-1], int(values[0]), values[1:]
+
 def main():
     """
     Test the KGTK compact processor.
@@ -400,6 +677,23 @@ def main():
 
     parser.add_argument("-o", "--output-file", dest="output_file_path", help="The KGTK file to write (default=%(default)s).", type=Path, default="-")
     
+    parser.add_argument(      "--max-rows-in-memory", dest="max_rows_in_memory",
+                              help="When the input is not presorted, spill the input rows to temporary files, " +
+                              "hash-partitioned by key, once more than this many rows are held in memory. " +
+                              "(default=no limit).", type=int, default=None)
+
+    parser.add_argument(      "--spill-partitions", dest="spill_partitions",
+                              help="The number of hash partitions used when the input rows are spilled. (default=%(default)s).",
+                              type=int, default=64)
+
+    parser.add_argument(      "--procs", dest="procs",
+                              help="The number of worker processes that compact spilled partitions. (default=%(default)s).",
+                              type=int, default=1)
+
+    parser.add_argument(      "--temp-directory", dest="temp_directory",
+                              help="The directory for the spilled partitions. (default=the system temporary directory).",
+                              type=Path, default=None)
+
     parser.add_argument(      "--build-id", dest="build_id",
                               help="Build id values in an id column. (default=%(default)s).",
                               type=optional_bool, nargs='?', const=True, default=False)
@@ -428,6 +722,12 @@ def main():
         print("--verify-sort=%s" % str(args.verify_sort), file=error_file, flush=True)
         print("--lists-in-input=%s" % str(args.lists_in_input), file=error_file, flush=True)
         print("--build-id=%s" % str(args.build_id), file=error_file, flush=True)
+        if args.max_rows_in_memory is not None:
+            print("--max-rows-in-memory=%d" % args.max_rows_in_memory, file=error_file, flush=True)
+        print("--spill-partitions=%d" % args.spill_partitions, file=error_file, flush=True)
+        print("--procs=%d" % args.procs, file=error_file, flush=True)
+        if args.temp_directory is not None:
+            print("--temp-directory=%s" % str(args.temp_directory), file=error_file, flush=True)
         idbuilder_options.show(out=error_file)
         reader_options.show(out=error_file)
         value_options.show(out=error_file)
@@ -442,6 +742,10 @@ def main():
         output_file_path=args.output_file_path,
         build_id=args.build_id,
         idbuilder_options=idbuilder_options,
+        max_rows_in_memory=args.max_rows_in_memory,
+        spill_partitions=args.spill_partitions,
+        procs=args.procs,
+        temp_directory=args.temp_directory,
         reader_options=reader_options,
         value_options=value_options,
         error_file=error_file,
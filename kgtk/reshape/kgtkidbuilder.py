@@ -8,6 +8,7 @@ import typing
 from kgtk.kgtkformat import KgtkFormat
 from kgtk.io.kgtkreader import KgtkReader, KgtkReaderOptions
 from kgtk.io.kgtkwriter import KgtkWriter
+from kgtk.reshape.kgtkidverifier import KgtkIdVerifier, BloomIdVerifier, SortedRunIdVerifier
 from kgtk.utils.argparsehelpers import optional_bool
 from kgtk.value.kgtkvalueoptions import KgtkValueOptions
 from kgtk.value.kgtkvalue import KgtkValue
@@ -17,6 +18,17 @@ class KgtkIdBuilderOptions(KgtkFormat):
     DEFAULT_OVERWRITE: bool = False
     DEFAULT_VERIFY_ID_UNIQUE: bool = False
 
+    # TODO: use an enum
+    MEMORY_VERIFY_METHOD: str = "memory" # An in-memory set, stop at the first duplicate.
+    SORTED_RUNS_VERIFY_METHOD: str = "sorted-runs" # Sorted runs on disk, report every duplicate.
+    BLOOM_VERIFY_METHOD: str = "bloom" # A Bloom filter with exact confirmation, report every duplicate.
+    VERIFY_METHODS: typing.List[str] = [
+        MEMORY_VERIFY_METHOD,
+        SORTED_RUNS_VERIFY_METHOD,
+        BLOOM_VERIFY_METHOD,
+    ]
+    DEFAULT_VERIFY_METHOD: str = MEMORY_VERIFY_METHOD
+
     # TODO: use an enum
     CONCAT_NLN_STYLE: str = "node1-label-node2" # node1-label-node2
     CONCAT_NL_NUM_STYLE: str = "node1-label-num" # node1-label-#
@@ -52,6 +64,9 @@ class KgtkIdBuilderOptions(KgtkFormat):
     new_id_column_name: typing.Optional[str] = attr.ib(validator=attr.validators.optional(attr.validators.instance_of(str)), default=None)
     overwrite_id: bool = attr.ib(validator=attr.validators.instance_of(bool), default=DEFAULT_OVERWRITE)
     verify_id_unique: bool = attr.ib(validator=attr.validators.instance_of(bool), default=DEFAULT_VERIFY_ID_UNIQUE)
+    verify_id_unique_method: str = attr.ib(validator=attr.validators.in_(VERIFY_METHODS), default=DEFAULT_VERIFY_METHOD)
+    verify_id_unique_run_size: int = attr.ib(validator=attr.validators.instance_of(int), default=SortedRunIdVerifier.DEFAULT_RUN_SIZE)
+    verify_id_unique_capacity: int = attr.ib(validator=attr.validators.instance_of(int), default=BloomIdVerifier.DEFAULT_CAPACITY)
     id_style: str = attr.ib(validator=attr.validators.instance_of(str), default=DEFAULT_STYLE)
     id_prefix: str = attr.ib(validator=attr.validators.instance_of(str), default=DEFAULT_PREFIX)
     initial_id: int = attr.ib(validator=attr.validators.instance_of(int), default=DEFAULT_INITIAL_ID)
@@ -101,6 +116,20 @@ class KgtkIdBuilderOptions(KgtkFormat):
                                   "When --verify-id-unique is supplied without an argument, it is %(const)s. ",
                                   type=optional_bool, nargs='?', const=True, default=cls.DEFAULT_VERIFY_ID_UNIQUE)
 
+        parser.add_argument(      "--verify-id-unique-method", dest="verify_id_unique_method",
+                                  default=cls.DEFAULT_VERIFY_METHOD, choices=cls.VERIFY_METHODS,
+                                  help="How to verify ID uniqueness: an in-memory set that stops at the first duplicate (memory), " +
+                                  "or, after all IDs are built, sorted runs on disk (sorted-runs) or a Bloom filter with " +
+                                  "exact confirmation (bloom), which report every duplicate. (default=%(default)s).")
+
+        parser.add_argument(      "--verify-id-unique-run-size", dest="verify_id_unique_run_size", type=int,
+                                  default=SortedRunIdVerifier.DEFAULT_RUN_SIZE, metavar="INTEGER",
+                                  help=h("The number of IDs in each sorted run for --verify-id-unique-method sorted-runs. (default=%(default)s)."))
+
+        parser.add_argument(      "--verify-id-unique-capacity", dest="verify_id_unique_capacity", type=int,
+                                  default=BloomIdVerifier.DEFAULT_CAPACITY, metavar="INTEGER",
+                                  help=h("The expected number of IDs, which sizes the Bloom filter for --verify-id-unique-method bloom. (default=%(default)s)."))
+
         parser.add_argument(      "--id-style", dest="id_style", default=cls.DEFAULT_STYLE, choices=cls.STYLES,
                                   help=h("The ID generation style. (default=%(default)s)."))
 
@@ -137,6 +166,9 @@ class KgtkIdBuilderOptions(KgtkFormat):
             new_id_column_name=d.get("new_id_column_name"),
             overwrite_id=d.get("overwrite_id", False),
             verify_id_unique=d.get("verify_id_unique", False),
+            verify_id_unique_method=d.get("verify_id_unique_method", cls.DEFAULT_VERIFY_METHOD),
+            verify_id_unique_run_size=d.get("verify_id_unique_run_size", SortedRunIdVerifier.DEFAULT_RUN_SIZE),
+            verify_id_unique_capacity=d.get("verify_id_unique_capacity", BloomIdVerifier.DEFAULT_CAPACITY),
             id_style=d.get("id_style", cls.PREFIXED_STYLE),
             id_prefix=d.get("id_prefix", cls.DEFAULT_PREFIX),
             initial_id=d.get("initial_id", cls.DEFAULT_INITIAL_ID),
@@ -159,6 +191,9 @@ class KgtkIdBuilderOptions(KgtkFormat):
             print("--new-id-column-name=%s" % str(self.new_id_column_name), file=out, flush=True)
         print("--overwrite-id=%s" % str(self.overwrite_id), file=out, flush=True)
         print("--verify_id_unique=%s" % str(self.verify_id_unique), file=out, flush=True)
+        print("--verify-id-unique-method=%s" % str(self.verify_id_unique_method), file=out, flush=True)
+        print("--verify-id-unique-run-size=%s" % str(self.verify_id_unique_run_size), file=out, flush=True)
+        print("--verify-id-unique-capacity=%s" % str(self.verify_id_unique_capacity), file=out, flush=True)
         print("--id-style=%s" % str(self.id_style), file=out, flush=True)
         print("--id-prefix=%s" % str(self.id_prefix), file=out, flush=True)
         print("--initial-id=%s" % str(self.initial_id), file=out, flush=True)
@@ -192,6 +227,9 @@ class KgtkIdBuilder(KgtkFormat):
 
     id_set: typing.Set[str] =attr.ib(validator=attr.validators.instance_of(set), factory=set)
 
+    # The deferred uniqueness verifier, when not using id_set.
+    id_verifier: typing.Optional[KgtkIdVerifier] = attr.ib(default=None)
+
     nl_keys: typing.MutableMapping[str, int] = attr.ib(validator=attr.validators.instance_of(dict), factory=dict)
 
     @classmethod
@@ -348,6 +386,13 @@ class KgtkIdBuilder(KgtkFormat):
             if claim_id_column_idx < 0:
                 raise ValueError("No claim_id column index")
         
+        id_verifier: typing.Optional[KgtkIdVerifier] = None
+        if options.verify_id_unique:
+            if options.verify_id_unique_method == KgtkIdBuilderOptions.SORTED_RUNS_VERIFY_METHOD:
+                id_verifier = SortedRunIdVerifier(run_size=options.verify_id_unique_run_size)
+            elif options.verify_id_unique_method == KgtkIdBuilderOptions.BLOOM_VERIFY_METHOD:
+                id_verifier = BloomIdVerifier(capacity=options.verify_id_unique_capacity)
+
         return cls(options=options,
                    column_names=column_names,
                    old_id_column_name=old_id_column_name,
@@ -359,7 +404,8 @@ class KgtkIdBuilder(KgtkFormat):
                    label_column_idx=label_column_idx,
                    node2_column_idx=node2_column_idx,
                    claim_id_column_idx=claim_id_column_idx,
-                   current_id=options.initial_id
+                   current_id=options.initial_id,
+                   id_verifier=id_verifier,
         )
 
     def verify_uniqueness(self, id_value: str, row: typing.List[str], line_number, who: str):
@@ -368,7 +414,17 @@ class KgtkIdBuilder(KgtkFormat):
         of `kgtk compact`, but is a little too strong for general use.
         The weaker constraint should be that the ID values don't repeat
         with different (node1, label, node2) tuples in an edge file.
+
+        A deferred verifier records the ID values here and checks them in finish().
         """
+        if self.id_verifier is not None:
+            if KgtkFormat.LIST_SEPARATOR in id_value:
+                for id_v in KgtkValue.split_list(id_value):
+                    self.id_verifier.add(id_v, line_number, who)
+            else:
+                self.id_verifier.add(id_value, line_number, who)
+            return
+
         if KgtkFormat.LIST_SEPARATOR in id_value:
             # The ID value might be a list.
             id_v: str
@@ -487,12 +543,26 @@ class KgtkIdBuilder(KgtkFormat):
         else:
             return self.build_wikidata_id(row) + "-" + hashlib.sha256(claim_id.lower().encode('utf-8')).hexdigest()[:self.options.claim_id_hash_width]
 
-    def process(self, kr: KgtkReader, kw: KgtkWriter):
+    def finish(self, error_file: typing.TextIO = sys.stderr):
+        """
+        Complete a deferred ID uniqueness verification, reporting every
+        duplicate ID to the error file.
+        """
+        if self.id_verifier is None:
+            return
+        id_verifier: KgtkIdVerifier = self.id_verifier
+        self.id_verifier = None
+        duplicate_count: int = id_verifier.finish(error_file)
+        if duplicate_count > 0:
+            raise ValueError("Found %d duplicate ID values." % duplicate_count)
+
+    def process(self, kr: KgtkReader, kw: KgtkWriter, error_file: typing.TextIO = sys.stderr):
         line_number: int = 0
         row: typing.List[str]
         for row in kr:
             line_number += 1
             kw.write(self.build(row, line_number))
+        self.finish(error_file)
 
 def main():
     """
@@ -554,7 +624,7 @@ def main():
                                      very_verbose=args.very_verbose)
 
     # Process the input file, building IDs.
-    idb.process(kr, ew)
+    idb.process(kr, ew, error_file=error_file)
 
     ew.close()
     kr.close()
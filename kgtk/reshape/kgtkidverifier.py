@@ -0,0 +1,196 @@
+"""
+Verify ID uniqueness without keeping every ID value in memory.
+
+KgtkIdBuilder normally verifies ID uniqueness with an in-memory set of the
+IDs it has seen, which stops at the first duplicate.  The verifiers in this
+file check the IDs when the input has been processed and report every
+duplicate:
+
+SortedRunIdVerifier buffers (ID, line number) pairs, writes them to disk
+in sorted runs, and scans the merged runs for adjacent duplicates.  The
+runs are merged in passes with a bounded number of open files.
+
+BloomIdVerifier checks each ID against a Bloom filter and logs every ID to
+disk in input order.  IDs that the filter may have seen before are
+candidate duplicates; one scan of the log confirms them exactly.
+"""
+
+from abc import ABC, abstractmethod
+import hashlib
+import heapq
+import math
+from pathlib import Path
+import sys
+import tempfile
+import typing
+
+from kgtk.utils.runmerge import DEFAULT_FAN_IN, reduce_runs
+
+class KgtkIdVerifier(ABC):
+    """
+    The interface of the deferred ID verifiers.
+    """
+    def __init__(self, temp_directory: typing.Optional[Path] = None):
+        self.tempdir = tempfile.TemporaryDirectory(prefix="kgtk-idverify-",
+                                                   dir=str(temp_directory) if temp_directory is not None else None)
+
+    @abstractmethod
+    def add(self, id_value: str, line_number: int, who: str):
+        pass
+
+    @abstractmethod
+    def duplicates(self)->typing.Iterator[typing.Tuple[str, int, str, int]]:
+        """
+        Yield (ID, line number, who, previous line number) for every repeated ID.
+        """
+        pass
+
+    def finish(self, error_file: typing.TextIO = sys.stderr)->int:
+        """
+        Report every duplicate ID to the error file, clean up, and return the
+        number of duplicates.
+        """
+        duplicate_count: int = 0
+        try:
+            id_value: str
+            line_number: int
+            who: str
+            previous_line_number: int
+            for id_value, line_number, who, previous_line_number in self.duplicates():
+                duplicate_count += 1
+                print("Line %d: %s ID '%s' duplicates a previous ID on line %d." % (line_number, who, id_value, previous_line_number),
+                      file=error_file, flush=True)
+        finally:
+            self.tempdir.cleanup()
+        return duplicate_count
+
+class SortedRunIdVerifier(KgtkIdVerifier):
+    DEFAULT_RUN_SIZE: int = 1000000
+
+    def __init__(self,
+                 run_size: int = DEFAULT_RUN_SIZE,
+                 temp_directory: typing.Optional[Path] = None,
+                 fan_in: int = DEFAULT_FAN_IN):
+        super().__init__(temp_directory)
+        self.run_size: int = run_size
+        self.fan_in: int = fan_in
+        self.buffer: typing.List[typing.Tuple[str, int, str]] = [ ]
+        self.run_paths: typing.List[Path] = [ ]
+
+    def add(self, id_value: str, line_number: int, who: str):
+        self.buffer.append((id_value, line_number, who))
+        if len(self.buffer) >= self.run_size:
+            self.write_run()
+
+    def write_run(self):
+        if len(self.buffer) == 0:
+            return
+        self.buffer.sort()
+        run_path: Path = Path(self.tempdir.name) / ("run%d.tsv" % len(self.run_paths))
+        self.write_items(run_path, self.buffer)
+        self.run_paths.append(run_path)
+        self.buffer = [ ]
+
+    @staticmethod
+    def write_items(run_path: Path, items: typing.Iterable[typing.Tuple[str, int, str]]):
+        with open(run_path, "w", encoding="utf-8", newline="\n") as f:
+            id_value: str
+            line_number: int
+            who: str
+            for id_value, line_number, who in items:
+                f.write("%s\t%d\t%s\n" % (id_value, line_number, who))
+
+    @staticmethod
+    def read_run(run_path: Path)->typing.Iterator[typing.Tuple[str, int, str]]:
+        with open(run_path, "r", encoding="utf-8", newline="\n") as f:
+            line: str
+            for line in f:
+                id_value, line_number, who = line[:-1].split("\t")
+                yield id_value, int(line_number), who
+
+    def duplicates(self)->typing.Iterator[typing.Tuple[str, int, str, int]]:
+        runs: typing.List[typing.Iterator[typing.Tuple[str, int, str]]]
+        if len(self.run_paths) == 0:
+            # Everything fit in one run; there is no need to write it.
+            self.buffer.sort()
+            runs = [ iter(self.buffer) ]
+        else:
+            self.write_run()
+            self.run_paths = reduce_runs(self.run_paths, self.read_run, self.write_items, fan_in=self.fan_in)
+            runs = [ self.read_run(run_path) for run_path in self.run_paths ]
+
+        previous_id: typing.Optional[str] = None
+        first_line_number: int = 0
+        id_value: str
+        line_number: int
+        who: str
+        for id_value, line_number, who in heapq.merge(*runs):
+            if id_value == previous_id:
+                yield id_value, line_number, who, first_line_number
+            else:
+                previous_id = id_value
+                first_line_number = line_number
+
+class BloomIdVerifier(KgtkIdVerifier):
+    DEFAULT_CAPACITY: int = 10000000
+    DEFAULT_ERROR_RATE: float = 0.01
+
+    def __init__(self,
+                 capacity: int = DEFAULT_CAPACITY,
+                 error_rate: float = DEFAULT_ERROR_RATE,
+                 temp_directory: typing.Optional[Path] = None):
+        super().__init__(temp_directory)
+        # The usual Bloom filter sizing.  More IDs than the capacity raise the
+        # false positive rate (and the number of candidates), but the exact
+        # confirmation keeps the result correct.
+        self.bit_count: int = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count: int = max(1, int(round(self.bit_count / max(1, capacity) * math.log(2))))
+        self.bits: bytearray = bytearray((self.bit_count + 7) // 8)
+        self.candidates: typing.Set[str] = set()
+        self.log_path: Path = Path(self.tempdir.name) / "ids.tsv"
+        self.log_file: typing.TextIO = open(self.log_path, "w", encoding="utf-8", newline="\n")
+
+    def positions(self, id_value: str)->typing.Iterator[int]:
+        # Double hashing with two 64-bit halves of one digest.
+        digest: bytes = hashlib.blake2b(id_value.encode("utf-8"), digest_size=16).digest()
+        h1: int = int.from_bytes(digest[:8], "little")
+        h2: int = int.from_bytes(digest[8:], "little") | 1
+        idx: int
+        for idx in range(self.hash_count):
+            yield (h1 + idx * h2) % self.bit_count
+
+    def add(self, id_value: str, line_number: int, who: str):
+        self.log_file.write("%s\t%d\t%s\n" % (id_value, line_number, who))
+        seen: bool = True
+        position: int
+        for position in self.positions(id_value):
+            mask: int = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                seen = False
+                self.bits[position >> 3] |= mask
+        if seen:
+            self.candidates.add(id_value)
+
+    def duplicates(self)->typing.Iterator[typing.Tuple[str, int, str, int]]:
+        self.log_file.close()
+        if len(self.candidates) == 0:
+            return
+
+        # Confirm the candidates exactly, in input order.
+        first_line_numbers: typing.MutableMapping[str, int] = { }
+        with open(self.log_path, "r", encoding="utf-8", newline="\n") as f:
+            line: str
+            for line in f:
+                id_value, line_number_str, who = line[:-1].split("\t")
+                if id_value not in self.candidates:
+                    continue
+                line_number: int = int(line_number_str)
+                if id_value in first_line_numbers:
+                    yield id_value, line_number, who, first_line_numbers[id_value]
+                else:
+                    first_line_numbers[id_value] = line_number
+
+    def finish(self, error_file: typing.TextIO = sys.stderr)->int:
+        if not self.log_file.closed:
+            self.log_file.close()
+        return super().finish(error_file)
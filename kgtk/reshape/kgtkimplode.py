@@ -687,6 +687,10 @@ class KgtkImplode(KgtkFormat):
                 if idb is not None:
                     output_row = idb.build(output_row, input_line_count)
                 ew.write(output_row, shuffle_list=shuffle_list)
+
+        if idb is not None:
+            # Report deferred ID uniqueness violations, if any.
+            idb.finish(self.error_file)
                 
         if self.verbose:
             print("Processed %d records, imploded %d values, %d invalid values." % (input_line_count, imploded_value_count, invalid_value_count),
@@ -1,9 +1,13 @@
+import io
 import shutil
 import unittest
 import tempfile
+from pathlib import Path
 import pandas as pd
 from kgtk.cli_entry import cli_entry
 from kgtk.exceptions import KGTKArgumentParseException
+from kgtk.reshape.kgtkidbuilder import KgtkIdBuilder, KgtkIdBuilderOptions
+from kgtk.reshape.kgtkidverifier import SortedRunIdVerifier
 
 
 class TestKGTKAddID(unittest.TestCase):
@@ -85,3 +89,40 @@ class TestKGTKAddID(unittest.TestCase):
         df = pd.read_csv(f'{self.temp_dir}/id.tsv', sep='\t').fillna("")
         for i, row in df.iterrows():
             self.assertEqual(row['id'], f'THIS{i + 1}')
+
+    def verify_ids_with_method(self, method: str):
+        options = KgtkIdBuilderOptions(verify_id_unique=True, verify_id_unique_method=method, verify_id_unique_run_size=2)
+        idb = KgtkIdBuilder.from_column_names(["node1", "label", "node2", "id"], options)
+        rows = [["a", "b", "c", "x1"], ["a", "b", "d", "x2"], ["a", "b", "e", "x1"], ["q", "b", "e", "x3|x2"], ["z", "b", "z", ""]]
+        for line_number, row in enumerate(rows):
+            idb.build(row, line_number + 1)
+        error_file = io.StringIO()
+        with self.assertRaises(ValueError):
+            idb.finish(error_file)
+        self.assertEqual(error_file.getvalue().splitlines(),
+                         ["Line 3: existing ID 'x1' duplicates a previous ID on line 1.",
+                          "Line 4: existing ID 'x2' duplicates a previous ID on line 2."])
+
+    def test_verify_id_unique_sorted_runs(self):
+        self.verify_ids_with_method(KgtkIdBuilderOptions.SORTED_RUNS_VERIFY_METHOD)
+
+    def test_verify_id_unique_sorted_runs_fan_in(self):
+        # 100 runs of 3 IDs, merged at most 4 runs at a time.
+        verifier = SortedRunIdVerifier(run_size=3, temp_directory=Path(self.temp_dir), fan_in=4)
+        for line_number in range(1, 301):
+            verifier.add("x%d" % (line_number % 250), line_number, "new")
+        error_file = io.StringIO()
+        self.assertEqual(verifier.finish(error_file), 50)
+        self.assertLessEqual(len(verifier.run_paths), 4)
+        self.assertEqual(error_file.getvalue().splitlines()[0],
+                         "Line 251: new ID 'x1' duplicates a previous ID on line 1.")
+
+    def test_verify_id_unique_bloom(self):
+        self.verify_ids_with_method(KgtkIdBuilderOptions.BLOOM_VERIFY_METHOD)
+
+    def test_kgtk_add_id_verify_id_unique_bloom(self):
+        cli_entry("kgtk", "add-id", "-i", self.file_path, "-o", f'{self.temp_dir}/id.tsv',
+                  "--verify-id-unique", "--verify-id-unique-method", "bloom")
+        df = pd.read_csv(f'{self.temp_dir}/id.tsv', sep='\t')
+        for i, row in df.iterrows():
+            self.assertEqual(row['id'], f'E{i + 1}')
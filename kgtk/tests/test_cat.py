@@ -1,4 +1,5 @@
 import json
+import os
 import shutil
 import unittest
 import tempfile
@@ -95,3 +96,68 @@ class TestKGTKCat(unittest.TestCase):
         cli_entry("kgtk", "cat", "-i", f1_path, f2_path, "-o", f'{self.temp_dir}/cat.tsv')
         df = pd.read_csv(f'{self.temp_dir}/cat.tsv', sep='\t')
         self.assertEqual(len(df), 6)
+
+    def test_kgtk_cat_fast_copy(self):
+        f1_path = 'data/sample_kgtk_edge_Q47158.tsv'
+        f2_path = 'data/sample_kgtk_edge_file_with_id.tsv'
+        cli_entry("kgtk", "cat", "-i", self.file_path, self.file_path, "-o", f'{self.temp_dir}/rows.tsv')
+        cli_entry("kgtk", "cat", "-i", self.file_path, self.file_path, "-o", f'{self.temp_dir}/fast.tsv', "--fast-copy")
+        with open(f'{self.temp_dir}/rows.tsv') as f1, open(f'{self.temp_dir}/fast.tsv') as f2:
+            self.assertEqual(f1.read(), f2.read())
+
+        # Files that need column merging are copied row by row.
+        cli_entry("kgtk", "cat", "-i", f1_path, f2_path, "-o", f'{self.temp_dir}/merged.tsv', "--fast-copy")
+        df = pd.read_csv(f'{self.temp_dir}/merged.tsv', sep='\t')
+        self.assertEqual(len(df), 6)
+
+    def test_kgtk_cat_fast_copy_counts_lines(self):
+        from io import StringIO
+        from pathlib import Path
+        from kgtk.io.kgtkreader import KgtkReaderOptions
+        from kgtk.join.kgtkcat import KgtkCat
+        from kgtk.value.kgtkvalueoptions import KgtkValueOptions
+        errors = StringIO()
+        kc = KgtkCat(input_file_paths=[Path(self.file_path), Path(self.file_path)],
+                     output_path=Path(f'{self.temp_dir}/fast.tsv'),
+                     reader_options=KgtkReaderOptions(),
+                     value_options=KgtkValueOptions(),
+                     fast_copy=True,
+                     error_file=errors,
+                     verbose=True)
+        kc.process()
+        with open(self.file_path) as f:
+            data_lines = len(f.readlines()) - 1
+        self.assertIn("Copied %d data lines" % data_lines, errors.getvalue())
+        self.assertIn("Wrote %d lines total from 2 files" % (2 * data_lines), errors.getvalue())
+
+    def test_kgtk_cat_seek_sampling(self):
+        # Copy the input file so that the line index is built in the temp dir.
+        input_path = f'{self.temp_dir}/input.tsv'
+        shutil.copyfile(self.file_path, input_path)
+        with open(input_path) as f:
+            lines = f.readlines()
+        record_count = len(lines) - 1
+
+        def cat(output, *options):
+            cli_entry("kgtk", "cat", "-i", input_path, "-o", f'{self.temp_dir}/{output}', *options)
+            with open(f'{self.temp_dir}/{output}') as f:
+                return f.read()
+
+        # The line index gives the same results as reading every record.
+        tail = cat("tail.tsv", "--record-limit", str(record_count), "--tail-count", "5")
+        self.assertEqual(tail, lines[0] + "".join(lines[-5:]))
+        self.assertEqual(cat("tail_index.tsv", "--tail-count", "5", "--use-line-index"), tail)
+        self.assertTrue(os.path.exists(input_path + ".lidx"))
+        self.assertEqual(cat("sample.tsv", "--initial-skip-count", "4", "--every-nth-record", "3", "--record-limit", "20"),
+                         cat("sample_index.tsv", "--initial-skip-count", "4", "--every-nth-record", "3", "--record-limit", "20",
+                             "--use-line-index"))
+
+        # Seeking to the end of the file without an index.
+        self.assertEqual(cat("tail_seek.tsv", "--tail-count", "5", "--seek-sampling"), tail)
+
+        # Random sampling returns input records in file order.
+        sample = cat("sample_seek.tsv", "--every-nth-record", "3", "--seek-sampling").splitlines(keepends=True)
+        self.assertEqual(sample[0], lines[0])
+        self.assertGreater(len(sample), 1)
+        positions = [lines.index(line) for line in sample[1:]]
+        self.assertEqual(positions, sorted(set(positions)))
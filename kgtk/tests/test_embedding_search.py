@@ -0,0 +1,64 @@
+import shutil
+import unittest
+import tempfile
+import numpy as np
+import pandas as pd
+from kgtk.cli_entry import cli_entry
+from kgtk.gt.embedding_search_utils import ExactIndex, IVFPQIndex
+
+
+class TestEmbeddingSearch(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(7)
+        self.vectors = rng.normal(size=(300, 16)).astype(np.float32)
+        self.file_path = f'{self.temp_dir}/embeddings.tsv'
+        with open(self.file_path, 'w') as f:
+            f.write("node\tproperty\tvalue\n")
+            for i, vector in enumerate(self.vectors):
+                f.write("Q%d\ttext_embedding\t%s\n" % (i, ",".join(str(x) for x in vector)))
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def brute_force(self, query: int, k: int):
+        normalized = self.vectors / np.linalg.norm(self.vectors, axis=1, keepdims=True)
+        scores = normalized @ normalized[query]
+        scores[query] = -np.inf
+        return list(np.argsort(-scores)[:k])
+
+    def test_exact_index_matches_brute_force(self):
+        index = ExactIndex(self.vectors, block_size=37)
+        ids, scores = index.search(self.vectors[:5], 4, exclude=np.arange(5))
+        for query in range(5):
+            self.assertEqual(list(ids[query]), self.brute_force(query, 4))
+            self.assertTrue(all(scores[query][i] >= scores[query][i + 1] for i in range(3)))
+
+    def test_ivfpq_index_recall(self):
+        index = IVFPQIndex(self.vectors, nlist=8, nprobe=8, subquantizers=4)
+        ids, _ = index.search(self.vectors[:20], 5, exclude=np.arange(20))
+        hits = sum(len(set(ids[query]) & set(self.brute_force(query, 5))) for query in range(20))
+        # Visiting every cell with exact reranking finds all neighbors that
+        # survive the PQ candidate stage.
+        self.assertGreaterEqual(hits / 100, 0.8)
+
+    def test_kgtk_embedding_search(self):
+        cli_entry("kgtk", "embedding-search", "-i", self.file_path, "--nodes", "Q1", "Q2", "Q_missing",
+                  "-k", "3", "-o", f'{self.temp_dir}/out.tsv')
+        df = pd.read_csv(f'{self.temp_dir}/out.tsv', sep='\t')
+        self.assertEqual(list(df.columns), ["node1", "label", "node2", "score"])
+        self.assertEqual(len(df), 6)
+        self.assertEqual(list(df[df["node1"] == "Q1"]["node2"]), ["Q%d" % i for i in self.brute_force(1, 3)])
+        self.assertTrue((df["label"] == "similar_to").all())
+
+    def test_kgtk_embedding_search_saved_index(self):
+        index_path = f'{self.temp_dir}/embeddings.index.npz'
+        cli_entry("kgtk", "embedding-search", "-i", self.file_path, "--nodes", "Q1",
+                  "--index", "ivfpq", "--subquantizers", "4", "--save-index", index_path,
+                  "-o", f'{self.temp_dir}/out1.tsv')
+        cli_entry("kgtk", "embedding-search", "--load-index", index_path, "--nodes", "Q1",
+                  "-o", f'{self.temp_dir}/out2.tsv')
+        df1 = pd.read_csv(f'{self.temp_dir}/out1.tsv', sep='\t')
+        df2 = pd.read_csv(f'{self.temp_dir}/out2.tsv', sep='\t')
+        self.assertEqual(len(df1), 10)
+        self.assertEqual(list(df1["node2"]), list(df2["node2"]))
@@ -0,0 +1,46 @@
+import json
+import shutil
+import unittest
+import tempfile
+from kgtk.cli_entry import cli_entry
+
+
+class TestExportWikidata(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        with open(f'{self.temp_dir}/nodes.tsv', 'w') as f:
+            f.write("id\tlabel\ttype\tdatatype\tdescription\talias\n")
+            for i in range(50):
+                f.write(f"Q{i:03d}\t'n{i}'@en\titem\t\t'desc {i}'@en\t'a{i}'@en\n")
+        with open(f'{self.temp_dir}/edges.tsv', 'w') as f, open(f'{self.temp_dir}/qualifiers.tsv', 'w') as g:
+            f.write("id\tnode1\tlabel\tnode2\trank\tnode2;wikidatatype\tclaim_id\tval_type\tentity_type\tdatahash\tprecision\tcalendar\n")
+            g.write("id\tnode1\tlabel\tnode2\tnode2;wikidatatype\tval_type\tentity_type\tdatahash\tprecision\tcalendar\n")
+            for i in range(50):
+                if i % 5 == 0:
+                    continue # Some qnodes have no edges.
+                edge_id = f"Q{i:03d}-P31-1"
+                f.write(f"{edge_id}\tQ{i:03d}\tP31\tQ{(i * 3) % 50:03d}\tnormal\twikibase-item\tc{i}\twikibase-entityid\titem\t\t\t\n")
+                f.write(f"Q{i:03d}-P1082-1\tQ{i:03d}\tP1082\t{i * 10}\tnormal\tquantity\td{i}\tquantity\t\t\t\t\n")
+                g.write(f"{edge_id}-1\t{edge_id}\tP580\t^2000-01-01T00:00:00Z/11\ttime\ttime\t\t\t\tQ1985727\n")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def export(self, output_name: str, *args):
+        cli_entry("kgtk", "export-wikidata",
+                  "--node-file", f'{self.temp_dir}/nodes.tsv',
+                  "--edge-file", f'{self.temp_dir}/edges.tsv',
+                  "--qualifier-file", f'{self.temp_dir}/qualifiers.tsv',
+                  "-o", f'{self.temp_dir}/{output_name}', *args)
+        with open(f'{self.temp_dir}/{output_name}') as f:
+            return f.read()
+
+    def test_export_wikidata_procs_matches_serial(self):
+        serial = self.export("serial.json")
+        parallel = self.export("parallel.json", "--procs", "2", "--qnode-batch-size", "7")
+        self.assertEqual(serial, parallel)
+
+        entities = json.loads(serial)
+        self.assertEqual([entity["id"] for entity in entities], [f"Q{i:03d}" for i in range(50)])
+        self.assertEqual(entities[1]["claims"]["P31"][0]["mainsnak"]["datavalue"]["value"]["id"], "Q003")
+        self.assertNotIn("claims", entities[5])
@@ -4,6 +4,8 @@ import shutil
 import pandas as pd
 from kgtk.cli_entry import cli_entry
 import os
+import gzip
+from pathlib import Path
 
 class TestGraphEmbeddings(unittest.TestCase):
     def setUp(self):
@@ -52,6 +54,52 @@ class TestGraphEmbeddings(unittest.TestCase):
         '-e','1','-T',f'{self.temp_dir}/outtmp/')  
         self.assertTrue(os.path.exists(f'{self.temp_dir}/outtmp/'))
 
+    def read_entities(self):
+        entities = set()
+        with open(self.file_path) as f:
+            next(f)
+            for line in f:
+                values = line.rstrip('\n').split('\t')
+                entities.update((values[0], values[2]))
+        return entities
+
+    def read_glove_entities(self):
+        with open(f'{self.temp_dir}/out.tsv') as f:
+            return set(line.split('\t')[0] for line in f)
+
+    def test_graph_embeddings_num_partitions(self):
+        cli_entry("kgtk", "graph-embeddings", "-i", self.file_path, "-o", f'{self.temp_dir}/out.tsv','-e','1',
+        '-ot','glove', '-np', '2', '-T', f'{self.temp_dir}/outtmp/')
+        self.assertEqual(self.read_glove_entities(), self.read_entities())
+        self.assertTrue(os.path.exists(f'{self.temp_dir}/outtmp/output/edges_partitioned/edges_1_1.h5'))
+
+    def test_graph_embeddings_preprocess_workers(self):
+        cli_entry("kgtk", "graph-embeddings", "-i", self.file_path, "-o", f'{self.temp_dir}/out.tsv','-e','1',
+        '-ot','glove', '-pw', '2', '-T', f'{self.temp_dir}/outtmp/')
+        self.assertEqual(self.read_glove_entities(), self.read_entities())
+
+    def test_read_kgtk_edges(self):
+        from kgtk.graph_embeddings.importers import read_kgtk_edges
+        from kgtk.io.kgtkreader import KgtkReaderOptions
+
+        def edges(path, **kwargs):
+            names, rels, lhs, rel, rhs = read_kgtk_edges(Path(path), **kwargs)
+            return [(names[l], rels[r], names[h]) for l, r, h in zip(lhs, rel, rhs)]
+
+        expected = edges(self.file_path)
+        self.assertEqual(len(expected), 99)
+        self.assertEqual(expected[0], ('fn:intentionally_affect', 'fn:IsInheritedBy', 'fn:abandonment'))
+
+        # Split into byte ranges for the workers, or read by the parent.
+        gz_path = f'{self.temp_dir}/edges.tsv.gz'
+        with open(self.file_path, 'rb') as f_in, gzip.open(gz_path, 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        self.assertEqual(edges(self.file_path, num_workers=2), expected)
+        self.assertEqual(edges(gz_path, num_workers=2, batch_size=10), expected)
+
+        # The reader options are honored.
+        self.assertEqual(edges(gz_path, num_workers=2, reader_options=KgtkReaderOptions(record_limit=10)), expected[:10])
+
     """
     def test_graph_embeddings_log(self):
         cli_entry("kgtk", "graph-embeddings", "-i", self.file_path, "-o", f'{self.temp_dir}/out.tsv',
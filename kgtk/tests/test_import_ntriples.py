@@ -0,0 +1,46 @@
+import shutil
+import unittest
+import tempfile
+from kgtk.cli_entry import cli_entry
+from kgtk.imports.kgtkntriples import KgtkNtriples
+
+
+class TestImportNtriples(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_path = f'{self.temp_dir}/input.nt'
+        with open(self.file_path, 'w') as f:
+            for i in range(2000):
+                # Namespaces that are discovered at different depths, structured
+                # literals (new nodes), blank nodes, and unparseable lines.
+                subject = "<http://a.org/%s/s%d>" % ("x/y" if i % 3 else "x", i) if i % 10 else "_:b%d" % i
+                predicate = "<http://p.org/%s#p%d>" % ("q" * (i % 4), i % 5)
+                if i % 7 == 0:
+                    value = '"v%d"^^<http://t.org/types/t%d>' % (i, i % 3)
+                elif i % 11 == 0:
+                    value = "not a value"
+                else:
+                    value = '"text %d | pipe"' % i
+                f.write("%s %s %s .\n" % (subject, predicate, value))
+        self.saved_min_chunk_size = KgtkNtriples.PARALLEL_MIN_CHUNK_SIZE
+        KgtkNtriples.PARALLEL_MIN_CHUNK_SIZE = 1000
+
+    def tearDown(self) -> None:
+        KgtkNtriples.PARALLEL_MIN_CHUNK_SIZE = self.saved_min_chunk_size
+        shutil.rmtree(self.temp_dir)
+
+    def read(self, name: str) -> str:
+        with open(f'{self.temp_dir}/{name}') as f:
+            return f.read()
+
+    def test_import_ntriples_procs_matches_serial(self):
+        for procs in ["1", "3"]:
+            cli_entry("kgtk", "import-ntriples", "-i", self.file_path,
+                      "-o", f'{self.temp_dir}/out{procs}.tsv',
+                      "--reject-file", f'{self.temp_dir}/reject{procs}.nt',
+                      "--updated-namespace-file", f'{self.temp_dir}/namespaces{procs}.tsv',
+                      "--override-uuid", "U", "--procs", procs)
+        self.assertEqual(self.read("out1.tsv"), self.read("out3.tsv"))
+        self.assertEqual(self.read("reject1.nt"), self.read("reject3.nt"))
+        self.assertEqual(self.read("namespaces1.tsv"), self.read("namespaces3.tsv"))
+        self.assertEqual(len(self.read("reject1.nt").splitlines()), len([i for i in range(2000) if i % 11 == 0 and i % 7 != 0]))
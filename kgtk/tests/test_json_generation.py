@@ -122,4 +122,24 @@ class TestTripleGeneration(unittest.TestCase):
         f1.close()
         f2.close()
         p = Path('data/ranked_tmp0.jsonl')
-        p.unlink()
\ No newline at end of file
+        p.unlink()
+    def test_grouped_kgtk_generation(self):
+        # kgtk generate_mediawiki_jsons -i ranked_example.tsv -pf wikidata_properties.tsv -pr ranked_grouped --procs 2
+        ranked_tsv_file = 'data/ranked_example.tsv'
+        wikidata_property_file = 'data/wikidata_properties.tsv'
+        generator = JsonGenerator(prop_file = wikidata_property_file, label_set='label', alias_set='alias',
+                                    description_set='description', warning=True, n=1000,
+                                    log_path="data/ranked_grouped_warning.log",
+                                    prop_declaration=False,
+                                    has_rank = False,
+                                    output_prefix="data/ranked_grouped_tmp")
+        with open(ranked_tsv_file) as fp:
+            lines = [(line_num + 1, edge) for line_num, edge in enumerate(fp) if not edge.startswith("#")]
+        generator.generate_grouped(lines, procs=2, group_batch_size=1)
+        f1 = open('data/ranked0.jsonl')
+        f2 = open('data/ranked_grouped_tmp0.jsonl')
+        self.assertEqual(f1.readlines(), f2.readlines())
+        f1.close()
+        f2.close()
+        Path('data/ranked_grouped_warning.log').unlink()
+        Path('data/ranked_grouped_tmp0.jsonl').unlink()
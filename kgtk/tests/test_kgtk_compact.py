@@ -0,0 +1,48 @@
+import shutil
+import unittest
+import tempfile
+from kgtk.cli_entry import cli_entry
+from kgtk.reshape.kgtkcompact import KgtkCompactSpill
+
+
+class TestKGTKCompact(unittest.TestCase):
+    def setUp(self) -> None:
+        self.file_path = 'data/sample_kgtk_edge_file.tsv'
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def read_lines(self, file_name: str):
+        with open(f'{self.temp_dir}/{file_name}') as f:
+            return f.readlines()
+
+    def test_kgtk_compact_spilled_matches_in_memory(self):
+        cli_entry("kgtk", "compact", "-i", self.file_path, "-o", f'{self.temp_dir}/memory.tsv',
+                  "--columns", "node1", "--compact-id")
+        cli_entry("kgtk", "compact", "-i", self.file_path, "-o", f'{self.temp_dir}/spilled.tsv',
+                  "--columns", "node1", "--compact-id", "--max-rows-in-memory", "20",
+                  "--spill-partitions", "5", "--temp-directory", self.temp_dir)
+        cli_entry("kgtk", "compact", "-i", self.file_path, "-o", f'{self.temp_dir}/parallel.tsv',
+                  "--columns", "node1", "--compact-id", "--max-rows-in-memory", "20", "--procs", "2")
+        memory = self.read_lines('memory.tsv')
+        self.assertLess(len(memory), 288)
+        self.assertEqual(memory, self.read_lines('spilled.tsv'))
+        self.assertEqual(memory, self.read_lines('parallel.tsv'))
+
+    def test_kgtk_compact_spilled_oversize_partition(self):
+        cli_entry("kgtk", "compact", "-i", self.file_path, "-o", f'{self.temp_dir}/memory.tsv',
+                  "--columns", "node1", "--compact-id")
+        # A single partition holds every row, so it has to be split again to fit the budget.
+        cli_entry("kgtk", "compact", "-i", self.file_path, "-o", f'{self.temp_dir}/spilled.tsv',
+                  "--columns", "node1", "--compact-id", "--max-rows-in-memory", "20",
+                  "--spill-partitions", "1", "--temp-directory", self.temp_dir)
+        self.assertEqual(self.read_lines('memory.tsv'), self.read_lines('spilled.tsv'))
+
+    def test_kgtk_compact_spill_keeps_line_numbers(self):
+        # Each compacted row carries the input line number of the last row merged into it.
+        spill = KgtkCompactSpill(partition_count=1, max_rows_per_partition=2, temp_directory=self.temp_dir)
+        for line_number, key in enumerate(["c", "a", "b", "a", "d"], start=1):
+            spill.add(key, line_number, [key, str(line_number)])
+        self.assertEqual(list(spill.compacted_rows([0], "|", False)),
+                         [(4, ["a", "2|4"]), (3, ["b", "3"]), (1, ["c", "1"]), (5, ["d", "5"])])
@@ -86,3 +86,19 @@ class TestKGTKFilter(unittest.TestCase):
         self.assertEqual(lines[len(lines) - 1].replace('\n', ''),
                          "Q65695069-label-1	Q65695069	label	Spring Break Forever\t")
         f.close()
+
+    def test_kgtk_ifexists_projected_filter_keys(self):
+        # Only the filter key columns are read from the filter file.
+        Q47158_path = 'data/sample_kgtk_edge_Q47158.tsv'
+        input_df = pd.read_csv(self.file_path, sep='\t', dtype=str, keep_default_na=False)
+        filter_df = pd.read_csv(Q47158_path, sep='\t', dtype=str, keep_default_na=False)
+        for command, keep in (("ifexists", True), ("ifnotexists", False)):
+            for keys in (["label"], ["node1", "label"]):
+                cli_entry("kgtk", command, "-i", self.file_path, "--filter-on", Q47158_path, "-o",
+                          f'{self.temp_dir}/out.tsv', "--input-keys", *keys, "--filter-keys", *keys)
+                df = pd.read_csv(f'{self.temp_dir}/out.tsv', sep='\t', dtype=str, keep_default_na=False)
+
+                filter_keys = set(filter_df[keys].itertuples(index=False, name=None))
+                matched = [key in filter_keys for key in input_df[keys].itertuples(index=False, name=None)]
+                expected = input_df[[match == keep for match in matched]]
+                self.assertEqual(df.values.tolist(), expected.values.tolist())
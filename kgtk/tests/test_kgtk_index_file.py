@@ -0,0 +1,73 @@
+import shutil
+import unittest
+import tempfile
+from pathlib import Path
+from kgtk.cli_entry import cli_entry
+from kgtk.io.kgtkreader import KgtkReader
+from kgtk.utils.lineindex import LineIndex
+
+
+class TestKGTKIndexFile(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_path = f'{self.temp_dir}/sorted.tsv'
+        with open(self.file_path, 'w') as f:
+            f.write("node1\tlabel\tnode2\n")
+            for i in range(1000):
+                # Sorted on node1, in groups of decreasing size.
+                f.write(f"Q{(i * i) // 5000:05d}\tP{i % 5}\tQ{i}\n")
+        with open(self.file_path) as f:
+            self.lines = f.readlines()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def read_partitions(self, partition_count, key_column=None):
+        partitions = [ ]
+        for partition in range(partition_count):
+            kr = KgtkReader.open_partition(Path(self.file_path), partition, partition_count, key_column=key_column)
+            self.assertEqual(kr.column_names, ["node1", "label", "node2"])
+            partitions.append(list(kr))
+            kr.close()
+        return partitions
+
+    def test_kgtk_index_file(self):
+        cli_entry("kgtk", "index-file", "-i", self.file_path, "--stride", "10")
+        index = LineIndex.load(LineIndex.index_path(Path(self.file_path)))
+        self.assertEqual(index.stride, 10)
+        self.assertEqual(index.line_count, 1000)
+        self.assertTrue(index.is_current(Path(self.file_path)))
+        with open(self.file_path, "rb") as f:
+            f.seek(index.offsets[3])
+            self.assertEqual(f.readline().decode("utf-8"), self.lines[31])
+
+    def test_kgtk_index_file_default_stride(self):
+        cli_entry("kgtk", "index-file", "-i", self.file_path)
+        index = LineIndex.load(LineIndex.index_path(Path(self.file_path)))
+        self.assertEqual(index.stride, LineIndex.DEFAULT_STRIDE)
+        self.assertEqual(len(index.offsets), 1)
+
+    def test_kgtk_index_iter_lines(self):
+        index = LineIndex.build(Path(self.file_path), stride=10)
+        for (start, stop, step) in ((0, 1000, 1), (5, 1000, 3), (17, 900, 7), (3, 1000, 25), (990, 2000, 4)):
+            self.assertEqual(list(index.iter_lines(Path(self.file_path), start, stop, step)),
+                             self.lines[1 + start:1 + min(stop, 1000):step])
+
+    def test_kgtk_open_partition(self):
+        rows = [line.rstrip("\n").split("\t") for line in self.lines[1:]]
+        for partition_count in (1, 3, 8):
+            partitions = self.read_partitions(partition_count)
+            self.assertEqual([row for partition in partitions for row in partition], rows)
+
+    def test_kgtk_open_partition_key_column(self):
+        cli_entry("kgtk", "index-file", "-i", self.file_path, "--stride", "10", "--key-column", "node1")
+        partitions = self.read_partitions(8, key_column="node1")
+        self.assertEqual(sum(len(partition) for partition in partitions), 1000)
+        for first, second in zip(partitions, partitions[1:]):
+            if len(first) > 0 and len(second) > 0:
+                self.assertNotEqual(first[-1][0], second[0][0])
+
+    def test_kgtk_index_file_unsorted(self):
+        with open(self.file_path, 'w') as f:
+            f.write("node1\tlabel\tnode2\nQ1\tP1\tQ2\nQ3\tP1\tQ4\nQ2\tP1\tQ5\n")
+        self.assertNotEqual(cli_entry("kgtk", "index-file", "-i", self.file_path, "--key-column", "node1"), 0)
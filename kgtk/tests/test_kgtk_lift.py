@@ -0,0 +1,49 @@
+import shutil
+import unittest
+import tempfile
+from kgtk.cli_entry import cli_entry
+
+
+class TestKGTKLift(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        self.input_path = f'{self.temp_dir}/input.tsv'
+        with open(self.input_path, 'w') as f:
+            f.write("node1\tlabel\tnode2\n")
+            f.write("Q1\tP1\tQ5\n")
+            f.write("Q1\tP2\tQ6\n")
+            f.write("Q6\tP1\tQ5\n")
+        # The label file is sorted on node1, and has extra columns after the label columns.
+        self.label_path = f'{self.temp_dir}/labels.tsv'
+        with open(self.label_path, 'w') as f:
+            f.write("node1\tlabel\tnode2\tsource\tnote\n")
+            f.write("P1\tlabel\t\"instance of\"\twikidata\tx\n")
+            f.write("P2\tlabel\t\"friend\"\twikidata\tx\n")
+            f.write("Q1\tlabel\t\"Elmo\"\twikidata\tx\n")
+            f.write("Q2\tlabel\t\"Alice\"\twikidata\tx\n")
+            f.write("Q5\tlabel\t\"human\"\twikidata\tx\n")
+            f.write("Q6\tlabel\t\"Fred\"\twikidata\tx\n")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def lift(self, *args):
+        cli_entry("kgtk", "lift", "-i", self.input_path, "-o", f'{self.temp_dir}/out.tsv', *args)
+        with open(f'{self.temp_dir}/out.tsv') as f:
+            return f.read().splitlines()
+
+    def test_kgtk_lift_label_file(self):
+        expected = ["node1\tlabel\tnode2\tnode1;label",
+                    "Q1\tP1\tQ5\t\"Elmo\"",
+                    "Q1\tP2\tQ6\t\"Elmo\"",
+                    "Q6\tP1\tQ5\t\"Fred\""]
+        self.assertEqual(self.lift("--label-file", self.label_path, "--columns-to-lift", "node1"), expected)
+        self.assertEqual(self.lift("--label-file", self.label_path, "--columns-to-lift", "node1",
+                                   "--input-file-is-presorted", "--label-file-is-presorted"), expected)
+
+    def test_kgtk_lift_label_file_all_columns(self):
+        self.assertEqual(self.lift("--label-file", self.label_path),
+                         ["node1\tlabel\tnode2\tnode1;label\tlabel;label\tnode2;label",
+                          "Q1\tP1\tQ5\t\"Elmo\"\t\"instance of\"\t\"human\"",
+                          "Q1\tP2\tQ6\t\"Elmo\"\t\"friend\"\t\"Fred\"",
+                          "Q6\tP1\tQ5\t\"Fred\"\t\"instance of\"\t\"human\""])
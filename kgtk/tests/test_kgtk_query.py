@@ -456,6 +456,245 @@ class TestKGTKQuery(unittest.TestCase):
         self.assertTrue('m13' in ids)
         self.assertTrue('m14' in ids)
 
+    def get_index_names(self):
+        import sqlite3
+        conn = sqlite3.connect(self.sqldb)
+        try:
+            return [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")]
+        finally:
+            conn.close()
+
+    def test_kgtk_query_date_filter_expression_index(self):
+        cli_entry("kgtk", "query", "-i", self.quals_path, "-o", f'{self.temp_dir}/out.tsv', "--match",
+                  "(eid)-[q]->(time)", "--where", "time.kgtk_date_year < 2005 and q.label = 'starts'",
+                  '--graph-cache', self.sqldb)
+        df = pd.read_csv(f'{self.temp_dir}/out.tsv', sep='\t')
+        self.assertEqual(sorted(df['id'].unique()), ['m11', 'm13'])
+        self.assertIn('graph_1_kgtk_date_year_node2_idx', self.get_index_names())
+
+        # an explicitly requested expression index is created regardless of the index mode:
+        cli_entry("kgtk", "query", "-i", self.quals_path, "-o", f'{self.temp_dir}/out.tsv', "--match",
+                  "(eid)-[q]->(time)", "--where", "kgtk_date_month(time) = 11",
+                  '--index', 'none', '--expression-index', 'kgtk_quantity_number(node2)',
+                  '--graph-cache', self.sqldb)
+        df = pd.read_csv(f'{self.temp_dir}/out.tsv', sep='\t')
+        self.assertEqual(list(df['id']), ['m12'])
+        indexes = self.get_index_names()
+        self.assertIn('graph_1_kgtk_quantity_number_node2_idx', indexes)
+        self.assertNotIn('graph_1_kgtk_date_month_node2_idx', indexes)
+
+    def test_kgtk_query_date_filter_non_deterministic_functions(self):
+        # where user functions can't be registered as deterministic, they can't be indexed,
+        # so auto mode doesn't create expression indexes and the query still runs:
+        from unittest import mock
+        from kgtk.kypher.sqlstore import SqliteStore
+        with mock.patch.object(SqliteStore, 'DETERMINISTIC_FUNCTIONS', False):
+            cli_entry("kgtk", "query", "-i", self.quals_path, "-o", f'{self.temp_dir}/out.tsv', "--match",
+                      "(eid)-[q]->(time)", "--where", "time.kgtk_date_year < 2005 and q.label = 'starts'",
+                      '--graph-cache', self.sqldb)
+            df = pd.read_csv(f'{self.temp_dir}/out.tsv', sep='\t')
+            self.assertEqual(sorted(df['id'].unique()), ['m11', 'm13'])
+            self.assertNotIn('graph_1_kgtk_date_year_node2_idx', self.get_index_names())
+            # explicitly requested expression indexes are reported as errors:
+            self.assertNotEqual(cli_entry("kgtk", "query", "-i", self.quals_path, "--match", "(eid)-[q]->(time)",
+                                          '--expression-index', 'kgtk_date_year(node2)', '--graph-cache', self.sqldb), 0)
+
+    def test_kgtk_query_appended_graph(self):
+        quals_path = f'{self.temp_dir}/quals.tsv'
+        shutil.copyfile(self.quals_path, quals_path)
+        def query(*args):
+            cli_entry("kgtk", "query", "-i", quals_path, "-o", f'{self.temp_dir}/out.tsv', "--match",
+                      "(eid)-[q]->(time)", "--where", "time.kgtk_date_year < 2005",
+                      '--graph-cache', self.sqldb, *args)
+            return sorted(pd.read_csv(f'{self.temp_dir}/out.tsv', sep='\t')['id'])
+        self.assertEqual(query(), ['m11', 'm12', 'm13', 'm14'])
+        self.assertIn('graph_1_kgtk_date_year_node2_idx', self.get_index_names())
+
+        # appended rows are imported into the existing table and its indexes:
+        with open(quals_path, 'a') as out:
+            out.write('m16\tw16\tstarts\t^1950-01-01T00:00:00Z/11\tquals\n')
+        self.assertEqual(query('--index', 'none'), ['m11', 'm12', 'm13', 'm14', 'm16'])
+        self.assertIn('graph_1_kgtk_date_year_node2_idx', self.get_index_names())
+        import sqlite3
+        conn = sqlite3.connect(self.sqldb)
+        try:
+            self.assertEqual(conn.execute("SELECT graph FROM fileinfo").fetchall(), [('graph_1',)])
+            self.assertEqual(conn.execute("SELECT count(*) FROM graph_1").fetchone()[0], 6)
+        finally:
+            conn.close()
+
+        # a rewritten file gets imported from scratch:
+        with open(quals_path, 'w') as out:
+            out.write('id\tnode1\tlabel\tnode2\tgraph\n')
+            out.write('m21\tw21\tstarts\t^1900-01-01T00:00:00Z/11\tquals\n')
+        self.assertEqual(query(), ['m21'])
+
+    def test_kgtk_query_variable_length_path(self):
+        taxonomy_path = f'{self.temp_dir}/taxonomy.tsv'
+        with open(taxonomy_path, 'w') as out:
+            out.write('id\tnode1\tlabel\tnode2\n')
+            # b -> c -> d -> b is a cycle:
+            for i, (node1, label, node2) in enumerate([('a', 'P279', 'b'), ('b', 'P279', 'c'), ('c', 'P279', 'd'),
+                                                       ('d', 'P279', 'b'), ('x', 'P31', 'a'), ('e', 'P279', 'c')]):
+                out.write(f't{i}\t{node1}\t{label}\t{node2}\n')
+        def query(match, ret='x, y'):
+            cli_entry("kgtk", "query", "-i", taxonomy_path, "-o", f'{self.temp_dir}/out.tsv', "--match", match,
+                      "--return", ret, '--graph-cache', self.sqldb)
+            df = pd.read_csv(f'{self.temp_dir}/out.tsv', sep='\t')
+            return sorted(map(tuple, df.values.tolist()))
+
+        self.assertEqual(query("(x:a)-[:P279*]->(y)"), [('a', 'b'), ('a', 'c'), ('a', 'd')])
+        self.assertEqual(query("(x)-[:P279*]->(y:c)"),
+                         [('a', 'c'), ('b', 'c'), ('c', 'c'), ('d', 'c'), ('e', 'c')])
+        self.assertEqual(query("(x)-[:P279*2]->(y)"),
+                         [('a', 'c'), ('b', 'd'), ('c', 'b'), ('d', 'c'), ('e', 'd')])
+        self.assertEqual(query("(x:a)-[:P279*..2]->(y)"), [('a', 'b'), ('a', 'c')])
+        self.assertEqual(query("(i)-[:P31]->(x), (x)-[:P279*2..3]->(y)", ret='i, y'), [('x', 'c'), ('x', 'd')])
+        self.assertEqual(len(query("(x)-[:P279*]->(y)")), 15)
+
+    def test_kgtk_query_para_file(self):
+        para_path = f'{self.temp_dir}/paras.tsv'
+        with open(para_path, 'w') as out:
+            out.write('person\tlabel\n')
+            out.write('Hans\tname\n')
+            out.write('Nobody\tname\n')
+            out.write('Otto\tloves\n')
+            out.write('Hans\tloves\n')
+        def query(mode, ret='p, n', order=None):
+            cli_entry("kgtk", "query", "-i", self.file_path, "-o", f'{self.temp_dir}/out.tsv', "--match",
+                      "(p)-[r]->(n)", "--where", "p = $person AND r.label = $label", "--return", ret,
+                      *(order and ['--order-by', order] or []),
+                      "--para-file", para_path, "--para-file-mode", mode, '--graph-cache', self.sqldb)
+            return pd.read_csv(f'{self.temp_dir}/out.tsv', sep='\t')
+
+        for mode in ('join', 'prepared'):
+            df = query(mode)
+            self.assertEqual(list(df.columns), ['para_row', 'node1', 'node2'])
+            self.assertEqual(df.values.tolist(), [[1, 'Hans', "'Hans'@de"], [3, 'Otto', 'Susi'], [4, 'Hans', 'Molly']])
+
+        # aggregation applies to each parameter row, so 'auto' runs it once per row:
+        df = query('auto', ret='count(n) as n')
+        self.assertEqual(df.values.tolist(), [[1, 1], [2, 0], [3, 1], [4, 1]])
+        with self.assertRaises(Exception):
+            query('join', ret='count(n) as n')
+
+    def test_kgtk_query_cache_results(self):
+        graph_path = f'{self.temp_dir}/graph.tsv'
+        shutil.copyfile(self.file_path, graph_path)
+        def query(*args):
+            cli_entry("kgtk", "query", "-i", graph_path, "-o", f'{self.temp_dir}/out.tsv', "--match",
+                      "(p)-[r]->()", "--return", "r.label as label, count(p) as n", "--order-by", "label",
+                      '--graph-cache', self.sqldb, *args)
+            return pd.read_csv(f'{self.temp_dir}/out.tsv', sep='\t').values.tolist()
+        import sqlite3
+        def execute(sql):
+            conn = sqlite3.connect(self.sqldb)
+            try:
+                result = conn.execute(sql).fetchall()
+                conn.commit()
+                return result
+            finally:
+                conn.close()
+
+        # the edge counts per label of data/kypher/graph.tsv:
+        expected = [['friend', 1], ['loves', 3], ['name', 5]]
+        self.assertEqual(query('--cache-results'), expected)
+        self.assertEqual(execute('SELECT count(*) FROM querycache'), [(1,)])
+        self.assertEqual(execute('SELECT version FROM graphinfo'), [(1,)])
+        # a cached result is used without looking at the graph data:
+        execute('DELETE FROM graph_1')
+        self.assertEqual(query('--cache-results'), expected)
+        self.assertEqual(query(), [])
+
+        # modifying the graph invalidates its cached results:
+        with open(graph_path, 'a') as out:
+            out.write('e31\tHans\tfriend\tJoe\n')
+        self.assertEqual(query('--cache-results'), [['friend', 1]])
+        self.assertEqual(execute('SELECT count(*) FROM querycache'), [(1,)])
+        self.assertEqual(execute('SELECT version FROM graphinfo'), [(2,)])
+
+        # results that exceed the size budget are not cached:
+        execute('DELETE FROM querycache')
+        query('--cache-results', '--result-cache-size', '0')
+        self.assertEqual(execute('SELECT count(*) FROM querycache'), [(0,)])
+
+    def test_kgtk_query_cache_results_upgrades_graph_info(self):
+        def query(*args):
+            cli_entry("kgtk", "query", "-i", self.file_path, "-o", f'{self.temp_dir}/out.tsv', "--match",
+                      "(p)-[:loves]->(n)", "--return", "count(p) as n", '--graph-cache', self.sqldb, *args)
+            return pd.read_csv(f'{self.temp_dir}/out.tsv', sep='\t').values.tolist()
+        import sqlite3
+        self.assertEqual(query(), [[3]])
+        # turn the graph info table into one of a store created before graphs had versions:
+        conn = sqlite3.connect(self.sqldb)
+        try:
+            conn.execute('CREATE TABLE graphinfo_old AS SELECT name, shasum, header, size, acctime FROM graphinfo')
+            conn.execute('DROP TABLE graphinfo')
+            conn.execute('ALTER TABLE graphinfo_old RENAME TO graphinfo')
+            conn.commit()
+        finally:
+            conn.close()
+        self.assertEqual(query('--cache-results'), [[3]])
+        self.assertEqual(query('--cache-results'), [[3]])
+        conn = sqlite3.connect(self.sqldb)
+        try:
+            self.assertEqual(conn.execute('SELECT version FROM graphinfo').fetchall(), [(None,)])
+            self.assertEqual(conn.execute('SELECT count(*) FROM querycache').fetchall(), [(1,)])
+        finally:
+            conn.close()
+
+    def test_kgtk_query_output_format(self):
+        cli_entry("kgtk", "query", "-i", self.file_path, "-o", f'{self.temp_dir}/out.jsonl', "--match",
+                  "(p)-[:loves]->(n)", "--return", "p, n", "--order-by", "p", '--graph-cache', self.sqldb)
+        with open(f'{self.temp_dir}/out.jsonl') as inp:
+            lines = inp.read().splitlines()
+        self.assertEqual(lines[0], '["node1","node2"]')
+        self.assertEqual(lines[1], '["Hans","Molly"]')
+        self.assertEqual(len(lines), 4)
+
+        cli_entry("kgtk", "query", "-i", self.file_path, "-o", f'{self.temp_dir}/out.tsv.gz', "--match",
+                  "(p)-[:loves]->(n)", "--output-format", "kgtk", "--gzip-in-parallel", '--graph-cache', self.sqldb)
+        df = pd.read_csv(f'{self.temp_dir}/out.tsv.gz', sep='\t')
+        self.assertEqual(len(df), 3)
+
+    def test_kgtk_query_output_graph(self):
+        cli_entry("kgtk", "query", "-i", self.file_path, "--match", "(p)-[r:loves]->(n)",
+                  "--return", "p as node1, 'likes' as label, n as node2",
+                  "--output-graph", "likes", '--graph-cache', self.sqldb)
+        cli_entry("kgtk", "query", "-i", "likes", "-o", f'{self.temp_dir}/out.tsv', "--match", "(p)-[:likes]->(n)",
+                  "--return", "p, n", "--order-by", "p, n", '--graph-cache', self.sqldb)
+        df = pd.read_csv(f'{self.temp_dir}/out.tsv', sep='\t')
+        self.assertEqual(df.values.tolist(), [['Hans', 'Molly'], ['Joe', 'Joe'], ['Otto', 'Susi']])
+        self.assertNotEqual(cli_entry("kgtk", "query", "-i", "likes", "--output-graph", "likes", '--graph-cache', self.sqldb), 0)
+
+    def test_kgtk_query_procs(self):
+        def query(*args):
+            cli_entry("kgtk", "query", "-i", self.file_path, "-o", f'{self.temp_dir}/out.tsv',
+                      '--graph-cache', self.sqldb, *args)
+            return pd.read_csv(f'{self.temp_dir}/out.tsv', sep='\t').values.tolist()
+
+        for args in (["--match", "(p)-[r]->(n)", "--order-by", "n desc, p", "--skip", "1", "--limit", "5"],
+                     ["--match", "(p)-[r]->(n)", "--return", "distinct r.label as label", "--order-by", "label"],
+                     ["--match", "(p)-[r]->(n)", "--return", "r.label as label, count(p) as n, min(n) as first",
+                      "--order-by", "n desc"],
+                     ["--match", "(p)-[:loves]->(n)-[:name]->(name)", "--return", "p, name", "--order-by", "name"]):
+            self.assertEqual(query("--procs", "2", *args), query(*args))
+        df = query("--procs", "3", "--match", "(p)-[r]->(n)", "--return", "count(r) as n")
+        self.assertEqual(df, [[9]])
+        # the merged rows are cached once they have all been written, and reused:
+        args = ["--match", "(p)-[r]->(n)", "--order-by", "n desc, p", "--cache-results"]
+        self.assertEqual(query("--procs", "2", *args), query(*args[:-1]))
+        self.assertEqual(query("--procs", "2", *args), query(*args[:-1]))
+
+    def test_kgtk_query_merge_partition_results_streams(self):
+        from kgtk.kypher.query import merge_partition_results
+        plan = {'hidden': 1, 'sort': [(1, False)], 'aggregates': None, 'distinct': False}
+        results = [[('a', 1), ('c', 3)], iter([('b', 2), ('d', 4)])]
+        rows = merge_partition_results(results, plan, limit=2, skip=1)
+        self.assertNotIsInstance(rows, list)
+        self.assertEqual(next(rows), ('b',))
+        self.assertEqual(list(rows), [('c',)])
+
     def test_kgtk_query_three_graphs(self):
         cli_entry("kgtk", "query", "-i", self.works_path,
                   "-i", self.quals_path,
@@ -1057,6 +1296,46 @@ class TestKGTKQuery(unittest.TestCase):
                 """eq8\tq8\tquantity\t1.609344e03[-0.1,+0.2]Q11573\t0.2"""]
         self.assert_literal_access_query_result(query, result, rowids=['eq5', 'eq6', 'eq7', 'eq8'])
 
+    def test_kgtk_query_literal_access_kgtk_quantity_several_accessors(self):
+        query = """kgtk query -i {LITERALS} -o {OUTPUT} --graph-cache {DB}
+                        --match  '(n1)-[r:quantity]->(v)'
+                        --return 'r, n1, r.label, v, kgtk_quantity_number(v) as `node2;number`, kgtk_quantity_si_units(v) as `node2;si_units`, kgtk_quantity_low_tolerance(v) as `node2;low_tolerance`'
+                """
+        result=["""id\tnode1\tlabel\tnode2\tnode2;number\tnode2;si_units\tnode2;low_tolerance""",
+                """eq1\tq1\tquantity\t0\t0\t\t""",
+                """eq2\tq2\tquantity\t0.0\t0.0\t\t""",
+                """eq3\tq3\tquantity\t+1234\t1234\t\t""",
+                """eq4\tq4\tquantity\t-12345.1234\t-12345.1234\t\t""",
+                """eq5\tq5\tquantity\t4567.12e-10\t4.56712e-07\t\t""",
+                """eq6\tq6\tquantity\t100m\t100\tm\t""",
+                """eq7\tq7\tquantity\t+1.609344e03[-0.1,+0.2]m\t1609.344\tm\t-0.1""",
+                """eq8\tq8\tquantity\t1.609344e03[-0.1,+0.2]Q11573\t1609.344\t\t-0.1"""]
+        self.assert_literal_access_query_result(query, result, rowids=['eq5', 'eq6', 'eq7', 'eq8'])
+
+    def test_kgtk_query_literal_parser_shared_across_threads(self):
+        # The parsers are shared by all connections, so concurrent parses of
+        # different literals must never return each other's matches:
+        from concurrent.futures import ThreadPoolExecutor
+        from kgtk.kypher.sqlstore import LiteralParser, QUANTITY_PARSER
+        parser = LiteralParser(QUANTITY_PARSER.regex, cache_size=0)
+        def parse_all(literal):
+            return all(parser.parse(literal).group(0) == literal for i in range(20000))
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            self.assertTrue(all(executor.map(parse_all, ['1m', '22kg', '333Q11573', '4444'])))
+
+    def test_kgtk_query_literal_parse_cache_size(self):
+        # The LRU caches are off unless they are given a size:
+        from kgtk.kypher import sqlstore
+        self.assertEqual(sqlstore.QUANTITY_PARSER.cached_match, sqlstore.QUANTITY_PARSER.regex.match)
+        try:
+            sqlstore.set_literal_parse_cache_size(16)
+            for literal in ['1m', '22kg', '1m', '22kg']:
+                self.assertEqual(sqlstore.parse_quantity(literal).group(0), literal)
+            self.assertEqual(sqlstore.QUANTITY_PARSER.cached_match.cache_info().hits, 2)
+        finally:
+            sqlstore.set_literal_parse_cache_size(0)
+        self.assertEqual(sqlstore.LITERAL_PARSE_CACHE_SIZE, 0)
+
     def test_kgtk_query_literal_access_kgtk_geo_coords(self):
         query = """kgtk query -i {LITERALS} -o {OUTPUT} --graph-cache {DB}
                         --match  '(n1:st1)-[r]->(v)'
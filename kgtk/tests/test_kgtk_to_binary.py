@@ -0,0 +1,101 @@
+import gzip
+import os
+import shutil
+import unittest
+import tempfile
+from pathlib import Path
+from kgtk.cli_entry import cli_entry
+from kgtk.io.kgtkbinary import KgtkBinaryFile
+from kgtk.io.kgtkreader import KgtkReader, KgtkReaderOptions
+
+
+class TestKGTKToBinary(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_path = f'{self.temp_dir}/edges.tsv'
+        shutil.copyfile('data/sample_kgtk_edge_file.tsv', self.file_path)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def read(self, **options):
+        kr = KgtkReader.open(Path(self.file_path), options=KgtkReaderOptions(**options))
+        rows = list(kr)
+        kr.close()
+        return kr.column_names, rows
+
+    def test_kgtk_to_binary(self):
+        column_names, rows = self.read()
+        cli_entry("kgtk", "to-binary", "-i", self.file_path)
+        self.assertTrue(os.path.exists(self.file_path + ".kbin"))
+
+        self.assertEqual(self.read(require_binary_cache=True), (column_names, rows))
+        self.assertEqual(self.read(use_binary_cache=True), (column_names, rows))
+
+        # Sampling gives the same rows as reading the file.
+        for options in ({"record_limit": len(rows), "tail_count": 5},
+                        {"initial_skip_count": 4, "every_nth_record": 3, "record_limit": 20}):
+            self.assertEqual(self.read(require_binary_cache=True, **options), self.read(use_binary_cache=False, **options))
+
+        # The cache is not used when validation is requested.
+        with self.assertRaises(ValueError):
+            self.read(require_binary_cache=True, repair_and_validate_lines=True)
+
+    def test_kgtk_to_binary_sampling(self):
+        # The cache holds all of the data lines, so sampling options are rejected.
+        self.assertNotEqual(cli_entry("kgtk", "to-binary", "-i", self.file_path, "--record-limit", "1"), 0)
+        self.assertFalse(os.path.exists(self.file_path + ".kbin"))
+
+        # The cache is only used when it is requested.
+        with open(self.file_path, "rb") as f:
+            line_count = len(f.readlines()) - 1
+        cli_entry("kgtk", "to-binary", "-i", self.file_path)
+        kr = KgtkReader.open(Path(self.file_path))
+        self.assertIsNone(kr.binary)
+        kr.close()
+        self.assertEqual(len(self.read(require_binary_cache=True)[1]), line_count)
+
+    def test_kgtk_to_binary_unique_procs(self):
+        # kgtk unique --procs reads raw lines, which the cache does not have.
+        gz_path = self.file_path + ".gz"
+        with open(self.file_path, "rb") as f_in, gzip.open(gz_path, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        cli_entry("kgtk", "to-binary", "-i", gz_path)
+
+        outputs = [ ]
+        for options in ([ ], ["--procs", "2"], ["--procs", "2", "--use-binary-cache"]):
+            output_path = f'{self.temp_dir}/unique.tsv'
+            cli_entry("kgtk", "unique", "-i", gz_path, "--column", "node1", "-o", output_path, *options)
+            with open(output_path) as f:
+                outputs.append(f.read())
+        self.assertGreater(len(outputs[0].splitlines()), 1)
+        self.assertEqual(outputs[1], outputs[0])
+        self.assertEqual(outputs[2], outputs[0])
+
+    def test_kgtk_to_binary_columns(self):
+        column_names, rows = self.read()
+        cli_entry("kgtk", "to-binary", "-i", self.file_path)
+        binary = KgtkBinaryFile.load(KgtkBinaryFile.binary_path(Path(self.file_path)))
+        self.assertEqual(binary.column_names, column_names)
+        self.assertEqual(binary.row_count, len(rows))
+
+        # Read only the node1 and label columns.
+        node1_idx = column_names.index("node1")
+        label_idx = column_names.index("label")
+        self.assertEqual(list(binary.iter_rows(column_indexes=[node1_idx, label_idx])),
+                         [[row[node1_idx], row[label_idx]] for row in rows])
+
+        # Codes compare like the values they encode.
+        node1 = binary.columns[node1_idx]
+        for idx in range(1, len(rows)):
+            self.assertEqual(rows[idx - 1][node1_idx] < rows[idx][node1_idx],
+                             node1.codes[idx - 1] < node1.codes[idx])
+
+    def test_kgtk_to_binary_stale(self):
+        cli_entry("kgtk", "to-binary", "-i", self.file_path)
+        with open(self.file_path, "a") as f:
+            f.write("Q1-P1-1\tQ1\tP1\tQ2\tnormal\n")
+        column_names, rows = self.read()
+        self.assertEqual(rows[-1], ["Q1-P1-1", "Q1", "P1", "Q2", "normal"])
+        with self.assertRaises(ValueError):
+            self.read(require_binary_cache=True)
@@ -0,0 +1,120 @@
+import shutil
+import unittest
+import tempfile
+from pathlib import Path
+import pandas as pd
+from kgtk.cli_entry import cli_entry
+from kgtk.io.kgtkreader import KgtkReader, KgtkReaderOptions
+from kgtk.utils.validationaction import ValidationAction
+from kgtk.utils.sketches import ApproximateCounts
+
+
+class TestKGTKUnique(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_path = f'{self.temp_dir}/skewed.tsv'
+        with open(self.file_path, 'w') as f:
+            f.write("node1\tlabel\tnode2\n")
+            for i in range(5000):
+                # P0 is the most frequent label, then P1, ...; plus a long tail of singletons.
+                label = "P%d" % (i % 7 if i % 2 == 0 else i % 3) if i % 5 else "T%d" % i
+                f.write(f"Q{i}\t{label}\tQ{i % 11}\n")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def test_kgtk_unique_procs_matches_serial(self):
+        cli_entry("kgtk", "unique", "-i", self.file_path, "-o", f'{self.temp_dir}/serial.tsv', "--column", "label")
+        cli_entry("kgtk", "unique", "-i", self.file_path, "-o", f'{self.temp_dir}/parallel.tsv', "--column", "label",
+                  "--procs", "2")
+        serial = pd.read_csv(f'{self.temp_dir}/serial.tsv', sep='\t')
+        parallel = pd.read_csv(f'{self.temp_dir}/parallel.tsv', sep='\t')
+        self.assertTrue(serial.equals(parallel))
+
+    def test_kgtk_unique_approximate(self):
+        cli_entry("kgtk", "unique", "-i", self.file_path, "-o", f'{self.temp_dir}/exact.tsv', "--column", "label")
+        cli_entry("kgtk", "unique", "-i", self.file_path, "-o", f'{self.temp_dir}/approximate.tsv', "--column", "label",
+                  "--approximate", "--top-k", "3")
+        exact = pd.read_csv(f'{self.temp_dir}/exact.tsv', sep='\t').sort_values("node2", ascending=False)
+        approximate = pd.read_csv(f'{self.temp_dir}/approximate.tsv', sep='\t')
+        self.assertEqual(list(approximate["node1"]), list(exact["node1"][:3]))
+        self.assertEqual(list(approximate["node2"]), list(exact["node2"][:3]))
+
+    def test_kgtk_unique_projects_columns(self):
+        # Extra columns after the counted column are not split, but the counts are unchanged.
+        wide_path = f'{self.temp_dir}/wide.tsv'
+        df = pd.read_csv(self.file_path, sep='\t')
+        df["note"] = "x"
+        df["rank"] = "normal"
+        df.to_csv(wide_path, sep='\t', index=False)
+        for args in ([], ["--where", "node2", "--in", "Q1", "Q2"], ["--format", "node"]):
+            cli_entry("kgtk", "unique", "-i", self.file_path, "-o", f'{self.temp_dir}/narrow_out.tsv', "--column", "label", *args)
+            cli_entry("kgtk", "unique", "-i", wide_path, "-o", f'{self.temp_dir}/wide_out.tsv', "--column", "label", *args)
+            narrow = pd.read_csv(f'{self.temp_dir}/narrow_out.tsv', sep='\t')
+            wide = pd.read_csv(f'{self.temp_dir}/wide_out.tsv', sep='\t')
+            self.assertTrue(narrow.equals(wide))
+
+        cli_entry("kgtk", "to-binary", "-i", wide_path)
+        cli_entry("kgtk", "unique", "-i", wide_path, "-o", f'{self.temp_dir}/binary_out.tsv', "--column", "label",
+                  "--use-binary-cache")
+        cli_entry("kgtk", "unique", "-i", wide_path, "-o", f'{self.temp_dir}/wide_out.tsv', "--column", "label")
+        self.assertTrue(pd.read_csv(f'{self.temp_dir}/binary_out.tsv', sep='\t').equals(
+            pd.read_csv(f'{self.temp_dir}/wide_out.tsv', sep='\t')))
+
+    def test_kgtk_unique_projection_validates_values(self):
+        bad_path = f'{self.temp_dir}/dates.tsv'
+        with open(bad_path, 'w') as f:
+            f.write("node1\tlabel\tnode2\n")
+            f.write("Q1\tP1\t^2020-01-01T00:00:00Z/11\n")
+            f.write("Q2\tP1\t^2020-13-45T00:00:00Z/11\n")
+            f.write("Q3\tP2\t^2020-01-01T00:00:00Z/11\n")
+        cli_entry("kgtk", "unique", "-i", bad_path, "-o", f'{self.temp_dir}/out.tsv', "--column", "node2",
+                  "--repair-and-validate-values", "--invalid-value-action", "EXCLUDE")
+        df = pd.read_csv(f'{self.temp_dir}/out.tsv', sep='\t')
+        self.assertEqual(df.values.tolist(), [["^2020-01-01T00:00:00Z/11", "count", 2]])
+
+        # Reading the projected columns directly, the bad value is still rejected.
+        kr = KgtkReader.open(Path(bad_path), options=KgtkReaderOptions(repair_and_validate_values=True,
+                                                                        invalid_value_action=ValidationAction.ERROR))
+        kr.project([kr.node1_column_idx, kr.node2_column_idx])
+        with self.assertRaises(ValueError):
+            list(kr)
+        kr.close()
+
+        # The columns cannot be projected after reading data lines.
+        kr = KgtkReader.open(Path(bad_path))
+        kr.nextrow()
+        with self.assertRaises(ValueError):
+            kr.project([kr.label_column_idx])
+        kr.close()
+
+    def test_approximate_counts_merge(self):
+        values = ["a"] * 50 + ["b"] * 30 + ["v%d" % i for i in range(2000)]
+        counts1 = ApproximateCounts(top_k=2, width=4096, precision=12)
+        counts2 = ApproximateCounts(top_k=2, width=4096, precision=12)
+        counts1.add_batch(values[:1000])
+        counts2.add_batch(values[1000:])
+        counts1.merge(counts2)
+        self.assertEqual(counts1.top(), [("a", 50), ("b", 30)])
+        self.assertAlmostEqual(counts1.distinct_count() / 2002, 1.0, delta=0.05)
+
+    def test_kgtk_unique_procs_blank_and_comment_lines(self):
+        # Without line validation, the serial reader counts blank and comment lines
+        # as rows, and the parallel workers must do the same.
+        with open(self.file_path, 'a') as f:
+            f.write("# a comment\n")
+            f.write("\n")
+        cli_entry("kgtk", "unique", "-i", self.file_path, "-o", f'{self.temp_dir}/serial.tsv', "--column", "node1")
+        cli_entry("kgtk", "unique", "-i", self.file_path, "-o", f'{self.temp_dir}/parallel.tsv', "--column", "node1",
+                  "--procs", "2")
+        with open(f'{self.temp_dir}/serial.tsv') as f:
+            serial = f.read()
+        with open(f'{self.temp_dir}/parallel.tsv') as f:
+            self.assertEqual(serial, f.read())
+        self.assertIn("# a comment\tcount\t1\n", serial)
+
+        # The blank line is a short row for the label column.
+        self.assertNotEqual(cli_entry("kgtk", "unique", "-i", self.file_path, "-o", f'{self.temp_dir}/serial.tsv',
+                                      "--column", "label"), 0)
+        self.assertNotEqual(cli_entry("kgtk", "unique", "-i", self.file_path, "-o", f'{self.temp_dir}/parallel.tsv',
+                                      "--column", "label", "--procs", "2"), 0)
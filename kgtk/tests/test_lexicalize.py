@@ -0,0 +1,51 @@
+import shutil
+import unittest
+import tempfile
+from kgtk.cli_entry import cli_entry
+
+
+class TestLexicalize(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        groups = [ ]
+        for i in range(60):
+            qnode = f"Q{i:03d}"
+            groups.append([f"{qnode}\tlabel\t'item {i}'@en\n",
+                           f"{qnode}\tdescription\t'thing {i}'@en\n",
+                           f"{qnode}\tP31\tQ{(i * 7) % 60:03d}\n"])
+        with open(f'{self.temp_dir}/sorted.tsv', 'w') as f:
+            f.write("node1\tlabel\tnode2\n")
+            for group in groups:
+                f.writelines(group)
+        with open(f'{self.temp_dir}/grouped.tsv', 'w') as f:
+            f.write("node1\tlabel\tnode2\n")
+            for group in reversed(groups):
+                f.writelines(group)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def lexicalize(self, input_name: str, output_name: str, *args):
+        cli_entry("kgtk", "lexicalize",
+                  "-i", f'{self.temp_dir}/{input_name}',
+                  "--entity-label-file", f'{self.temp_dir}/sorted.tsv',
+                  "-o", f'{self.temp_dir}/{output_name}', *args)
+        with open(f'{self.temp_dir}/{output_name}') as f:
+            return f.read().splitlines()
+
+    def test_lexicalize_procs_matches_serial(self):
+        serial = self.lexicalize("grouped.tsv", "serial.tsv")
+        parallel = self.lexicalize("grouped.tsv", "parallel.tsv", "--procs", "2", "--node-batch-size", "7")
+        self.assertEqual(serial, parallel)
+        self.assertEqual(len(serial), 61)
+        self.assertEqual(serial[1], 'Q000\tsentence\t"item 0, thing 0, is an item 0."')
+
+    def test_lexicalize_grouped_keeps_input_order(self):
+        serial = self.lexicalize("grouped.tsv", "serial.tsv", "--grouped")
+        parallel = self.lexicalize("grouped.tsv", "parallel.tsv", "--grouped", "--procs", "2", "--node-batch-size", "7")
+        self.assertEqual(serial, parallel)
+        self.assertEqual([line.split("\t")[0] for line in serial[1:]], [f"Q{i:03d}" for i in reversed(range(60))])
+
+        presorted = self.lexicalize("sorted.tsv", "presorted.tsv", "--presorted", "--procs", "2")
+        self.assertEqual(presorted[0], serial[0])
+        self.assertEqual(presorted[1:], list(reversed(serial[1:])))
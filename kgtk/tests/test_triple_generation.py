@@ -1,8 +1,26 @@
 import unittest
+import io
 import os
-from kgtk.generator import TripleGenerator
+import rdflib
+from kgtk.generator import TripleGenerator, FastTripleGenerator
 from pathlib import Path
 
+# The etk output uses these prefixes without declaring them.
+UNDECLARED_PREFIXES = "@prefix rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#> .\n" \
+                      "@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .\n" \
+                      "@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .\n"
+NUMERIC_TYPES = {rdflib.XSD.decimal, rdflib.XSD.double, rdflib.XSD.integer}
+
+
+def normalized_triples(ttl: str):
+    """
+    Parse the triples, comparing numeric literals by value: rdflib writes decimals
+    as bare numbers, which read back as doubles when they have an exponent.
+    """
+    graph = rdflib.Graph().parse(data=ttl, format="turtle")
+    return {(s, p, float(o) if isinstance(o, rdflib.Literal) and o.datatype in NUMERIC_TYPES else o)
+            for s, p, o in graph}
+
 
 class TestTripleGeneration(unittest.TestCase):
     def test_truthy_dates_generation(self):
@@ -206,4 +224,64 @@ class TestTripleGeneration(unittest.TestCase):
         p = Path("data/corrupted_warning_tmp.log")
         p.unlink()
         p = Path('data/corrupted_tmp.ttl')
-        p.unlink()
\ No newline at end of file
+        p.unlink()
+
+    def test_fast_serializer_matches_etk(self):
+        wikidata_property_file = 'data/wikidata_properties.tsv'
+        for tsv_file, ttl_file, truthy in [('data/P10.tsv', 'data/P10_truthy.ttl', True),
+                                           ('data/P10.tsv', 'data/P10_not_truthy.ttl', False),
+                                           ('data/Q57160439.tsv', 'data/Q57160439_truthy.ttl', True),
+                                           ('data/Q57160439.tsv', 'data/Q57160439_not_truthy.ttl', False),
+                                           ('data/small_values.tsv', 'data/small_values.ttl', True),
+                                           ('data/corrupted_kgtk.tsv', 'data/corrupted.ttl', True)]:
+            o = io.StringIO()
+            generator = FastTripleGenerator(prop_file=wikidata_property_file, label_set='label', alias_set='aliases',
+                                            description_set='descriptions', warning=True, n=100, truthy=truthy,
+                                            use_id=True, dest_fp=o, log_path="data/fast_warning.log",
+                                            prop_declaration=False, prefix_path="NONE")
+            with open(tsv_file) as fp:
+                for line_num, edge in enumerate(fp):
+                    if edge.startswith("#") or len(edge.strip("\n")) == 0:
+                        continue
+                    generator.entry_point(line_num + 1, edge)
+            generator.finalize()
+
+            with open(ttl_file) as f:
+                expected = normalized_triples(UNDECLARED_PREFIXES + f.read())
+            self.assertEqual(normalized_triples(o.getvalue()), expected, ttl_file)
+            for line in o.getvalue().splitlines():
+                # one triple per line after the prefix header
+                self.assertTrue(line == "" or line.endswith(" ."), line)
+        p = Path("data/fast_warning.log")
+        p.unlink()
+
+    def test_procs_with_data_type_edges(self):
+        # The property declarations in the input are spread over several shards.
+        lines = ["node1\tlabel\tnode2\tid\n",
+                 "P9001\tdata_type\tquantity\tP9001-data_type\n",
+                 "P9001\tlabel\t'amount'@en\tP9001-label\n",
+                 "Q1\tP9001\t5\tQ1-P9001-1\n",
+                 "P9002\tdata_type\tstring\tP9002-data_type\n",
+                 "Q2\tP9001\t7\tQ2-P9001-1\n",
+                 "Q2\tP9002\t\"text\"\tQ2-P9002-1\n",
+                 "Q3\tP9002\t\"more\"\tQ3-P9002-1\n",
+                 "Q3\tP9001\t9\tQ3-P9001-1\n"]
+
+        def generate(procs):
+            o = io.StringIO()
+            generator = TripleGenerator(prop_file='data/wikidata_properties.tsv', label_set='label', alias_set='aliases',
+                                        description_set='descriptions', warning=True, n=100, truthy=True, use_id=True,
+                                        dest_fp=o, log_path="data/procs_warning.log", prop_declaration=False,
+                                        prefix_path="NONE")
+            if procs > 1:
+                generator.generate_in_parallel(enumerate(lines, start=1), procs, 2)
+            else:
+                for line_number, edge in enumerate(lines, start=1):
+                    generator.entry_point(line_number, edge)
+            generator.finalize()
+            return normalized_triples(UNDECLARED_PREFIXES + o.getvalue())
+
+        expected = generate(1)
+        self.assertGreater(len(expected), 0)
+        self.assertEqual(generate(2), expected)
+        Path("data/procs_warning.log").unlink()
@@ -0,0 +1,68 @@
+import shutil
+import unittest
+import tempfile
+from pathlib import Path
+from kgtk.cli_entry import cli_entry
+from kgtk.unreify.kgtksortbuffer import KgtkSortBuffer
+
+
+class TestUnreifyRdfStatements(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        with open(f'{self.temp_dir}/input.tsv', 'w') as f:
+            f.write("node1\tlabel\tnode2\n")
+            for i in range(40):
+                statement = f"S{i:02d}"
+                subject = f"Q{(i * 7) % 13}"
+                f.write(f"{statement}\trdf:type\trdf:Statement\n")
+                f.write(f"{statement}\trdf:subject\t{subject}\n")
+                f.write(f"{statement}\trdf:predicate\tP{i % 3}\n")
+                f.write(f"{statement}\trdf:object\tQ{i}\n")
+                f.write(f"{subject}\tlabel\t'n{i}'\n")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def unreify(self, output_name: str, *args):
+        cli_entry("kgtk", "unreify-rdf-statements",
+                  "-i", f'{self.temp_dir}/input.tsv',
+                  "-o", f'{self.temp_dir}/{output_name}', *args)
+        with open(f'{self.temp_dir}/{output_name}') as f:
+            return f.read()
+
+    def test_unreify_rdf_statements_spill_matches_memory(self):
+        in_memory = self.unreify("memory.tsv")
+        spilled = self.unreify("spilled.tsv", "--max-rows-in-memory", "17", "--temp-directory", self.temp_dir)
+        self.assertEqual(in_memory, spilled)
+
+        lines = in_memory.splitlines()
+        self.assertEqual(len(lines), 81)
+        self.assertIn("Q9\tP2\tQ5\tS05", lines)
+
+    def test_sort_buffer_keeps_input_order_within_groups(self):
+        ksb: KgtkSortBuffer = KgtkSortBuffer(node1_column_idx=0, label_column_idx=-1, node2_column_idx=-1, id_column_idx=1,
+                                             grouped=True, max_rows_in_memory=3, temp_directory=Path(self.temp_dir))
+        rows = [["b", "1"], ["a", "2"], ["b", "3"], ["a", "4"], ["c", "5"], ["b", "6"], ["a", "7"]]
+        for row in rows:
+            ksb.add(row)
+        self.assertEqual(list(ksb.groupiterate()),
+                         [[["a", "2"], ["a", "4"], ["a", "7"]],
+                          [["b", "1"], ["b", "3"], ["b", "6"]],
+                          [["c", "5"]]])
+        ksb.close()
+
+    def test_sort_buffer_merges_runs_in_passes(self):
+        ksb: KgtkSortBuffer = KgtkSortBuffer(node1_column_idx=0, label_column_idx=-1, node2_column_idx=-1, id_column_idx=1,
+                                             grouped=True, max_rows_in_memory=2, merge_fan_in=3,
+                                             temp_directory=Path(self.temp_dir))
+        rows = [[chr(ord("a") + (i * 5) % 4), str(i)] for i in range(21)]
+        for row in rows:
+            ksb.add(row)
+        self.assertEqual(len(ksb.run_paths), 10)
+
+        expected = sorted(rows, key=lambda row: row[0])
+        self.assertEqual(list(ksb.iterate()), expected)
+        self.assertLessEqual(len(ksb.run_paths), 2)
+        # The merged runs can be iterated again.
+        self.assertEqual(list(ksb.iterate()), expected)
+        ksb.close()
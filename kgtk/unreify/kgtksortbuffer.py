@@ -2,17 +2,25 @@
 Build a sorting buffer for KGTK rows.  The design is intended to support using
 an external sorter for large files.
 
+When a limit on the number of rows kept in memory is given, the buffer is
+written to disk as a sorted run each time it fills up, and iteration merges
+the runs.
+
 """
 from argparse import ArgumentParser, Namespace
 import attr
+import heapq
+from itertools import groupby
 from pathlib import Path
 import sys
+import tempfile
 import typing
 
 from kgtk.kgtkformat import KgtkFormat
 from kgtk.io.kgtkreader import KgtkReader, KgtkReaderMode, KgtkReaderOptions
 from kgtk.io.kgtkwriter import KgtkWriter
 from kgtk.utils.argparsehelpers import optional_bool
+from kgtk.utils.runmerge import DEFAULT_FAN_IN, reduce_runs
 from kgtk.value.kgtkvalueoptions import KgtkValueOptions
 
 @attr.s(slots=True, frozen=False)
@@ -24,6 +32,8 @@ class KgtkSortBuffer(KgtkFormat):
     DEFAULT_ERROR_FILE: typing.TextIO = sys.stderr
     DEFAULT_VERBOSE: bool = False
     DEFAULT_VERY_VERBOSE: bool = False
+    DEFAULT_MAX_ROWS_IN_MEMORY: typing.Optional[int] = None
+    DEFAULT_MERGE_FAN_IN: int = DEFAULT_FAN_IN
 
 
     node1_column_idx: int = attr.ib(validator=attr.validators.instance_of(int))
@@ -54,6 +64,20 @@ class KgtkSortBuffer(KgtkFormat):
 
     group_buf: typing.MutableMapping[str, typing.List[typing.List[str]]] = attr.ib(factory=dict)
 
+    # When set, write the buffered rows to disk as a sorted run each time
+    # this many rows have been buffered.
+    max_rows_in_memory: typing.Optional[int] = attr.ib(validator=attr.validators.optional(attr.validators.instance_of(int)),
+                                                       default=DEFAULT_MAX_ROWS_IN_MEMORY)
+    temp_directory: typing.Optional[Path] = attr.ib(validator=attr.validators.optional(attr.validators.instance_of(Path)), default=None)
+
+    # The most runs that are merged at once.  When there are more runs, they
+    # are merged in passes.
+    merge_fan_in: int = attr.ib(validator=attr.validators.instance_of(int), default=DEFAULT_MERGE_FAN_IN)
+
+    buffered_count: int = attr.ib(default=0)
+    run_paths: typing.List[Path] = attr.ib(factory=list)
+    tempdir: typing.Optional[tempfile.TemporaryDirectory] = attr.ib(default=None)
+
     @staticmethod
     def node1_keygen(buf: 'KgtkSortBuffer', row: typing.List[str])->str:
         if buf.node1_column_idx < 0:
@@ -113,6 +137,8 @@ class KgtkSortBuffer(KgtkFormat):
                         kr: KgtkReader,
                         keygen: 'KgtkSortBuffer.KEYGEN_TYPE'=DEFAULT_KEYGEN,
                         grouped: bool=DEFAULT_GROUPED,
+                        max_rows_in_memory: typing.Optional[int]=DEFAULT_MAX_ROWS_IN_MEMORY,
+                        temp_directory: typing.Optional[Path]=None,
     )->'KgtkSortBuffer':
         return cls(node1_column_idx=kr.node1_column_idx,
                    label_column_idx=kr.label_column_idx,
@@ -120,6 +146,8 @@ class KgtkSortBuffer(KgtkFormat):
                    id_column_idx=kr.id_column_idx,
                    keygen=keygen,
                    grouped=grouped,
+                   max_rows_in_memory=max_rows_in_memory,
+                   temp_directory=temp_directory,
                    error_file=kr.error_file,
                    verbose=kr.verbose,
                    very_verbose=kr.very_verbose)
@@ -129,8 +157,14 @@ class KgtkSortBuffer(KgtkFormat):
                 kr: KgtkReader,
                 keygen: 'KgtkSortBuffer.KEYGEN_TYPE'=DEFAULT_KEYGEN,
                 grouped: bool=DEFAULT_GROUPED,
+                max_rows_in_memory: typing.Optional[int]=DEFAULT_MAX_ROWS_IN_MEMORY,
+                temp_directory: typing.Optional[Path]=None,
     )->'KgtkSortBuffer':
-        ksb: KgtkSortBuffer = cls.new_from_reader(kr, keygen=keygen, grouped=grouped)
+        ksb: KgtkSortBuffer = cls.new_from_reader(kr,
+                                                  keygen=keygen,
+                                                  grouped=grouped,
+                                                  max_rows_in_memory=max_rows_in_memory,
+                                                  temp_directory=temp_directory)
         
         row: typing.List[str]
         for row in kr:
@@ -152,30 +186,110 @@ class KgtkSortBuffer(KgtkFormat):
             key = self.keygen(self, row) + " " + str(self.input_count).zfill(self.list_buf_zfill)
             self.list_buf[key] = row
 
-    # We can iterate many times, in sequence or in parallel, but we shouldn't
-    # alter the buffer when iterating over it.
-    def iterate(self)->typing.Generator[typing.List[str], None, None]:
+        self.buffered_count += 1
+        if self.max_rows_in_memory is not None and self.buffered_count >= self.max_rows_in_memory:
+            self.write_run()
+
+    def keyed_rows(self)->typing.Iterator[typing.Tuple[str, typing.List[str]]]:
+        """
+        Yield the buffered (key, row) pairs in sorted order.
+        """
         key: str
         row: typing.List[str]
         if self.grouped:
             for key in sorted(self.group_buf.keys()):
-                rows: typing.List[typing.List[str]] = self.group_buf[key]
-                for row in rows:
-                    yield row
+                for row in self.group_buf[key]:
+                    yield key, row
         else:
             for key in sorted(self.list_buf.keys()):
-                row = self.list_buf[key]
-                yield row
+                yield key, self.list_buf[key]
+
+    def write_run(self):
+        """
+        Write the buffered rows to disk as a sorted run and empty the buffer.
+        Each row is written as a key line followed by a row line.
+        """
+        if self.buffered_count == 0:
+            return
+        if self.tempdir is None:
+            self.tempdir = tempfile.TemporaryDirectory(prefix="kgtk-sortbuffer-",
+                                                       dir=str(self.temp_directory) if self.temp_directory is not None else None)
+        run_path: Path = Path(self.tempdir.name) / ("run%d.tsv" % len(self.run_paths))
+        if self.verbose:
+            print("KgtkSortBuffer: writing %d rows to %s" % (self.buffered_count, str(run_path)), file=self.error_file, flush=True)
+        self.write_keyed_rows(run_path, self.keyed_rows())
+        self.run_paths.append(run_path)
+        self.list_buf.clear()
+        self.group_buf.clear()
+        self.buffered_count = 0
+
+    @staticmethod
+    def write_keyed_rows(run_path: Path, keyed_rows: typing.Iterable[typing.Tuple[str, typing.List[str]]]):
+        with open(run_path, "w", encoding="utf-8", newline="\n") as f:
+            key: str
+            row: typing.List[str]
+            for key, row in keyed_rows:
+                f.write(key + "\n" + "\t".join(row) + "\n")
+
+    @staticmethod
+    def read_run(run_path: Path)->typing.Iterator[typing.Tuple[str, typing.List[str]]]:
+        with open(run_path, "r", encoding="utf-8", newline="\n") as f:
+            key: str
+            for key in f:
+                yield key[:-1], f.readline()[:-1].split("\t")
+
+    def merged_rows(self)->typing.Iterator[typing.Tuple[str, typing.List[str]]]:
+        """
+        Yield all (key, row) pairs in sorted order, merging the runs on disk
+        with the rows still in memory.  Rows with equal keys stay in input
+        order, since earlier runs come first in the merge.  When there are
+        more than merge_fan_in runs, they are first merged in passes.
+        """
+        if len(self.run_paths) == 0:
+            return self.keyed_rows()
+        # Leave room for the rows in memory in the final merge.
+        self.run_paths = reduce_runs(self.run_paths, self.read_run, self.write_keyed_rows,
+                                     fan_in=max(self.merge_fan_in - 1, 2),
+                                     key=lambda keyed_row: keyed_row[0])
+        runs: typing.List[typing.Iterator[typing.Tuple[str, typing.List[str]]]] = [ self.read_run(run_path) for run_path in self.run_paths ]
+        runs.append(self.keyed_rows())
+        return heapq.merge(*runs, key=lambda keyed_row: keyed_row[0])
+
+    # We can iterate many times, in sequence or in parallel, but we shouldn't
+    # alter the buffer when iterating over it.
+    def iterate(self)->typing.Generator[typing.List[str], None, None]:
+        row: typing.List[str]
+        for _, row in self.merged_rows():
+            yield row
 
     def groupiterate(self)->typing.Generator[typing.List[typing.List[str]], None, None]:
-        key: str
         if self.grouped:
-            for key in sorted(self.group_buf.keys()):
-                rows: typing.List[typing.List[str]] = self.group_buf[key]
-                yield rows
+            keyed_rows: typing.Iterator[typing.Tuple[str, typing.List[str]]]
+            for _, keyed_rows in groupby(self.merged_rows(), key=lambda keyed_row: keyed_row[0]):
+                yield [ row for _, row in keyed_rows ]
         else:
             raise ValueError("KgtkSortBuffer.groupiterate() called when not sorted by groups.")
 
+    def close(self):
+        """
+        Remove the sorted runs, if any.
+        """
+        if self.tempdir is not None:
+            self.tempdir.cleanup()
+            self.tempdir = None
+        self.run_paths = [ ]
+
+    @classmethod
+    def add_arguments(cls, parser: ArgumentParser):
+        parser.add_argument(      "--max-rows-in-memory", dest="max_rows_in_memory",
+                                  help="When set, sort and group the input in runs of at most this many rows, " +
+                                  "which are written to temporary files and merged. (default=%(default)s).",
+                                  type=int, default=cls.DEFAULT_MAX_ROWS_IN_MEMORY)
+
+        parser.add_argument(      "--temp-directory", dest="temp_directory",
+                                  help="The directory for the temporary run files. (default=the system temporary directory).",
+                                  type=Path, default=None)
+
 @attr.s(slots=True, frozen=False)
 class KgtkSortBufferTest(KgtkFormat):
     input_file_path: Path = attr.ib(validator=attr.validators.instance_of(Path))
@@ -185,6 +299,9 @@ class KgtkSortBufferTest(KgtkFormat):
     group_sort: bool = attr.ib(validator=attr.validators.instance_of(bool), default=KgtkSortBuffer.DEFAULT_GROUPED)
     group_iterate: bool = attr.ib(validator=attr.validators.instance_of(bool), default=KgtkSortBuffer.DEFAULT_GROUPED)
 
+    max_rows_in_memory: typing.Optional[int] = attr.ib(default=KgtkSortBuffer.DEFAULT_MAX_ROWS_IN_MEMORY)
+    temp_directory: typing.Optional[Path] = attr.ib(default=None)
+
     # TODO: find working validators
     # value_options: typing.Optional[KgtkValueOptions] = attr.ib(attr.validators.optional(attr.validators.instance_of(KgtkValueOptions)), default=None)
     reader_options: typing.Optional[KgtkReaderOptions]= attr.ib(default=None)
@@ -242,7 +359,11 @@ class KgtkSortBufferTest(KgtkFormat):
 
         if self.verbose:
             print("Create the sort buffer.", file=self.error_file, flush=True)
-        ksb: KgtkSortBuffer = KgtkSortBuffer.readall(kr, keygen=keygen, grouped=self.group_sort)
+        ksb: KgtkSortBuffer = KgtkSortBuffer.readall(kr,
+                                                     keygen=keygen,
+                                                     grouped=self.group_sort,
+                                                     max_rows_in_memory=self.max_rows_in_memory,
+                                                     temp_directory=self.temp_directory)
 
         if self.verbose:
             print("Processing the sorted records.", file=self.error_file, flush=True)
@@ -266,6 +387,7 @@ class KgtkSortBufferTest(KgtkFormat):
             print("Processed %d groups." % (input_group_count), file=self.error_file, flush=True)
         
         kw.close()
+        ksb.close()
 
             
 def main():
@@ -291,6 +413,7 @@ def main():
                               help="If true, us the grouped iteration. (default=%(default)s).",
                               type=optional_bool, nargs='?', const=True, default=False)
 
+    KgtkSortBuffer.add_arguments(parser)
     KgtkReader.add_debug_arguments(parser)
     KgtkReaderOptions.add_arguments(parser, mode_options=True, expert=True)
     KgtkValueOptions.add_arguments(parser)
@@ -310,6 +433,10 @@ def main():
         print("--keygen=%s" % str(args.keygen), file=error_file, flush=True)
         print("--group-sort=%s" % str(args.group_sort), file=error_file, flush=True)
         print("--group-iterate=%s" % str(args.group_iterate), file=error_file, flush=True)
+        if args.max_rows_in_memory is not None:
+            print("--max-rows-in-memory=%d" % args.max_rows_in_memory, file=error_file, flush=True)
+        if args.temp_directory is not None:
+            print("--temp-directory=%s" % str(args.temp_directory), file=error_file, flush=True)
 
         reader_options.show(out=error_file)
         value_options.show(out=error_file)
@@ -320,6 +447,8 @@ def main():
         keygen=args.keygen,
         group_sort=args.group_sort,
         group_iterate=args.group_iterate,
+        max_rows_in_memory=args.max_rows_in_memory,
+        temp_directory=args.temp_directory,
         reader_options=reader_options,
         value_options=value_options,
         error_file=error_file,
@@ -43,6 +43,9 @@ class KgtkUnreifyRdfStatements(KgtkFormat):
     allow_multiple_predicates: bool = attr.ib(validator=attr.validators.instance_of(bool), default=DEFAULT_ALLOW_MULTIPLE_PREDICATES)
     allow_multiple_objects: bool = attr.ib(validator=attr.validators.instance_of(bool), default=DEFAULT_ALLOW_MULTIPLE_OBJECTS)
 
+    max_rows_in_memory: typing.Optional[int] = attr.ib(default=KgtkSortBuffer.DEFAULT_MAX_ROWS_IN_MEMORY)
+    temp_directory: typing.Optional[Path] = attr.ib(default=None)
+
     # TODO: find working validators
     # value_options: typing.Optional[KgtkValueOptions] = attr.ib(attr.validators.optional(attr.validators.instance_of(KgtkValueOptions)), default=None)
     reader_options: typing.Optional[KgtkReaderOptions]= attr.ib(default=None)
@@ -152,7 +155,9 @@ class KgtkUnreifyRdfStatements(KgtkFormat):
 
         if self.verbose:
             print("Reading and grouping the input records.", file=self.error_file, flush=True)
-        ksb: KgtkSortBuffer = KgtkSortBuffer.readall(kr, grouped=True, keygen=KgtkSortBuffer.node1_keygen)
+        ksb: KgtkSortBuffer = KgtkSortBuffer.readall(kr, grouped=True, keygen=KgtkSortBuffer.node1_keygen,
+                                                     max_rows_in_memory=self.max_rows_in_memory,
+                                                     temp_directory=self.temp_directory)
 
         input_group_count: int = 0
         input_line_count: int = 0
@@ -252,6 +257,7 @@ class KgtkUnreifyRdfStatements(KgtkFormat):
             print("Wrote %d output records" % self.output_line_count, file=self.error_file, flush=True)
 
         
+        ksb.close()
         kw.close()
         if reifiedw is not None:
             reifiedw.close()
@@ -501,6 +507,7 @@ def main():
                               choices=KgtkWriter.OUTPUT_FORMAT_CHOICES)
 
     KgtkUnreifyRdfStatements.add_arguments(parser)
+    KgtkSortBuffer.add_arguments(parser)
     KgtkReader.add_debug_arguments(parser)
     KgtkReaderOptions.add_arguments(parser, mode_options=False, expert=True)
     KgtkValueOptions.add_arguments(parser)
@@ -536,6 +543,10 @@ def main():
         print("--allow-multiple-subjects=%s" % str(args.allow_multiple_subjects), file=error_file, flush=True)
         print("--allow-multiple-predicates=%s" % str(args.allow_multiple_predicates), file=error_file, flush=True)
         print("--allow-multiple-objects=%s" % str(args.allow_multiple_objects), file=error_file, flush=True)
+        if args.max_rows_in_memory is not None:
+            print("--max-rows-in-memory=%d" % args.max_rows_in_memory, file=error_file, flush=True)
+        if args.temp_directory is not None:
+            print("--temp-directory=%s" % str(args.temp_directory), file=error_file, flush=True)
 
         reader_options.show(out=error_file)
         value_options.show(out=error_file)
@@ -557,6 +568,9 @@ def main():
         allow_multiple_predicates=args.allow_multiple_predicates,
         allow_multiple_objects=args.allow_multiple_objects,
 
+        max_rows_in_memory=args.max_rows_in_memory,
+        temp_directory=args.temp_directory,
+
         reader_options=reader_options,
         value_options=value_options,
         output_format=args.output_format,
@@ -43,6 +43,9 @@ class KgtkUnreifyValues(KgtkFormat):
     allow_multiple_values: bool = attr.ib(validator=attr.validators.instance_of(bool), default=DEFAULT_ALLOW_MULTIPLE_VALUES)
     allow_extra_columns: bool = attr.ib(validator=attr.validators.instance_of(bool), default=DEFAULT_ALLOW_EXTRA_COLUMNS)
 
+    max_rows_in_memory: typing.Optional[int] = attr.ib(default=KgtkSortBuffer.DEFAULT_MAX_ROWS_IN_MEMORY)
+    temp_directory: typing.Optional[Path] = attr.ib(default=None)
+
     # TODO: find working validators
     # value_options: typing.Optional[KgtkValueOptions] = attr.ib(attr.validators.optional(attr.validators.instance_of(KgtkValueOptions)), default=None)
     reader_options: typing.Optional[KgtkReaderOptions]= attr.ib(default=None)
@@ -180,7 +183,9 @@ class KgtkUnreifyValues(KgtkFormat):
 
         if self.verbose:
             print("Reading and grouping the input records.", file=self.error_file, flush=True)
-        ksb: KgtkSortBuffer = KgtkSortBuffer.readall(kr, grouped=True, keygen=self.make_keygen(self.old_label_value))
+        ksb: KgtkSortBuffer = KgtkSortBuffer.readall(kr, grouped=True, keygen=self.make_keygen(self.old_label_value),
+                                                     max_rows_in_memory=self.max_rows_in_memory,
+                                                     temp_directory=self.temp_directory)
 
         input_group_count: int = 0
         input_line_count: int = 0
@@ -274,6 +279,7 @@ class KgtkUnreifyValues(KgtkFormat):
             print("Wrote %d output records" % self.output_line_count, file=self.error_file, flush=True)
 
         
+        ksb.close()
         kw.close()
         if reifiedw is not None:
             reifiedw.close()
@@ -464,6 +470,7 @@ def main():
                               choices=KgtkWriter.OUTPUT_FORMAT_CHOICES)
 
     KgtkUnreifyValues.add_arguments(parser)
+    KgtkSortBuffer.add_arguments(parser)
     KgtkReader.add_debug_arguments(parser)
     KgtkReaderOptions.add_arguments(parser, mode_options=False, expert=True)
     KgtkValueOptions.add_arguments(parser)
@@ -503,6 +510,10 @@ def main():
 
         print("--allow-multiple-values=%s" % str(args.allow_multiple_values), file=error_file, flush=True)
         print("--allow-extra-columns=%s" % str(args.allow_extra_columns), file=error_file, flush=True)
+        if args.max_rows_in_memory is not None:
+            print("--max-rows-in-memory=%d" % args.max_rows_in_memory, file=error_file, flush=True)
+        if args.temp_directory is not None:
+            print("--temp-directory=%s" % str(args.temp_directory), file=error_file, flush=True)
 
         reader_options.show(out=error_file)
         value_options.show(out=error_file)
@@ -523,6 +534,9 @@ def main():
         allow_multiple_values=args.allow_multiple_values,
         allow_extra_columns=args.allow_extra_columns,
 
+        max_rows_in_memory=args.max_rows_in_memory,
+        temp_directory=args.temp_directory,
+
         reader_options=reader_options,
         value_options=value_options,
         output_format=args.output_format,
@@ -131,6 +131,57 @@ def sendfile_cat(infiles: typing.List[str],
         print('Done with sendfile_cat. len=%d' % totallen, file=error_file, flush=True)
         print('Time taken : {}s'.format(time.time() - start_time), file=error_file, flush=True)
 
+def append_file_data(infile: str,
+                     ofd: int,
+                     offset: int = 0)->int:
+    """
+    Append the data in infile, starting at offset, to the open output file
+    descriptor.  The data is copied in the kernel with copy_file_range (when
+    both files are regular files) or sendfile, and with plain reads and writes
+    where neither is supported.  Return the number of bytes copied.
+    """
+    totallen: int = 0
+    ifd: int = os.open(infile, os.O_RDONLY)
+    try:
+        # This is chunk size is chosen to be less than the limit in
+        # the 32-bit system call.
+        count: int = 1024 * 1024 * 1024
+
+        copycount: int
+        copy_file_range: typing.Optional[typing.Callable[..., int]] = getattr(os, "copy_file_range", None)
+        if copy_file_range is not None:
+            try:
+                while True:
+                    copycount = copy_file_range(ifd, ofd, count, offset + totallen)
+                    if copycount == 0:
+                        return totallen
+                    totallen += copycount
+            except OSError:
+                pass # Not supported for these files, try sendfile.
+
+        if hasattr(os, "sendfile"):
+            try:
+                while True:
+                    copycount = os.sendfile(ofd, ifd, offset + totallen, count)
+                    if copycount == 0:
+                        return totallen
+                    totallen += copycount
+            except OSError:
+                pass # Not supported for these files, copy the data ourselves.
+
+        os.lseek(ifd, offset + totallen, os.SEEK_SET)
+        while True:
+            data: bytes = os.read(ifd, 1024 * 1024)
+            if len(data) == 0:
+                return totallen
+            view: memoryview = memoryview(data)
+            while len(view) > 0:
+                written: int = os.write(ofd, view)
+                view = view[written:]
+                totallen += written
+    finally:
+        os.close(ifd)
+
 def platform_cat(infiles: typing.List[str],
                  outfile: str,
                  remove: bool=False,
@@ -31,3 +31,18 @@ class ClosableIterTextIOWrapper(ClosableIter[str]):
 
     def close(self):
         self.s.close()
+
+
+class ClosableIterGenerator(ClosableIter[T]):
+    def __init__(self, g: typing.Generator[T, None, None]):
+        super().__init__()
+        self.g = g
+
+    def __iter__(self)->typing.Iterator[T]:
+        return self
+
+    def __next__(self)->T:
+        return self.g.__next__()
+
+    def close(self):
+        self.g.close()
@@ -0,0 +1,183 @@
+"""
+Split an uncompressed file into line-aligned byte ranges so that several
+processes can read it in parallel.
+
+A line belongs to the chunk in which it starts.  Each reader seeks to the
+start of its range, skips forward to the next line boundary (unless it is
+already at one), and reads lines until it passes the end of its range.
+
+The same line-boundary resync lets tail_offset() and iter_sample_lines()
+read the last lines of a file, or a random sample of its lines, without
+reading the whole file.
+"""
+
+from pathlib import Path
+import os
+import random
+import typing
+
+def can_split(file_path: typing.Optional[Path])->bool:
+    """
+    Return True if the file can be read in line-aligned byte ranges:  it must
+    be a regular, uncompressed file (not stdin or a file descriptor).
+    """
+    if file_path is None or str(file_path) == "-" or str(file_path).startswith("<"):
+        return False
+    if file_path.suffix in [".bz2", ".gz", ".lz4", ".xz"]:
+        return False
+    return file_path.is_file()
+
+def header_length(file_path: Path)->int:
+    """
+    Return the length in bytes of the first (header) line, including its end-of-line.
+    """
+    with open(file_path, "rb") as f:
+        return len(f.readline())
+
+def count_lines(file_path: Path, start_offset: int = 0)->int:
+    """
+    Return the number of lines in the file after start_offset, counting a
+    last line that does not end in a newline.
+    """
+    count: int = 0
+    last: bytes = b"\n"
+    with open(file_path, "rb") as f:
+        f.seek(start_offset)
+        while True:
+            data: bytes = f.read(1024 * 1024)
+            if len(data) == 0:
+                break
+            count += data.count(b"\n")
+            last = data[-1:]
+    return count if last == b"\n" else count + 1
+
+def chunk_ranges(file_path: Path,
+                 chunk_count: int,
+                 start_offset: int = 0,
+                 min_chunk_size: int = 1 << 20,
+)->typing.List[typing.Tuple[int, int]]:
+    """
+    Divide the file, starting at start_offset (normally the end of the header
+    line), into at most chunk_count ranges of roughly equal size.  The ranges
+    are not line-aligned; iter_range_lines() takes care of that.
+    """
+    file_size: int = os.path.getsize(file_path)
+    data_size: int = file_size - start_offset
+    if data_size <= 0:
+        return [ ]
+    chunk_count = max(1, min(chunk_count, data_size // min_chunk_size if min_chunk_size > 0 else chunk_count))
+    ranges: typing.List[typing.Tuple[int, int]] = [ ]
+    idx: int
+    for idx in range(chunk_count):
+        start: int = start_offset + (data_size * idx) // chunk_count
+        end: int = start_offset + (data_size * (idx + 1)) // chunk_count
+        ranges.append((start, end))
+    return ranges
+
+def iter_range_lines(file_path: Path,
+                     start: int,
+                     end: int,
+                     encoding: str = "utf-8",
+)->typing.Iterator[str]:
+    """
+    Yield the decoded lines (with their end-of-line characters) that start
+    within [start, end).  The caller must make sure that start is not inside
+    the header line.
+    """
+    with open(file_path, "rb") as f:
+        position: int = start
+        if start > 0:
+            # Are we already at a line boundary?
+            f.seek(start - 1)
+            if f.read(1) != b"\n":
+                position += len(f.readline())
+        else:
+            f.seek(0)
+
+        line: bytes
+        while position < end:
+            line = f.readline()
+            if len(line) == 0:
+                break
+            position += len(line)
+            yield line.decode(encoding)
+
+def tail_offset(file_path: Path,
+                line_count: int,
+                start_offset: int = 0,
+                block_size: int = 1 << 16,
+)->int:
+    """
+    Return the offset of the first of the last line_count lines of the file,
+    reading backwards from the end in blocks.  Lines that start before
+    start_offset (normally the end of the header line) are never included.
+    """
+    file_size: int = os.path.getsize(file_path)
+    if line_count <= 0 or file_size <= start_offset:
+        return file_size
+    with open(file_path, "rb") as f:
+        # A newline at the very end of the file terminates the last line, it
+        # does not start a new one.
+        f.seek(file_size - 1)
+        needed: int = line_count + (1 if f.read(1) == b"\n" else 0)
+
+        position: int = file_size
+        while position > start_offset:
+            block_start: int = max(start_offset, position - block_size)
+            f.seek(block_start)
+            block: bytes = f.read(position - block_start)
+            idx: int = len(block)
+            while True:
+                idx = block.rfind(b"\n", 0, idx)
+                if idx < 0:
+                    break
+                needed -= 1
+                if needed == 0:
+                    return block_start + idx + 1
+            position = block_start
+    return start_offset
+
+def iter_sample_lines(file_path: Path,
+                      every_nth: int,
+                      start_offset: int = 0,
+                      seed: typing.Optional[int] = None,
+                      probe_size: int = 1 << 20,
+                      encoding: str = "utf-8",
+)->typing.Iterator[str]:
+    """
+    Yield, in file order, roughly one line in every_nth of the lines that start
+    at or after start_offset.  The lines are found by seeking to random byte
+    offsets and skipping forward to the next line boundary, so the cost
+    depends upon the size of the sample rather than the size of the file.
+    The number of lines in the file is estimated from the average length of
+    the lines in the first probe_size bytes.
+    """
+    file_size: int = os.path.getsize(file_path)
+    data_size: int = file_size - start_offset
+    if data_size <= 0 or every_nth < 1:
+        return
+    with open(file_path, "rb") as f:
+        f.seek(start_offset)
+        probe: bytes = f.read(min(probe_size, data_size))
+        probe_lines: int = max(1, probe.count(b"\n"))
+        estimated_lines: int = max(1, (data_size * probe_lines) // len(probe))
+        sample_count: int = max(1, estimated_lines // every_nth)
+
+        rng: random.Random = random.Random(seed)
+        positions: typing.List[int] = sorted(start_offset + rng.randrange(data_size) for _ in range(sample_count))
+
+        last_line_start: int = -1
+        position: int
+        for position in positions:
+            # Resync to the start of the next line, unless already at one.
+            line_start: int = position
+            if position > start_offset:
+                f.seek(position - 1)
+                if f.read(1) != b"\n":
+                    line_start += len(f.readline())
+            if line_start <= last_line_start or line_start >= file_size:
+                continue
+            f.seek(line_start)
+            line: bytes = f.readline()
+            last_line_start = line_start
+            yield line.decode(encoding)
@@ -0,0 +1,333 @@
+"""
+A line-offset sidecar index for an uncompressed KGTK file.
+
+The index records the byte offset of every stride-th data line (the header
+line is not a data line), so that a reader can seek directly to a range of
+records instead of reading and discarding every line before them.  It is
+stored next to the file it indexes, with the suffix ".lidx", and it is
+rebuilt when the size or modification time of that file changes.
+
+For a file that is sorted on a key column (such as node1), the index can
+also record key boundaries:  for each block of stride lines, the first line
+in or after the block that starts a new key value.  partition() uses them to
+divide the file into row-aligned chunks that do not split a group of lines
+with the same key, so that parallel readers can each process whole groups.
+
+The index file starts with a fixed-size header and the name of the key
+column (padded to a multiple of 8 bytes), followed by the line offsets, the
+key boundary line numbers, and the key boundary offsets as little-endian
+unsigned 64-bit integers.  The arrays are memory-mapped when the index is
+loaded.
+"""
+
+from array import array
+import attr
+import bisect
+import mmap
+import os
+from pathlib import Path
+import struct
+import sys
+import typing
+
+@attr.s(slots=True, frozen=True)
+class LineIndex():
+    SUFFIX: str = ".lidx"
+    MAGIC: bytes = b"KGTKLIDX"
+    VERSION: int = 2
+
+    # An offset for every data line would make the index as large as a
+    # file of short lines (8 bytes per line).  Recording every 1024th line
+    # keeps the index to a few bytes per thousand lines, and a seek reads at
+    # most 1023 extra lines, which is cheap next to opening the file.
+    DEFAULT_STRIDE: int = 1024
+
+    # magic, version, stride, line count, file size, file mtime (ns), data start,
+    # key boundary count, key column name length
+    HEADER: struct.Struct = struct.Struct("<8sIIQQqQQQ")
+
+    # Record the offset of every stride-th data line.
+    stride: int = attr.ib(validator=attr.validators.instance_of(int))
+
+    # The number of data lines in the file.
+    line_count: int = attr.ib(validator=attr.validators.instance_of(int))
+
+    # The size and modification time of the file when it was indexed.
+    file_size: int = attr.ib(validator=attr.validators.instance_of(int))
+    file_mtime_ns: int = attr.ib(validator=attr.validators.instance_of(int))
+
+    # The offset of the first data line (the length of the header line, if any).
+    data_start: int = attr.ib(validator=attr.validators.instance_of(int))
+
+    offsets: typing.Sequence[int] = attr.ib()
+
+    # The optional key column and the line numbers and offsets of the key boundaries.
+    key_column: typing.Optional[str] = attr.ib(validator=attr.validators.optional(attr.validators.instance_of(str)), default=None)
+    key_lines: typing.Sequence[int] = attr.ib(factory=list)
+    key_offsets: typing.Sequence[int] = attr.ib(factory=list)
+
+    @classmethod
+    def index_path(cls, file_path: Path)->Path:
+        return Path(str(file_path) + cls.SUFFIX)
+
+    def is_current(self, file_path: Path)->bool:
+        """
+        Return True if the file has not changed since it was indexed.
+        """
+        st: os.stat_result = os.stat(file_path)
+        return st.st_size == self.file_size and st.st_mtime_ns == self.file_mtime_ns
+
+    @classmethod
+    def build(cls,
+              file_path: Path,
+              has_header: bool = True,
+              stride: int = DEFAULT_STRIDE,
+              key_column: typing.Optional[str] = None,
+              column_separator: str = "\t",
+    )->"LineIndex":
+        """
+        Read the file once and record the offset of every stride-th data line
+        and, optionally, the key boundaries of a file that is sorted on the key
+        column.  Raises ValueError if the file is not sorted on the key column.
+        """
+        if stride < 1:
+            raise ValueError("The line index stride must be at least 1.")
+        st: os.stat_result = os.stat(file_path)
+        offsets: array = array("Q")
+        key_lines: array = array("Q")
+        key_offsets: array = array("Q")
+        line_count: int = 0
+        data_start: int = 0
+        with open(file_path, "rb") as f:
+            separator: bytes = column_separator.encode("utf-8")
+            key_idx: int = -1
+            if has_header:
+                header: bytes = f.readline()
+                data_start = len(header)
+                if key_column is not None:
+                    column_names: typing.List[str] = header.decode("utf-8").rstrip("\r\n").split(column_separator)
+                    if key_column not in column_names:
+                        raise ValueError("Key column '%s' is not in the header of %s." % (key_column, str(file_path)))
+                    key_idx = column_names.index(key_column)
+            elif key_column is not None:
+                raise ValueError("A key column requires a header line.")
+
+            position: int = data_start
+            prev_key: typing.Optional[bytes] = None
+            ascending: typing.Optional[bool] = None
+            line: bytes
+            for line in f:
+                if line_count % stride == 0:
+                    offsets.append(position)
+                if key_idx >= 0:
+                    fields: typing.List[bytes] = line.rstrip(b"\r\n").split(separator, key_idx + 1)
+                    key: bytes = fields[key_idx] if key_idx < len(fields) else b""
+                    if key != prev_key:
+                        if prev_key is not None:
+                            if ascending is None:
+                                ascending = key > prev_key
+                            elif ascending != (key > prev_key):
+                                raise ValueError("%s is not sorted on column '%s' (data line %d)." % (str(file_path), key_column, line_count + 1))
+                        # Record the first key boundary in each block of stride lines.
+                        if len(key_lines) == 0 or key_lines[-1] // stride < line_count // stride:
+                            key_lines.append(line_count)
+                            key_offsets.append(position)
+                        prev_key = key
+                position += len(line)
+                line_count += 1
+
+        return cls(stride=stride,
+                   line_count=line_count,
+                   file_size=st.st_size,
+                   file_mtime_ns=st.st_mtime_ns,
+                   data_start=data_start,
+                   offsets=offsets,
+                   key_column=key_column,
+                   key_lines=key_lines,
+                   key_offsets=key_offsets)
+
+    def save(self, index_path: Path):
+        key_name: bytes = b"" if self.key_column is None else self.key_column.encode("utf-8")
+        with open(index_path, "wb") as f:
+            f.write(self.HEADER.pack(self.MAGIC,
+                                     self.VERSION,
+                                     self.stride,
+                                     self.line_count,
+                                     self.file_size,
+                                     self.file_mtime_ns,
+                                     self.data_start,
+                                     len(self.key_lines),
+                                     len(key_name) if self.key_column is not None else 0xffffffff))
+            f.write(key_name + bytes(-len(key_name) % 8))
+            values: typing.Sequence[int]
+            for values in (self.offsets, self.key_lines, self.key_offsets):
+                a: array = array("Q", values)
+                if sys.byteorder != "little":
+                    a.byteswap()
+                a.tofile(f)
+
+    @classmethod
+    def load(cls, index_path: Path)->typing.Optional["LineIndex"]:
+        """
+        Load an index file.  Returns None if the index file is missing or is
+        not a line index that we understand.
+        """
+        if not index_path.is_file():
+            return None
+        with open(index_path, "rb") as f:
+            header: bytes = f.read(cls.HEADER.size)
+            if len(header) < cls.HEADER.size:
+                return None
+            magic: bytes
+            version: int
+            stride: int
+            line_count: int
+            file_size: int
+            file_mtime_ns: int
+            data_start: int
+            key_count: int
+            key_name_length: int
+            (magic, version, stride, line_count, file_size, file_mtime_ns, data_start, key_count, key_name_length) = cls.HEADER.unpack(header)
+            if magic != cls.MAGIC or version != cls.VERSION or stride < 1:
+                return None
+
+            key_column: typing.Optional[str] = None
+            if key_name_length != 0xffffffff:
+                key_column = f.read(key_name_length).decode("utf-8")
+                f.read(-key_name_length % 8)
+            array_start: int = f.tell()
+
+            offset_count: int = (line_count + stride - 1) // stride
+            if os.fstat(f.fileno()).st_size != array_start + 8 * (offset_count + 2 * key_count):
+                return None
+
+            values: typing.Sequence[int]
+            if offset_count == 0:
+                values = array("Q")
+            elif sys.byteorder == "little":
+                # The memory map stays open as long as the arrays are in use.
+                mm: mmap.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                values = memoryview(mm)[array_start:].cast("Q")
+            else:
+                swapped: array = array("Q")
+                swapped.fromfile(f, offset_count + 2 * key_count)
+                swapped.byteswap()
+                values = swapped
+
+        return cls(stride=stride,
+                   line_count=line_count,
+                   file_size=file_size,
+                   file_mtime_ns=file_mtime_ns,
+                   data_start=data_start,
+                   offsets=values[:offset_count],
+                   key_column=key_column,
+                   key_lines=values[offset_count:offset_count + key_count],
+                   key_offsets=values[offset_count + key_count:])
+
+    @classmethod
+    def get(cls,
+            file_path: Path,
+            has_header: bool = True,
+            stride: typing.Optional[int] = None,
+            key_column: typing.Optional[str] = None,
+            error_file: typing.TextIO = sys.stderr,
+            verbose: bool = False,
+    )->"LineIndex":
+        """
+        Load the sidecar index for a file, building (and saving) it if it is
+        missing or stale, or if it does not have the requested stride (any
+        stride will do when stride is None) or key column.  Failing to save the
+        index is not an error: the index is still returned.
+        """
+        index_path: Path = cls.index_path(file_path)
+        index: typing.Optional[LineIndex] = cls.load(index_path)
+        if index is not None and \
+           (stride is None or index.stride == stride) and \
+           (key_column is None or index.key_column == key_column) and \
+           (index.data_start > 0) == has_header and \
+           index.is_current(file_path):
+            if verbose:
+                print("Using line index %s (%d lines)" % (str(index_path), index.line_count), file=error_file, flush=True)
+            return index
+
+        if verbose:
+            print("Building line index %s" % str(index_path), file=error_file, flush=True)
+        index = cls.build(file_path,
+                          has_header=has_header,
+                          stride=cls.DEFAULT_STRIDE if stride is None else stride,
+                          key_column=key_column)
+        try:
+            index.save(index_path)
+        except OSError as e:
+            if verbose:
+                print("Unable to save line index %s: %s" % (str(index_path), str(e)), file=error_file, flush=True)
+        if verbose:
+            print("Indexed %d lines" % index.line_count, file=error_file, flush=True)
+        return index
+
+    def iter_lines(self,
+                   file_path: Path,
+                   start: int,
+                   stop: typing.Optional[int] = None,
+                   step: int = 1,
+                   encoding: str = "utf-8",
+    )->typing.Iterator[str]:
+        """
+        Yield the decoded data lines start, start + step, ... up to (but not
+        including) stop.  When step > 1, each line is reached by seeking or by
+        reading on from the previous line, whichever reads fewer lines.  Data
+        lines are numbered from 0.
+        """
+        if stop is None or stop > self.line_count:
+            stop = self.line_count
+        if start >= stop:
+            return
+        with open(file_path, "rb") as f:
+            if step == 1:
+                self._seek(f, start)
+                idx: int
+                for idx in range(start, stop):
+                    yield f.readline().decode(encoding)
+            else:
+                next_idx: int = -1 # The number of the line at the file position, if known.
+                line_idx: int
+                for line_idx in range(start, stop, step):
+                    if next_idx < 0 or line_idx - next_idx > line_idx % self.stride:
+                        self._seek(f, line_idx)
+                    else:
+                        skip: int
+                        for skip in range(line_idx - next_idx):
+                            f.readline()
+                    yield f.readline().decode(encoding)
+                    next_idx = line_idx + 1
+
+    def _seek(self, f: typing.BinaryIO, line_idx: int):
+        f.seek(self.offsets[line_idx // self.stride])
+        skip: int
+        for skip in range(line_idx % self.stride):
+            f.readline()
+
+    def partition(self, partition: int, partition_count: int)->typing.Tuple[int, int]:
+        """
+        Return the byte range [start, end) of one of partition_count row-aligned
+        chunks of the data lines.  The chunks have roughly equal numbers of
+        lines, and start at indexed lines (at key boundaries if the index has a
+        key column), so some chunks may be empty.  Partitions are numbered from 0.
+        """
+        if partition_count < 1 or partition < 0 or partition >= partition_count:
+            raise ValueError("Partition %d is out of range for %d partitions." % (partition, partition_count))
+
+        def boundary(idx: int)->int:
+            # Return the offset at which partition idx starts.
+            if idx >= partition_count:
+                return self.file_size
+            if idx == 0:
+                return self.data_start
+            target: int = (self.line_count * idx) // partition_count
+            if self.key_column is not None:
+                pos: int = bisect.bisect_left(self.key_lines, target)
+                return self.key_offsets[pos] if pos < len(self.key_lines) else self.file_size
+            pos = (target + self.stride - 1) // self.stride
+            return self.offsets[pos] if pos < len(self.offsets) else self.file_size
+
+        return (boundary(partition), boundary(partition + 1))
@@ -0,0 +1,30 @@
+"""
+Run a function over a stream of tasks in a process pool and return the
+results in task order.
+
+multiprocessing.Pool.imap() starts a feeder thread that consumes its input
+iterable as fast as it can, so a large input (such as a file read from
+stdin) ends up in memory.  ordered_imap() keeps at most `backlog` tasks in
+flight at a time.
+"""
+
+from collections import deque
+import typing
+
+def ordered_imap(pool: typing.Any,
+                 func: typing.Callable[[typing.Any], typing.Any],
+                 tasks: typing.Iterable[typing.Any],
+                 backlog: int,
+)->typing.Iterator[typing.Any]:
+    """
+    Yield func(task) for each task, in the order of the tasks.  pool is a
+    multiprocessing.Pool (or anything with a compatible apply_async()).
+    """
+    pending: typing.Deque[typing.Any] = deque()
+    task: typing.Any
+    for task in tasks:
+        pending.append(pool.apply_async(func, (task,)))
+        if len(pending) >= max(1, backlog):
+            yield pending.popleft().get()
+    while len(pending) > 0:
+        yield pending.popleft().get()
@@ -0,0 +1,55 @@
+"""
+Merge sorted run files with a bounded number of open files.
+
+External sorts write their input to disk in sorted runs and merge the runs.
+Merging every run at once opens one file per run, which can exceed the
+process's file descriptor limit for large inputs.  reduce_runs() merges the
+runs in passes, at most fan_in runs at a time, until no more than fan_in
+runs remain for the caller's final merge.
+
+Each group of runs that is merged is a consecutive group, and heapq.merge()
+takes equal items from earlier inputs first, so equal items stay in the
+order of the runs.
+"""
+
+import heapq
+from pathlib import Path
+import typing
+
+DEFAULT_FAN_IN: int = 64
+
+T = typing.TypeVar("T")
+
+def reduce_runs(run_paths: typing.List[Path],
+                read_run: typing.Callable[[Path], typing.Iterator[T]],
+                write_run: typing.Callable[[Path, typing.Iterable[T]], None],
+                fan_in: int = DEFAULT_FAN_IN,
+                key: typing.Optional[typing.Callable[[T], typing.Any]] = None,
+)->typing.List[Path]:
+    """
+    Merge the sorted runs, at most fan_in at a time, until there are at most
+    fan_in runs.  The merged runs are written in the directory of the runs,
+    and the runs that were merged are removed.  Returns the remaining runs,
+    in order.
+    """
+    if fan_in < 2:
+        raise ValueError("The merge fan-in must be at least 2.")
+
+    pass_number: int = 0
+    while len(run_paths) > fan_in:
+        pass_number += 1
+        merged_paths: typing.List[Path] = [ ]
+        start: int
+        for start in range(0, len(run_paths), fan_in):
+            group: typing.List[Path] = run_paths[start:start + fan_in]
+            if len(group) == 1:
+                merged_paths.append(group[0])
+                continue
+            merged_path: Path = group[0].parent / ("merge%d_%d.tsv" % (pass_number, len(merged_paths)))
+            write_run(merged_path, heapq.merge(*[read_run(run_path) for run_path in group], key=key))
+            run_path: Path
+            for run_path in group:
+                run_path.unlink()
+            merged_paths.append(merged_path)
+        run_paths = merged_paths
+    return run_paths
@@ -0,0 +1,179 @@
+"""
+Approximate counting in bounded memory:  a Count-Min sketch with a list of
+heavy-hitter candidates for the top-k values, and a HyperLogLog estimate of
+the number of distinct values.
+
+Values are hashed with a 64-bit BLAKE2b digest so that sketches built
+in different processes can be merged.  The sketches are updated a batch of
+values at a time with numpy.
+"""
+
+import hashlib
+import typing
+
+import numpy as np
+
+def hash_values(values: typing.Sequence[str])->np.ndarray:
+    """
+    Return the 64-bit hashes of the values as a numpy uint64 array.
+    """
+    return np.fromiter((int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little")
+                        for value in values),
+                       dtype=np.uint64, count=len(values))
+
+class CountMinSketch:
+    """
+    A depth x width table of counters.  Each row uses its own multiply-shift
+    hash of the 64-bit value hash.  Estimates are never less than the true counts.
+    """
+    # Fixed odd multipliers, so that sketches built separately can be merged.
+    MULTIPLIERS: typing.List[int] = [ 0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93,
+                                      0xFF51AFD7ED558CCD, 0xC4CEB9FE1A85EC53, 0x94D049BB133111EB, 0xBF58476D1CE4E5B9 ]
+
+    def __init__(self, width: int = 1 << 20, depth: int = 4):
+        if depth < 1 or depth > len(self.MULTIPLIERS):
+            raise ValueError("The Count-Min depth must be between 1 and %d." % len(self.MULTIPLIERS))
+        if width < 1:
+            raise ValueError("The Count-Min width must be positive.")
+        self.width: int = width
+        self.depth: int = depth
+        self.table: np.ndarray = np.zeros((depth, width), dtype=np.int64)
+
+    def columns(self, hashes: np.ndarray)->np.ndarray:
+        """
+        Return the depth x len(hashes) array of table columns for the hashes.
+        """
+        result: np.ndarray = np.empty((self.depth, len(hashes)), dtype=np.int64)
+        row: int
+        with np.errstate(over="ignore"):
+            for row in range(self.depth):
+                mixed: np.ndarray = hashes * np.uint64(self.MULTIPLIERS[row])
+                result[row] = (mixed >> np.uint64(32)) % np.uint64(self.width)
+        return result
+
+    def add(self, hashes: np.ndarray):
+        cols: np.ndarray = self.columns(hashes)
+        row: int
+        for row in range(self.depth):
+            self.table[row] += np.bincount(cols[row], minlength=self.width)
+
+    def estimate(self, hashes: np.ndarray)->np.ndarray:
+        cols: np.ndarray = self.columns(hashes)
+        return np.min(self.table[np.arange(self.depth)[:, None], cols], axis=0)
+
+    def merge(self, other: "CountMinSketch"):
+        if self.width != other.width or self.depth != other.depth:
+            raise ValueError("Cannot merge Count-Min sketches of different sizes.")
+        self.table += other.table
+
+class HyperLogLog:
+    """
+    Estimate the number of distinct values with 2**precision registers.
+    The relative standard error is about 1.04 / sqrt(2**precision).
+    """
+    def __init__(self, precision: int = 14):
+        if precision < 4 or precision > 18:
+            raise ValueError("The HyperLogLog precision must be between 4 and 18.")
+        self.precision: int = precision
+        self.registers: np.ndarray = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, hashes: np.ndarray):
+        idx: np.ndarray = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        # The remaining bits, truncated to 53 bits so that they convert to
+        # float64 exactly.  frexp() then gives their bit length.
+        rest: np.ndarray = ((hashes << np.uint64(self.precision)) >> np.uint64(11)).astype(np.float64)
+        _, bit_length = np.frexp(rest)
+        rank: np.ndarray = (54 - bit_length).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+
+    def merge(self, other: "HyperLogLog"):
+        if self.precision != other.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precisions.")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self)->int:
+        m: int = len(self.registers)
+        alpha: float = 0.7213 / (1 + 1.079 / m)
+        estimate: float = alpha * m * m / float(np.sum(np.power(2.0, -self.registers.astype(np.float64))))
+        zeros: int = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros > 0:
+            # Small range correction (linear counting).
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+class ApproximateCounts:
+    """
+    Approximate value counts:  a Count-Min sketch, the heavy-hitter candidates
+    for the top_k values, and a HyperLogLog distinct count.  Counts of values
+    that are not heavy hitters are not kept.
+    """
+    def __init__(self, top_k: int = 1000, width: int = 1 << 20, depth: int = 4, precision: int = 14):
+        self.top_k: int = top_k
+        self.sketch: CountMinSketch = CountMinSketch(width=width, depth=depth)
+        self.distinct: HyperLogLog = HyperLogLog(precision=precision)
+        self.candidates: typing.Dict[str, int] = { }
+        self.total: int = 0
+
+    def add_batch(self, values: typing.Sequence[str]):
+        if len(values) == 0:
+            return
+        hashes: np.ndarray = hash_values(values)
+        self.sketch.add(hashes)
+        self.distinct.add(hashes)
+        self.total += len(values)
+
+        # Consider each value in the batch once.
+        unique_hashes: np.ndarray
+        first_idx: np.ndarray
+        unique_hashes, first_idx = np.unique(hashes, return_index=True)
+        estimates: np.ndarray = self.sketch.estimate(unique_hashes)
+        threshold: int = self.threshold()
+        idx: int
+        for idx in np.nonzero(estimates > threshold)[0]:
+            self.candidates[values[first_idx[idx]]] = int(estimates[idx])
+        self.prune()
+
+    def threshold(self)->int:
+        """
+        A value must have a larger estimate than this to become a candidate.
+        """
+        if len(self.candidates) < 2 * self.top_k:
+            return 0
+        return min(self.candidates.values())
+
+    def prune(self):
+        # Keep twice top_k candidates, so that values near the cutoff in one
+        # part of the input survive a merge, and allow some slack so that we
+        # do not prune after every batch.
+        if len(self.candidates) > 4 * self.top_k:
+            self.refresh()
+            kept: typing.List[typing.Tuple[str, int]] = sorted(self.candidates.items(), key=lambda item: (-item[1], item[0]))[:2 * self.top_k]
+            self.candidates = dict(kept)
+
+    def refresh(self):
+        """
+        Replace the candidates' estimates with estimates from the current sketch.
+        """
+        if len(self.candidates) == 0:
+            return
+        values: typing.List[str] = list(self.candidates.keys())
+        estimates: np.ndarray = self.sketch.estimate(hash_values(values))
+        self.candidates = { value: int(estimate) for value, estimate in zip(values, estimates) }
+
+    def merge(self, other: "ApproximateCounts"):
+        self.sketch.merge(other.sketch)
+        self.distinct.merge(other.distinct)
+        self.total += other.total
+        self.candidates.update(other.candidates)
+        self.refresh()
+        self.prune()
+
+    def top(self)->typing.List[typing.Tuple[str, int]]:
+        """
+        Return the top_k (value, estimated count) pairs, by descending count.
+        """
+        self.refresh()
+        return sorted(self.candidates.items(), key=lambda item: (-item[1], item[0]))[:self.top_k]
+
+    def distinct_count(self)->int:
+        return self.distinct.count()
@@ -32,7 +32,7 @@ if not lite_build:
 
 lite_excluded_modules = {
     'kgtk.cli': {'filter', 'export_gt', 'export_neo4j', 'connected-components', 'graph_statistics', 'gt_loader',
-                 'reachable_nodes', 'text_embedding'}
+                 'reachable_nodes', 'text_embedding', 'embedding_search'}
 }
 
 